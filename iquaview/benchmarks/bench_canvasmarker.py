@@ -0,0 +1,167 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+USAGE = """
+Paint throughput of CanvasMarker.
+
+Paints the vessel marker of the GPS, in svg and in symbol mode, onto an offscreen
+image with the previous implementation, which transformed the vessel size and
+rendered the svg on every paint, and with the cached one. Each case is measured
+with a fixed pose, as when the canvas is panned, and with the vessel turning one
+degree per paint, which is the worst case of the heading bucket.
+
+Usage:
+    python3 benchmarks/bench_canvasmarker.py [--paints 2000]
+"""
+
+import sys
+import os
+import math
+import time
+import argparse
+
+srcpath = os.path.dirname(os.path.realpath(__file__))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import Qt, QRectF, QLine, QPoint
+from PyQt5.QtGui import QImage, QPainter, QPolygonF, QPainterPath
+from qgis.core import QgsApplication, QgsPointXY, QgsRectangle
+from qgis.gui import QgsMapCanvas
+
+from iquaview.src import resources_rc
+from iquaview.src.config import Config
+from iquaview.src.utils.calcutils import endpoint, magnitude
+from iquaview.src.canvastracks.canvasmarker import CanvasMarker
+
+
+def legacy_paint(marker, painter):
+    """Previous CanvasMarker.paint."""
+    pos = marker.toCanvasCoordinates(marker.map_pos)
+    marker.setPos(pos)
+    changing_scale = 400
+    if marker.marker_mode:
+        mode = marker.config.csettings["canvas_marker_mode"]
+        if mode == 'auto':
+            transform = marker.canvas.getCoordinateTransform()
+            start_point = transform.toMapCoordinates(pos.x(), pos.y())
+            map_end_point_width = endpoint(start_point, marker.width, 90 + math.degrees(marker.heading))
+            map_end_point_length = endpoint(start_point, marker.length, math.degrees(marker.heading))
+            canvas_end_point_width = marker.toCanvasCoordinates(map_end_point_width)
+            canvas_end_point_length = marker.toCanvasCoordinates(map_end_point_length)
+            width = magnitude(marker.toCanvasCoordinates(start_point), QgsPointXY(canvas_end_point_width))
+            height = magnitude(marker.toCanvasCoordinates(start_point), QgsPointXY(canvas_end_point_length))
+            if width < 20 and height < 20:
+                changing_scale = marker.canvas.scale()
+            else:
+                changing_scale = marker.canvas.scale() * 2
+        elif mode == 'manual':
+            changing_scale = marker.config.csettings["canvas_marker_scale"]
+
+    if marker.svg is None or marker.canvas.scale() >= changing_scale:
+        size = 20
+        half_size = size / 2.0
+        rect = QRectF(0 - half_size, 0 - half_size, size, size)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setBrush(marker.pointbrush)
+        painter.setPen(marker.pointpen)
+        line = QLine(0, -half_size, 0, half_size)
+        line2 = QLine(-half_size, 0, half_size, 0)
+        p = QPolygonF()
+        p.append(QPoint(0 - half_size, 0))
+        p.append(QPoint(0, -size))
+        p.append(QPoint(half_size, 0))
+        p.append(QPoint(0, 0))
+        painter.save()
+        painter.rotate(math.degrees(marker.heading) + marker.canvas.rotation())
+        path = QPainterPath()
+        path.addPolygon(p)
+        painter.drawPath(path)
+        painter.restore()
+        painter.drawEllipse(rect)
+        painter.drawLine(line)
+        painter.drawLine(line2)
+    else:
+        rotation = marker.canvas.rotation()
+        painter.save()
+        transform = marker.canvas.getCoordinateTransform()
+        start_point = transform.toMapCoordinates(pos.x(), pos.y())
+        map_end_point_width = endpoint(start_point, marker.width, 90 + math.degrees(marker.heading))
+        map_end_point_length = endpoint(start_point, marker.length, math.degrees(marker.heading))
+        canvas_end_point_width = marker.toCanvasCoordinates(map_end_point_width)
+        canvas_end_point_length = marker.toCanvasCoordinates(map_end_point_length)
+        width = magnitude(marker.toCanvasCoordinates(start_point), QgsPointXY(canvas_end_point_width))
+        height = magnitude(marker.toCanvasCoordinates(start_point), QgsPointXY(canvas_end_point_length))
+        if width != 0 and height != 0:
+            center_x = width / 2.0
+            center_y = height / 2.0
+            myradians = math.radians(rotation + math.degrees(marker.heading))
+            xshift = int(((center_x * math.cos(myradians)) + (center_y * math.sin(myradians))) - center_x)
+            yshift = int(((-center_x * math.sin(myradians)) + (center_y * math.cos(myradians))) - center_y)
+            painter.translate(-width / 2, -height / 2)
+            painter.rotate(math.degrees(marker.heading) + marker.canvas.rotation())
+            marker.svg.render(painter, QRectF(xshift, yshift, width, height))
+        painter.restore()
+
+
+def measure(marker, paint, paints, turning):
+    image = QImage(400, 400, QImage.Format_ARGB32_Premultiplied)
+    painter = QPainter(image)
+    painter.translate(200, 200)
+    start = time.perf_counter()
+    for i in range(paints):
+        if turning:
+            marker.heading = math.radians(i % 360)
+        paint(painter)
+    elapsed = time.perf_counter() - start
+    painter.end()
+    return paints / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=USAGE, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--paints', type=int, default=2000, help='paints per case')
+    args = parser.parse_args()
+
+    app = QgsApplication([], True)
+    QgsApplication.initQgis()
+    config = Config()
+    config.load()
+    config.csettings = config.settings
+
+    canvas = QgsMapCanvas()
+    canvas.resize(800, 600)
+    marker = CanvasMarker(canvas, Qt.red, ":/resources/vessel.svg", 10.0, 30.0, marker_mode=True, config=config)
+    position = QgsPointXY(3.0, 41.0)
+    marker.set_center(position, 0.0)
+
+    for label, half_extent in (("svg", 0.0005), ("symbol", 0.05)):
+        canvas.setExtent(QgsRectangle(position.x() - half_extent, position.y() - half_extent,
+                                      position.x() + half_extent, position.y() + half_extent))
+        for turning in (False, True):
+            marker.invalidate_cache()
+            legacy = measure(marker, lambda painter: legacy_paint(marker, painter), args.paints, turning)
+            cached = measure(marker, lambda painter: marker.paint(painter, None, None), args.paints, turning)
+            print("  {:<7} {:<8} legacy {:>9.0f} paints/s  cached {:>9.0f} paints/s  x{:.1f}".format(
+                label, "turning" if turning else "fixed", legacy, cached, cached / legacy))
+
+    QgsApplication.exitQgis()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+USAGE = """
+Throughput and accuracy of the geodesic kernel in utils.geodesy.
+
+Measures the points per second of the previous scalar functions of utils.calcutils,
+called in a loop, and of the vectorized ones on random points around the vehicle
+operation area, for distances up to a few tens of kilometres. The vectorized
+results are compared with the scalar ones and, when QGIS is available, the Vincenty
+inverse distances and bearings are compared with QgsDistanceArea on WGS 84.
+
+Usage:
+    python3 benchmarks/bench_geodesy.py [--points 100000] [--qgis-points 2000]
+"""
+
+import sys
+import os
+import math
+import time
+import argparse
+
+import numpy as np
+
+srcpath = os.path.dirname(os.path.realpath(__file__))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+from iquaview.src.utils import geodesy
+
+
+def legacy_distance(start_lon, start_lat, end_lon, end_lat):
+    """Previous calcutils.distance."""
+    radius = 6378137
+    flattening = 1 / 298.257223563
+    start_lon = start_lon * math.pi / 180
+    start_lat = math.atan2((1 - flattening) * math.sin(start_lat * math.pi / 180), math.cos(start_lat * math.pi / 180))
+    end_lon = end_lon * math.pi / 180
+    end_lat = math.atan2((1 - flattening) * math.sin(end_lat * math.pi / 180), math.cos(end_lat * math.pi / 180))
+    arc_distance = (math.sin((end_lat - start_lat) / 2) ** 2) + \
+                   (math.cos(start_lat) * math.cos(end_lat) * (math.sin((end_lon - start_lon) / 2) ** 2))
+    return 2 * radius * math.atan2(math.sqrt(arc_distance), math.sqrt(1 - arc_distance))
+
+
+def legacy_bearing(start_lon, start_lat, end_lon, end_lat):
+    """Previous calcutils.bearing."""
+    start_lon = start_lon * math.pi / 180
+    start_lat = start_lat * math.pi / 180
+    end_lon = end_lon * math.pi / 180
+    end_lat = end_lat * math.pi / 180
+    return math.atan2(math.sin(end_lon - start_lon) * math.cos(end_lat),
+                      (math.cos(start_lat) * math.sin(end_lat))
+                      - (math.sin(start_lat) * math.cos(end_lat) * math.cos(end_lon - start_lon))) * 180 / math.pi
+
+
+def legacy_endpoint(start_lon, start_lat, dist, degrees_bearing):
+    """Previous calcutils.endpoint."""
+    radius = 6378137.0
+    start_lon = start_lon * math.pi / 180
+    start_lat = start_lat * math.pi / 180
+    bearing = degrees_bearing * math.pi / 180
+    end_lat = math.asin((math.sin(start_lat) * math.cos(dist / radius)) +
+                        (math.cos(start_lat) * math.sin(dist / radius) * math.cos(bearing)))
+    end_lon = start_lon + math.atan2(math.sin(bearing) * math.sin(dist / radius) * math.cos(start_lat),
+                                     math.cos(dist / radius) - (math.sin(start_lat) * math.sin(end_lat)))
+    return end_lon * 180 / math.pi, end_lat * 180 / math.pi
+
+
+def legacy_endpoint_ellipsoid(start_lon, start_lat, dist, degrees_bearing):
+    """Previous calcutils.endpoint_ellipsoid, with its Vincenty loop per point."""
+    start_lon = start_lon * math.pi / 180
+    start_lat = start_lat * math.pi / 180
+    bearing = degrees_bearing * math.pi / 180
+    d = dist
+    a = 6378137
+    f = 0.003352813
+    b = 6356752.3142
+    sin_angle1 = math.sin(bearing)
+    cos_angle1 = math.cos(bearing)
+    tan_U1 = (1-f) * math.tan(start_lat)
+    cos_U1 = 1 / math.sqrt((1+ tan_U1*tan_U1))
+    sin_U1 = tan_U1 * cos_U1
+    o1 = math.atan2(tan_U1, cos_angle1)
+    sin_angle = cos_U1 * sin_angle1
+    cosSq_angle = 1 - sin_angle*sin_angle
+    uSq = cosSq_angle * (a*a - b*b) / (b*b)
+    A = 1 + uSq / 16384 * (4096 + uSq * (-768 + uSq * (320 - 175 * uSq)))
+    B = uSq / 1024 * (256 + uSq * (-128 + uSq * (74 - 47 * uSq)))
+    r1 = d / (b*A)
+    r2 = 0.0
+    iteration = 0
+    while abs(r1 - r2 > 1e-12) and iteration < 100:
+        cos2roM = math.cos(2*o1 + r1)
+        sin_ro = math.sin(r1)
+        cos_ro = math.cos(r1)
+        dif_ro = B * sin_ro * (cos2roM + B/4 * (cos_ro * (-1 + 2*cos2roM*cos2roM) -
+                                                B/6 * cos2roM * (-3 +4*sin_ro*sin_ro) *
+                                                (-3 + 4*cos2roM*cos2roM)))
+        r2 = r1
+        r1 = d / (b*A) + dif_ro
+        iteration += 1
+    x = sin_U1*sin_ro - cos_U1*cos_ro*cos_angle1
+    lon = math.atan2(sin_ro*sin_angle1, cos_U1*cos_ro - sin_U1*sin_ro*cos_angle1)
+    C = f/16 * cosSq_angle*(4+f * (4 - 3*cosSq_angle))
+    L = lon - (1-C) * f * sin_angle * (r1 + C*sin_ro * (cos2roM+C*cos_ro * (-1 + 2*cos2roM*cos2roM)))
+    end_lon = (start_lon + L + 3*math.pi) % (2*math.pi) - math.pi
+    end_lat = math.atan2(sin_U1 * cos_ro + cos_U1 * sin_ro * cos_angle1, (1 - f) * math.sqrt(sin_angle * sin_angle + x * x))
+    return end_lon * 180 / math.pi, end_lat * 180 / math.pi
+
+
+def measure(function, count):
+    start = time.perf_counter()
+    result = function()
+    return result, count / (time.perf_counter() - start)
+
+
+def compare_qgis(lon1, lat1, lon2, lat2):
+    """Largest differences between geodesy.inverse and QgsDistanceArea, None without QGIS."""
+    try:
+        from qgis.core import (QgsApplication, QgsDistanceArea, QgsPointXY, QgsCoordinateReferenceSystem,
+                               QgsProject)
+    except ImportError:
+        return None
+    app = QgsApplication([], False)
+    QgsApplication.initQgis()
+    distance_area = QgsDistanceArea()
+    distance_area.setSourceCrs(QgsCoordinateReferenceSystem(4326), QgsProject.instance().transformContext())
+    distance_area.setEllipsoid('WGS84')
+    dist, initial, _, converged = geodesy.inverse(lon1, lat1, lon2, lat2)
+    distance_error = 0.0
+    bearing_error = 0.0
+    for i in range(len(lon1)):
+        start = QgsPointXY(lon1[i], lat1[i])
+        end = QgsPointXY(lon2[i], lat2[i])
+        distance_error = max(distance_error, abs(distance_area.measureLine(start, end) - dist[i]))
+        difference = (math.degrees(distance_area.bearing(start, end)) - initial[i] + 180) % 360 - 180
+        bearing_error = max(bearing_error, abs(difference))
+    QgsApplication.exitQgis()
+    return distance_error, bearing_error, converged.all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=USAGE, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--points', type=int, default=100000, help='points per case')
+    parser.add_argument('--qgis-points', type=int, default=2000, help='points compared with QgsDistanceArea')
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(0)
+    n = args.points
+    lon1 = rng.uniform(2.0, 4.0, n)
+    lat1 = rng.uniform(40.0, 42.0, n)
+    dist = rng.uniform(0.0, 50000.0, n)
+    angle = rng.uniform(-180.0, 180.0, n)
+    lon2, lat2 = geodesy.endpoint_ellipsoid(lon1, lat1, dist, angle)
+
+    cases = (
+        ("distance", lambda: [legacy_distance(*p) for p in zip(lon1, lat1, lon2, lat2)],
+         lambda: geodesy.distance(lon1, lat1, lon2, lat2)),
+        ("bearing", lambda: [legacy_bearing(*p) for p in zip(lon1, lat1, lon2, lat2)],
+         lambda: geodesy.bearing(lon1, lat1, lon2, lat2)),
+        ("endpoint", lambda: [legacy_endpoint(*p) for p in zip(lon1, lat1, dist, angle)],
+         lambda: geodesy.endpoint(lon1, lat1, dist, angle)),
+        ("endpoint_ellipsoid", lambda: [legacy_endpoint_ellipsoid(*p) for p in zip(lon1, lat1, dist, angle)],
+         lambda: geodesy.endpoint_ellipsoid(lon1, lat1, dist, angle)),
+    )
+    print("{} points".format(n))
+    for label, legacy, vectorized in cases:
+        legacy_result, legacy_rate = measure(legacy, n)
+        result, rate = measure(vectorized, n)
+        legacy_result = np.array(legacy_result)
+        if isinstance(result, tuple):
+            result = np.stack(result, axis=-1)
+        if label == "bearing":
+            difference = np.abs((result - legacy_result + 180) % 360 - 180)
+        else:
+            difference = np.abs(result - legacy_result)
+        print("  {:<19} legacy {:>10.0f} points/s  vectorized {:>11.0f} points/s  x{:<6.1f} max difference {:.3g}"
+              .format(label, legacy_rate, rate, rate / legacy_rate, difference.max()))
+
+    (inverse_dist, inverse_angle, _, converged), rate = measure(lambda: geodesy.inverse(lon1, lat1, lon2, lat2), n)
+    print("  {:<19} {:>52.0f} points/s  converged {}/{}".format("inverse", rate, np.count_nonzero(converged), n))
+    print("  round trip of endpoint_ellipsoid and inverse: distance {:.3g} m, bearing {:.3g} deg".format(
+        np.abs(inverse_dist - dist).max(), np.abs((inverse_angle - angle + 180) % 360 - 180).max()))
+
+    m = min(args.qgis_points, n)
+    errors = compare_qgis(lon1[:m], lat1[:m], lon2[:m], lat2[:m])
+    if errors is None:
+        print("  QGIS not available, comparison with QgsDistanceArea skipped")
+    else:
+        print("  QgsDistanceArea on {} points: distance {:.3g} m, bearing {:.3g} deg, converged {}".format(
+            m, *errors))
+
+
+if __name__ == '__main__':
+    main()
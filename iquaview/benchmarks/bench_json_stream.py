@@ -0,0 +1,139 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+USAGE = """
+Benchmark of the rosbridge stream framing.
+
+Replays a byte stream split at random points, as it would be returned by
+successive recv calls, and reports the messages decoded per second and the
+messages lost by the legacy one-recv-one-message parsing and by JsonStreamDecoder.
+
+Usage:
+    python3 benchmarks/bench_json_stream.py [capture_file ...]
+
+A capture file holds the raw bytes read from the rosbridge socket. When no file
+is given a synthetic stream of navigation and rosout messages is used.
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+
+srcpath = os.path.dirname(os.path.realpath(__file__))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+from iquaview.src.cola2api.json_stream import JsonStreamDecoder
+
+
+def synthetic_stream(n_messages, seed=0):
+    """Build a stream mixing small navigation messages and large rosout bursts."""
+    rng = random.Random(seed)
+    chunks = list()
+    for i in range(n_messages):
+        if rng.random() < 0.2:
+            msg = {"op": "publish", "topic": "/rosout_agg",
+                   "msg": {"header": {"seq": i, "stamp": {"secs": i, "nsecs": 0}, "frame_id": ""},
+                           "level": 2, "name": "/captain",
+                           "msg": "step {} reached ".format(i) * rng.randint(1, 400),
+                           "file": "captain.py", "function": "run", "line": 120,
+                           "topics": ["/rosout", "/captain/state"]}}
+        else:
+            msg = {"op": "publish", "topic": "/sparus2/navigator/navigation",
+                   "msg": {"header": {"seq": i, "stamp": {"secs": i, "nsecs": 0}, "frame_id": "world"},
+                           "global_position": {"latitude": 41.7778 + rng.random() * 1e-4,
+                                               "longitude": 3.0335 + rng.random() * 1e-4},
+                           "position": {"north": rng.random(), "east": rng.random(), "depth": rng.random()},
+                           "altitude": rng.random() * 10,
+                           "orientation": {"roll": 0.0, "pitch": 0.0, "yaw": rng.random()},
+                           "body_velocity": {"x": 0.5, "y": 0.0, "z": 0.0}}}
+        chunks.append(json.dumps(msg).encode())
+    return b''.join(chunks), n_messages
+
+
+def count_messages(stream):
+    """Count the messages in a stream by decoding it in one go."""
+    decoder = JsonStreamDecoder()
+    return len(decoder.feed(stream))
+
+
+def split_stream(stream, max_chunk, seed=0):
+    """Split a stream at random points."""
+    rng = random.Random(seed)
+    chunks = list()
+    pos = 0
+    while pos < len(stream):
+        end = pos + rng.randint(1, max_chunk)
+        chunks.append(stream[pos:end])
+        pos = end
+    return chunks
+
+
+def run_legacy(chunks):
+    """Legacy parsing: every recv is assumed to be exactly one message."""
+    decoded = 0
+    for chunk in chunks:
+        try:
+            json.loads(chunk.decode())
+            decoded += 1
+        except ValueError:
+            pass
+    return decoded
+
+
+def run_decoder(chunks):
+    """Incremental framing with JsonStreamDecoder."""
+    decoder = JsonStreamDecoder()
+    decoded = 0
+    for chunk in chunks:
+        decoded += len(decoder.feed(chunk))
+    return decoded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=USAGE, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('captures', nargs='*', help='raw rosbridge byte captures')
+    parser.add_argument('--messages', type=int, default=20000, help='messages in the synthetic stream')
+    parser.add_argument('--chunk', type=int, default=4096, help='maximum bytes per simulated recv')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.captures:
+        streams = list()
+        for capture in args.captures:
+            with open(capture, 'rb') as f:
+                stream = f.read()
+            streams.append((capture, stream, count_messages(stream)))
+    else:
+        stream, total = synthetic_stream(args.messages, args.seed)
+        streams = [("synthetic", stream, total)]
+
+    for name, stream, total in streams:
+        chunks = split_stream(stream, args.chunk, args.seed)
+        print("{}: {} messages, {:.1f} MB, {} recv chunks".format(name, total, len(stream) / 1e6, len(chunks)))
+        for label, function in (("legacy", run_legacy), ("decoder", run_decoder)):
+            start = time.perf_counter()
+            decoded = function(chunks)
+            elapsed = time.perf_counter() - start
+            print("  {:<8} {:>10.0f} msg/s {:>8.1f} MB/s  decoded {:>7}  lost {:>7}".format(
+                label, decoded / elapsed, len(stream) / elapsed / 1e6, decoded, total - decoded))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+USAGE = """
+Load and save time and peak memory of mission files.
+
+Generates missions of 1k, 10k and 100k section steps, some of them with actions, and
+loads and saves each one with the previous implementation, which parsed the whole file
+with ET.parse and walked it with find() calls and built the whole tree before writing
+it, and with the streaming one. Every case runs in its own process, so the peak RSS
+reported is the growth of that process over the generated mission it starts from.
+
+Usage:
+    python3 benchmarks/bench_mission_xml.py [--steps 1000 10000 100000]
+"""
+
+import sys
+import os
+import time
+import argparse
+import resource
+import subprocess
+import tempfile
+
+srcpath = os.path.dirname(os.path.realpath(__file__))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+from lxml import etree as ET
+
+from iquaview.src.cola2api.mission_types import (Mission,
+                                                 MissionStep,
+                                                 MissionPosition,
+                                                 MissionSection,
+                                                 MissionTolerance,
+                                                 MissionWaypoint,
+                                                 MissionPark,
+                                                 MissionAction,
+                                                 MissionConfiguration,
+                                                 Parameter,
+                                                 WAYPOINT_MANEUVER,
+                                                 SECTION_MANEUVER,
+                                                 PARK_MANEUVER)
+
+
+def legacy_load_position(xml_position):
+    latitude = xml_position.find('latitude').text
+    longitude = xml_position.find('longitude').text
+    z = xml_position.find('z').text
+    altitude_mode = xml_position.find('altitude_mode').text
+    return MissionPosition(latitude, longitude, z, altitude_mode != "False")
+
+
+def legacy_load_tolerance(xml_tolerance):
+    return MissionTolerance(xml_tolerance.find('x').text, xml_tolerance.find('y').text, xml_tolerance.find('z').text)
+
+
+def legacy_load_mission(mission, mission_file_name):
+    """Previous Mission.load_mission, with the find() calls of the previous MissionStep.load_* methods."""
+    tree = ET.parse(mission_file_name)
+    root = tree.getroot()
+    for mStep in root:
+        mission_step = MissionStep()
+        for child in mStep:
+            if child.tag == 'configuration':
+                mission_step.add_configuration(MissionConfiguration(child.find('key').text,
+                                                                    child.find('value').text))
+            elif child.tag == 'actions_list':
+                for action in child:
+                    parameters = action.find('parameters')
+                    params = list()
+                    if parameters is not None:
+                        for param in parameters:
+                            params.append(Parameter(param.text))
+                    mission_step.add_action(MissionAction(action.find('action_id').text, params))
+            elif child.tag == 'maneuver':
+                if child.get('type') == 'waypoint':
+                    mission_step.add_maneuver(MissionWaypoint(legacy_load_position(child.find('position')),
+                                                              child.find('speed').text,
+                                                              legacy_load_tolerance(child.find('tolerance'))))
+                if child.get('type') == 'section':
+                    mission_step.add_maneuver(MissionSection(legacy_load_position(child.find('initial_position')),
+                                                             legacy_load_position(child.find('final_position')),
+                                                             child.find('speed').text,
+                                                             legacy_load_tolerance(child.find('tolerance'))))
+                if child.get('type') == 'park':
+                    mission_step.add_maneuver(MissionPark(legacy_load_position(child.find('position')),
+                                                          child.find('speed').text,
+                                                          child.find('time').text,
+                                                          legacy_load_tolerance(child.find('tolerance'))))
+        mission.add_step(mission_step)
+
+
+def legacy_write_mission(mission, mission_file_name):
+    """Previous Mission.write_mission, building the whole tree before writing it."""
+    xml_mission = ET.Element('mission')
+    for step_id in range(mission.get_length()):
+        mission_step = mission.get_step(step_id)
+        xml_mission_step = ET.SubElement(xml_mission, 'mission_step')
+
+        if mission_step.maneuver.maneuver_type == WAYPOINT_MANEUVER:
+            mission.write_waypoint_maneuver(xml_mission_step, mission_step.maneuver)
+        elif mission_step.maneuver.maneuver_type == SECTION_MANEUVER:
+            mission.write_section_maneuver(xml_mission_step, mission_step.maneuver)
+        elif mission_step.maneuver.maneuver_type == PARK_MANEUVER:
+            mission.write_park_maneuver(xml_mission_step, mission_step.maneuver)
+
+        if mission_step.has_actions():
+            xml_actions = ET.SubElement(xml_mission_step, 'actions_list')
+            for action in mission_step.actions:
+                mission.write_action(xml_actions, action)
+
+    tree = ET.ElementTree(xml_mission)
+    tree.write(mission_file_name, pretty_print=True)
+
+
+def generate_mission(steps):
+    """Lawn mower like mission, every tenth step records sonar data."""
+    mission = Mission()
+    tolerance = MissionTolerance(2.0, 2.0, 1.0)
+    previous = MissionPosition(41.777, 3.030, 5.0, False)
+    for i in range(steps):
+        position = MissionPosition(41.777 + (i // 2) * 1e-4, 3.030 + (i % 2) * 1e-2, 5.0, False)
+        step = MissionStep()
+        if i == 0:
+            step.add_maneuver(MissionWaypoint(position, 0.5, tolerance))
+        else:
+            step.add_maneuver(MissionSection(previous, position, 0.5, tolerance))
+        if i % 10 == 0:
+            step.add_action(MissionAction("sonar/enable_logging", [Parameter("true"), Parameter("{}".format(i))]))
+        mission.add_step(step)
+        previous = position
+    return mission
+
+
+def peak_rss():
+    """Return the peak resident set size of this process in bytes."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_case(operation, implementation, steps, file_name):
+    """Run one case in this process and print its time and memory growth."""
+    if operation == 'save':
+        mission = generate_mission(steps)
+        write = legacy_write_mission if implementation == 'legacy' else Mission.write_mission
+        baseline = peak_rss()
+        start = time.perf_counter()
+        write(mission, file_name)
+    else:
+        mission = Mission()
+        load = legacy_load_mission if implementation == 'legacy' else Mission.load_mission
+        baseline = peak_rss()
+        start = time.perf_counter()
+        load(mission, file_name)
+        assert mission.get_length() == steps
+    elapsed = time.perf_counter() - start
+    print("{} {}".format(elapsed, peak_rss() - baseline))
+
+
+def measure(operation, implementation, steps, file_name):
+    output = subprocess.check_output([sys.executable, os.path.realpath(__file__), '--case', operation,
+                                      implementation, str(steps), file_name])
+    elapsed, growth = output.split()
+    return float(elapsed), int(growth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=USAGE, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--steps', type=int, nargs='+', default=[1000, 10000, 100000], help='mission sizes')
+    parser.add_argument('--case', nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        operation, implementation, steps, file_name = args.case
+        run_case(operation, implementation, int(steps), file_name)
+        return
+
+    directory = tempfile.mkdtemp()
+    for steps in args.steps:
+        file_name = os.path.join(directory, 'mission_{}.xml'.format(steps))
+        print("{} steps".format(steps))
+        for operation in ('save', 'load'):
+            results = dict()
+            for implementation in ('legacy', 'streaming'):
+                results[implementation] = measure(operation, implementation, steps, file_name)
+                print("  {} {:<9} {:>8.3f} s  peak RSS +{:>7.1f} MB".format(
+                    operation, implementation, results[implementation][0], results[implementation][1] / 1e6))
+        os.remove(file_name)
+    os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+
+USAGE = """
+Throughput of the NMEA parser of the GPS driver.
+
+Generates a stream with 10 Hz GNSS (GGA, RMC, VTG and GST) and 20 Hz heading (HDT)
+on one port, cuts it in chunks of random size as recv would return them and
+parses it with the previous line splitting of GpsDriver and with NmeaParser.
+Reports the sentences per second parsed and the sentences lost at chunk boundaries.
+
+Usage:
+    python3 benchmarks/bench_nmea.py [--seconds 3600] [--max-chunk 1000]
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+
+srcpath = os.path.dirname(os.path.realpath(__file__))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+from iquaview.src.cola2api.nmea import NmeaParser, nmea_checksum
+
+
+def sentence(body):
+    return "${}*{:02X}\r\n".format(body, nmea_checksum(body.encode())).encode()
+
+
+def generate_stream(seconds):
+    """Return the stream and the number of GNSS and heading sentences in it."""
+    sentences = list()
+    for step in range(int(seconds * 20)):
+        t = step / 20.0
+        utc = time.strftime("%H%M%S", time.gmtime(t)) + ".{:02d}".format(int(t * 100) % 100)
+        lat = "{:09.4f}".format(4146.6680 + 0.001 * step)
+        lon = "{:010.4f}".format(301.9940 + 0.001 * step)
+        if step % 2 == 0:
+            sentences.append(sentence("GPGGA,{},{},N,{},E,4,12,0.8,2.1,M,50.7,M,1.0,0000".format(utc, lat, lon)))
+            sentences.append(sentence("GPRMC,{},A,{},N,{},E,1.2,87.5,181026,,,D".format(utc, lat, lon)))
+            sentences.append(sentence("GPVTG,87.5,T,86.0,M,1.2,N,2.2,K,D"))
+            sentences.append(sentence("GPGST,{},0.6,0.4,0.3,45.0,0.02,0.03,0.05".format(utc)))
+        sentences.append(sentence("HEHDT,{:.2f},T".format((step * 0.5) % 360)))
+    gnss = int(seconds * 10) * 4
+    return b''.join(sentences), gnss, int(seconds * 20)
+
+
+def split_stream(stream, max_chunk, seed=1):
+    rng = random.Random(seed)
+    chunks = list()
+    pos = 0
+    while pos < len(stream):
+        size = rng.randint(1, max_chunk)
+        chunks.append(stream[pos:pos + size])
+        pos += size
+    return chunks
+
+
+def legacy_parse(chunks):
+    """Previous GpsDriver parsing: every chunk decoded and split on its own, every line parsed as GGA and HDT."""
+    parsed = 0
+    for chunk in chunks:
+        try:
+            lines = chunk.decode().split('\r\n')
+        except UnicodeDecodeError:
+            continue
+        for line in lines:
+            if line.startswith('GGA', 3):
+                field = line.split(',')
+                try:
+                    if len(field) > 9:
+                        float(field[2])
+                        float(field[4])
+                        int(field[6])
+                        float(field[9])
+                        parsed += 1
+                except ValueError:
+                    pass
+            if line.startswith('HDT', 3):
+                field = line.split(',')
+                try:
+                    if len(field) > 1 and len(field[1]) > 1:
+                        float(field[1])
+                        parsed += 1
+                except ValueError:
+                    pass
+    return parsed
+
+
+def nmea_parse(chunks):
+    parser = NmeaParser()
+    parsed = 0
+    for chunk in chunks:
+        parsed += len(parser.feed(chunk))
+    return parsed, parser.get_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=USAGE, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=3600, help='seconds of GPS data')
+    parser.add_argument('--max-chunk', type=int, default=1000, help='maximum bytes per read')
+    args = parser.parse_args()
+
+    stream, gnss, heading = generate_stream(args.seconds)
+    chunks = split_stream(stream, args.max_chunk)
+    total = gnss + heading
+    print("{:.0f} s of data, {} sentences, {} bytes in {} reads".format(args.seconds, total, len(stream),
+                                                                          len(chunks)))
+
+    start = time.perf_counter()
+    parsed = legacy_parse(chunks)
+    elapsed = time.perf_counter() - start
+    expected = gnss // 4 + heading
+    print("  legacy  GGA+HDT only {:>9.0f} sentences/s  parsed {} of {}  lost {}".format(
+        parsed / elapsed, parsed, expected, expected - parsed))
+
+    start = time.perf_counter()
+    parsed, stats = nmea_parse(chunks)
+    elapsed = time.perf_counter() - start
+    print("  nmea    all types    {:>9.0f} sentences/s  parsed {} of {}  lost {}  {}".format(
+        parsed / elapsed, parsed, total, total - parsed, stats))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+USAGE = """
+Load test of the vehicle data pipeline driven by recorded telemetry.
+
+Replays a recording through VehicleData at increasing speeds and reports the
+messages per second dispatched, the GUI refreshes per second and the latency
+from the reception of a message to its topic_updated notification. A speed is
+flagged as falling behind when the replay cannot keep the recorded timing or the
+GUI notification latency exceeds the threshold.
+
+Usage:
+    python3 benchmarks/bench_replay.py [recording] [--speeds 1 10 100 0]
+
+recording is a telemetry session folder, a .tlog file or a JSON-lines capture of
+rosbridge traffic. When not given, a synthetic dive is generated. Speed 0 plays
+as fast as possible.
+"""
+
+import sys
+import os
+import json
+import time
+import math
+import argparse
+import tempfile
+
+srcpath = os.path.dirname(os.path.realpath(__file__))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+
+from iquaview.src.config import Config
+from iquaview.src.vehicle.vehicledata import VehicleData
+from iquaview.src.vehicle.vehicleinfo import VehicleInfo
+from iquaview.src.vehicle.logwidget import LogWidget
+from iquaview.src.vehicle.telemetryreplay import TelemetryReplay
+
+
+def synthetic_dive(file_name, vehicle_data, namespace, duration, nav_rate):
+    """Write a JSON-lines capture with navigation at nav_rate Hz and the other topics at 1 Hz."""
+    steps = int(duration * nav_rate)
+    with open(file_name, 'w') as f:
+        for i in range(steps):
+            stamp = i / nav_rate
+            lines = [{"op": "publish", "topic": namespace + vehicle_data.topic_names['navigation status'],
+                      "stamp": stamp,
+                      "msg": {"global_position": {"latitude": 41.7778 + 1e-5 * math.sin(stamp / 60),
+                                                  "longitude": 3.0335 + 1e-5 * math.cos(stamp / 60)},
+                              "position": {"north": stamp, "east": 0.0, "depth": 5.0},
+                              "altitude": 10.0,
+                              "orientation": {"roll": 0.0, "pitch": 0.0, "yaw": stamp / 60},
+                              "body_velocity": {"x": 0.5, "y": 0.0, "z": 0.0}}},
+                     {"op": "publish", "topic": "/rosout_agg", "stamp": stamp,
+                      "msg": {"header": {"stamp": {"secs": int(stamp), "nsecs": 0}},
+                              "level": 2, "name": "/captain", "msg": "step {}".format(i)}}]
+            if i % nav_rate == 0:
+                for key, topic in vehicle_data.topic_names.items():
+                    if key not in ('navigation status', 'rosout'):
+                        lines.append({"op": "publish", "topic": namespace + topic, "stamp": stamp,
+                                      "msg": {"data": stamp, "total_time": stamp}})
+            for line in lines:
+                f.write(json.dumps(line) + '\n')
+
+
+def run(app, vehicle_data, log_widget, recording, speed, wall_time, threshold):
+    """Replay a recording at a speed for wall_time seconds and measure the pipeline."""
+    latencies = list()
+    refreshes = [0]
+
+    def topic_updated(key):
+        subscription = vehicle_data.topics.get(key)
+        if subscription is not None:
+            latencies.append(time.time() - subscription.last_received)
+        refreshes[0] += 1
+
+    replay = TelemetryReplay(recording, speed)
+    vehicle_data.subscribe_topics(replay)
+    vehicle_data.topic_updated.connect(topic_updated)
+    log_widget.connect()
+    replay.start()
+    max_lag = 0.0
+    start = time.time()
+    while time.time() - start < wall_time and not replay.get_stats()['finished']:
+        app.processEvents()
+        max_lag = max(max_lag, replay.get_stats()['lag'])
+        time.sleep(0.001)
+    elapsed = time.time() - start
+    dispatched = replay.get_stats()['dispatched']
+    log_widget.disconnect()
+    vehicle_data.topic_updated.disconnect(topic_updated)
+    vehicle_data.disconnect()
+
+    latencies.sort()
+    mean_latency = sum(latencies) / len(latencies) if latencies else 0.0
+    max_latency = latencies[-1] if latencies else 0.0
+    behind = (speed > 0 and max_lag > 0.1) or max_latency > threshold
+    print("  speed {:>6}  {:>9.0f} msg/s  {:>6.0f} refresh/s  latency mean {:>6.1f} ms max {:>7.1f} ms  "
+          "lag {:>6.2f} s  {}".format(speed if speed > 0 else "max", dispatched / elapsed, refreshes[0] / elapsed,
+                                      mean_latency * 1000, max_latency * 1000, max_lag,
+                                      "FALLING BEHIND" if behind else "ok"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=USAGE, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('recording', nargs='?', help='telemetry session folder, .tlog file or JSON-lines capture')
+    parser.add_argument('--speeds', type=float, nargs='+', default=[1, 10, 100, 0])
+    parser.add_argument('--duration', type=float, default=600, help='seconds of the synthetic dive')
+    parser.add_argument('--nav-rate', type=int, default=10, help='navigation rate of the synthetic dive')
+    parser.add_argument('--wall-time', type=float, default=5, help='seconds to replay each speed')
+    parser.add_argument('--threshold', type=float, default=0.1, help='GUI latency in seconds considered behind')
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    config = Config()
+    config.load()
+    config.csettings = config.settings
+    config.csettings['telemetry_recording'] = False
+    vehicle_info = VehicleInfo(config)
+    vehicle_data = VehicleData(config, vehicle_info)
+    log_widget = LogWidget(vehicle_data)
+
+    recording = args.recording
+    if recording is None:
+        recording = os.path.join(tempfile.mkdtemp(), 'synthetic_dive.jsonl')
+        synthetic_dive(recording, vehicle_data, vehicle_info.get_vehicle_namespace(), args.duration, args.nav_rate)
+    print("{}".format(recording))
+
+    for speed in args.speeds:
+        run(app, vehicle_data, log_widget, recording, speed, args.wall_time, args.threshold)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+
+USAGE = """
+End-to-end benchmark of the rosbridge clients against the local simulator.
+
+Starts the rosbridge simulator in a separate process publishing the topics of the
+current AUV config, drives VehicleData with each client implementation and
+reports the latency from the publish time stamped in the navigation header to the
+data being available in VehicleData.current_data, and the client CPU time spent
+per received message.
+
+Client implementations:
+    shared      all topics multiplexed on a single RosbridgeConnection
+    per-topic   one RosbridgeConnection (socket) per topic
+
+Usage:
+    python3 benchmarks/bench_rosbridge.py [--nav-rate 50] [--duration 10] [--latency 0] [--split 0]
+"""
+
+import sys
+import os
+import time
+import socket
+import argparse
+import subprocess
+
+srcpath = os.path.dirname(os.path.realpath(__file__))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+
+from iquaview.src.config import Config
+from iquaview.src.cola2api.cola2_interface import RosbridgeConnection
+from iquaview.src.vehicle.vehicledata import VehicleData
+from iquaview.src.vehicle.vehicleinfo import VehicleInfo
+
+
+class PerTopicConnections(object):
+    """Connection-like object opening a separate rosbridge connection for every subscription."""
+
+    def __init__(self, ip, port):
+        self.ip = ip
+        self.port = port
+        self.connections = list()
+
+    def subscribe(self, topic, *args, **kwargs):
+        connection = RosbridgeConnection(self.ip, self.port)
+        self.connections.append(connection)
+        return connection.subscribe(topic, *args, **kwargs)
+
+    def unsubscribe(self, subscription):
+        subscription.connection.unsubscribe(subscription)
+
+    def set_message_listener(self, listener):
+        pass
+
+    def close(self):
+        for connection in self.connections:
+            connection.close()
+
+
+def free_port():
+    s = socket.socket()
+    s.bind(('127.0.0.1', 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+def start_simulator(config_file, port, args):
+    command = [sys.executable, '-m', 'iquaview.src.cola2api.rosbridgesimulator', config_file, '--port', str(port),
+               '--rate', 'navigation status={}'.format(args.nav_rate), '--rate', 'rosout={}'.format(args.rosout_rate),
+               '--default-rate', str(args.default_rate), '--latency', str(args.latency), '--split', str(args.split)]
+    process = subprocess.Popen(command, cwd=iquaview_root_path, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Rosbridge simulator did not start")
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run(app, vehicle_data, name, connection, duration):
+    """Drive VehicleData from a connection for duration seconds and measure it."""
+    latencies = list()
+    received = [0]
+
+    def topic_updated(key):
+        if key == 'navigation status':
+            header_stamp = vehicle_data.current_data[key]['header']['stamp']
+            latencies.append(time.time() - (header_stamp['secs'] + header_stamp['nsecs'] * 1e-9))
+
+    def count(topic, msg, stamp):
+        received[0] += 1
+
+    vehicle_data.topic_updated.connect(topic_updated)
+    vehicle_data.subscribe_topics(connection)
+    if isinstance(connection, RosbridgeConnection):
+        connection.set_message_listener(count)
+    else:
+        for c in connection.connections:
+            c.set_message_listener(count)
+    # let the connections settle before measuring
+    QTimer.singleShot(1000, app.quit)
+    app.exec_()
+    del latencies[:]
+    received[0] = 0
+    cpu_start = time.process_time()
+    QTimer.singleShot(int(duration * 1000), app.quit)
+    app.exec_()
+    cpu = time.process_time() - cpu_start
+    messages = received[0]
+    vehicle_data.topic_updated.disconnect(topic_updated)
+    vehicle_data.disconnect()
+
+    latencies.sort()
+    mean = sum(latencies) / len(latencies) if latencies else 0.0
+    print("  {:<10} {:>7.0f} msg/s  latency mean {:>6.2f} ms p50 {:>6.2f} ms p99 {:>7.2f} ms  "
+          "cpu {:>6.1f} us/msg".format(name, messages / duration, mean * 1000, percentile(latencies, 0.5) * 1000,
+                                       percentile(latencies, 0.99) * 1000,
+                                       cpu / messages * 1e6 if messages else 0.0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=USAGE, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nav-rate', type=float, default=50, help='navigation rate in Hz')
+    parser.add_argument('--rosout-rate', type=float, default=20, help='rosout rate in Hz')
+    parser.add_argument('--default-rate', type=float, default=10, help='rate in Hz of the other topics')
+    parser.add_argument('--duration', type=float, default=10, help='seconds measured per client')
+    parser.add_argument('--latency', type=float, default=0.0, help='latency injected by the simulator')
+    parser.add_argument('--split', type=int, default=0, help='maximum bytes per write of the simulator')
+    parser.add_argument('--clients', nargs='+', default=['shared', 'per-topic'])
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    config = Config()
+    config.load()
+    config.csettings = config.settings
+    config.csettings['telemetry_recording'] = False
+    vehicle_info = VehicleInfo(config)
+    vehicle_data = VehicleData(config, vehicle_info)
+    config_file = config.csettings['configs_path'] + '/' + config.csettings['last_auv_config_xml']
+
+    port = free_port()
+    simulator = start_simulator(config_file, port, args)
+    print("{} nav {} Hz, latency {} s, split {} bytes".format(config_file, args.nav_rate, args.latency, args.split))
+    try:
+        for name in args.clients:
+            if name == 'shared':
+                connection = RosbridgeConnection('127.0.0.1', port)
+            else:
+                connection = PerTopicConnections('127.0.0.1', port)
+            run(app, vehicle_data, name, connection, args.duration)
+    finally:
+        simulator.terminate()
+        simulator.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -19,7 +19,7 @@ If not, see <http://www.gnu.org/licenses/>.
 import logging
 
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from PyQt5.QtCore import Qt, pyqtSignal
 from qgis.core import QgsPointXY, QgsWkbTypes
 from iquaview.src.ui.ui_auvpose import Ui_AUVPosewidget
 from iquaview.src.canvastracks.canvasmarker import CanvasMarker
@@ -48,9 +48,6 @@ class AUVPoseWidget(QWidget, Ui_AUVPosewidget):
         self.connected = False
         # self.mission_sts = MissionStatus(self.config)
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.auv_pose_update_canvas)
-
     def emit_connection(self):
         if not self.connected:
             self.auv_wifi_connected.emit(True)
@@ -63,7 +60,7 @@ class AUVPoseWidget(QWidget, Ui_AUVPosewidget):
             self.auv_status_label.setStyleSheet('font:italic; color:green')
             self.connected = True
             self.connectButton.setText("Disconnect")
-            self.timer.start(1000)
+            self.vehicle_data.topic_updated.connect(self.topic_updated)
             self.mission_sts.init_mission_status_wifi()
         except:
             logger.error("No connection with COLA2")
@@ -72,7 +69,11 @@ class AUVPoseWidget(QWidget, Ui_AUVPosewidget):
 
     def disconnect(self, msg=''):
         self.auv_wifi_connected.emit(False)
-        self.timer.stop()
+        try:
+            self.vehicle_data.topic_updated.disconnect(self.topic_updated)
+        except TypeError:
+            # not connected
+            pass
         self.mission_sts.disconnect()
         self.connected = False
         self.trackwidget.close()
@@ -81,10 +82,23 @@ class AUVPoseWidget(QWidget, Ui_AUVPosewidget):
         self.auv_status_label.setStyleSheet('font:italic; color:red')
         self.trackwidget.centerButton.setEnabled(False)
 
+    def topic_updated(self, key):
+        """
+        Update the canvas when new navigation data is received.
+
+        :param key: key of the updated topic
+        """
+        if key == 'navigation status':
+            self.auv_pose_update_canvas()
+
     def auv_pose_update_canvas(self):
         if self.connected:
             data = self.vehicle_data.get_nav_sts()
             if data is not None and data['valid_data'] != 'disconnected':
+                if 'global_position' not in data:
+                    # no navigation received yet
+                    return
+
                 lat = float(data['global_position']['latitude'])
                 lon = float(data['global_position']['longitude'])
                 heading = float(data['orientation']['yaw'])
@@ -92,7 +106,7 @@ class AUVPoseWidget(QWidget, Ui_AUVPosewidget):
                 altitude = float(data['altitude'])
 
                 pos = QgsPointXY(lon, lat)
-                self.trackwidget.track_update_canvas(pos, heading)
+                self.trackwidget.track_update_canvas(pos, heading, depth)
                 self.auv_status_label.setText("Receiving data from AUV")
                 self.auv_status_label.setStyleSheet('font:italic; color:green')
                 [status, status_color] = self.mission_sts.get_status()
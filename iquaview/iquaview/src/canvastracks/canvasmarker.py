@@ -18,31 +18,54 @@ If not, see <http://www.gnu.org/licenses/>.
 """
 
 import math
-from iquaview.src.utils.calcutils import endpoint, magnitude
+from iquaview.src.utils.calcutils import endpoint
 from qgis.core import QgsPointXY, QgsDistanceArea, QgsProject
 from qgis.gui import QgsMapCanvasItem
-from PyQt5.QtCore import Qt, QRectF, QLine, QPoint
-from PyQt5.QtGui import QBrush, QPen, QPainter, QPolygonF, QPainterPath
+from PyQt5.QtCore import Qt, QRectF, QLineF, QPointF
+from PyQt5.QtGui import QBrush, QPen, QPainter, QPolygonF, QPainterPath, QPixmap
 from PyQt5.QtSvg import QSvgRenderer
 
+# size in pixels of the symbol drawn when the vessel is too small to be seen
+SYMBOL_SIZE = 20
+# the pixel size of the vessel is computed again when the heading changes more than this, in degrees
+HEADING_BUCKET = 1.0
+# or when the latitude changes more than this, in degrees
+LATITUDE_BUCKET = 0.01
+# vessels drawn bigger than this number of pixels are rendered from the svg without caching them
+MAX_PIXMAP_PIXELS = 2048 * 2048
+
 
 class CanvasMarker(QgsMapCanvasItem):
+    """
+    Marker showing a position and heading on the canvas, as a symbol or as the svg of the vessel.
+
+    The pixel size of the vessel, the symbol shapes and the rendered svg are cached, so
+    repainting after a pan only draws them. The size is computed again when the scale,
+    the heading bucket, the latitude bucket or the vessel dimensions change, and the
+    svg is rendered again only when the size in pixels changes.
+    """
+
     def __init__(self, canvas, color, svg=None, width=0.0, length=0.0, orientation=True, marker_mode=False, config=None):
         super(CanvasMarker, self).__init__(canvas)
         self.canvas = canvas
         self.config = config
-        self.size = 20
+        self.size = SYMBOL_SIZE
         self.changing_scale = 400
         self.marker_mode = marker_mode
         self.color = color
         self.pointbrush = QBrush(self.color)
         self.pointpen = QPen(Qt.black)
-        self.pointpen.setWidth(1)
+        self.pointpen.setWidth(2)
         self.map_pos = QgsPointXY(0.0, 0.0)
         self.heading = 0
         self.width = width
         self.length = length
         self.orientation = orientation
+        self.symbol = self.build_symbol(SYMBOL_SIZE)
+        self.vessel_size_key = None
+        self.vessel_size = (0.0, 0.0)
+        self.pixmap_key = None
+        self.pixmap = None
         if svg is not None:
             # set crs and ellipsoid
             crs = self.canvas.mapSettings().destinationCrs()
@@ -59,129 +82,127 @@ class CanvasMarker(QgsMapCanvasItem):
 
     def set_color(self, color):
         self.color = color
+        self.pointbrush.setColor(self.color)
 
     def set_marker_mode(self, canvas_marker_mode):
         self.marker_mode = canvas_marker_mode
 
-    def paint(self, painter, xxx, xxx2):
-        pos = self.toCanvasCoordinates(self.map_pos)
-        self.setPos(pos)
-
-        if self.marker_mode:
-            mode = self.config.csettings["canvas_marker_mode"]
-
-            if mode == 'auto':
-                self.set_size(20)
-                transform = self.canvas.getCoordinateTransform()
-                start_point = transform.toMapCoordinates(pos.x(), pos.y())
-                map_end_point_width = endpoint(start_point, self.width, 90 + math.degrees(self.heading))
-                map_end_point_length = endpoint(start_point, self.length, math.degrees(self.heading))
+    def invalidate_cache(self):
+        """Discard the cached vessel size and svg pixmap."""
+        self.vessel_size_key = None
+        self.pixmap_key = None
+        self.pixmap = None
+
+    @staticmethod
+    def build_symbol(size):
+        """
+        Create the shapes of the symbol, centered on the origin.
+
+        :param size: diameter in pixels
+        :return: tuple with the circle rect, the two cross lines and the heading arrow path
+        """
+        half_size = size / 2.0
+        rect = QRectF(-half_size, -half_size, size, size)
+        vertical = QLineF(0, -half_size, 0, half_size)
+        horizontal = QLineF(-half_size, 0, half_size, 0)
+        arrow = QPainterPath()
+        arrow.addPolygon(QPolygonF([QPointF(-half_size, 0), QPointF(0, -size), QPointF(half_size, 0),
+                                    QPointF(0, 0)]))
+        return rect, vertical, horizontal, arrow
+
+    def get_vessel_size(self):
+        """
+        Return the width and length of the vessel in pixels at the current scale.
+
+        :return: tuple with the width and the length in pixels
+        """
+        map_units_per_pixel = self.canvas.mapUnitsPerPixel()
+        heading = math.degrees(self.heading)
+        key = (map_units_per_pixel, round(heading / HEADING_BUCKET), round(self.map_pos.y() / LATITUDE_BUCKET),
+               self.width, self.length)
+        if key != self.vessel_size_key and map_units_per_pixel > 0:
+            start_point = self.map_pos
+            end_width = endpoint(start_point, self.width, 90 + heading)
+            end_length = endpoint(start_point, self.length, heading)
+            # the map to pixel transform scales both axes by the same factor
+            self.vessel_size = (math.hypot(end_width.x() - start_point.x(), end_width.y() - start_point.y())
+                                / map_units_per_pixel,
+                                math.hypot(end_length.x() - start_point.x(), end_length.y() - start_point.y())
+                                / map_units_per_pixel)
+            self.vessel_size_key = key
+        return self.vessel_size
+
+    def get_pixmap(self, width, height):
+        """
+        Return the svg rendered at a size, rendering it only when the size changes.
+
+        :return: QPixmap, None if the size is too large to be cached
+        """
+        ratio = self.canvas.devicePixelRatioF()
+        key = (round(width), round(height), ratio)
+        if key != self.pixmap_key:
+            pixels = key[0] * key[1] * ratio * ratio
+            self.pixmap = None
+            if 0 < pixels <= MAX_PIXMAP_PIXELS:
+                self.pixmap = QPixmap(round(key[0] * ratio), round(key[1] * ratio))
+                self.pixmap.setDevicePixelRatio(ratio)
+                self.pixmap.fill(Qt.transparent)
+                pixmap_painter = QPainter(self.pixmap)
+                pixmap_painter.setRenderHint(QPainter.Antialiasing)
+                self.svg.render(pixmap_painter, QRectF(0, 0, key[0], key[1]))
+                pixmap_painter.end()
+            self.pixmap_key = key
+        return self.pixmap
 
-                # to canvas coordinates
-                canvas_end_point_width = self.toCanvasCoordinates(map_end_point_width)
-                canvas_end_point_length = self.toCanvasCoordinates(map_end_point_length)
-
-                width = magnitude(self.toCanvasCoordinates(start_point), QgsPointXY(canvas_end_point_width))
-                height = magnitude(self.toCanvasCoordinates(start_point), QgsPointXY(canvas_end_point_length))
-
-                if width < self.size and height < self.size:
-                    self.changing_scale = self.canvas.scale()
-                else:
-                    self.changing_scale = self.canvas.scale() * 2
+    def paint(self, painter, xxx, xxx2):
+        self.setPos(self.toCanvasCoordinates(self.map_pos))
 
-            elif mode == 'manual':
-                self.changing_scale = self.config.csettings["canvas_marker_scale"]
-        else:
-            self.changing_scale = 400
+        svg_valid = self.svg is not None and self.svg.isValid()
+        if svg_valid:
+            width, height = self.get_vessel_size()
+
+        draw_svg = False
+        if self.svg is not None:
+            if self.marker_mode:
+                mode = self.config.csettings["canvas_marker_mode"]
+                if mode == 'auto':
+                    # the vessel is drawn once it is bigger than the symbol
+                    draw_svg = not (width < SYMBOL_SIZE and height < SYMBOL_SIZE) if svg_valid else False
+                elif mode == 'manual':
+                    draw_svg = self.canvas.scale() < self.config.csettings["canvas_marker_scale"]
+            else:
+                draw_svg = self.canvas.scale() < 400
 
-        if self.svg is None or self.canvas.scale() >= self.changing_scale:
-            self.set_size(20)
-            half_size = self.size / 2.0
-            rect = QRectF(0 - half_size, 0 - half_size, self.size, self.size)
+        rotation = math.degrees(self.heading) + self.canvas.rotation()
+        if not draw_svg:
+            self.set_size(SYMBOL_SIZE)
+            rect, vertical, horizontal, arrow = self.symbol
             painter.setRenderHint(QPainter.Antialiasing)
-
-            self.pointpen.setColor(Qt.black)
-            self.pointpen.setWidth(2)
-            self.pointbrush.setColor(self.color)
-
             painter.setBrush(self.pointbrush)
             painter.setPen(self.pointpen)
-            y = 0 - half_size
-            x = rect.width() / 2 - half_size
-            line = QLine(x, y, x, rect.height() - half_size)
-            y = rect.height() / 2 - half_size
-            x = 0 - half_size
-            line2 = QLine(x, y, rect.width() - half_size, y)
-
-            # Arrow
-            p = QPolygonF()
-            p.append(QPoint(0 - half_size, 0))
-            p.append(QPoint(0, -self.size))
-            x = rect.width() - half_size
-            p.append(QPoint(x, 0))
-            p.append(QPoint(0, 0))
-
-            offsetp = QPolygonF()
-            offsetp.append(QPoint(0 - half_size, 0))
-            offsetp.append(QPoint(0, -self.size))
-            x = rect.width() - half_size
-            offsetp.append(QPoint(x, 0))
-            offsetp.append(QPoint(0, 0))
-
-            painter.save()
-            painter.rotate(math.degrees(self.heading) + self.canvas.rotation())
             if self.orientation:
-                path = QPainterPath()
-                path.addPolygon(p)
-                painter.drawPath(path)
-            painter.restore()
+                painter.save()
+                painter.rotate(rotation)
+                painter.drawPath(arrow)
+                painter.restore()
             painter.drawEllipse(rect)
-            painter.drawLine(line)
-            painter.drawLine(line2)
+            painter.drawLine(vertical)
+            painter.drawLine(horizontal)
 
         # svg valid
-        elif self.svg is not None and self.svg.isValid():
-
-            # get rotation
-            rotation = self.canvas.rotation()
-
-            painter.save()
-
-            transform = self.canvas.getCoordinateTransform()
-            start_point = transform.toMapCoordinates(pos.x(), pos.y())
-            map_end_point_width = endpoint(start_point, self.width, 90 + math.degrees(self.heading))
-            map_end_point_length = endpoint(start_point, self.length, math.degrees(self.heading))
-
-            # to canvas coordinates
-            canvas_end_point_width = self.toCanvasCoordinates(map_end_point_width)
-            canvas_end_point_length = self.toCanvasCoordinates(map_end_point_length)
-
-            width = magnitude(self.toCanvasCoordinates(start_point), QgsPointXY(canvas_end_point_width))
-            height = magnitude(self.toCanvasCoordinates(start_point), QgsPointXY(canvas_end_point_length))
-
-            if width > height:
-                self.set_size(width)
-            else:
-                self.set_size(height)
-
+        elif svg_valid:
+            self.set_size(max(width, height))
             if width != 0 and height != 0:
-                center_x = width / 2.0
-                center_y = height / 2.0
-                # work out how to shift the image so that it rotates
-                #           properly about its center
-                # ( x cos a + y sin a - x, -x sin a + y cos a - y)
-                myradians = math.radians(rotation + math.degrees(self.heading))
-                xshift = int(((center_x * math.cos(myradians)) +
-                              (center_y * math.sin(myradians)))
-                             - center_x)
-                yshift = int(((-center_x * math.sin(myradians)) +
-                              (center_y * math.cos(myradians)))
-                             - center_y)
-
-                painter.translate(-width / 2, -height / 2)
-                painter.rotate(math.degrees(self.heading) + self.canvas.rotation())
-                self.svg.render(painter, QRectF(xshift, yshift, width, height))
-            painter.restore()
+                painter.save()
+                painter.rotate(rotation)
+                target = QRectF(-width / 2.0, -height / 2.0, width, height)
+                pixmap = self.get_pixmap(width, height)
+                if pixmap is not None:
+                    painter.setRenderHint(QPainter.SmoothPixmapTransform)
+                    painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+                else:
+                    self.svg.render(painter, target)
+                painter.restore()
 
     def boundingRect(self):
         size = self.size * 2
@@ -197,6 +218,8 @@ class CanvasMarker(QgsMapCanvasItem):
 
     def set_width(self, width):
         self.width = width
+        self.invalidate_cache()
 
     def set_length(self, length):
         self.length = length
+        self.invalidate_cache()
@@ -18,6 +18,7 @@ If not, see <http://www.gnu.org/licenses/>.
 """
 
 import math
+import time
 import logging
 
 from PyQt5.QtWidgets import QWidget, QMessageBox
@@ -29,6 +30,9 @@ from iquaview.src.cola2api.gps_driver import GpsDriver
 
 logger = logging.getLogger(__name__)
 
+# the fixes received meanwhile are drained and drawn in a single update
+GPS_UPDATE_INTERVAL_MS = 250
+
 
 class GPSWidget(QWidget, Ui_GPSwidget):
 
@@ -49,6 +53,7 @@ class GPSWidget(QWidget, Ui_GPSwidget):
         self.trackwidget.init("GPS track", self.canvas, self.default_color, QgsWkbTypes.LineGeometry, self.marker)
         self.gps = None
         self.connected = False
+        self.last_status_time = 0.0
         self.set_label_disconnected()
 
         # set signals
@@ -74,7 +79,7 @@ class GPSWidget(QWidget, Ui_GPSwidget):
                 self.gps.gpsparsingfailed.connect(self.parsing_failed)
                 self.connectButton.setText("Disconnect")
                 self.connected = True
-                self.timer.start(1000)
+                self.timer.start(GPS_UPDATE_INTERVAL_MS)
                 self.gps_status_label.setText("Connected")
                 self.gps_status_label.setStyleSheet('font:italic; color:green')
             except:
@@ -103,20 +108,23 @@ class GPSWidget(QWidget, Ui_GPSwidget):
 
     def gps_update_canvas(self):
         if self.connected:
-            data = self.gps.get_data()
-            if data['status'] == 'new_data' and (data['quality'] >= 1) and (data['quality'] <= 5):
-                gps_lat = data['latitude']
-                gps_lon = data['longitude']
-                gps_heading = data['heading']
-                pos = QgsPointXY(gps_lon, gps_lat)
-                self.trackwidget.track_update_canvas(pos,
-                                                     math.radians(gps_heading-self.config.csettings['gps_offset_heading']))
+            now = time.time()
+            fixes = [fix for fix in self.gps.drain_fixes() if 1 <= fix['quality'] <= 5]
+            if fixes:
+                self.last_status_time = now
+                positions = [QgsPointXY(fix['longitude'], fix['latitude']) for fix in fixes]
+                headings = [math.radians(fix['heading'] - self.config.csettings['gps_offset_heading'])
+                            for fix in fixes]
+                self.trackwidget.track_update_canvas_batch(positions, headings[-1], headings,
+                                                           [fix['time'] for fix in fixes])
                 self.gps_status_label.setText("Connected, receiving signal")
                 self.gps_status_label.setStyleSheet('font:italic; color:green')
 
-            elif data['status'] == 'old_data':
-                self.parsing_failed()
-
+            elif now - self.last_status_time >= 1.0:
+                # check the signal once per second, as often as the driver flags data as old
+                self.last_status_time = now
+                if self.gps.get_data()['status'] == 'old_data':
+                    self.parsing_failed()
 
     def set_label_disconnected(self):
         self.gps_status_label.setText("Disconnected")
@@ -0,0 +1,293 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+"""
+ Export of the tracks stored in a TrackStore to GPX, KML, ESRI Shapefile and CSV.
+
+ Files are written directly in blocks of samples, each position keeps its time and depth.
+"""
+
+import os
+import time
+import struct
+import logging
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from iquaview.src.canvastracks.trackstore import LONGITUDE, LATITUDE, TIME, DEPTH, HEADING
+
+logger = logging.getLogger(__name__)
+
+# samples formatted at once when writing text formats
+BLOCK_SIZE = 4096
+
+WGS84_WKT = ('GEOGCS["GCS_WGS_1984",DATUM["D_WGS_1984",SPHEROID["WGS_1984",6378137.0,298.257223563]],'
+             'PRIMEM["Greenwich",0.0],UNIT["Degree",0.0174532925199433]]')
+
+
+def format_times(times):
+    """
+    Format times as ISO 8601 UTC strings.
+
+    :param times: array of seconds since the epoch
+    :return: list of strings, empty strings for unknown times
+    """
+    known = np.isfinite(times)
+    milliseconds = np.where(known, np.round(times * 1000.0), 0).astype(np.int64)
+    text = np.datetime_as_string(milliseconds.astype('datetime64[ms]'), unit='ms')
+    return [t + 'Z' if k else '' for t, k in zip(text.tolist(), known.tolist())]
+
+
+def blocks(samples):
+    """Iterate over the samples in blocks of BLOCK_SIZE rows."""
+    for start in range(0, len(samples), BLOCK_SIZE):
+        yield samples[start:start + BLOCK_SIZE]
+
+
+def write_csv(path, samples):
+    """
+    Write a track as CSV with one row per sample.
+
+    :param path: output file
+    :param samples: array of samples returned by TrackStore.get_samples
+    """
+    with open(path, 'w') as f:
+        f.write("time,latitude,longitude,depth,heading\n")
+        for block in blocks(samples):
+            times = format_times(block[:, TIME])
+            rows = block[:, [LATITUDE, LONGITUDE, DEPTH, HEADING]].tolist()
+            f.writelines("{},{:.8f},{:.8f},{},{}\n".format(t, latitude, longitude,
+                                                          "" if depth != depth else "{:.3f}".format(depth),
+                                                          "" if heading != heading else "{:.2f}".format(heading))
+                         for t, (latitude, longitude, depth, heading) in zip(times, rows))
+
+
+def write_gpx(path, samples, name, as_points=False):
+    """
+    Write a track as GPX 1.1, as a track or as waypoints.
+
+    The elevation of each point is the negated depth.
+
+    :param path: output file
+    :param samples: array of samples returned by TrackStore.get_samples
+    :param name: name of the track
+    :param as_points: write waypoints instead of a track
+    """
+    tag = "wpt" if as_points else "trkpt"
+    indent = "  " if as_points else "      "
+    with open(path, 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<gpx version="1.1" creator="IQUAview" xmlns="http://www.topografix.com/GPX/1/1">\n')
+        if not as_points:
+            f.write('  <trk>\n    <name>{}</name>\n    <trkseg>\n'.format(escape(name)))
+        for block in blocks(samples):
+            times = format_times(block[:, TIME])
+            for t, (longitude, latitude, depth) in zip(times, block[:, [LONGITUDE, LATITUDE, DEPTH]].tolist()):
+                f.write('{}<{} lat="{:.8f}" lon="{:.8f}">'.format(indent, tag, latitude, longitude))
+                if depth == depth:
+                    f.write('<ele>{:.3f}</ele>'.format(-depth))
+                if t:
+                    f.write('<time>{}</time>'.format(t))
+                f.write('</{}>\n'.format(tag))
+        if not as_points:
+            f.write('    </trkseg>\n  </trk>\n')
+        f.write('</gpx>\n')
+
+
+def write_kml(path, samples, name, as_points=False):
+    """
+    Write a track as KML, as a gx:Track with the time of each position or as timestamped points.
+
+    The altitude of each position is the negated depth.
+
+    :param path: output file
+    :param samples: array of samples returned by TrackStore.get_samples
+    :param name: name of the track
+    :param as_points: write a placemark per position instead of a track
+    """
+    with open(path, 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<kml xmlns="http://www.opengis.net/kml/2.2" xmlns:gx="http://www.google.com/kml/ext/2.2">\n'
+                '<Document>\n  <name>{}</name>\n'.format(escape(name)))
+        if as_points:
+            for block in blocks(samples):
+                times = format_times(block[:, TIME])
+                for t, (longitude, latitude, depth) in zip(times, block[:, [LONGITUDE, LATITUDE, DEPTH]].tolist()):
+                    f.write('  <Placemark>')
+                    if t:
+                        f.write('<TimeStamp><when>{}</when></TimeStamp>'.format(t))
+                    f.write('<Point><altitudeMode>absolute</altitudeMode>'
+                            '<coordinates>{:.8f},{:.8f},{:.3f}</coordinates></Point></Placemark>\n'.format(
+                                longitude, latitude, 0.0 if depth != depth else -depth))
+        else:
+            f.write('  <Placemark>\n    <name>{}</name>\n    <gx:Track>\n'
+                    '      <altitudeMode>absolute</altitudeMode>\n'.format(escape(name)))
+            # a gx:Track lists all the times before all the coordinates
+            for block in blocks(samples):
+                f.writelines('      <when>{}</when>\n'.format(t) for t in format_times(block[:, TIME]))
+            for block in blocks(samples):
+                f.writelines('      <gx:coord>{:.8f} {:.8f} {:.3f}</gx:coord>\n'.format(
+                    longitude, latitude, 0.0 if depth != depth else -depth)
+                    for longitude, latitude, depth in block[:, [LONGITUDE, LATITUDE, DEPTH]].tolist())
+            f.write('    </gx:Track>\n  </Placemark>\n')
+        f.write('</Document>\n</kml>\n')
+
+
+def write_dbf(path, fields, records):
+    """
+    Write the dBASE III attribute table of a shapefile.
+
+    :param path: output file
+    :param fields: list of (name, type, length, decimals) with type 'C' for text or 'N' for numbers
+    :param records: list of rows, each a list of values already formatted as strings
+    """
+    record_length = 1 + sum(field[2] for field in fields)
+    header_length = 32 + 32 * len(fields) + 1
+    today = time.gmtime()
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<BBBBIHH20x', 3, today.tm_year - 1900, today.tm_mon, today.tm_mday, len(records),
+                            header_length, record_length))
+        for name, field_type, length, decimals in fields:
+            f.write(struct.pack('<11sc4xBB14x', name.encode(), field_type.encode(), length, decimals))
+        f.write(b'\r')
+        for record in records:
+            row = [b' ']
+            for (name, field_type, length, decimals), value in zip(fields, record):
+                value = value.encode()[:length]
+                row.append(value.ljust(length) if field_type == 'C' else value.rjust(length))
+            f.write(b''.join(row))
+        f.write(b'\x1a')
+
+
+def write_shapefile(path, samples, name, as_points=False):
+    """
+    Write a track as an ESRI Shapefile with its .shp, .shx, .dbf and .prj files.
+
+    A line track is a single PolyLineZ whose Z values are the negated depths and whose M values
+    are the times in seconds since the epoch. Point tracks are PointZ records with the time,
+    depth and heading of each position in the attribute table.
+
+    :param path: output .shp file
+    :param samples: array of samples returned by TrackStore.get_samples
+    :param name: name of the track, stored in the attribute table of a line track
+    :param as_points: write a record per position instead of a line
+    """
+    base = os.path.splitext(path)[0]
+    xy = samples[:, [LONGITUDE, LATITUDE]]
+    z = np.nan_to_num(-samples[:, DEPTH])
+    m = samples[:, TIME]
+    known_m = m[np.isfinite(m)]
+    # M values smaller than -1e38 mean no data
+    m = np.where(np.isfinite(m), m, -1e39)
+    if len(samples):
+        box = (xy[:, 0].min(), xy[:, 1].min(), xy[:, 0].max(), xy[:, 1].max(), z.min(), z.max(),
+               known_m.min() if len(known_m) else 0.0, known_m.max() if len(known_m) else 0.0)
+    else:
+        box = (0.0,) * 8
+
+    if as_points:
+        shape_type = 11
+        content_length = 36
+        records = np.empty(len(samples), dtype=[('number', '>i4'), ('length', '>i4'), ('type', '<i4'),
+                                                ('x', '<f8'), ('y', '<f8'), ('z', '<f8'), ('m', '<f8')])
+        records['number'] = np.arange(1, len(samples) + 1)
+        records['length'] = content_length // 2
+        records['type'] = shape_type
+        records['x'] = xy[:, 0]
+        records['y'] = xy[:, 1]
+        records['z'] = z
+        records['m'] = m
+        offsets = 50 + np.arange(len(samples)) * (8 + content_length) // 2
+        lengths = [content_length] * len(samples)
+        shp_content = [records.tobytes()]
+    else:
+        shape_type = 13
+        n = len(samples)
+        content_length = 44 + 4 + 16 * n + 16 + 8 * n + 16 + 8 * n
+        head = struct.pack('<i4dii', shape_type, *box[:4], 1, n) + struct.pack('<i', 0)
+        shp_content = [struct.pack('>ii', 1, content_length // 2), head,
+                       np.ascontiguousarray(xy, dtype='<f8').tobytes(),
+                       struct.pack('<2d', *box[4:6]), z.astype('<f8').tobytes(),
+                       struct.pack('<2d', *box[6:8]), m.astype('<f8').tobytes()]
+        offsets = [50]
+        lengths = [content_length]
+
+    shp_length = 100 + sum(8 + length for length in lengths)
+    shx_length = 100 + 8 * len(lengths)
+    with open(base + '.shp', 'wb') as f:
+        f.write(shapefile_header(shp_length, shape_type, box))
+        f.writelines(shp_content)
+    with open(base + '.shx', 'wb') as f:
+        f.write(shapefile_header(shx_length, shape_type, box))
+        index = np.empty(len(lengths), dtype=[('offset', '>i4'), ('length', '>i4')])
+        index['offset'] = offsets
+        index['length'] = np.asarray(lengths) // 2
+        f.write(index.tobytes())
+    with open(base + '.prj', 'w') as f:
+        f.write(WGS84_WKT)
+
+    if as_points:
+        times = format_times(samples[:, TIME])
+        fields = [('TIME', 'C', 24, 0), ('DEPTH', 'N', 12, 3), ('HEADING', 'N', 8, 2)]
+        records = [[t, "" if depth != depth else "{:.3f}".format(depth),
+                    "" if heading != heading else "{:.2f}".format(heading)]
+                   for t, (depth, heading) in zip(times, samples[:, [DEPTH, HEADING]].tolist())]
+    else:
+        times = format_times(samples[[0, -1], TIME]) if len(samples) else ['', '']
+        fields = [('NAME', 'C', 64, 0), ('START', 'C', 24, 0), ('END', 'C', 24, 0), ('POINTS', 'N', 10, 0)]
+        records = [[name, times[0], times[1], str(len(samples))]]
+    write_dbf(base + '.dbf', fields, records)
+
+
+def shapefile_header(file_length, shape_type, box):
+    """
+    Return the 100 byte header of a .shp or .shx file.
+
+    :param file_length: length of the file in bytes
+    :param shape_type: shapefile type of the records
+    :param box: xmin, ymin, xmax, ymax, zmin, zmax, mmin, mmax
+    """
+    return struct.pack('>i20xi', 9994, file_length // 2) + struct.pack('<ii8d', 1000, shape_type, *box)
+
+
+# export functions for each file dialog filter, and the extension added to the file name
+EXPORT_FORMATS = {"Shapefile (*.shp)": (write_shapefile, '.shp'),
+                  "KML (*.kml)": (write_kml, '.kml'),
+                  "GPX (*.gpx)": (write_gpx, '.gpx'),
+                  "CSV (*.csv)": (write_csv, '.csv')}
+
+
+def export_track(path, selected_filter, samples, name, as_points=False):
+    """
+    Export a track to the format of a file dialog filter.
+
+    :param path: output file, the extension of the format is added if missing
+    :param selected_filter: one of the keys of EXPORT_FORMATS
+    :param samples: array of samples returned by TrackStore.get_samples
+    :param name: name of the track
+    :param as_points: export the positions as points instead of a line
+    :return: path of the written file
+    """
+    write, extension = EXPORT_FORMATS[selected_filter]
+    if not path.endswith(extension):
+        path = path + extension
+    if write is write_csv:
+        write(path, samples)
+    else:
+        write(path, samples, name, as_points)
+    logger.info("{} saved to {}".format(name, path))
+    return path
@@ -0,0 +1,184 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+"""
+ Full resolution storage of a track and its scale dependent simplification for drawing.
+"""
+
+import math
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# columns of the track samples
+LONGITUDE, LATITUDE, TIME, DEPTH, HEADING = range(5)
+
+
+def douglas_peucker(points, tolerance):
+    """
+    Simplify a polyline with the Douglas-Peucker algorithm.
+
+    :param points: array of shape (n, 2)
+    :param tolerance: maximum distance from the removed points to the simplified polyline
+    :return: sorted array with the indices of the points kept, always including the first and the last
+    """
+    n = len(points)
+    if n < 3:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start = points[first]
+        chord = points[last] - start
+        offsets = points[first + 1:last] - start
+        length = math.hypot(chord[0], chord[1])
+        if length > 0.0:
+            distances = np.abs(chord[0] * offsets[:, 1] - chord[1] * offsets[:, 0]) / length
+        else:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            index = first + 1 + farthest
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return np.flatnonzero(keep)
+
+
+class TrackStore:
+    """
+    Growable array of track samples with a level of detail cache.
+
+    Each sample holds the longitude, latitude, time, depth and heading of a position,
+    kept at full resolution in a float64 array that doubles its capacity when full.
+    Unknown values are stored as NaN.
+
+    For drawing, the track is split in chunks of CHUNK_SIZE positions that are
+    simplified once per detail level, the positions after the last complete chunk are
+    drawn as received. Adding positions only simplifies the chunks they complete, so
+    the cost does not grow with the length of the track.
+    """
+
+    CHUNK_SIZE = 256
+
+    def __init__(self, capacity=1024):
+        """
+        Class constructor
+
+        :param capacity: initial number of samples allocated
+        """
+        self.data = np.empty((capacity, 5))
+        self.count = 0
+        # simplified chunks for each detail level
+        self.levels = dict()
+
+    def __len__(self):
+        return self.count
+
+    def append(self, x, y, t=np.nan, depth=np.nan, heading=np.nan):
+        """
+        Add a sample at the end of the track.
+
+        :param x: longitude
+        :param y: latitude
+        :param t: time in seconds since the epoch
+        :param depth: depth in meters
+        :param heading: heading in degrees
+        """
+        if self.count == len(self.data):
+            self.grow(self.count + 1)
+        self.data[self.count] = (x, y, t, depth, heading)
+        self.count += 1
+
+    def extend(self, samples):
+        """
+        Add several samples at the end of the track.
+
+        :param samples: sequence of (x, y) pairs or of (x, y, t, depth, heading) tuples
+        """
+        samples = np.asarray(samples, dtype=float)
+        samples = samples.reshape(-1, samples.shape[-1] if samples.ndim > 1 else 2)
+        if self.count + len(samples) > len(self.data):
+            self.grow(self.count + len(samples))
+        rows = self.data[self.count:self.count + len(samples)]
+        rows[:, :samples.shape[1]] = samples
+        rows[:, samples.shape[1]:] = np.nan
+        self.count += len(samples)
+
+    def grow(self, size):
+        capacity = len(self.data)
+        while capacity < size:
+            capacity *= 2
+        data = np.empty((capacity, 5))
+        data[:self.count] = self.data[:self.count]
+        self.data = data
+
+    def get_points(self):
+        """Return a read only view of the positions, shape (n, 2) with longitude and latitude."""
+        view = self.data[:self.count, :2]
+        view.flags.writeable = False
+        return view
+
+    def get_samples(self):
+        """Return a read only view of all the samples, shape (n, 5), indexed by the column constants."""
+        view = self.data[:self.count]
+        view.flags.writeable = False
+        return view
+
+    def clear(self):
+        """Remove all the samples."""
+        self.count = 0
+        self.levels.clear()
+
+    @staticmethod
+    def get_level(tolerance):
+        """
+        Return the detail level for a simplification tolerance.
+
+        Levels are powers of two so small zoom changes reuse the same simplification.
+
+        :param tolerance: maximum error allowed, in the units of the positions
+        :return: integer level, the tolerance of the level is 2 ** level
+        """
+        if tolerance <= 0.0:
+            return None
+        return math.floor(math.log2(tolerance))
+
+    def get_simplified(self, level):
+        """
+        Return the simplified track at a detail level.
+
+        :param level: level returned by get_level, None for the full resolution
+        :return: tuple with the list of arrays of simplified vertices of the complete chunks and
+                 the index of the first position after them, which are not simplified
+        """
+        if level is None:
+            return list(), 0
+        complete = max(self.count - 1, 0) // self.CHUNK_SIZE
+        chunks = self.levels.setdefault(level, list())
+        tolerance = 2.0 ** level
+        while len(chunks) < complete:
+            start = len(chunks) * self.CHUNK_SIZE
+            # chunks share their end position, it is kept as the start of the next chunk
+            chunk = self.data[start:start + self.CHUNK_SIZE + 1, :2]
+            chunks.append(chunk[douglas_peucker(chunk, tolerance)[:-1]])
+        return chunks, complete * self.CHUNK_SIZE
@@ -17,24 +17,26 @@ If not, see <http://www.gnu.org/licenses/>.
  history and center track on the map.
 """
 
+import math
+import time
 import logging
 
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QColor, QIcon
-from PyQt5.QtWidgets import QWidget, QFileDialog
-
-from qgis.core import (QgsRectangle,
-                       QgsWkbTypes,
-                       QgsVectorLayer,
-                       QgsFeature,
-                       QgsVectorFileWriter,
-                       QgsCoordinateReferenceSystem)
+from PyQt5.QtWidgets import QWidget, QFileDialog, QMessageBox
+
+from qgis.core import QgsRectangle, QgsPointXY, QgsWkbTypes
 from qgis.gui import QgsRubberBand, QgsColorButton
 
 from iquaview.src.ui.ui_track import Ui_Track
+from iquaview.src.canvastracks.trackstore import TrackStore
+from iquaview.src.canvastracks.trackexport import EXPORT_FORMATS, export_track
 
 logger = logging.getLogger(__name__)
 
+# maximum distance in pixels between the drawn line and the received positions
+LOD_TOLERANCE_PIXELS = 1.0
+
 
 class TrackWidget(QWidget, Ui_Track):
 
@@ -50,6 +52,11 @@ class TrackWidget(QWidget, Ui_Track):
         self.geom_type = None
         self.marker = None
         self.hidden = False
+        # full resolution track, the band of a line track only draws its simplification
+        self.track = TrackStore()
+        self.band_level = None
+        self.band_chunks = 0
+        self.band_tail = 0
         self.centerButton.setEnabled(False)
         icon = QIcon(":/resources/mActionSave.svg")
         self.save_track_pushButton.setIcon(icon)
@@ -73,6 +80,7 @@ class TrackWidget(QWidget, Ui_Track):
             self.band.setIconSize(12)
         else:
             self.band.setWidth(3)
+            self.canvas.scaleChanged.connect(self.scale_changed)
         # Add color button widget for picking color
         self.color_btn = QgsColorButton()
         self.horizontal_layout_color.insertWidget(1, self.color_btn, 0, Qt.AlignLeft)
@@ -90,15 +98,95 @@ class TrackWidget(QWidget, Ui_Track):
         if self.with_marker:
             self.marker.set_color(QColor(self.color_btn.color()))
 
-    def add_position(self, position):
-        self.band.addPoint(position)
+    def add_position(self, position, update=True, heading=None, depth=None, t=None):
+        """
+        Add a position to the track.
+
+        :param position: QgsPointXY
+        :param update: redraw the band, False when more positions follow
+        :param heading: heading in radians, if known
+        :param depth: depth in meters, if known
+        :param t: time of the position in seconds since the epoch, now if None
+        """
+        self.track.append(position.x(), position.y(),
+                          time.time() if t is None else t,
+                          math.nan if depth is None else depth,
+                          math.nan if heading is None else math.degrees(heading) % 360.0)
+        if self.geom_type == QgsWkbTypes.PointGeometry:
+            self.band.addPoint(position, update)
+        elif update:
+            self.update_band()
+
+    def scale_changed(self, scale):
+        self.update_band()
 
-    def track_update_canvas(self, position, heading):
+    def update_band(self):
+        """
+        Bring the band of a line track up to date with the track, simplified for the current scale.
+
+        Only the vertices added since the last update are added to the band, unless the
+        scale has changed to another detail level, which draws the band again.
+        """
+        if self.geom_type == QgsWkbTypes.PointGeometry:
+            return
+        level = self.track.get_level(LOD_TOLERANCE_PIXELS * self.canvas.mapUnitsPerPixel())
+        chunks, tail_start = self.track.get_simplified(level)
+        if level != self.band_level:
+            self.band.reset(self.geom_type)
+            self.band_level = level
+            self.band_chunks = 0
+            self.band_tail = 0
+        elif self.band_chunks < len(chunks):
+            # the drawn positions have been simplified, replace them
+            for _ in range(self.band_tail):
+                self.band.removeLastPoint(0, False)
+            self.band_tail = 0
+
+        tail = self.track.get_points()[tail_start + self.band_tail:]
+        vertices = chunks[self.band_chunks:] + [tail]
+        self.band_chunks = len(chunks)
+        self.band_tail += len(tail)
+        vertices = [(x, y) for part in vertices for x, y in part.tolist()]
+        if vertices:
+            for x, y in vertices[:-1]:
+                self.band.addPoint(QgsPointXY(x, y), False)
+            self.band.addPoint(QgsPointXY(*vertices[-1]))
+
+    def track_update_canvas(self, position, heading, depth=None, t=None):
+        """
+        Add a position to the track and move the marker to it.
+
+        :param position: QgsPointXY
+        :param heading: heading in radians
+        :param depth: depth in meters, if known
+        :param t: time of the position in seconds since the epoch, now if None
+        """
         self.centerButton.setEnabled(True)
         self.position = position
-        self.add_position(position)
+        self.add_position(position, True, heading, depth, t)
         if self.with_marker:
             self.marker.set_center(position, heading)
+        self.set_visibility()
+
+    def track_update_canvas_batch(self, positions, heading, headings=None, times=None):
+        """
+        Add several positions to the track with a single update of the band.
+
+        :param positions: list of QgsPointXY, oldest first
+        :param heading: heading at the last position in radians, to place the marker
+        :param headings: list with the heading in radians of each position but the last, if known
+        :param times: list with the time of each position in seconds since the epoch, now if None
+        """
+        if not positions:
+            return
+        headings = headings if headings is not None else [None] * len(positions)
+        times = times if times is not None else [None] * len(positions)
+        for position, position_heading, t in zip(positions[:-1], headings, times):
+            self.add_position(position, False, position_heading, None, t)
+        self.track_update_canvas(positions[-1], heading, None, times[-1])
+
+    def set_visibility(self):
+        """Show the band and the marker on the canvas only while the widget is visible."""
         if self.isHidden():
             if self.with_marker:
                 self.marker.hide()
@@ -126,60 +214,28 @@ class TrackWidget(QWidget, Ui_Track):
 
     def clear_track(self):
         self.band.reset(self.geom_type)
+        self.track.clear()
+        self.band_chunks = 0
+        self.band_tail = 0
 
     def save_track(self):
         """
         Save the track to disk
         """
         layer_name, selected_filter = QFileDialog.getSaveFileName(None, 'Save Track', "",
-                                                                  'Shapefile (*.shp);;KML (*.kml);;GPX (*.gpx)')
+                                                                  ';;'.join(EXPORT_FORMATS))
 
         if layer_name != '':
-
-            if self.geom_type == QgsWkbTypes.PointGeometry:
-                geometric_object = "MultiPoint?crs=epsg:4326"
-            else:
-                geometric_object = "LineString?crs=epsg:4326"
-
-            layer = QgsVectorLayer(
-                geometric_object,
-                layer_name,
-                "memory")
-            feature = QgsFeature()
-            feature.setGeometry(self.band.asGeometry())
-            layer.dataProvider().addFeatures([feature])
-
-            if selected_filter == "Shapefile (*.shp)":
-
-                if not layer_name.endswith('.shp'):
-                    layer_name = layer_name + '.shp'
-                ret = QgsVectorFileWriter.writeAsVectorFormat(layer, layer_name, "utf-8",
-                                                              QgsCoordinateReferenceSystem(4326,
-                                                                                           QgsCoordinateReferenceSystem.EpsgCrsId),
-                                                              "ESRI Shapefile")
-                if ret == QgsVectorFileWriter.NoError:
-                    logger.info(layer.name() + " saved to " + layer_name)
-
-            elif selected_filter == "KML (*.kml)":
-
-                if not layer_name.endswith('.kml'):
-                    layer_name = layer_name + '.kml'
-
-                QgsVectorFileWriter.writeAsVectorFormat(layer, layer_name, "utf-8",
-                                                        QgsCoordinateReferenceSystem(4326,
-                                                                                     QgsCoordinateReferenceSystem.EpsgCrsId),
-                                                        "KML")
-            elif selected_filter == "GPX (*.gpx)":
-
-                if not layer_name.endswith('.gpx'):
-                    layer_name = layer_name + '.gpx'
-                ds_options = list()
-                ds_options.append("GPX_USE_EXTENSIONS=TRUE")
-                QgsVectorFileWriter.writeAsVectorFormat(layer, layer_name, "utf-8",
-                                                        QgsCoordinateReferenceSystem(4326,
-                                                                                     QgsCoordinateReferenceSystem.EpsgCrsId),
-                                                        "GPX",
-                                                        datasourceOptions=ds_options)
+            # export the full resolution track, not the simplified band
+            try:
+                export_track(layer_name, selected_filter, self.track.get_samples(),
+                             self.track_groupBox.title(), self.geom_type == QgsWkbTypes.PointGeometry)
+            except OSError as e:
+                logger.error("Track could not be saved: {}".format(e))
+                QMessageBox.critical(self,
+                                     "Save Track",
+                                     "The track could not be saved: {}".format(e),
+                                     QMessageBox.Close)
 
     def close(self):
         self.hide_band()
@@ -17,117 +17,81 @@ If not, see <http://www.gnu.org/licenses/>.
 
 import json
 import socket
+import bisect
 import threading
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from iquaview.src.cola2api.io_reactor import get_reactor
+from iquaview.src.cola2api.json_stream import JsonStreamDecoder
+from iquaview.src.cola2api.ring_buffer import RingBuffer
 
 logger = logging.getLogger(__name__)
 
+# seconds to wait for the response of a service call
+SERVICE_TIMEOUT = 10
+# seconds without new fragments after which a partial fragmented message is discarded
+FRAGMENT_TIMEOUT = 10
+
 
 def send_action_service(ip, port, action_id, params):
     """Call a ROS service of type action."""
-    message_dict = {"service": action_id, "op": "call_service",
-                    "args": {"param": params}}
-    message = json.dumps(message_dict)
-
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    s.connect((ip, port))
-    s.send(message.encode())
-    response = s.recv(1024)
-    data = json.loads(response.decode())
-    s.close()
+    data = call_service(ip, port, action_id, {"param": params})
     return data['result']
 
 
-def send_empty_service(ip, port, action_id):
+def send_empty_service(ip, port, action_id, timeout=SERVICE_TIMEOUT):
     """Call a ROS service of type Empty."""
-    message_dict = {"service": action_id, "op": "call_service",
-                    "args": {}}
-    message = json.dumps(message_dict)
-
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    s.connect((ip, port))
-    s.send(message.encode())
-    response = s.recv(1024)
-    data = json.loads(response.decode())
-    s.close()
+    data = call_service(ip, port, action_id, timeout=timeout)
     return data['result']
 
 
-def send_trigger_service(ip, port, action_id):
+def send_trigger_service(ip, port, action_id, timeout=SERVICE_TIMEOUT):
     """Call a ROS service of type Trigger."""
-    message_dict = {"service": action_id, "op": "call_service",
-                    "args": {}}
-    message = json.dumps(message_dict)
-
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    s.connect((ip, port))
-    s.send(message.encode())
-    response = s.recv(1024)
-    data = json.loads(response.decode())
-    s.close()
-    return data
+    return call_service(ip, port, action_id, timeout=timeout)
 
 
 def send_goto_service(ip, port, service, altitude, altitude_mode, x, y, z, surge, tolerance_x, tolerance_y,
-                      tolerance_z):
+                      tolerance_z, timeout=SERVICE_TIMEOUT):
     """Call a ROS service of type GOTO."""
-    message_dict = {"service": service,
-                    "op": "call_service",
-                    "args":
-                        {"yaw": 0.0,
-                         "altitude": altitude,
-                         "altitude_mode": altitude_mode,
-                         "blocking": False,
-                         "priority": 10,
-                         "reference": 1,
-                         "position": {
-                             "x": x,
-                             "y": y,
-                             "z": z
-                         },
-                         "disable_axis": {
-                             "x": False,
-                             "y": True,
-                             "z": False,
-                             "roll": True,
-                             "pitch": True,
-                             "yaw": False
-                         },
-                         "position_tolerance": {
-                             "x": tolerance_x,
-                             "y": tolerance_y,
-                             "z": tolerance_z
-                         },
-                         "linear_velocity": {
-                             "x": surge,
-                             "y": 0.0,
-                             "z": 0.5
-                         }
-                         }
-                    }
-    message = json.dumps(message_dict)
-    logger.info('send: {} '.format(message))
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    s.connect((ip, port))
-    s.send(message.encode())
-    response = s.recv(1024)
-    data = json.loads(response.decode())
-    s.close()
-    return data
+    args = {"yaw": 0.0,
+            "altitude": altitude,
+            "altitude_mode": altitude_mode,
+            "blocking": False,
+            "priority": 10,
+            "reference": 1,
+            "position": {
+                "x": x,
+                "y": y,
+                "z": z
+            },
+            "disable_axis": {
+                "x": False,
+                "y": True,
+                "z": False,
+                "roll": True,
+                "pitch": True,
+                "yaw": False
+            },
+            "position_tolerance": {
+                "x": tolerance_x,
+                "y": tolerance_y,
+                "z": tolerance_z
+            },
+            "linear_velocity": {
+                "x": surge,
+                "y": 0.0,
+                "z": 0.5
+            }
+            }
+    logger.info('send: {} {}'.format(service, json.dumps(args)))
+    return call_service(ip, port, service, args, timeout)
 
 
 def get_ros_param(ip, port, name):
     """Obtain param from ROS param server."""
-    message_dict = {"service": "/rosapi/get_param", "op": "call_service",
-                    "args": {"name": name}}
-    message = json.dumps(message_dict)
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    s.connect((ip, port))
-    s.send(message.encode())
-    response = s.recv(1024)
-    data = json.loads(response.decode())
-    s.close()
+    data = call_service(ip, port, "/rosapi/get_param", {"name": name})
     return data['values']
 
 
@@ -136,90 +100,210 @@ def set_ros_param(ip, port, name, value):
     """value if number = "1", "1234,12" ... if boolean "True" or "False"
        if string "\"string\""."""
 
-    message_dict = {"service": "/rosapi/set_param", "op": "call_service",
-                    "args": {"name": name, "value": value}}
-    message = json.dumps(message_dict)
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    s.connect((ip, port))
-    s.send(message.encode())
-    response = s.recv(1024)
-    data = json.loads(response.decode())
-    s.close()
+    data = call_service(ip, port, "/rosapi/set_param", {"name": name, "value": value})
     return data['result']
 
 
-class SubscribeToTopic:
-    """Class helper to subscribe to ROS topic using rosbridge."""
-
-    def __init__(self, ip, port, topic, timeout=5, buffer_enabled=False):
-        try:
-            """Class constructor."""
-            message_dict = {"op": "subscribe", "topic": topic, "throttle_rate": 1}
-            self.message = json.dumps(message_dict)
-            self.s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.s.settimeout(timeout)
-            self.s.connect((ip, port))
-            self.buffer = list()
-            self.buffer_enabled = buffer_enabled
-            self.data = dict()
-            self.keepgoing = True
-            self.t = threading.Thread(target=self.read_topic)
-            self.t.daemon = True
-            self.t.start()
-        except:
-            raise
-
-    def read_topic(self):
-        """Infinite loop that updates last topic data."""
-        self.s.send(self.message.encode())
-        retries = 0
-        while self.keepgoing:
-            try:
-                response = self.s.recv(4096)
-                received = True
-
-            except Exception as e:
-                received = False
-                send_decoded = json.loads(self.message)
-                logger.warning("{} {} ".format(send_decoded['topic'], e))
-                time.sleep(0.05)
-                self.data['valid_data'] = 'old_data'
-                retries += 1
-                if retries > 5:
-                    self.data['valid_data'] = 'disconnected'
-
+def set_ros_params(ip, port, values, timeout=SERVICE_TIMEOUT):
+    """
+    Set several params to ROS param server, pipelined over one connection.
+
+    :param ip: address of the rosbridge server
+    :param port: port of the rosbridge server
+    :param values: dictionary with the value of each param name, formatted as in set_ros_param
+    :param timeout: seconds to wait for all the responses
+    :return: dictionary with the reason of the failure of each param that could not be set
+    """
+    names = list(values)
+    responses = call_services(ip, port, [("/rosapi/set_param", {"name": name, "value": values[name]})
+                                         for name in names], timeout)
+    failures = dict()
+    for name, response in zip(names, responses):
+        if response is None:
+            failures[name] = "no response"
+        elif not response.get('result', False):
+            failures[name] = str(response.get('values') or "rejected")
+    return failures
+
+
+def call_service(ip, port, service, args=None, timeout=SERVICE_TIMEOUT):
+    """
+    Call a ROS service over the pooled connection to a rosbridge server.
+
+    :param ip: address of the rosbridge server
+    :param port: port of the rosbridge server
+    :param service: name of the service
+    :param args: dictionary with the service request
+    :param timeout: seconds to wait for the response
+    :return: the rosbridge service_response message
+    """
+    start = time.time()
+    try:
+        response = service_connection_pool.get_connection(ip, port).call_service(service, args, timeout)
+    except Exception:
+        service_latency.record(service, time.time() - start, failed=True)
+        raise
+    service_latency.record(service, time.time() - start)
+    return response
+
+
+def call_service_async(ip, port, service, args=None, timeout=SERVICE_TIMEOUT):
+    """
+    Call a ROS service without blocking the caller.
+
+    :param ip: address of the rosbridge server
+    :param port: port of the rosbridge server
+    :param service: name of the service
+    :param args: dictionary with the service request
+    :param timeout: seconds to wait for the response
+    :return: concurrent.futures.Future resolved with the rosbridge service_response message
+    """
+    return service_executor.submit(call_service, ip, port, service, args, timeout)
+
+
+def run_async(function, *args, **kwargs):
+    """
+    Run one of the blocking service functions of this module (i.e. send_trigger_service) on the service workers.
+
+    :return: concurrent.futures.Future resolved with the value returned by the function
+    """
+    return service_executor.submit(function, *args, **kwargs)
+
+
+def call_services(ip, port, calls, timeout=SERVICE_TIMEOUT):
+    """
+    Call several ROS services pipelined over the pooled connection to a rosbridge server.
+
+    :param ip: address of the rosbridge server
+    :param port: port of the rosbridge server
+    :param calls: list of (service, args) tuples
+    :param timeout: seconds to wait for all the responses
+    :return: list with the service_response message of each call, None for the calls without response
+    """
+    return service_connection_pool.get_connection(ip, port).call_services(calls, timeout)
+
+
+def close_service_connections():
+    """Close the pooled service connections."""
+    if service_latency.get_stats():
+        logger.info("Service call latencies:\n{}".format(service_latency.format()))
+    service_connection_pool.close()
+
+
+def project_fields(msg, fields):
+    """
+    Keep only the requested fields of a message.
+
+    :param msg: decoded message
+    :param fields: list of field paths, nested fields separated by '/' (i.e. 'position/north')
+    :return: new dictionary with the requested fields, missing fields are skipped
+    """
+    projected = dict()
+    for field in fields:
+        source = msg
+        target = projected
+        names = field.split('/')
+        for name in names[:-1]:
+            source = source.get(name) if isinstance(source, dict) else None
+            if source is None:
+                break
+            target = target.setdefault(name, dict())
+        else:
+            if isinstance(source, dict) and names[-1] in source:
+                target[names[-1]] = source[names[-1]]
+    return projected
+
+
+class TopicSubscription:
+    """Latest-value slot for a topic carried by a RosbridgeConnection."""
+
+    def __init__(self, connection, topic, subscription_id, timeout=5, buffer_enabled=False, fields=None,
+                 buffer_capacity=1000):
+        """Class constructor."""
+        self.connection = connection
+        self.topic = topic
+        self.subscription_id = subscription_id
+        self.timeout = timeout
+        self.fields = fields
+        self.buffer = RingBuffer(buffer_capacity)
+        self.buffer_enabled = buffer_enabled
+        self.data = dict()
+        self.keepgoing = True
+        self.last_received = time.time()
+        self.callback = None
+
+    def set_callback(self, callback):
+        """
+        Set a function called from the reactor thread every time the data changes.
+
+        :param callback: function receiving this subscription, None to remove it
+        """
+        self.callback = callback
+
+    def notify(self):
+        """Call the callback, if any."""
+        callback = self.callback
+        if callback is not None:
             try:
-                if received:
-                    d = json.loads(response.decode())
-                    self.data = d['msg']
-                    self.data['valid_data'] = 'new_data'
-                    retries = 0
+                callback(self)
             except Exception as e:
-                send_decoded = json.loads(self.message)
-                logger.warning("{} {} ".format(send_decoded['topic'], e))
-                time.sleep(0.05)
-                self.data['valid_data'] = 'corrupt_data'
-                retries += 1
-                if retries > 25:
-                    self.data['valid_data'] = 'disconnected'
-
-            if self.buffer_enabled:
-                data = self.data
-                response = None
-                self.buffer.append(data)
+                logger.error("{} callback failed: {}".format(self.topic, e))
+
+    def update(self, msg):
+        """Store a new message received for this topic."""
+        self.last_received = time.time()
+        # each subscription owns its copy, consumers may add keys to it
+        if self.fields:
+            self.data = project_fields(msg, self.fields)
+        else:
+            self.data = dict(msg)
+        self.data['valid_data'] = 'new_data'
+        if self.buffer_enabled:
+            self.buffer.push(self.data)
+        self.notify()
+
+    def check_timeout(self, now):
+        """Flag the last data as old or disconnected if the topic stopped publishing."""
+        elapsed = now - self.last_received
+        if elapsed > self.timeout * 6:
+            valid_data = 'disconnected'
+        elif elapsed > self.timeout:
+            valid_data = 'old_data'
+        else:
+            return
+        if self.data.get('valid_data') != valid_data:
+            self.data['valid_data'] = valid_data
+            self.notify()
+
+    def set_disconnected(self):
+        """Mark the subscription as disconnected."""
+        self.data['valid_data'] = 'disconnected'
+        self.keepgoing = False
+        self.notify()
 
     def get_data(self):
         """Return the last topic data received."""
         return self.data
 
     def get_buffer(self):
-        buffer = self.buffer[:]
-        return buffer
+        """Return a copy of the buffered messages, which are kept in the buffer."""
+        return self.buffer.snapshot()
+
+    def drain_buffer(self, max_items=None):
+        """
+        Move the buffered messages out of the buffer.
+
+        :param max_items: maximum number of messages to take, all of them if None
+        :return: deque with the oldest messages first
+        """
+        return self.buffer.drain(max_items)
 
     def clear_buffer(self):
-        if self.buffer:
-            del self.buffer[:]
+        self.buffer.clear()
+
+    def get_buffer_stats(self):
+        """Return the pushed, dropped, delivered and pending counters of the buffer."""
+        return self.buffer.get_stats()
 
     def get_keepgoing(self):
         return self.keepgoing
@@ -227,7 +311,478 @@ class SubscribeToTopic:
     def close(self):
         self.keepgoing = False
         self.buffer_enabled = False
+        self.callback = None
+        self.connection.unsubscribe(self)
+
+
+class RosbridgeConnection:
+    """
+    Single rosbridge connection multiplexing topic subscriptions and service calls.
+
+    All the operations share one socket, read from the I/O reactor thread, which routes
+    every incoming message by topic to its subscriptions or by id to the pending service call.
+    """
+
+    def __init__(self, ip, port, timeout=5, sock=None):
+        """
+        Class constructor
+
+        :param ip: address of the rosbridge server
+        :param port: port of the rosbridge server
+        :param timeout: seconds to wait for the connection and for each send
+        :param sock: socket already connected to the server, a new one is opened if None
+        """
+        self.ip = ip
+        self.port = port
+        if sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.settimeout(timeout)
+            sock.connect((ip, port))
+        self.s = sock
+        self.s.settimeout(timeout)
+        self.send_lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.subscriptions = dict()
+        self.pending_calls = dict()
+        self.fragments = dict()
+        self.next_id = 0
+        self.decoder = JsonStreamDecoder()
+        self.message_listener = None
+        self.keepgoing = True
+        self.reactor = get_reactor()
+        self.reactor.add_reader(self.s, self.on_readable)
+        # check topic staleness even when nothing is received
+        self.timeout_timer = self.reactor.call_every(1.0, self.check_timeouts)
+
+    def new_id(self, prefix):
+        """Return a new unique operation id."""
+        with self.lock:
+            self.next_id += 1
+            return "{}:{}".format(prefix, self.next_id)
+
+    def set_message_listener(self, listener):
+        """
+        Set a function called from the reactor thread with every message published on a subscribed topic.
+
+        :param listener: function receiving the topic name, the message and its receive time, None to remove it
+        """
+        self.message_listener = listener
+
+    def send(self, message_dict):
+        """Serialize and send a rosbridge operation."""
+        message = json.dumps(message_dict)
+        with self.send_lock:
+            self.s.sendall(message.encode())
+
+    def subscribe(self, topic, timeout=5, buffer_enabled=False, throttle_rate=1, queue_length=None,
+                  fragment_size=None, fields=None, buffer_capacity=1000):
+        """
+        Subscribe to a topic over this connection.
+
+        :param topic: name of the topic
+        :param timeout: seconds without messages before the data is flagged as old
+        :param buffer_enabled: keep every received message in a buffer
+        :param throttle_rate: minimum time in ms between messages sent by rosbridge
+        :param queue_length: messages queued by rosbridge while throttling
+        :param fragment_size: maximum size of the fragments rosbridge splits large messages into
+        :param fields: list of field paths to keep from each message, all fields if None
+        :param buffer_capacity: maximum number of messages kept in the buffer
+        :return: the TopicSubscription holding the last topic data
+        """
+        subscription = TopicSubscription(self, topic, self.new_id("subscribe:" + topic), timeout, buffer_enabled,
+                                         fields, buffer_capacity)
+        with self.lock:
+            self.subscriptions.setdefault(topic, list()).append(subscription)
+        message_dict = {"op": "subscribe", "id": subscription.subscription_id, "topic": topic,
+                        "throttle_rate": throttle_rate}
+        if queue_length is not None:
+            message_dict["queue_length"] = queue_length
+        if fragment_size is not None:
+            message_dict["fragment_size"] = fragment_size
+        self.send(message_dict)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        Remove a subscription from this connection.
+
+        :param subscription: the TopicSubscription returned by subscribe
+        """
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.topic, list())
+            if subscription not in subscriptions:
+                return
+            subscriptions.remove(subscription)
+            if not subscriptions:
+                del self.subscriptions[subscription.topic]
+        if self.keepgoing:
+            try:
+                self.send({"op": "unsubscribe", "id": subscription.subscription_id, "topic": subscription.topic})
+            except OSError as e:
+                logger.warning("{} {} ".format(subscription.topic, e))
+
+    def call_service(self, service, args=None, timeout=5):
+        """
+        Call a ROS service over this connection and wait for its response.
+
+        :param service: name of the service
+        :param args: dictionary with the service request
+        :param timeout: seconds to wait for the response
+        :return: the rosbridge service_response message
+        """
+        call_id = self.send_service_call(service, args)
+        response = self.wait_service_response(call_id, timeout)
+        if response is None:
+            if self.keepgoing:
+                raise socket.timeout("No response from service {}".format(service))
+            raise ConnectionError("Connection closed while calling service {}".format(service))
+        return response
+
+    def call_services(self, calls, timeout=5):
+        """
+        Send several service calls back to back and wait for all their responses.
+
+        :param calls: list of (service, args) tuples
+        :param timeout: seconds to wait for all the responses
+        :return: list with the service_response message of each call, None for the calls without response
+        """
+        call_ids = list()
+        try:
+            for service, args in calls:
+                call_ids.append(self.send_service_call(service, args))
+        except OSError:
+            with self.lock:
+                for call_id in call_ids:
+                    self.pending_calls.pop(call_id, None)
+            raise
+        deadline = time.time() + timeout
+        return [self.wait_service_response(call_id, max(deadline - time.time(), 0)) for call_id in call_ids]
+
+    def send_service_call(self, service, args=None):
+        """
+        Send a service call without waiting for its response.
+
+        :param service: name of the service
+        :param args: dictionary with the service request
+        :return: id of the call to wait for its response with wait_service_response
+        """
+        call_id = self.new_id("call_service:" + service)
+        with self.lock:
+            self.pending_calls[call_id] = [threading.Event(), None]
+        try:
+            self.send({"op": "call_service", "id": call_id, "service": service,
+                       "args": args if args is not None else {}})
+        except OSError:
+            with self.lock:
+                self.pending_calls.pop(call_id, None)
+            raise
+        return call_id
+
+    def wait_service_response(self, call_id, timeout=5):
+        """
+        Wait for the response of a service call sent with send_service_call.
+
+        :param call_id: id of the call
+        :param timeout: seconds to wait for the response
+        :return: the rosbridge service_response message, None on timeout or disconnection
+        """
+        with self.lock:
+            pending_call = self.pending_calls.get(call_id)
+        if pending_call is None:
+            return None
+        try:
+            pending_call[0].wait(timeout)
+        finally:
+            with self.lock:
+                self.pending_calls.pop(call_id, None)
+        return pending_call[1]
+
+    def on_readable(self):
+        """Read the data available on the socket and dispatch the completed messages."""
+        try:
+            response = self.s.recv(65536)
+        except (BlockingIOError, socket.timeout):
+            return
+        except OSError as e:
+            if self.keepgoing:
+                logger.warning("{}:{} {} ".format(self.ip, self.port, e))
+            self.connection_lost()
+            return
+
+        if not response:
+            if self.keepgoing:
+                logger.warning("{}:{} connection closed by peer".format(self.ip, self.port))
+            self.connection_lost()
+            return
+
+        for message in self.decoder.feed(response):
+            self.dispatch(message)
+        self.check_timeouts()
+
+    def connection_lost(self):
+        """Stop reading a connection that failed."""
+        self.keepgoing = False
+        self.timeout_timer.cancel()
+        self.reactor.remove_reader(self.s)
+        self.fragments.clear()
+        self.set_disconnected()
+
+    def dispatch(self, message):
+        """
+        Route a received message to its subscriptions or pending service call.
+
+        :param message: decoded rosbridge message
+        """
+        op = message.get('op')
+        if op == 'publish':
+            listener = self.message_listener
+            if listener is not None:
+                listener(message.get('topic'), message['msg'], time.time())
+            with self.lock:
+                subscriptions = list(self.subscriptions.get(message.get('topic'), list()))
+            for subscription in subscriptions:
+                subscription.update(message['msg'])
+        elif op == 'service_response':
+            with self.lock:
+                pending_call = self.pending_calls.get(message.get('id'))
+                if pending_call is not None:
+                    pending_call[1] = message
+            if pending_call is not None:
+                pending_call[0].set()
+        elif op == 'fragment':
+            self.add_fragment(message)
+        elif op == 'status':
+            logger.warning("rosbridge {}: {}".format(message.get('level'), message.get('msg')))
+
+    def add_fragment(self, fragment):
+        """
+        Store a fragment of a large message and dispatch the message once complete.
+
+        :param fragment: rosbridge fragment message
+        """
+        received = self.fragments.setdefault(fragment['id'], [0, dict()])
+        received[0] = time.time()
+        parts = received[1]
+        parts[fragment['num']] = fragment['data']
+        if len(parts) == fragment['total']:
+            del self.fragments[fragment['id']]
+            try:
+                message = json.loads(''.join(parts[i] for i in range(fragment['total'])))
+            except (ValueError, KeyError) as e:
+                logger.warning("Discarding corrupt fragmented message: {}".format(e))
+                return
+            self.dispatch(message)
+
+    def check_timeouts(self):
+        """Check the staleness of all the subscriptions and discard the stale partial messages."""
+        now = time.time()
+        for fragment_id, received in list(self.fragments.items()):
+            if now - received[0] > FRAGMENT_TIMEOUT:
+                logger.warning("Discarding incomplete fragmented message {}".format(fragment_id))
+                del self.fragments[fragment_id]
+        with self.lock:
+            subscriptions = [s for topic_subscriptions in self.subscriptions.values() for s in topic_subscriptions]
+        for subscription in subscriptions:
+            subscription.check_timeout(now)
+
+    def set_disconnected(self):
+        """Flag all subscriptions as disconnected and release the pending service calls."""
+        with self.lock:
+            subscriptions = [s for topic_subscriptions in self.subscriptions.values() for s in topic_subscriptions]
+            pending_calls = list(self.pending_calls.values())
+        for subscription in subscriptions:
+            subscription.set_disconnected()
+        for pending_call in pending_calls:
+            pending_call[0].set()
+
+    def get_keepgoing(self):
+        return self.keepgoing
+
+    def close(self):
+        """Close the connection and all its subscriptions."""
+        self.keepgoing = False
+        self.timeout_timer.cancel()
+        self.reactor.remove_reader(self.s)
+        try:
+            self.s.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
         self.s.close()
+        self.fragments.clear()
+        self.set_disconnected()
+
+
+class ServiceConnectionPool:
+    """
+    Persistent rosbridge connections shared by the service calls, one per server address.
+
+    Connections are opened on first use and kept alive between calls. Replies are matched
+    to their callers by id, so calls from several threads can be in flight on the same
+    socket. A connection closed by the server is replaced on the next call.
+    """
+
+    def __init__(self, timeout=5):
+        """
+        Class constructor
+
+        :param timeout: seconds to wait for a connection to be established
+        """
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.connections = dict()
+        # one lock per address, so a slow connect does not block the calls to other servers
+        self.connect_locks = dict()
+
+    def get_open_connection(self, ip, port):
+        """
+        Return the pooled connection to a rosbridge server if it is still open.
+
+        :param ip: address of the rosbridge server
+        :param port: port of the rosbridge server
+        :return: connected RosbridgeConnection, None if there is none
+        """
+        with self.lock:
+            connection = self.connections.get((ip, port))
+        if connection is None or not connection.get_keepgoing():
+            return None
+        return connection
+
+    def get_connection(self, ip, port):
+        """
+        Return the connection to a rosbridge server, opening it if needed.
+
+        :param ip: address of the rosbridge server
+        :param port: port of the rosbridge server
+        :return: connected RosbridgeConnection
+        """
+        connection = self.get_open_connection(ip, port)
+        if connection is not None:
+            return connection
+
+        with self.lock:
+            connect_lock = self.connect_locks.setdefault((ip, port), threading.Lock())
+        with connect_lock:
+            # another caller may have connected while this one waited
+            connection = self.get_open_connection(ip, port)
+            if connection is None:
+                connection = RosbridgeConnection(ip, port, self.timeout)
+                set_keepalive(connection.s)
+                with self.lock:
+                    self.connections[(ip, port)] = connection
+            return connection
+
+    def close(self):
+        """Close all the pooled connections."""
+        with self.lock:
+            connections = list(self.connections.values())
+            self.connections.clear()
+        for connection in connections:
+            connection.close()
+
+
+def set_keepalive(s, idle=5, interval=2, count=3):
+    """
+    Enable TCP keep-alive so a connection to a vehicle that went out of range is detected.
+
+    :param s: connected socket
+    :param idle: seconds without traffic before the first probe
+    :param interval: seconds between probes
+    :param count: unanswered probes before the connection is dropped
+    """
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    # per socket tuning is not available on every platform
+    for option, value in (('TCP_KEEPIDLE', idle), ('TCP_KEEPINTVL', interval), ('TCP_KEEPCNT', count)):
+        if hasattr(socket, option):
+            s.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+
+
+class ServiceLatencyHistogram:
+    """Histogram of the latency of the calls to each service."""
+
+    # upper bounds in seconds of the histogram buckets, the last bucket holds the slower calls
+    BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0)
+
+    def __init__(self):
+        """Class constructor."""
+        self.lock = threading.Lock()
+        self.services = dict()
+
+    def record(self, service, latency, failed=False):
+        """
+        Add a call to the histogram.
+
+        :param service: name of the service
+        :param latency: seconds from the request to the response or the failure
+        :param failed: True if the call timed out or the connection failed
+        """
+        with self.lock:
+            stats = self.services.get(service)
+            if stats is None:
+                stats = {'counts': [0] * (len(self.BUCKETS) + 1), 'calls': 0, 'failed': 0, 'total': 0.0,
+                         'max': 0.0}
+                self.services[service] = stats
+            stats['counts'][bisect.bisect_left(self.BUCKETS, latency)] += 1
+            stats['calls'] += 1
+            stats['total'] += latency
+            stats['max'] = max(stats['max'], latency)
+            if failed:
+                stats['failed'] += 1
+
+    def get_stats(self):
+        """
+        Return a copy of the histogram of every service.
+
+        :return: dictionary with the counts per bucket, calls, failed calls, total and max latency of each service
+        """
+        with self.lock:
+            return {service: dict(stats, counts=list(stats['counts'])) for service, stats in self.services.items()}
+
+    def format(self):
+        """Return the histograms as text, one line per service."""
+        lines = list()
+        labels = ["<{:g}s".format(bound) for bound in self.BUCKETS] + [">={:g}s".format(self.BUCKETS[-1])]
+        for service, stats in sorted(self.get_stats().items()):
+            buckets = " ".join("{}:{}".format(label, count) for label, count in zip(labels, stats['counts']) if count)
+            lines.append("{} calls {} failed {} mean {:.3f}s max {:.3f}s [{}]".format(
+                service, stats['calls'], stats['failed'], stats['total'] / stats['calls'], stats['max'], buckets))
+        return "\n".join(lines)
+
+    def clear(self):
+        with self.lock:
+            self.services.clear()
+
+
+service_connection_pool = ServiceConnectionPool()
+service_latency = ServiceLatencyHistogram()
+# calls are multiplexed on the pooled connections, the workers only wait for the responses
+service_executor = ThreadPoolExecutor(max_workers=4)
+
+
+class SubscribeToTopic:
+    """Class helper to subscribe to a single ROS topic using its own rosbridge connection."""
+
+    def __init__(self, ip, port, topic, timeout=5, buffer_enabled=False, sock=None):
+        """Class constructor."""
+        self.connection = RosbridgeConnection(ip, port, timeout, sock)
+        self.subscription = self.connection.subscribe(topic, timeout, buffer_enabled)
+
+    def get_data(self):
+        """Return the last topic data received."""
+        return self.subscription.get_data()
+
+    def get_buffer(self):
+        return self.subscription.get_buffer()
+
+    def clear_buffer(self):
+        self.subscription.clear_buffer()
+
+    def get_keepgoing(self):
+        return self.subscription.get_keepgoing()
+
+    def close(self):
+        self.subscription.close()
+        self.connection.close()
 
 
 if __name__ == "__main__":
@@ -15,30 +15,45 @@ If not, see <http://www.gnu.org/licenses/>.
 """
 
 """
-GPS NMEA-183 GGA sequence driver.
+GPS NMEA-183 driver, reads position from GGA and RMC, heading from HDT, velocity from VTG and accuracy from GST.
 """
 import serial
 import threading
 import time
 import socket
-import select
 import sys
 import logging
 
 from PyQt5.QtCore import pyqtSignal, QObject
 
+from iquaview.src.cola2api.io_reactor import get_reactor
+from iquaview.src.cola2api.nmea import NmeaParser
+from iquaview.src.cola2api.ring_buffer import RingBuffer
+
 # from iquaview.src.utils.printcolor import printerror, printdebug
 
 logger = logging.getLogger(__name__)
 
+# fixes kept until drained, one minute at 10 Hz
+FIX_QUEUE_CAPACITY = 600
+# seconds a fix waits for a newer heading to interpolate its heading
+HEADING_WAIT = 0.5
+# seconds without positions before the connection is flagged as failed
+GPS_TIMEOUT = 5.0
+# seconds between checks of the time since the last position
+WATCHDOG_INTERVAL = 0.5
+
 
-def degree_minute_to_decimal_degree(degree_minute):
-    """ Transform degree minutes values into
-        decimal degrees (i.e., 3830.0 --> 38.5)
+def interpolate_heading(time_a, heading_a, time_b, heading_b, t):
     """
-    degrees = int(degree_minute / 100)
-    minutes = degree_minute - (degrees * 100)
-    return degrees + minutes / 60.0
+    Interpolate a heading in degrees at time t, going through the shortest turn.
+
+    :return: heading in [0, 360)
+    """
+    if time_b <= time_a:
+        return heading_b
+    turn = (heading_b - heading_a + 180.0) % 360.0 - 180.0
+    return (heading_a + turn * (t - time_a) / (time_b - time_a)) % 360.0
 
 
 class GpsDriver(QObject):
@@ -64,12 +79,27 @@ class GpsDriver(QObject):
         self.heading = 0.0
         self.quality = -1
         self.altitude = 0.0
+        self.speed = 0.0
+        self.course = 0.0
+        self.std_latitude = None
+        self.std_longitude = None
+        self.fixes = RingBuffer(FIX_QUEUE_CAPACITY)
+        # fixes waiting for a newer heading
+        self.pending_fixes = list()
+        self.fixes_lock = threading.Lock()
+        self.previous_heading = None
+        self.previous_orientation_time = 0.0
+        self.parser = NmeaParser()
+        self.parser_hdt = NmeaParser()
         self.mode = "NONE"
         self.is_new_gps_data = True
         self.stream = None
         self.stream_gga = None
         self.stream_hdt = None
-        self.t = None
+        self.reactor = None
+        self.watchdog_timer = None
+        self.keepgoing = False
+        self.connection_time = 0.0
         self.orientation_time = 0.0
 
     def connect(self):
@@ -126,126 +156,179 @@ class GpsDriver(QObject):
                 logger.error(line)
                 raise Exception(line)
 
-        if self.ip_addr and self.hdt_port != self.gga_port:
-            # Launch a reading thread
-            self.keepgoing = True
-            self.t = threading.Thread(target=self.read_gps_from_two_ports)
-            self.t.daemon = True
-            self.t.start()
+        # Read from the I/O reactor thread
+        self.keepgoing = True
+        self.connection_time = time.time()
+        self.reactor = get_reactor()
+        if self.mode == "SERIAL":
+            self.reactor.add_reader(self.stream.fileno(), self.read_serial)
+        elif self.stream is not None:
+            self.reactor.add_reader(self.stream, lambda: self.read_socket(self.stream, self.parser))
         else:
-            # Launch a reading thread
-            self.keepgoing = True
-            self.t = threading.Thread(target=self.read_gps)
-            self.t.daemon = True
-            self.t.start()
+            self.reactor.add_reader(self.stream_gga, lambda: self.read_socket(self.stream_gga, self.parser))
+            self.reactor.add_reader(self.stream_hdt, lambda: self.read_socket(self.stream_hdt, self.parser_hdt))
+        self.watchdog_timer = self.reactor.call_every(WATCHDOG_INTERVAL, self.watchdog)
 
         logger.debug("gpsdrv: mode {}".format(self.mode))
         logger.debug("gpsdrv: started")
 
-    def read_gps_from_two_ports(self):
-        """ Parse GPS sequences """
-        while self.keepgoing:
-            # Check availability
-            rlist, _, _ = select.select([self.stream_gga, self.stream_hdt], [], [], 2.0)
-            # Something to read
-            if rlist:
-                for sock in rlist:
-                    if sock is self.stream_gga:
-                        data = self.stream_gga.recv(1000).decode()
-                        lines = data.split('\r\n')
-                        for line in lines:
-                            self.parse_xxGGA(line)
-                    elif sock is self.stream_hdt:
-                        # Read from modem
-                        data = self.stream_hdt.recv(1000).decode()
-                        lines = data.split('\r\n')
-                        for line in lines:
-                            self.parse_xxHDT(line)
-            else:
-                now = time.time()
-                if (now - self.time) > 5.0:
-                    self.is_new_gps_data = False
-                    self.keepgoing = False
-                    self.gpsconnectionfailed.emit()
-
-    def read_gps(self):
-        """ Parse GPS sequences """
-        while self.keepgoing:
-            if self.mode == "SERIAL":
-                try:
-                    line = self.stream.readline().decode()
-                    logger.debug("<<< gpsdrv: {:s}".format(line))
-                    self.parse_xxGGA(line)
-                    self.parse_xxHDT(line)
-                except UnicodeDecodeError:
-                    pass
-                except Exception as e:
-                    logger.error(e)
-                    line = "gpsdrv: error reading serial gps"
-                    logger.error(line)
-                    self.is_new_gps_data = False
-                    self.keepgoing = False
-                    self.gpsconnectionfailed.emit()
-
-            elif self.mode == "TCP":
-                # Check availability
-                rlist, _, _ = select.select([self.stream], [], [], 2.0)
-                # Something to read
-                if rlist:
-                    # Read from modem
-                    data = self.stream.recv(1000).decode()
-                    lines = data.split('\r\n')
-                    for line in lines:
-                        logger.debug("<<< gpsdrv: {:s}".format(line))
-                        self.parse_xxGGA(line)
-                        self.parse_xxHDT(line)
-                else:
-                    now = time.time()
-                    if (now - self.time) > 5.0:
-                        self.is_new_gps_data = False
-                        self.keepgoing = False
-                        self.gpsconnectionfailed.emit()
+    def read_socket(self, sock, parser):
+        """
+        Parse the data available on a TCP stream
+
+        :param sock: readable socket
+        :param parser: NmeaParser of the stream
+        """
+        try:
+            data = sock.recv(1000)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logger.error("gpsdrv: error reading tcp gps: {}".format(e))
+            self.connection_lost()
+            return
+        if not data:
+            logger.error("gpsdrv: connection closed by {}".format(self.ip_addr))
+            self.connection_lost()
+            return
+        logger.debug("<<< gpsdrv: {}".format(data))
+        self.process(data, parser)
 
-            # time.sleep(0.05)
+    def read_serial(self):
+        """ Parse the data available on the serial port """
+        try:
+            data = self.stream.read(self.stream.in_waiting or 1)
+        except Exception as e:
+            logger.error(e)
+            logger.error("gpsdrv: error reading serial gps")
+            self.connection_lost()
+            return
+        logger.debug("<<< gpsdrv: {}".format(data))
+        self.process(data, self.parser)
+
+    def watchdog(self):
+        """ Flag the connection as failed when no position has been received for a while """
+        if (time.time() - max(self.time, self.connection_time)) > GPS_TIMEOUT:
+            logger.error("gpsdrv: no position received for {} seconds".format(GPS_TIMEOUT))
+            self.connection_lost()
+
+    def connection_lost(self):
+        """ Stop reading and notify the failure """
+        if not self.keepgoing:
+            return
+        self.keepgoing = False
+        self.stop_reading()
+        self.is_new_gps_data = False
+        self.gpsconnectionfailed.emit()
+
+    def stop_reading(self):
+        if self.watchdog_timer is not None:
+            self.watchdog_timer.cancel()
+        for stream in (self.stream, self.stream_gga, self.stream_hdt):
+            if stream is not None and self.reactor is not None:
+                self.reactor.remove_reader(stream.fileno() if self.mode == "SERIAL" else stream)
+
+    def process(self, data, parser):
+        """
+        Parse the data read from a stream and update the GPS state with its sentences
 
-    def parse_xxHDT(self, line):
-        """ Parse xxHDT sentence that contains heading in degrees
-            $xxHDT,XX.X,T
+        :param data: bytes read
+        :param parser: NmeaParser of the stream, which keeps the partial sentences between reads
+        """
+        malformed = parser.malformed
+        for sentence_id, fields in parser.feed(data):
+            self.update(sentence_id, fields)
+        if parser.malformed != malformed:
+            logger.error("gpsdrv: problem parsing NMEA sentence")
+            self.gpsparsingfailed.emit()
+
+    def update(self, sentence_id, fields):
+        """
+        Update the GPS state with a parsed sentence
+
+        :param sentence_id: GGA, RMC, VTG, HDT or GST
+        :param fields: dictionary with the fields of the sentence
         """
         self.is_new_gps_data = True
-        if line.startswith('HDT', 3):
-            field = line.split(',')
-            if len(field[1]) > 1:
-                self.heading = float(field[1])
+        if sentence_id == 'GGA':
+            self.time = time.time()
+            if fields['quality'] is not None:
+                self.quality = fields['quality']
+            if fields['altitude'] is not None:
+                self.altitude = fields['altitude']
+            if fields['latitude'] is not None and fields['longitude'] is not None:
+                self.latitude = fields['latitude']
+                self.longitude = fields['longitude']
+                self.add_fix()
+        elif sentence_id == 'HDT':
+            if fields['heading'] is not None:
+                self.previous_heading = self.heading
+                self.previous_orientation_time = self.orientation_time
+                self.heading = fields['heading']
                 self.orientation_time = time.time()
+                self.release_fixes()
+        elif sentence_id in ('RMC', 'VTG'):
+            if fields.get('valid', True):
+                if fields['speed'] is not None:
+                    # knots to m/s
+                    self.speed = fields['speed'] * 0.514444
+                if fields['course'] is not None:
+                    self.course = fields['course']
+        elif sentence_id == 'GST':
+            self.std_latitude = fields['std_latitude']
+            self.std_longitude = fields['std_longitude']
 
-    def parse_xxGGA(self, line):
+    def add_fix(self):
+        """ Queue the current position, it is released once its heading can be interpolated """
+        fix = {"time": self.time,
+               "latitude": self.latitude,
+               "longitude": self.longitude,
+               "quality": self.quality,
+               "altitude": self.altitude,
+               "heading": self.heading,
+               "speed": self.speed,
+               "course": self.course}
+        with self.fixes_lock:
+            self.pending_fixes.append(fix)
+        self.release_fixes()
+
+    def release_fixes(self, now=None):
         """
-        Read xxGGA sequence.
-        $xxGGA,time,lat,N/S,lon,E/W,fix,sat,hdop,alt,M,hgeo,M,,*chk
-        $xxGGA, 082051.800, 3840.3358, N, 00908.4963, W, 1, 9, 0.86, 2.2, M, 50.7, M,, *46
+        Move the pending fixes to the queue once a heading newer than them has been received,
+        interpolating it between the headings before and after each fix.
+        Fixes waiting longer than HEADING_WAIT are released with the last heading.
+
+        :param now: current time, time.time() if None
         """
-        self.is_new_gps_data = True
-        try:
-            if line.startswith('GGA', 3):
-                field = line.split(',')
-                if len(field) > 5:
-                    # time, lat, N/S, lon, E/W
-                    self.time = time.time()
-                    self.latitude = degree_minute_to_decimal_degree(
-                        float(field[2]))
-                    if field[3] == 'S':
-                        self.latitude = self.latitude * -1.0
-                    self.longitude = degree_minute_to_decimal_degree(
-                        float(field[4]))
-                    if field[5] == 'W':
-                        self.longitude = self.longitude * -1.0
-                if len(field) > 9:
-                    self.quality = int(field[6])
-                    self.altitude = float(field[9])
-        except Exception as e:
-            logger.error("gpsdrv: problem parsing $xxGGA: {}".format(e))
-            self.gpsparsingfailed.emit()
+        if now is None:
+            now = time.time()
+        with self.fixes_lock:
+            while self.pending_fixes:
+                fix = self.pending_fixes[0]
+                if self.orientation_time >= fix['time']:
+                    if self.previous_heading is not None and self.previous_orientation_time <= fix['time']:
+                        fix['heading'] = interpolate_heading(self.previous_orientation_time, self.previous_heading,
+                                                             self.orientation_time, self.heading, fix['time'])
+                elif now - fix['time'] > HEADING_WAIT:
+                    fix['heading'] = self.heading
+                else:
+                    break
+                self.fixes.push(self.pending_fixes.pop(0))
+
+    def drain_fixes(self, max_items=None):
+        """
+        Take the queued fixes
+
+        :param max_items: maximum number of fixes to take, all of them if None
+        :return: list of fixes, oldest first, with time, latitude, longitude, quality, altitude, heading,
+                 speed and course
+        """
+        self.release_fixes()
+        return list(self.fixes.drain(max_items))
+
+    def get_fix_stats(self):
+        """ Return the pushed, dropped, delivered and pending counters of the fix queue """
+        return self.fixes.get_stats()
 
     def get_data(self):
         """ Returns last gathered latitude, longitude position and time """
@@ -264,16 +347,16 @@ class GpsDriver(QObject):
                 "altitude": self.altitude,
                 "orientation": self.heading,
                 "orientation_time": self.orientation_time,
+                "speed": self.speed,
+                "course": self.course,
+                "std_latitude": self.std_latitude,
+                "std_longitude": self.std_longitude,
                 "status": status}
 
     def close(self):
         """Close the open connections."""
         self.keepgoing = False
-        try:
-            if self.t is not None:
-                self.t.join()
-        except RuntimeError as e:
-            logger.error(str(e.args[0]))
+        self.stop_reading()
         if self.stream is not None:
             self.stream.close()
         if self.stream_hdt is not None:
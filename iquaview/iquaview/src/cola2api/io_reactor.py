@@ -0,0 +1,383 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+"""
+Single I/O thread serving the sockets and serial ports of all the vehicle and sensor connections.
+"""
+
+import errno
+import heapq
+import itertools
+import logging
+import os
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class Timer:
+    """Handle of a function scheduled on the reactor."""
+
+    def __init__(self, due, interval, fn, args):
+        """Class constructor."""
+        self.due = due
+        self.interval = interval
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        """Prevent the function from being called again."""
+        self.cancelled = True
+
+
+class ReconnectBackoff:
+    """Exponentially growing delay between reconnection attempts."""
+
+    def __init__(self, initial=1.0, maximum=30.0, factor=2.0):
+        """
+        Class constructor
+
+        :param initial: seconds before the first retry
+        :param maximum: upper bound of the delay in seconds
+        :param factor: growth of the delay after each failed attempt
+        """
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.delay = initial
+
+    def next_delay(self):
+        """Return the delay before the next attempt and grow it for the following one."""
+        delay = self.delay
+        self.delay = min(self.delay * self.factor, self.maximum)
+        return delay
+
+    def reset(self):
+        """Go back to the initial delay, called once a connection succeeds."""
+        self.delay = self.initial
+
+
+class IOReactor:
+    """
+    Event loop multiplexing many file descriptors on one thread with a selector.
+
+    Connections register a callback that is called from the reactor thread when their
+    file is readable or writable, and schedule timeouts, watchdogs and reconnections
+    as timers instead of sleeping. Callbacks must not block, results are handed to the
+    Qt thread through queued signals or queues drained by a QTimer.
+    """
+
+    def __init__(self):
+        """Class constructor."""
+        self.selector = selectors.DefaultSelector()
+        self.lock = threading.Lock()
+        self.timers = list()
+        self.sequence = itertools.count()
+        self.callbacks = deque()
+        self.readers = dict()
+        self.writers = dict()
+        self.thread = None
+        self.keepgoing = False
+        # a byte written to the socket pair wakes the selector up when work is added from another thread
+        self.wakeup_recv, self.wakeup_send = socket.socketpair()
+        self.wakeup_recv.setblocking(False)
+        self.wakeup_send.setblocking(False)
+        self.selector.register(self.wakeup_recv, selectors.EVENT_READ)
+
+    def start(self):
+        """Start the reactor thread if it is not running."""
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.keepgoing = True
+            self.thread = threading.Thread(target=self.run, name="IOReactor")
+            self.thread.daemon = True
+            self.thread.start()
+
+    def stop(self):
+        """Stop the reactor thread, registered files are left open."""
+        self.keepgoing = False
+        self.wakeup()
+        if self.thread is not None and not self.in_reactor_thread():
+            self.thread.join()
+
+    def in_reactor_thread(self):
+        """Tell if the caller runs on the reactor thread."""
+        return threading.current_thread() is self.thread
+
+    def wakeup(self):
+        try:
+            self.wakeup_send.send(b'\0')
+        except (BlockingIOError, OSError):
+            # the selector already has a pending wake up
+            pass
+
+    def call_soon(self, fn, *args):
+        """
+        Call a function from the reactor thread as soon as possible. Can be called from any thread.
+
+        :param fn: function to call
+        """
+        self.callbacks.append((fn, args))
+        if not self.in_reactor_thread():
+            self.wakeup()
+
+    def call_later(self, delay, fn, *args):
+        """
+        Call a function from the reactor thread after a delay. Can be called from any thread.
+
+        :param delay: seconds to wait
+        :param fn: function to call
+        :return: the Timer, which can be cancelled
+        """
+        return self.add_timer(Timer(time.monotonic() + delay, None, fn, args))
+
+    def call_every(self, interval, fn, *args):
+        """
+        Call a function from the reactor thread periodically until its timer is cancelled.
+
+        :param interval: seconds between calls
+        :param fn: function to call
+        :return: the Timer, which can be cancelled
+        """
+        return self.add_timer(Timer(time.monotonic() + interval, interval, fn, args))
+
+    def add_timer(self, timer):
+        with self.lock:
+            heapq.heappush(self.timers, (timer.due, next(self.sequence), timer))
+        if not self.in_reactor_thread():
+            self.wakeup()
+        return timer
+
+    def run_in_loop(self, fn, *args, timeout=2.0):
+        """
+        Call a function from the reactor thread and wait until it has been called.
+
+        Used to change the registered files, so once it returns no callback of a
+        removed file is running or will run.
+
+        :param fn: function to call
+        :param timeout: seconds to wait for the reactor
+        :return: the value returned by fn
+        """
+        if self.in_reactor_thread() or not self.keepgoing:
+            return fn(*args)
+        done = threading.Event()
+        result = list()
+
+        def call():
+            try:
+                result.append(fn(*args))
+            finally:
+                done.set()
+
+        self.call_soon(call)
+        if not done.wait(timeout):
+            logger.warning("I/O reactor did not run {} in {} seconds".format(fn.__name__, timeout))
+        return result[0] if result else None
+
+    def add_reader(self, fileobj, callback):
+        """
+        Call a function from the reactor thread each time a file has data to read.
+
+        :param fileobj: socket, serial port or file descriptor
+        :param callback: function called without arguments
+        """
+        self.run_in_loop(self.update_registration, fileobj, self.readers, callback)
+
+    def remove_reader(self, fileobj):
+        """Stop watching a file for reading."""
+        self.run_in_loop(self.update_registration, fileobj, self.readers, None)
+
+    def add_writer(self, fileobj, callback):
+        """
+        Call a function from the reactor thread each time a file can be written.
+
+        :param fileobj: socket, serial port or file descriptor
+        :param callback: function called without arguments
+        """
+        self.run_in_loop(self.update_registration, fileobj, self.writers, callback)
+
+    def remove_writer(self, fileobj):
+        """Stop watching a file for writing."""
+        self.run_in_loop(self.update_registration, fileobj, self.writers, None)
+
+    def update_registration(self, fileobj, callbacks, callback):
+        fd = fileobj if isinstance(fileobj, int) else fileobj.fileno()
+        if fd < 0:
+            return
+        if callback is None:
+            callbacks.pop(fd, None)
+        else:
+            callbacks[fd] = callback
+        events = 0
+        if fd in self.readers:
+            events |= selectors.EVENT_READ
+        if fd in self.writers:
+            events |= selectors.EVENT_WRITE
+        try:
+            registered = self.selector.get_key(fd).events
+        except KeyError:
+            registered = 0
+        if events == registered:
+            return
+        if not events:
+            self.selector.unregister(fd)
+        elif not registered:
+            self.selector.register(fd, events)
+        else:
+            self.selector.modify(fd, events)
+
+    def connect_tcp(self, address, timeout, callback):
+        """
+        Open a TCP connection without blocking.
+
+        :param address: (ip, port) tuple
+        :param timeout: seconds to wait for the connection to be established
+        :param callback: function called from the reactor thread with the connected socket and None,
+                         or with None and the exception if the connection failed
+        :return: the Timer of the connection timeout, cancelling it abandons the attempt
+        """
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.setblocking(False)
+        attempt = self.call_later(timeout, self.connect_timeout, s, address, callback)
+        error = s.connect_ex(address)
+        if error in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+            self.add_writer(s, lambda: self.connect_done(s, address, attempt, callback))
+        else:
+            attempt.cancel()
+            s.close()
+            self.call_soon(callback, None, OSError(error, "Cannot connect to {}:{}".format(*address)))
+        return attempt
+
+    def connect_done(self, s, address, attempt, callback):
+        self.remove_writer(s)
+        if attempt.cancelled:
+            s.close()
+            return
+        attempt.cancel()
+        error = s.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if error:
+            s.close()
+            callback(None, OSError(error, "Cannot connect to {}:{}".format(*address)))
+        else:
+            callback(s, None)
+
+    def connect_timeout(self, s, address, callback):
+        self.remove_writer(s)
+        s.close()
+        callback(None, socket.timeout("Timeout connecting to {}:{}".format(*address)))
+
+    def run(self):
+        """Loop dispatching the ready files, the due timers and the queued calls."""
+        while self.keepgoing:
+            try:
+                events = self.selector.select(self.next_timeout())
+            except OSError as e:
+                # a file was closed while still registered
+                logger.error("I/O reactor select failed: {}".format(e))
+                self.drop_closed_files()
+                continue
+
+            for key, mask in events:
+                if key.fileobj is self.wakeup_recv:
+                    self.drain_wakeup()
+                    continue
+                if mask & selectors.EVENT_READ:
+                    self.dispatch(self.readers.get(key.fd))
+                if mask & selectors.EVENT_WRITE:
+                    self.dispatch(self.writers.get(key.fd))
+
+            self.run_timers()
+            for _ in range(len(self.callbacks)):
+                fn, args = self.callbacks.popleft()
+                self.dispatch(fn, *args)
+
+    @staticmethod
+    def dispatch(fn, *args):
+        if fn is None:
+            return
+        try:
+            fn(*args)
+        except Exception as e:
+            logger.exception("I/O reactor callback {} failed: {}".format(getattr(fn, '__name__', fn), e))
+
+    def next_timeout(self):
+        """Return the seconds until the next timer is due, None if there are no timers."""
+        if self.callbacks:
+            return 0
+        with self.lock:
+            while self.timers and self.timers[0][2].cancelled:
+                heapq.heappop(self.timers)
+            if not self.timers:
+                return None
+            return max(self.timers[0][0] - time.monotonic(), 0)
+
+    def run_timers(self):
+        now = time.monotonic()
+        while True:
+            with self.lock:
+                if not self.timers or self.timers[0][0] > now:
+                    return
+                _, _, timer = heapq.heappop(self.timers)
+            if timer.cancelled:
+                continue
+            if timer.interval is not None:
+                # keep the cadence, skipping the periods missed while the loop was busy
+                timer.due = max(timer.due + timer.interval, now)
+                with self.lock:
+                    heapq.heappush(self.timers, (timer.due, next(self.sequence), timer))
+            else:
+                timer.cancelled = True
+            self.dispatch(timer.fn, *timer.args)
+
+    def drain_wakeup(self):
+        try:
+            while self.wakeup_recv.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def drop_closed_files(self):
+        for key in list(self.selector.get_map().values()):
+            if key.fileobj is self.wakeup_recv:
+                continue
+            try:
+                os.fstat(key.fd)
+            except OSError:
+                logger.warning("Removing closed file descriptor {} from the I/O reactor".format(key.fd))
+                self.readers.pop(key.fd, None)
+                self.writers.pop(key.fd, None)
+                self.selector.unregister(key.fd)
+
+
+reactor = None
+reactor_lock = threading.Lock()
+
+
+def get_reactor():
+    """Return the I/O reactor shared by all the connections, starting it on first use."""
+    global reactor
+    with reactor_lock:
+        if reactor is None:
+            reactor = IOReactor()
+        reactor.start()
+        return reactor
@@ -0,0 +1,121 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+"""
+Incremental framing of the JSON messages sent by rosbridge over a TCP stream.
+"""
+
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JsonStreamDecoder:
+    """
+    Split a stream of concatenated JSON objects into complete messages.
+
+    Data is fed as it arrives from the socket, in chunks of any size. Messages are
+    decoded with a raw_decode loop over a growable bytearray. A message can only be
+    completed by a chunk holding a closing brace, so chunks without one are just
+    appended and large messages split across many reads are not parsed repeatedly.
+    """
+
+    def __init__(self):
+        """Class constructor."""
+        self.buffer = bytearray()
+        self.decoder = json.JSONDecoder()
+        self.decoded = 0
+        self.corrupt = 0
+
+    def feed(self, data):
+        """
+        Add received bytes to the stream.
+
+        :param data: bytes received from the socket
+        :return: list with the messages completed by this chunk
+        """
+        messages = list()
+        self.buffer += data
+        if data.rfind(b'}') < 0:
+            return messages
+
+        # closing braces are ASCII, cutting after the last one never splits a UTF-8 sequence
+        end = self.buffer.rfind(b'}') + 1
+        text = self.buffer[:end].decode(errors='surrogateescape')
+        pos = 0
+        size = len(text)
+        while True:
+            start = self.skip(text, pos)
+            if start == size:
+                pos = size
+                break
+            try:
+                message, pos = self.decoder.raw_decode(text, start)
+            except json.JSONDecodeError as e:
+                if self.is_incomplete(text, e):
+                    pos = start
+                    break
+                logger.warning("Discarding corrupt message: {}".format(e))
+                self.corrupt += 1
+                # resynchronize on the next object
+                pos = text.find('{', start + 1)
+                if pos < 0:
+                    pos = size
+                continue
+            messages.append(message)
+            self.decoded += 1
+
+        if pos == size:
+            del self.buffer[:end]
+        elif pos > 0:
+            del self.buffer[:len(text[:pos].encode(errors='surrogateescape'))]
+        return messages
+
+    @staticmethod
+    def skip(text, pos):
+        """
+        Skip the separators between messages.
+
+        :return: position of the next message in text
+        """
+        size = len(text)
+        while pos < size and text[pos] in ' \t\n\r':
+            pos += 1
+        return pos
+
+    @staticmethod
+    def is_incomplete(text, error):
+        """
+        Tell if a decoding error is caused by a message not fully received yet.
+
+        :param text: decoded text
+        :param error: the JSONDecodeError raised by raw_decode
+        :return: True if more data can complete the message, False if it is corrupt
+        """
+        if error.pos >= len(text):
+            return True
+        if error.msg.startswith('Unterminated string'):
+            return True
+        # escape sequence cut at the end of the text
+        return error.msg.startswith('Invalid') and 'escape' in error.msg and len(text) - error.pos <= 6
+
+    def pending(self):
+        """Return the number of bytes of the incomplete message kept in the buffer."""
+        return len(self.buffer)
+
+    def reset(self):
+        """Discard any partial message."""
+        del self.buffer[:]
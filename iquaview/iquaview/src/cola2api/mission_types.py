@@ -17,10 +17,19 @@ If not, see <http://www.gnu.org/licenses/>.
 Class for generating/reading an xml mission file.
 A mission contains one or more mission steps.
 A mission step contains one mission maneuver (waypoint, section or park) plus one or more mission actions.
+
+The values of the steps are stored by column in a MissionColumns, one row per step. Steps, maneuvers,
+positions and tolerances are views of one row of a MissionColumns, the ones created on their own get
+a row of a new MissionColumns, and their values are copied when they are added to a mission or a step.
 """
+import os
+import itertools
 import logging
+
+import numpy as np
 from lxml import etree as ET
 
+NO_MANEUVER = -1
 WAYPOINT_MANEUVER = 0
 SECTION_MANEUVER = 1
 PARK_MANEUVER = 2
@@ -28,31 +37,260 @@ MISSION_MANEUVER = 0
 MISSION_CONFIGURATION = 1
 MISSION_ACTION = 2
 
+# columns of the values of a step, the position of a section is its final position
+LATITUDE = 0
+LONGITUDE = 1
+Z = 2
+ALTITUDE_MODE = 3
+INITIAL_LATITUDE = 4
+INITIAL_LONGITUDE = 5
+INITIAL_Z = 6
+INITIAL_ALTITUDE_MODE = 7
+SPEED = 8
+TIME = 9
+TOLERANCE_X = 10
+TOLERANCE_Y = 11
+TOLERANCE_Z = 12
+NUM_COLUMNS = 13
+
+# first column of each position of a step
+POSITION = LATITUDE
+INITIAL_POSITION = INITIAL_LATITUDE
+
+# steps serialized at once when writing a mission
+STEPS_PER_CHUNK = 1000
+
+# versions given to the MissionColumns, shared so a version is never repeated
+versions = itertools.count(1)
+
 logger = logging.getLogger(__name__)
 
 
+def child_texts(element):
+    """Return a dict with the text of the children of an element by tag."""
+    return {child.tag: child.text for child in element}
+
+
 class Parameter(object):
+    __slots__ = ('value',)
+
     def __init__(self, value=""):
         self.value = value
 
 
-class MissionManeuver(object):
+def copy_actions(actions):
+    """Return a copy of the actions list of a step, None for steps without actions."""
+    return list(actions) if actions is not None else None
+
+
+class MissionColumns(object):
+    """
+    Values of the steps of a mission stored by column.
+
+    Positions, speed, time and tolerance are rows of a float64 array with one contiguous column per step,
+    maneuver types are coded in an int8 array and actions are kept in a list, None for steps without actions.
+    The version increases every time the steps change.
+    """
+    __slots__ = ('values', 'types', 'actions', 'size', 'version')
+
+    def __init__(self, size=0):
+        """
+        Class constructor.
+
+        :param size: number of steps, all of them without maneuver
+        """
+        capacity = max(size, 1)
+        self.values = np.zeros((NUM_COLUMNS, capacity))
+        self.types = np.full(capacity, NO_MANEUVER, dtype=np.int8)
+        self.actions = [None] * size
+        self.size = size
+        self.version = next(versions)
+
+    def touch(self):
+        """Give a new version to the steps, to be called on every change."""
+        self.version = next(versions)
+
+    def reserve(self, capacity):
+        """Grow the arrays to hold at least capacity steps."""
+        if capacity <= len(self.types):
+            return
+        values = np.zeros((NUM_COLUMNS, capacity))
+        values[:, :self.size] = self.values[:, :self.size]
+        types = np.full(capacity, NO_MANEUVER, dtype=np.int8)
+        types[:self.size] = self.types[:self.size]
+        self.values = values
+        self.types = types
+
+    def shrink(self):
+        """Release the capacity not used by the steps."""
+        self.values = self.values[:, :self.size].copy()
+        self.types = self.types[:self.size].copy()
+
+    def append(self):
+        """
+        Add a step without maneuver at the end.
+
+        :return: row of the new step
+        """
+        row = self.size
+        if row == len(self.types):
+            self.reserve(max(2 * row, 16))
+        self.values[:, row] = 0.0
+        self.types[row] = NO_MANEUVER
+        self.actions.append(None)
+        self.size += 1
+        self.touch()
+        return row
+
+    def insert(self, row, columns):
+        """
+        Insert the steps of another MissionColumns.
+
+        :param row: row of the first inserted step
+        :param columns: MissionColumns with the steps to insert
+        """
+        count = columns.size
+        end = self.size + count
+        if end > len(self.types):
+            self.reserve(max(end, 2 * self.size))
+        self.values[:, row + count:end] = self.values[:, row:self.size]
+        self.types[row + count:end] = self.types[row:self.size]
+        self.values[:, row:row + count] = columns.values[:, :count]
+        self.types[row:row + count] = columns.types[:count]
+        self.actions[row:row] = columns.actions
+        self.size = end
+        self.touch()
+
+    def delete(self, row):
+        """Remove the step of a row."""
+        self.values[:, row:self.size - 1] = self.values[:, row + 1:self.size]
+        self.types[row:self.size - 1] = self.types[row + 1:self.size]
+        del self.actions[row]
+        self.size -= 1
+        self.touch()
+
+    def copy(self):
+        """Return a MissionColumns with a copy of the steps."""
+        columns = MissionColumns()
+        columns.values = self.values[:, :self.size].copy()
+        columns.types = self.types[:self.size].copy()
+        columns.actions = [copy_actions(actions) for actions in self.actions]
+        columns.size = self.size
+        return columns
+
+    def column(self, column):
+        """Return a read-only view of the values of a column for all the steps."""
+        values = self.values[column, :self.size]
+        values.flags.writeable = False
+        return values
+
+    @staticmethod
+    def take(steps):
+        """
+        Copy the rows of some steps in a new MissionColumns.
+
+        :param steps: list of MissionStep
+        :return: MissionColumns with the steps in the same order
+        """
+        columns = MissionColumns(len(steps))
+        if len({id(step.columns) for step in steps}) == 1:
+            source = steps[0].columns
+            rows = np.fromiter((step.get_row() for step in steps), dtype=np.intp, count=len(steps))
+            columns.values[:] = source.values[:, rows]
+            columns.types[:] = source.types[rows]
+        else:
+            for i, step in enumerate(steps):
+                row = step.get_row()
+                columns.values[:, i] = step.columns.values[:, row]
+                columns.types[i] = step.columns.types[row]
+        columns.actions = [copy_actions(step.columns.actions[step.get_row()]) for step in steps]
+        return columns
+
+
+class ColumnsView(object):
+    """Base of the objects that read and write the values of one row of a MissionColumns."""
+    __slots__ = ('columns', 'row')
+
+    @classmethod
+    def view(cls, columns, row):
+        """Return an object of the class for a row of columns."""
+        view = cls.__new__(cls)
+        view.columns = columns
+        view.row = row
+        return view
+
+    def get_row(self):
+        """
+        Return the row of the view, raising IndexError if the row is past the end of the columns.
+
+        Only rows removed from the end are detected, a view of an earlier row points to
+        whatever step is in that row after steps are inserted or removed before it.
+        """
+        if self.row >= self.columns.size:
+            raise IndexError("Step {} is out of a mission of {} steps".format(self.row, self.columns.size))
+        return self.row
+
+    def get_value(self, column):
+        return float(self.columns.values[column, self.get_row()])
+
+    def set_value(self, column, value):
+        self.columns.values[column, self.get_row()] = float(value)
+        self.columns.touch()
+
+    def copy_values(self, other, column, count):
+        """Copy count values from the same columns of another view."""
+        self.columns.values[column:column + count, self.get_row()] = \
+            other.columns.values[column:column + count, other.get_row()]
+        self.columns.touch()
+
+
+class MissionManeuver(ColumnsView):
+    __slots__ = ()
+
     def __init__(self, m_type):
-        self.maneuver_type = m_type
+        self.columns = MissionColumns(1)
+        self.row = 0
+        self.columns.types[0] = m_type
 
     def __str__(self):
         logger.info("MissionManeuver To be overrided\n")
 
     def get_maneuver_type(self):
-        return self.maneuver_type
+        return int(self.columns.types[self.get_row()])
 
+    def get_speed(self):
+        return self.get_value(SPEED)
+
+    def set_speed(self, speed):
+        self.set_value(SPEED, speed)
+
+    def get_tolerance(self):
+        return MissionTolerance.view(self.columns, self.row)
+
+    def set_tolerance(self, tolerance):
+        if tolerance is not None:
+            self.get_tolerance().copy(tolerance)
+
+    maneuver_type = property(get_maneuver_type)
+    speed = property(get_speed, set_speed)
+    tolerance = property(get_tolerance, set_tolerance)
+
+
+class MissionPosition(ColumnsView):
+    __slots__ = ('column',)
 
-class MissionPosition(object):
     def __init__(self, lat=0.0, lon=0.0, z=0.0, mode=False):
-        self.latitude = lat
-        self.longitude = lon
-        self.z = z
-        self.altitude_mode = mode
+        self.columns = MissionColumns(1)
+        self.row = 0
+        self.column = POSITION
+        self.set(lat, lon, z, mode)
+
+    @classmethod
+    def view(cls, columns, row, column=POSITION):
+        """Return the position of a row of columns starting at column."""
+        view = super(MissionPosition, cls).view(columns, row)
+        view.column = column
+        return view
 
     def __str__(self):
         ret = "[" + str(self.latitude) + ", " + str(self.longitude) + ", " + str(self.z)
@@ -63,147 +301,195 @@ class MissionPosition(object):
         return ret
 
     def copy(self, position):
-        self.latitude = position.latitude
-        self.longitude = position.longitude
-        self.z = position.z
-        self.altitude_mode = position.altitude_mode
+        self.columns.values[self.column:self.column + 4, self.get_row()] = \
+            position.columns.values[position.column:position.column + 4, position.get_row()]
+        self.columns.touch()
 
     def set(self, latitude, longitude, z, altitude_mode):
-        self.latitude = latitude
-        self.longitude = longitude
-        self.z = z
-        self.altitude_mode = altitude_mode
+        self.columns.values[self.column:self.column + 4, self.get_row()] = (float(latitude), float(longitude),
+                                                                            float(z), bool(altitude_mode))
+        self.columns.touch()
 
     def set_lat_lon(self, latitude, longitude):
-        self.latitude = latitude
-        self.longitude = longitude
+        self.set_latitude(latitude)
+        self.set_longitude(longitude)
 
     def get_latitude(self):
-        return self.latitude
+        return self.get_value(self.column)
+
+    def set_latitude(self, latitude):
+        self.set_value(self.column, latitude)
 
     def get_longitude(self):
-        return self.longitude
+        return self.get_value(self.column + 1)
+
+    def set_longitude(self, longitude):
+        self.set_value(self.column + 1, longitude)
 
     def get_z(self):
-        return self.z
+        return self.get_value(self.column + 2)
+
+    def set_z(self, z):
+        self.set_value(self.column + 2, z)
 
     def get_altitude_mode(self):
-        return self.altitude_mode
+        return bool(self.columns.values[self.column + 3, self.get_row()])
+
+    def set_altitude_mode(self, altitude_mode):
+        self.set_value(self.column + 3, bool(altitude_mode))
+
+    latitude = property(get_latitude, set_latitude)
+    longitude = property(get_longitude, set_longitude)
+    z = property(get_z, set_z)
+    altitude_mode = property(get_altitude_mode, set_altitude_mode)
 
 
-class MissionTolerance(object):
+class MissionTolerance(ColumnsView):
+    __slots__ = ()
+
     def __init__(self, x=0.0, y=0.0, z=0.0):
-        self.x = x
-        self.y = y
-        self.z = z
+        self.columns = MissionColumns(1)
+        self.row = 0
+        self.set(x, y, z)
 
     def __str__(self):
         return "[" + str(self.x) + ", " + str(self.y) + ", " + str(self.z) + "]"
 
     def copy(self, tolerance):
-        self.x = tolerance.x
-        self.y = tolerance.y
-        self.z = tolerance.z
+        self.copy_values(tolerance, TOLERANCE_X, 3)
 
     def set(self, x, y, z):
-        self.x = x
-        self.y = y
-        self.z = z
+        self.columns.values[TOLERANCE_X:TOLERANCE_Z + 1, self.get_row()] = (float(x), float(y), float(z))
+        self.columns.touch()
+
+    def get_x(self):
+        return self.get_value(TOLERANCE_X)
+
+    def set_x(self, x):
+        self.set_value(TOLERANCE_X, x)
+
+    def get_y(self):
+        return self.get_value(TOLERANCE_Y)
+
+    def set_y(self, y):
+        self.set_value(TOLERANCE_Y, y)
+
+    def get_z(self):
+        return self.get_value(TOLERANCE_Z)
+
+    def set_z(self, z):
+        self.set_value(TOLERANCE_Z, z)
+
+    x = property(get_x, set_x)
+    y = property(get_y, set_y)
+    z = property(get_z, set_z)
 
 
 class MissionWaypoint(MissionManeuver):
+    __slots__ = ()
+
     def __init__(self, position=None, speed=0.0, tolerance=None):
         super(MissionWaypoint, self).__init__(WAYPOINT_MANEUVER)
-        self.position = position
-        self.speed = speed
-        self.tolerance = tolerance
+        self.set(position, speed, tolerance)
 
     def __str__(self):
         return "Waypoint -> " + str(self.position) + " at " + str(self.speed) + "m/s with tolerance " + str(
             self.tolerance)
 
     def set(self, position, speed, tolerance):
-        self.position = position
-        self.speed = speed
-        self.tolerance = tolerance
+        self.set_position(position)
+        self.set_speed(speed)
+        self.set_tolerance(tolerance)
 
     def set_position(self, position):
-        self.position = position
+        if position is not None:
+            self.get_position().copy(position)
 
     def get_position(self):
-        return self.position
-
-    def get_speed(self):
-        return self.speed
+        return MissionPosition.view(self.columns, self.row, POSITION)
 
-    def get_tolerance(self):
-        return self.tolerance
+    position = property(get_position, set_position)
 
 
 class MissionSection(MissionManeuver):
+    __slots__ = ()
+
     def __init__(self, initial_position=None, final_position=None, speed=0.0, tolerance=None):
         super(MissionSection, self).__init__(SECTION_MANEUVER)
-        self.initial_position = initial_position
-        self.final_position = final_position
-        self.speed = speed
-        self.tolerance = tolerance
+        self.set(initial_position, final_position, speed, tolerance)
 
     def __str__(self):
         return "Section -> " + str(self.initial_position) + " to " + str(self.final_position)
 
     def set(self, initial_position, final_position, speed, tolerance):
-        self.initial_position = initial_position
-        self.final_position = final_position
-        self.speed = speed
-        self.tolerance = tolerance
+        self.set_initial_position(initial_position)
+        self.set_final_position(final_position)
+        self.set_speed(speed)
+        self.set_tolerance(tolerance)
 
     def get_final_position(self):
-        return self.final_position
+        return MissionPosition.view(self.columns, self.row, POSITION)
+
+    def set_final_position(self, position):
+        if position is not None:
+            self.get_final_position().copy(position)
 
     def get_initial_position(self):
-        return self.initial_position
+        return MissionPosition.view(self.columns, self.row, INITIAL_POSITION)
 
-    def get_position(self):
-        return self.final_position
+    def set_initial_position(self, position):
+        if position is not None:
+            self.get_initial_position().copy(position)
 
-    def get_speed(self):
-        return self.speed
+    def get_position(self):
+        return self.get_final_position()
 
-    def get_tolerance(self):
-        return self.tolerance
+    initial_position = property(get_initial_position, set_initial_position)
+    final_position = property(get_final_position, set_final_position)
+    position = property(get_final_position, set_final_position)
 
 
 class MissionPark(MissionManeuver):
+    __slots__ = ()
+
     def __init__(self, position=None, speed=0.0, time=0.0, tolerance=None):
         super(MissionPark, self).__init__(PARK_MANEUVER)
-        self.position = position
-        self.speed = speed
-        self.time = time
-        self.tolerance = tolerance
+        self.set(position, speed, time, tolerance)
 
     def __str__(self):
         return "Park -> " + str(self.position) + " for " + str(self.time) + "s with tolerance " + str(self.tolerance)
 
     def set(self, position, speed, time, tolerance):
-        self.position = position
-        self.speed = speed
-        self.time = time
-        self.tolerance = tolerance
+        self.set_position(position)
+        self.set_speed(speed)
+        self.set_time(time)
+        self.set_tolerance(tolerance)
 
     def get_position(self):
-        return self.position
+        return MissionPosition.view(self.columns, self.row, POSITION)
+
+    def set_position(self, position):
+        if position is not None:
+            self.get_position().copy(position)
 
     def get_time(self):
-        return self.time
+        return self.get_value(TIME)
 
-    def get_speed(self):
-        return self.speed
+    def set_time(self, time):
+        self.set_value(TIME, time)
+
+    position = property(get_position, set_position)
+    time = property(get_time, set_time)
 
-    def get_tolerance(self):
-        return self.tolerance
+
+MANEUVER_CLASSES = {WAYPOINT_MANEUVER: MissionWaypoint,
+                    SECTION_MANEUVER: MissionSection,
+                    PARK_MANEUVER: MissionPark}
 
 
 class MissionConfiguration(object):
+    __slots__ = ('key', 'value')
+
     def __init__(self, key="", value=""):
         self.key = key
         self.value = value
@@ -217,6 +503,8 @@ class MissionConfiguration(object):
 
 
 class MissionAction(object):
+    __slots__ = ('action_id', 'parameters')
+
     def __init__(self, action_id="", parameters=None):
         if parameters is None:
             parameters = list()
@@ -241,53 +529,80 @@ class MissionAction(object):
 
 
 class Mission(object):
+    """
+    Sequence of mission steps.
+
+    get_step returns a view of the step stored in the mission, it is valid until steps are inserted or removed.
+    Steps inserted are copied, later changes to the inserted objects do not change the mission.
+    """
+
     def __init__(self):
-        self.mission = list()
-        self.num_steps = 0
+        self.columns = MissionColumns()
 
     def __str__(self):
         ret = "MISSION: \n"
-        for s in self.mission:
-            ret = ret + str(s) + "\n\n"
+        for step_id in range(self.get_length()):
+            ret = ret + str(self.get_step(step_id)) + "\n\n"
         return ret
 
+    @property
+    def num_steps(self):
+        return self.columns.size
+
     def get_length(self):
-        return self.num_steps
+        return self.columns.size
+
+    def get_version(self):
+        """Return the version of the steps, it increases every time they change."""
+        return self.columns.version
+
+    def get_column(self, column):
+        """Return a read-only view of the values of a column for all the steps, as an array."""
+        return self.columns.column(column)
+
+    def get_maneuver_types(self):
+        """Return a read-only view of the maneuver types of all the steps, as an array."""
+        types = self.columns.types[:self.columns.size]
+        types.flags.writeable = False
+        return types
 
     def copy(self, mission):
-        self.mission = list(mission.mission)
-        self.num_steps = mission.num_steps
+        self.columns = mission.columns.copy()
 
     def add_step(self, step):
-        self.num_steps += 1
-        self.mission.append(step)
+        self.insert_steps(self.columns.size, [step])
+
+    def add_steps(self, steps):
+        self.insert_steps(self.columns.size, steps)
 
     def get_step(self, step_id):
-        if 0 <= step_id < len(self.mission):
-            return self.mission[step_id]
+        if 0 <= step_id < self.columns.size:
+            return MissionStep.view(self.columns, step_id)
         else:
             return None
 
     def insert_step(self, step_id, step):
-        self.mission.insert(step_id, step)
-        self.num_steps += 1
+        self.insert_steps(step_id, [step])
+
+    def insert_steps(self, step_id, steps):
+        self.columns.insert(step_id, MissionColumns.take(steps))
 
     def update_step(self, step_id, step):
+        # copy the step before removing it, it can be a view of this mission
+        columns = MissionColumns.take([step])
         self.remove_step(step_id)
-        self.insert_step(step_id, step)
+        self.columns.insert(step_id, columns)
 
     def remove_step(self, step_id):
-        del self.mission[step_id]
-        self.num_steps -= 1
+        self.columns.delete(step_id)
 
     def size(self):
-        return len(self.mission)
+        return self.columns.size
 
     def load_mission(self, mission_file_name):
-        tree = ET.parse(mission_file_name)
-        root = tree.getroot()
-        for mStep in root:
-            mission_step = MissionStep()
+        # stream the steps, each one is dropped once loaded so memory does not grow with the file
+        for _, mStep in ET.iterparse(mission_file_name, events=('end',), tag='mission_step'):
+            mission_step = MissionStep.view(self.columns, self.columns.append())
             for child in mStep:
                 if child.tag == 'configuration':
                     mission_step.load_configuration(child)
@@ -302,29 +617,54 @@ class Mission(object):
                         mission_step.load_section_maneuver(child)
                     if child.get('type') == 'park':
                         mission_step.load_park_maneuver(child)
-            self.add_step(mission_step)
+            mStep.clear()
+            while mStep.getprevious() is not None:
+                del mStep.getparent()[0]
+        self.columns.shrink()
 
     def write_mission(self, mission_file_name):
-        xml_mission = ET.Element('mission')
-        for mission_step in self.mission:
-            xml_mission_step = ET.SubElement(xml_mission, 'mission_step')
-
-            if mission_step.maneuver.maneuver_type == WAYPOINT_MANEUVER:
-                self.write_waypoint_maneuver(xml_mission_step, mission_step.maneuver)
-            elif mission_step.maneuver.maneuver_type == SECTION_MANEUVER:
-                self.write_section_maneuver(xml_mission_step, mission_step.maneuver)
-            elif mission_step.maneuver.maneuver_type == PARK_MANEUVER:
-                self.write_park_maneuver(xml_mission_step, mission_step.maneuver)
-
-            if mission_step.actions:
-                xml_actions = ET.SubElement(xml_mission_step, 'actions_list')
-                for action in mission_step.actions:
-                    self.write_action(xml_actions, action)
-
-                    # TODO for configuration in mission_step.configurations:
-
-        tree = ET.ElementTree(xml_mission)
-        tree.write(mission_file_name, pretty_print=True)
+        # write next to the mission and replace it at the end, a failure never leaves it truncated
+        temp_file_name = mission_file_name + '.tmp'
+        try:
+            with open(temp_file_name, 'wb') as f:
+                self.write_steps(f)
+            os.replace(temp_file_name, mission_file_name)
+        except BaseException:
+            if os.path.exists(temp_file_name):
+                os.remove(temp_file_name)
+            raise
+
+    def write_steps(self, f):
+        if not self.columns.size:
+            f.write(ET.tostring(ET.Element('mission'), pretty_print=True))
+            return
+        # serialize the steps in chunks, so the element tree never holds more than one chunk
+        f.write(b"<mission>")
+        for first in range(0, self.columns.size, STEPS_PER_CHUNK):
+            xml_mission = ET.Element('mission')
+            for step_id in range(first, min(first + STEPS_PER_CHUNK, self.columns.size)):
+                self.write_step(xml_mission, self.get_step(step_id))
+            chunk = ET.tostring(xml_mission, pretty_print=True)
+            # keep the indented steps, without the start and end tags of the chunk
+            f.write(chunk[len(b"<mission>"):-len(b"\n</mission>\n")])
+        f.write(b"\n</mission>\n")
+
+    def write_step(self, root, mission_step):
+        xml_mission_step = ET.SubElement(root, 'mission_step')
+
+        if mission_step.maneuver.maneuver_type == WAYPOINT_MANEUVER:
+            self.write_waypoint_maneuver(xml_mission_step, mission_step.maneuver)
+        elif mission_step.maneuver.maneuver_type == SECTION_MANEUVER:
+            self.write_section_maneuver(xml_mission_step, mission_step.maneuver)
+        elif mission_step.maneuver.maneuver_type == PARK_MANEUVER:
+            self.write_park_maneuver(xml_mission_step, mission_step.maneuver)
+
+        if mission_step.has_actions():
+            xml_actions = ET.SubElement(xml_mission_step, 'actions_list')
+            for action in mission_step.actions:
+                self.write_action(xml_actions, action)
+
+                # TODO for configuration in mission_step.configurations:
 
     def write_configuration(self, root, step):
         xml_conf = ET.SubElement(root, 'configuration')
@@ -391,11 +731,12 @@ class Mission(object):
         self.write_tolerance(xml_maneuver, step.tolerance)
 
 
-class MissionStep(object):
+class MissionStep(ColumnsView):
+    __slots__ = ()
+
     def __init__(self):
-        self.maneuver = None
-        self.actions = list()
-        self.configuration = list()
+        self.columns = MissionColumns(1)
+        self.row = 0
 
     def __str__(self):
         ret = "Mission step\n"
@@ -405,97 +746,139 @@ class MissionStep(object):
         return ret
 
     def add_action(self, action):
-        self.actions.append(action)
+        self.get_actions().append(action)
+        self.columns.touch()
 
     def remove_action(self, id_action):
         if id_action >= 0:
-            del self.actions[id_action]
+            del self.get_actions()[id_action]
+            self.columns.touch()
 
     def add_configuration(self, config):
-        self.actions.append(config)
+        self.get_actions().append(config)
+        self.columns.touch()
 
     def add_maneuver(self, maneuver):
-        self.maneuver = maneuver
+        """Copy the values of a maneuver to the step."""
+        row = self.get_row()
+        maneuver_row = maneuver.get_row()
+        self.columns.values[:, row] = maneuver.columns.values[:, maneuver_row]
+        self.columns.types[row] = maneuver.columns.types[maneuver_row]
+        self.columns.touch()
 
     def get_maneuver(self):
-        return self.maneuver
+        maneuver_type = int(self.columns.types[self.get_row()])
+        if maneuver_type == NO_MANEUVER:
+            return None
+        return MANEUVER_CLASSES[maneuver_type].view(self.columns, self.row)
 
     def get_actions(self):
-        return self.actions
+        row = self.get_row()
+        actions = self.columns.actions[row]
+        if actions is None:
+            actions = self.columns.actions[row] = list()
+        return actions
+
+    def set_actions(self, actions):
+        self.columns.actions[self.get_row()] = actions
+        self.columns.touch()
+
+    def has_actions(self):
+        return bool(self.columns.actions[self.get_row()])
+
+    maneuver = property(get_maneuver, add_maneuver)
+    actions = property(get_actions, set_actions)
 
     def load_configuration(self, config_element):
-        key = config_element.find('key').text
-        value = config_element.find('value').text
-        config = MissionConfiguration(key, value)
+        texts = child_texts(config_element)
+        config = MissionConfiguration(texts.get('key'), texts.get('value'))
         self.add_configuration(config)
         logger.info(config)
 
     def load_action(self, action_element):
-        action_id = action_element.find('action_id').text
-        parameters = action_element.find('parameters')
+        action_id = None
         params = list()
-        if parameters is not None:
-            for param in parameters:
-                value = param.text
-                p = Parameter(value)
-                params.append(p)
+        for child in action_element:
+            if child.tag == 'action_id':
+                action_id = child.text
+            elif child.tag == 'parameters':
+                params = [Parameter(param.text) for param in child]
         action = MissionAction(action_id, params)
         self.add_action(action)
 
     def load_position(self, xml_position):
-        latitude = xml_position.find('latitude').text
-        longitude = xml_position.find('longitude').text
-        z = xml_position.find('z').text
-        altitude_mode = xml_position.find('altitude_mode').text
-        if altitude_mode == "False":
-            altitude_mode = False
+        """
+        Read a position element.
+
+        :return: tuple with the latitude, the longitude, the z and the altitude mode
+        """
+        texts = child_texts(xml_position)
+        if texts.get('altitude_mode') == "False":
+            altitude_mode = 0.0
         else:
-            altitude_mode = True
-        pose = MissionPosition(latitude, longitude, z, altitude_mode)
-        return pose
+            altitude_mode = 1.0
+        return float(texts['latitude']), float(texts['longitude']), float(texts['z']), altitude_mode
 
     def load_tolerance(self, xml_tolerance):
-        x = xml_tolerance.find('x').text
-        y = xml_tolerance.find('y').text
-        z = xml_tolerance.find('z').text
-        tolerance = MissionTolerance(x, y, z)
-        return tolerance
+        """
+        Read a tolerance element.
+
+        :return: tuple with the x, y and z tolerances
+        """
+        texts = child_texts(xml_tolerance)
+        return float(texts['x']), float(texts['y']), float(texts['z'])
+
+    def load_maneuver_children(self, maneuver):
+        """
+        Split the children of a maneuver element.
+
+        :return: tuple with a dict of the position and tolerance elements by tag and a dict of the other texts by tag
+        """
+        elements = dict()
+        texts = dict()
+        for child in maneuver:
+            if len(child):
+                elements[child.tag] = child
+            else:
+                texts[child.tag] = child.text
+        return elements, texts
+
+    def load_values(self, maneuver_type, position, speed, tolerance, initial_position=(0.0, 0.0, 0.0, 0.0),
+                    time=0.0):
+        """Store the values of a loaded maneuver in the row of the step, all columns at once."""
+        row = self.get_row()
+        self.columns.values[:, row] = position + initial_position + (speed, time) + tolerance
+        self.columns.types[row] = maneuver_type
+        self.columns.touch()
 
     def load_waypoint_maneuver(self, waypoint_maneuver):
-        xml_position = waypoint_maneuver.find('position')
-        xml_tolerance = waypoint_maneuver.find('tolerance')
+        elements, texts = self.load_maneuver_children(waypoint_maneuver)
 
-        pose = self.load_position(xml_position)
-        speed = waypoint_maneuver.find('speed').text
-        tolerance = self.load_tolerance(xml_tolerance)
+        pose = self.load_position(elements['position'])
+        speed = float(texts['speed'])
+        tolerance = self.load_tolerance(elements['tolerance'])
 
-        wp = MissionWaypoint(pose, speed, tolerance)
-        self.add_maneuver(wp)
+        self.load_values(WAYPOINT_MANEUVER, pose, speed, tolerance)
 
     def load_section_maneuver(self, sector_maneuver):
-        xml_initial_position = sector_maneuver.find('initial_position')
-        xml_final_position = sector_maneuver.find('final_position')
-        xml_tolerance = sector_maneuver.find('tolerance')
+        elements, texts = self.load_maneuver_children(sector_maneuver)
 
-        initial_position = self.load_position(xml_initial_position)
-        final_position = self.load_position(xml_final_position)
-        speed = sector_maneuver.find('speed').text
-        tolerance = self.load_tolerance(xml_tolerance)
+        initial_position = self.load_position(elements['initial_position'])
+        final_position = self.load_position(elements['final_position'])
+        speed = float(texts['speed'])
+        tolerance = self.load_tolerance(elements['tolerance'])
 
-        section = MissionSection(initial_position, final_position, speed, tolerance)
-        self.add_maneuver(section)
+        self.load_values(SECTION_MANEUVER, final_position, speed, tolerance, initial_position=initial_position)
 
     def load_park_maneuver(self, park_maneuver):
-        xml_position = park_maneuver.find('position')
-        xml_tolerance = park_maneuver.find('tolerance')
+        elements, texts = self.load_maneuver_children(park_maneuver)
 
-        position = self.load_position(xml_position)
-        time = park_maneuver.find('time').text
-        speed = park_maneuver.find('speed').text
-        tolerance = self.load_tolerance(xml_tolerance)
+        position = self.load_position(elements['position'])
+        time = float(texts['time'])
+        speed = float(texts['speed'])
+        tolerance = self.load_tolerance(elements['tolerance'])
 
-        park = MissionPark(position, speed, time, tolerance)
-        self.add_maneuver(park)
+        self.load_values(PARK_MANEUVER, position, speed, tolerance, time=time)
 
 
 def test_write_xml():
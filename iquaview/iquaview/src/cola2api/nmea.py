@@ -0,0 +1,220 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+"""
+Streaming parser of NMEA-0183 sentences.
+"""
+
+import logging
+import operator
+import functools
+
+logger = logging.getLogger(__name__)
+
+# longest valid sentence is 82 characters, anything longer without a line end is garbage
+MAX_SENTENCE_LENGTH = 256
+
+
+def nmea_checksum(body):
+    """
+    Compute the NMEA checksum, the XOR of all the bytes between '$' and '*'.
+
+    :param body: bytes of the sentence between '$' and '*'
+    :return: checksum as an int
+    """
+    return functools.reduce(operator.xor, body, 0)
+
+
+def to_float(field):
+    return float(field) if field else None
+
+
+def to_int(field):
+    return int(field) if field else None
+
+
+def to_degrees(field, hemisphere):
+    """
+    Transform a ddmm.mmmm latitude or dddmm.mmmm longitude into signed decimal degrees.
+
+    :param field: coordinate field
+    :param hemisphere: N, S, E or W
+    :return: decimal degrees, None if the field is empty
+    """
+    if not field:
+        return None
+    degree_minute = float(field)
+    degrees = int(degree_minute / 100)
+    value = degrees + (degree_minute - degrees * 100) / 60.0
+    if hemisphere in ('S', 'W'):
+        value = -value
+    return value
+
+
+def parse_gga(fields):
+    """$xxGGA,time,lat,N/S,lon,E/W,fix,sat,hdop,alt,M,hgeo,M,,*chk"""
+    return {"time": fields[1],
+            "latitude": to_degrees(fields[2], fields[3]),
+            "longitude": to_degrees(fields[4], fields[5]),
+            "quality": to_int(fields[6]),
+            "satellites": to_int(fields[7]),
+            "hdop": to_float(fields[8]),
+            "altitude": to_float(fields[9])}
+
+
+def parse_rmc(fields):
+    """$xxRMC,time,status,lat,N/S,lon,E/W,speed,course,date,magvar,E/W*chk"""
+    return {"time": fields[1],
+            "valid": fields[2] == 'A',
+            "latitude": to_degrees(fields[3], fields[4]),
+            "longitude": to_degrees(fields[5], fields[6]),
+            "speed": to_float(fields[7]),
+            "course": to_float(fields[8]),
+            "date": fields[9]}
+
+
+def parse_vtg(fields):
+    """$xxVTG,course,T,course,M,speed,N,speed,K*chk"""
+    return {"course": to_float(fields[1]),
+            "speed": to_float(fields[5]),
+            "speed_kmh": to_float(fields[7])}
+
+
+def parse_hdt(fields):
+    """$xxHDT,heading,T*chk"""
+    return {"heading": to_float(fields[1])}
+
+
+def parse_gst(fields):
+    """$xxGST,time,rms,major,minor,orientation,std_lat,std_lon,std_alt*chk"""
+    return {"time": fields[1],
+            "rms": to_float(fields[2]),
+            "std_major": to_float(fields[3]),
+            "std_minor": to_float(fields[4]),
+            "orientation": to_float(fields[5]),
+            "std_latitude": to_float(fields[6]),
+            "std_longitude": to_float(fields[7]),
+            "std_altitude": to_float(fields[8])}
+
+
+# sentence id: (parser, minimum number of fields)
+SENTENCE_PARSERS = {"GGA": (parse_gga, 10),
+                    "RMC": (parse_rmc, 10),
+                    "VTG": (parse_vtg, 8),
+                    "HDT": (parse_hdt, 2),
+                    "GST": (parse_gst, 9)}
+
+
+class NmeaParser:
+    """
+    Split a stream of NMEA-0183 data into sentences and parse them.
+
+    Data can be fed in chunks of any size. The incomplete sentence at the end of a
+    chunk is kept until the rest of it arrives. Sentences with a wrong checksum are
+    discarded and the ones without checksum are accepted. Each sentence is split once
+    and dispatched on its sentence id, regardless of the talker.
+    """
+
+    def __init__(self):
+        """Class constructor."""
+        self.buffer = bytearray()
+        self.sentences = 0
+        self.bad_checksum = 0
+        self.malformed = 0
+        self.unsupported = 0
+
+    def feed(self, data):
+        """
+        Add received bytes to the stream.
+
+        :param data: bytes received from the GPS
+        :return: list of (sentence id, dictionary with the parsed fields) for the sentences completed by this chunk
+        """
+        sentences = list()
+        buffer = self.buffer
+        buffer += data
+        start = 0
+        while True:
+            end = buffer.find(b'\n', start)
+            if end < 0:
+                break
+            sentence = self.parse_line(bytes(buffer[start:end]))
+            if sentence is not None:
+                sentences.append(sentence)
+            start = end + 1
+        if start:
+            del buffer[:start]
+        if len(buffer) > MAX_SENTENCE_LENGTH:
+            # no line end, keep only what may be the start of a sentence
+            begin = buffer.rfind(b'$')
+            del buffer[:begin if begin >= 0 else len(buffer)]
+        return sentences
+
+    def parse_line(self, line):
+        """
+        Parse a single line.
+
+        :param line: bytes of the line without the line end
+        :return: (sentence id, dictionary with the parsed fields), None if not valid or not supported
+        """
+        begin = line.find(b'$')
+        if begin < 0:
+            return None
+        star = line.rfind(b'*')
+        if star > begin:
+            body = line[begin + 1:star]
+            try:
+                if int(line[star + 1:star + 3], 16) != nmea_checksum(body):
+                    self.bad_checksum += 1
+                    return None
+            except ValueError:
+                self.bad_checksum += 1
+                return None
+        else:
+            body = line[begin + 1:].rstrip(b'\r')
+        try:
+            fields = body.decode('ascii').split(',')
+        except UnicodeDecodeError:
+            self.malformed += 1
+            return None
+
+        sentence_id = fields[0][2:]
+        parser = SENTENCE_PARSERS.get(sentence_id)
+        if parser is None or fields[0].startswith('P'):
+            self.unsupported += 1
+            return None
+        if len(fields) < parser[1]:
+            self.malformed += 1
+            return None
+        try:
+            parsed = parser[0](fields)
+        except ValueError as e:
+            logger.debug("Malformed {} sentence: {}".format(sentence_id, e))
+            self.malformed += 1
+            return None
+        self.sentences += 1
+        return sentence_id, parsed
+
+    def get_stats(self):
+        """Return the counters of parsed, bad checksum, malformed and unsupported sentences."""
+        return {"sentences": self.sentences,
+                "bad_checksum": self.bad_checksum,
+                "malformed": self.malformed,
+                "unsupported": self.unsupported}
+
+    def reset(self):
+        """Discard any partial sentence."""
+        del self.buffer[:]
@@ -0,0 +1,102 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+"""
+Bounded buffer shared between a producer thread and a consumer thread.
+"""
+
+import threading
+from collections import deque
+
+
+class RingBuffer:
+    """
+    Lock-protected ring buffer with a fixed capacity.
+
+    When the buffer is full the oldest item is overwritten, so a stalled consumer never
+    makes the memory grow. Pushed, dropped and delivered items are counted so that
+    the backpressure can be reported.
+    """
+
+    def __init__(self, capacity=1000):
+        """
+        Class constructor.
+
+        :param capacity: maximum number of items kept
+        """
+        self.capacity = capacity
+        self.items = deque(maxlen=capacity)
+        self.lock = threading.Lock()
+        self.pushed = 0
+        self.dropped = 0
+        self.delivered = 0
+
+    def push(self, item):
+        """
+        Append an item, dropping the oldest one if the buffer is full.
+
+        :param item: item to append
+        """
+        with self.lock:
+            if len(self.items) == self.capacity:
+                self.dropped += 1
+            self.items.append(item)
+            self.pushed += 1
+
+    def drain(self, max_items=None):
+        """
+        Move the buffered items out of the buffer.
+
+        The whole buffer is handed over without copying its items, a new empty one
+        takes its place.
+
+        :param max_items: maximum number of items to take, all of them if None
+        :return: deque with the oldest items first
+        """
+        with self.lock:
+            if max_items is None or max_items >= len(self.items):
+                batch = self.items
+                self.items = deque(maxlen=self.capacity)
+            else:
+                batch = deque(self.items.popleft() for _ in range(max_items))
+            self.delivered += len(batch)
+        return batch
+
+    def snapshot(self):
+        """Return a list with a copy of the buffered items, which are kept in the buffer."""
+        with self.lock:
+            return list(self.items)
+
+    def clear(self):
+        """Discard the buffered items, they are counted as dropped."""
+        with self.lock:
+            self.dropped += len(self.items)
+            self.items.clear()
+
+    def get_stats(self):
+        """
+        Get the buffer counters.
+
+        :return: dictionary with pushed, dropped, delivered and pending items
+        """
+        with self.lock:
+            return {'pushed': self.pushed,
+                    'dropped': self.dropped,
+                    'delivered': self.delivered,
+                    'pending': len(self.items)}
+
+    def __len__(self):
+        return len(self.items)
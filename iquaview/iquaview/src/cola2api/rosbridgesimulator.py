@@ -0,0 +1,467 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+USAGE = """
+Local stand-in for a vehicle rosbridge server.
+
+Speaks the subset of the rosbridge protocol used by IQUAview (subscribe,
+unsubscribe, call_service and fragments) and publishes synthetic navigation,
+status and log messages for the topics of an AUV config file. Parameters of the
+ros_params section are served through /rosapi/get_param and /rosapi/set_param,
+any other service call succeeds. Latency, packet splitting and periodic
+disconnections can be injected to load test the clients without a vehicle.
+
+Usage:
+    python3 -m iquaview.src.cola2api.rosbridgesimulator [config.xml] [--port 9091]
+        [--rate "navigation status=10"] [--latency 0.05] [--split 64] [--disconnect-every 30]
+"""
+
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import logging
+import argparse
+import threading
+
+from lxml import etree
+
+from iquaview.src.cola2api.json_stream import JsonStreamDecoder
+
+logger = logging.getLogger(__name__)
+
+ROSOUT_TOPIC = '/rosout_agg'
+
+FIELD_DEFAULTS = {'double': 0.0, 'int': 0, 'bool': False, 'boolean': False, 'string': ""}
+
+
+def stamp(t):
+    """Return a ROS header stamp for the time t."""
+    secs = int(t)
+    return {"secs": secs, "nsecs": int((t - secs) * 1e9)}
+
+
+class SyntheticVehicle(object):
+    """Generate the messages of a vehicle doing a slow lawnmower at 5 m depth."""
+
+    def __init__(self, latitude=41.7778, longitude=3.0335):
+        """
+        Class constructor
+
+        :param latitude: latitude of the origin of the trajectory
+        :param longitude: longitude of the origin of the trajectory
+        """
+        self.latitude = latitude
+        self.longitude = longitude
+        self.start = time.time()
+        self.seq = 0
+
+    def navigation(self, t):
+        """Navigation status at time t."""
+        elapsed = t - self.start
+        north = 50.0 * math.sin(elapsed / 60.0)
+        east = elapsed * 0.1
+        return {"header": {"seq": self.next_seq(), "stamp": stamp(t), "frame_id": "world"},
+                "global_position": {"latitude": self.latitude + north / 111132.0,
+                                    "longitude": self.longitude + east / (111320.0 * math.cos(
+                                        math.radians(self.latitude)))},
+                "origin": {"latitude": self.latitude, "longitude": self.longitude},
+                "position": {"north": north, "east": east, "depth": 5.0 + 0.1 * math.sin(elapsed)},
+                "altitude": 10.0 + random.uniform(-0.2, 0.2),
+                "body_velocity": {"x": 0.5, "y": 0.0, "z": 0.0},
+                "orientation": {"roll": 0.0, "pitch": 0.0, "yaw": math.atan2(50.0 / 60.0 * math.cos(elapsed / 60.0),
+                                                                             0.1)},
+                "orientation_rate": {"roll": 0.0, "pitch": 0.0, "yaw": 0.0}}
+
+    def message(self, key, t):
+        """
+        Message of a vehicle data topic at time t.
+
+        :param key: id of the topic in the vehicle_data_topics section
+        :param t: publish time
+        :return: message dictionary
+        """
+        header = {"seq": self.next_seq(), "stamp": stamp(t), "frame_id": ""}
+        elapsed = t - self.start
+        if key == 'navigation status':
+            return self.navigation(t)
+        if key == 'rosout':
+            return {"header": header, "level": random.choice([1, 2, 2, 2, 4, 8]), "name": "/simulator",
+                    "msg": "simulated log message {}".format(self.seq), "file": "", "function": "", "line": 0,
+                    "topics": []}
+        if key == 'merged world waypoint req':
+            return {"header": header, "goal": {"requester": "", "id": 0, "priority": 0},
+                    "altitude_mode": False, "position": {"north": 0.0, "east": 0.0, "depth": 5.0},
+                    "altitude": 0.0, "orientation": {"roll": 0.0, "pitch": 0.0, "yaw": 0.0},
+                    "disable_axis": {"x": False, "y": True, "z": False, "roll": True, "pitch": True, "yaw": False},
+                    "position_tolerance": {"x": 0.0, "y": 0.0, "z": 0.0},
+                    "orientation_tolerance": {"roll": 0.0, "pitch": 0.0, "yaw": 0.0}}
+        if key == 'merged body velocity req':
+            return {"header": header, "goal": {"requester": "", "id": 0, "priority": 0},
+                    "twist": {"linear": {"x": 0.5, "y": 0.0, "z": 0.0}, "angular": {"x": 0.0, "y": 0.0, "z": 0.0}},
+                    "disable_axis": {"x": False, "y": True, "z": True, "roll": True, "pitch": True, "yaw": True}}
+        if key == 'safety supervisor status':
+            return {"header": header, "status_code": 0, "error_code": 0,
+                    "recovery_action": {"error_level": 0, "error_string": ""}}
+        if key == 'watchdog':
+            return {"data": elapsed}
+        if key == 'vehicle status':
+            return {"header": header, "battery_charge": max(0.0, 100.0 - elapsed / 60.0), "thrusters_enabled": True,
+                    "active_controller": 0, "captain_state": 0, "mission_active": False, "current_step": 0,
+                    "total_steps": 0, "total_time": elapsed}
+        if key == 'goto status':
+            return {"header": header, "status_list": []}
+        if key in ('cpu usage', 'ram usage'):
+            return {"data": 20.0 + random.uniform(-5.0, 5.0)}
+        if key == 'thruster setpoints':
+            return {"header": header, "setpoints": [0.3, 0.3, 0.0]}
+        return {"header": header, "data": 0.0}
+
+    def next_seq(self):
+        self.seq += 1
+        return self.seq
+
+
+class RosbridgeSimulator(object):
+    """Asyncio rosbridge server publishing synthetic vehicle data."""
+
+    def __init__(self, config_file=None, host='127.0.0.1', port=9091, rates=None, default_rate=1.0,
+                 latency=0.0, split=0, disconnect_every=0.0):
+        """
+        Class constructor
+
+        :param config_file: AUV config file with the vehicle_data_topics and ros_params sections
+        :param host: address to listen on
+        :param port: port to listen on, 0 picks a free port
+        :param rates: dictionary of topic id to publish rate in Hz
+        :param default_rate: publish rate in Hz of the topics not in rates
+        :param latency: seconds added before every message sent to the clients
+        :param split: maximum size in bytes of the writes to the clients, 0 to write whole messages
+        :param disconnect_every: seconds between forced disconnections of every client, 0 to disable
+        """
+        self.host = host
+        self.port = port
+        self.rates = rates if rates is not None else dict()
+        self.default_rate = default_rate
+        self.latency = latency
+        self.split = split
+        self.disconnect_every = disconnect_every
+        self.namespace = ""
+        self.topics = dict()
+        self.params = dict()
+        self.vehicle = SyntheticVehicle()
+        self.clients = set()
+        self.published = 0
+        self.service_calls = 0
+        self.loop = None
+        self.server = None
+        self.disconnector = None
+        self.thread = None
+        self.ready = threading.Event()
+        if config_file is not None:
+            self.load_config(config_file)
+        self.topics[ROSOUT_TOPIC] = 'rosout'
+
+    def load_config(self, config_file):
+        """
+        Read the topics and parameters served from an AUV config file.
+
+        :param config_file: path of the XML config file
+        """
+        root = etree.parse(config_file).getroot()
+        namespace = root.find('.//vehicle_namespace')
+        if namespace is not None and namespace.text is not None:
+            self.namespace = namespace.text.strip()
+        for topic in root.iterfind('.//vehicle_data_topics/topic'):
+            self.topics[self.namespace + topic.text.strip()] = topic.get('id')
+        for param in root.iterfind('.//ros_params//param'):
+            name = param.findtext('.//field_name') or param.findtext('.//field_array_name')
+            if name is None:
+                continue
+            field_type = (param.findtext('.//field_type') or param.findtext('.//field_array_type') or '').strip()
+            value = FIELD_DEFAULTS.get(field_type, 0.0)
+            size = param.findtext('.//field_array_size')
+            if size is not None:
+                value = [value] * int(size)
+            self.params[self.namespace + name.strip()] = json.dumps(value)
+
+    def get_rate(self, key):
+        return self.rates.get(key, self.default_rate)
+
+    async def handle_client(self, reader, writer):
+        """Serve one client connection until it closes or is disconnected."""
+        client = SimulatorClient(self, reader, writer)
+        self.clients.add(client)
+        try:
+            await client.run()
+        finally:
+            self.clients.discard(client)
+            client.close()
+
+    async def disconnect_loop(self):
+        """Periodically drop every client connection."""
+        while True:
+            await asyncio.sleep(self.disconnect_every)
+            logger.info("Disconnecting {} clients".format(len(self.clients)))
+            for client in list(self.clients):
+                client.close()
+
+    def call_service(self, service, args):
+        """
+        Answer a service call.
+
+        :param service: name of the service
+        :param args: service request
+        :return: tuple with the result flag and the response values
+        """
+        self.service_calls += 1
+        if service == '/rosapi/get_param':
+            name = args.get('name', '')
+            if name in self.params:
+                return True, {"value": self.params[name]}
+            subtree = self.get_subtree(name)
+            if subtree is None:
+                return True, {"value": args.get('default', 'null')}
+            return True, {"value": json.dumps(subtree)}
+        if service == '/rosapi/set_param':
+            self.params[args.get('name', '')] = args.get('value', 'null')
+            return True, {}
+        if service == '/rosapi/get_param_names':
+            return True, {"names": sorted(self.params.keys())}
+        return True, {"success": True, "message": ""}
+
+    def get_subtree(self, namespace):
+        """
+        Build the dictionary of the parameters under a namespace, as rosapi does.
+
+        :param namespace: name of the namespace
+        :return: nested dictionary with the parameter values, None if there are no parameters under it
+        """
+        prefix = namespace.rstrip('/') + '/'
+        subtree = None
+        for name, value in self.params.items():
+            if not name.startswith(prefix):
+                continue
+            if subtree is None:
+                subtree = dict()
+            node = subtree
+            keys = name[len(prefix):].split('/')
+            for key in keys[:-1]:
+                node = node.setdefault(key, dict())
+            try:
+                node[keys[-1]] = json.loads(value)
+            except ValueError:
+                node[keys[-1]] = value
+        return subtree
+
+    async def start_server(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        if self.disconnect_every > 0:
+            self.disconnector = asyncio.ensure_future(self.disconnect_loop())
+        logger.info("Rosbridge simulator listening on {}:{}".format(self.host, self.port))
+
+    def serve_forever(self):
+        """Run the simulator in the calling thread."""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.start_server())
+        self.ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            if self.disconnector is not None:
+                self.disconnector.cancel()
+            for client in list(self.clients):
+                client.close()
+            self.server.close()
+            self.loop.run_until_complete(self.server.wait_closed())
+            self.loop.run_until_complete(asyncio.sleep(0))
+            self.loop.close()
+
+    def start(self):
+        """
+        Run the simulator in a background thread.
+
+        :return: the port the simulator listens on
+        """
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        return self.port
+
+    def stop(self):
+        """Stop a simulator started with start."""
+        if self.loop is not None and self.thread is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.thread = None
+
+
+class SimulatorClient(object):
+    """Connection of one client to the simulator."""
+
+    def __init__(self, simulator, reader, writer):
+        """
+        Class constructor
+
+        :param simulator: RosbridgeSimulator serving the client
+        :param reader: asyncio stream reader
+        :param writer: asyncio stream writer
+        """
+        self.simulator = simulator
+        self.reader = reader
+        self.writer = writer
+        self.decoder = JsonStreamDecoder()
+        self.publishers = dict()
+        self.send_queue = asyncio.Queue()
+        self.sender = asyncio.ensure_future(self.send_loop())
+        self.closed = False
+
+    async def run(self):
+        """Read the operations of the client and dispatch them."""
+        while not self.closed:
+            data = await self.reader.read(4096)
+            if not data:
+                break
+            for message in self.decoder.feed(data):
+                self.dispatch(message)
+
+    def dispatch(self, message):
+        op = message.get('op')
+        if op == 'subscribe':
+            self.subscribe(message)
+        elif op == 'unsubscribe':
+            publisher = self.publishers.pop((message.get('topic'), message.get('id')), None)
+            if publisher is not None:
+                publisher.cancel()
+        elif op == 'call_service':
+            result, values = self.simulator.call_service(message.get('service'), message.get('args') or {})
+            response = {"op": "service_response", "service": message.get('service'), "values": values,
+                        "result": result}
+            if 'id' in message:
+                response['id'] = message['id']
+            self.send(response)
+        elif op in ('advertise', 'unadvertise', 'publish'):
+            pass
+        else:
+            self.send({"op": "status", "level": "error", "msg": "Unsupported operation {}".format(op)})
+
+    def subscribe(self, message):
+        topic = message.get('topic')
+        key = self.simulator.topics.get(topic)
+        if key is None:
+            # rosbridge accepts subscriptions to topics not published yet
+            return
+        rate = self.simulator.get_rate(key)
+        throttle_rate = message.get('throttle_rate', 0) / 1000.0
+        period = max(1.0 / rate if rate > 0 else 0.0, throttle_rate)
+        publisher = asyncio.ensure_future(self.publish_loop(topic, key, period, message.get('fragment_size')))
+        self.publishers[(topic, message.get('id'))] = publisher
+
+    async def publish_loop(self, topic, key, period, fragment_size):
+        """Publish synthetic messages of a topic every period seconds."""
+        next_time = time.time()
+        while not self.closed:
+            now = time.time()
+            self.simulator.published += 1
+            self.send({"op": "publish", "topic": topic, "msg": self.simulator.vehicle.message(key, now)},
+                      fragment_size)
+            next_time += period
+            delay = next_time - time.time()
+            if delay < -period:
+                # fallen behind, do not burst to catch up
+                next_time = time.time()
+                delay = 0
+            await asyncio.sleep(max(delay, 0))
+
+    def send(self, message, fragment_size=None):
+        """Queue a message to the client, splitting it in rosbridge fragments if requested."""
+        text = json.dumps(message)
+        due = time.time() + self.simulator.latency
+        if fragment_size and len(text) > fragment_size:
+            fragment_id = "{}:{}".format(message.get('topic', 'message'), self.simulator.published)
+            parts = [text[i:i + fragment_size] for i in range(0, len(text), fragment_size)]
+            for num, part in enumerate(parts):
+                self.send_queue.put_nowait((due, json.dumps({"op": "fragment", "id": fragment_id, "data": part,
+                                                             "num": num, "total": len(parts)}).encode()))
+        else:
+            self.send_queue.put_nowait((due, text.encode()))
+
+    async def send_loop(self):
+        """Write the queued messages once their injected latency has elapsed, splitting them if requested."""
+        split = self.simulator.split
+        try:
+            while not self.closed:
+                due, data = await self.send_queue.get()
+                delay = due - time.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if split > 0:
+                    for i in range(0, len(data), split):
+                        self.writer.write(data[i:i + split])
+                        await self.writer.drain()
+                else:
+                    self.writer.write(data)
+                    await self.writer.drain()
+        except (ConnectionError, OSError):
+            self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for publisher in self.publishers.values():
+            publisher.cancel()
+        self.publishers.clear()
+        self.sender.cancel()
+        self.writer.close()
+
+
+def parse_rates(values):
+    """Parse a list of 'topic id=rate' strings."""
+    rates = dict()
+    for value in values:
+        key, _, rate = value.rpartition('=')
+        rates[key.strip()] = float(rate)
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=USAGE, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('config', nargs='?', help='AUV config file')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9091)
+    parser.add_argument('--rate', action='append', default=[], help='"topic id=rate in Hz", can be repeated')
+    parser.add_argument('--default-rate', type=float, default=1.0, help='rate in Hz of the other topics')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every message')
+    parser.add_argument('--split', type=int, default=0, help='maximum bytes per write')
+    parser.add_argument('--disconnect-every', type=float, default=0.0, help='seconds between disconnections')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    simulator = RosbridgeSimulator(args.config, args.host, args.port, parse_rates(args.rate), args.default_rate,
+                                   args.latency, args.split, args.disconnect_every)
+    try:
+        simulator.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -44,6 +44,11 @@ DEFAULTCONFIG = {'canvas_marker_mode': 'auto',
                  'joystick_device': '/dev/input/js0',
                  'last_auv_config_xml': 'sparus2_configuration.xml',
                  'last_open_project': '',
+                 'log_max_blocks': 5000,
+                 'rosout_buffer_capacity': 1000,
+                 'telemetry_recording': False,
+                 'telemetry_path': '~/.iquaview/telemetry',
+                 'telemetry_max_file_size_mb': 50,
                  'usbl_ip': '127.0.0.1',
                  'usbl_offset_x': -3.0,
                  'usbl_offset_y': -2.0,
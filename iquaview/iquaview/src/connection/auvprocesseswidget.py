@@ -42,7 +42,7 @@ class AUVProcessesWidget(QWidget, Ui_AUVProcessesWidget):
         self.cc = ConnectionClient(self.vehicle_info.get_vehicle_ip(), self.vehicle_info.get_vehicle_port())
         self.cc.connection_failure.connect(self.connection_failed)
         self.cc.connection_ok.connect(self.connection_ok)
-        self.cc.start_cc_thread()
+        self.cc.start_connection()
         self.connected = False
 
         self.connection_label.setText("Vehicle")
@@ -17,20 +17,21 @@ If not, see <http://www.gnu.org/licenses/>.
  Class to periodically check cola2 state.
 """
 
-import time
 import logging
 from iquaview.src.cola2api.cola2_interface import SubscribeToTopic
-from iquaview.src.utils.workerthread import Worker
+from iquaview.src.cola2api.io_reactor import get_reactor, ReconnectBackoff
 from iquaview.src.xmlconfighandler.vehicledatahandler import VehicleDataHandler
 
-from PyQt5.QtCore import pyqtSignal, QObject, QTimer, QThreadPool
+from PyQt5.QtCore import pyqtSignal, QObject, QTimer
 from PyQt5.QtGui import QPixmap
 
 logger = logging.getLogger(__name__)
 
+# seconds to wait for the connection to rosbridge
+CONNECT_TIMEOUT = 5.0
+
 
 class Cola2Status(QObject):
-    reconnect_signal = pyqtSignal()
     cola2_connected = pyqtSignal(bool)
     update_data_signal = pyqtSignal()
 
@@ -48,7 +49,6 @@ class Cola2Status(QObject):
         self.cola2_label.setStyleSheet('font:italic; color:red')
         self.cola2_indicator.setPixmap(QPixmap(":/resources/red_led.svg"))
 
-        self.reconnect_signal.connect(self.start_cola2_thread)
         self.update_data_signal.connect(self.start_timer)
 
         self.iswatchdog = False
@@ -67,35 +67,51 @@ class Cola2Status(QObject):
                 self.t_time_text = topic.text
                 self.iswatchdog = True
 
-        self.threadpool = QThreadPool()
-        self.start_cola2_thread()
-
-    def start_cola2_thread(self):
-        # self.t = threading.Thread(target=self.update_cola2_status)
-        # self.t.daemon = True
-        # self.t.start()
-        worker = Worker(self.update_cola2_status)  # Any other args, kwargs are passed to the run function
-        self.threadpool.start(worker)
-
-    def update_cola2_status(self):
+        self.reactor = get_reactor()
+        self.backoff = ReconnectBackoff()
+        self.connect_timer = None
+        self.retry_timer = None
+        self.keepgoing = False
+        self.start_connection()
+
+    def start_connection(self):
+        """Subscribe to the cola2 status topic, retrying until it succeeds or the status is disconnected."""
+        self.keepgoing = True
+        self.reactor.call_soon(self.do_connection)
+
+    def do_connection(self):
+        if not self.keepgoing:
+            return
+        self.subscribed = True
+        self.connect_timer = self.reactor.connect_tcp((self.vehicleinfo.get_vehicle_ip(), 9091), CONNECT_TIMEOUT,
+                                                      self.connection_done)
+
+    def connection_done(self, sock, error):
+        """Called from the reactor thread with the result of the connection attempt."""
+        self.connect_timer = None
+        if not self.keepgoing:
+            if sock is not None:
+                sock.close()
+            return
         try:
-            self.subscribed = True
+            if error is not None:
+                raise error
             self.total_time_topic = SubscribeToTopic(self.vehicleinfo.get_vehicle_ip(),
                                                      9091,
-                                                     self.vehicleinfo.get_vehicle_namespace()+self.t_time_text)
+                                                     self.vehicleinfo.get_vehicle_namespace()+self.t_time_text,
+                                                     sock=sock)
+            self.backoff.reset()
             self.cola2_connected.emit(True)
             self.update_data_signal.emit()
-        except OSError as oe:
-            logger.error("Disconnecting cola2 status {}".format(oe))
-            self.disconnect_cola2status()
-        except:
-            logger.error("Disconnecting cola2 status")
-            self.disconnect_cola2status()
-
-        if not self.subscribed:
-            time.sleep(5)
-            # self.update_cola2_status()
-            self.reconnect_signal.emit()
+        except Exception as e:
+            logger.error("Disconnecting cola2 status {}".format(e))
+            if self.total_time_topic is not None:
+                self.total_time_topic.close()
+                self.total_time_topic = None
+            elif sock is not None:
+                sock.close()
+            self.subscribed = False
+            self.retry_timer = self.reactor.call_later(self.backoff.next_delay(), self.do_connection)
 
     def start_timer(self):
         self.timer.start(1000)
@@ -127,7 +143,7 @@ class Cola2Status(QObject):
 
                         if data and data['valid_data'] == 'disconnected':
                             self.disconnect_cola2status()
-                            self.reconnect_signal.emit()
+                            self.start_connection()
                         else:
                             self.cola2_label.setStyleSheet('font:italic; color:red')
                             self.cola2_indicator.setPixmap(QPixmap(":/resources/red_led.svg"))
@@ -137,12 +153,21 @@ class Cola2Status(QObject):
                     self.cola2_indicator.setPixmap(QPixmap(":/resources/red_led.svg"))
         except:
             self.disconnect_cola2status()
-            self.reconnect_signal.emit()
+            self.start_connection()
 
     def is_subscribed(self):
         return self.subscribed
 
+    def cancel_connection(self):
+        for timer in (self.connect_timer, self.retry_timer):
+            if timer is not None:
+                timer.cancel()
+        self.connect_timer = None
+        self.retry_timer = None
+
     def disconnect_cola2status(self):
+        self.keepgoing = False
+        self.reactor.run_in_loop(self.cancel_connection)
         self.cola2_connected.emit(False)
         self.subscribed = False
         self.cola2_label.setStyleSheet('font:italic; color:red')
@@ -156,5 +181,3 @@ class Cola2Status(QObject):
 
         self.total_time_topic = None
 
-        self.threadpool.clear()
-
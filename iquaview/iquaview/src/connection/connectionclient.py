@@ -17,59 +17,48 @@ If not, see <http://www.gnu.org/licenses/>.
  Class to handle the connection to the init server of the vehicle
 """
 
+import queue
 import socket
-import time
 import threading
 import logging
-from PyQt5.QtCore import pyqtSignal, QObject, QTimer, QThreadPool
+from PyQt5.QtCore import pyqtSignal, QObject
 
-from iquaview.src.utils.workerthread import Worker
+from iquaview.src.cola2api.io_reactor import get_reactor, ReconnectBackoff
 
 logger = logging.getLogger(__name__)
 
-
-class RepeatedTimer(object):
-    def __init__(self, interval, func, *args, **kwargs):
-        self._timer     = QTimer()
-        self.interval   = interval
-        self.function   = func
-        self.args       = args
-        self.kwargs     = kwargs
-        self.is_running = False
-
-        self._timer.timeout.connect(self._run)
-        self._timer.start(5000)
-
-    def _run(self):
-        self.is_running = False
-        self.start()
-        self.function(*self.args, **self.kwargs)
-
-    def start(self):
-        if not self.is_running:
-            self.is_running = True
-
-    def stop(self):
-        self._timer.stop()
-        self.is_running = False
+# seconds to wait for the connection and for each reply of the server
+REPLY_TIMEOUT = 3.0
+# seconds between watchdog messages
+WATCHDOG_INTERVAL = 5.0
 
 
 class ConnectionClient(QObject):
+    """
+    Connection to the process server of the vehicle.
+
+    The socket is connected, read and watched from the I/O reactor thread. Lost
+    connections are retried with a growing delay. Requests sent with send wait
+    for the reply read by the reactor, and the watchdog runs between requests.
+    """
     connection_failure = pyqtSignal()
     connection_ok = pyqtSignal()
-    reconnect_signal = pyqtSignal()
 
     def __init__(self, ip, port,):
         super(ConnectionClient, self).__init__()
         self.ip = ip
         self.port = port
         self.sock = None
-        self.threadpool = QThreadPool()
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.watchdog)
-        self.reconnect_signal.connect(self.start_cc_thread)
-        self.connection_ok.connect(self.start_watchdog_timer)
-        # self.rt = RepeatedTimer(5000, self.watchdog)
+        self.reactor = get_reactor()
+        self.backoff = ReconnectBackoff()
+        self.replies = queue.Queue()
+        # held while a request, sent by send or by the watchdog, waits for its reply
+        self.request_lock = threading.Lock()
+        self.connect_timer = None
+        self.retry_timer = None
+        self.watchdog_timer = None
+        self.watchdog_reply_timer = None
+        self.keepgoing = False
         self.connected = False
 
     @property
@@ -88,79 +77,134 @@ class ConnectionClient(QObject):
     def port(self, port):
         self.__port = port
 
-    def start_cc_thread(self):
-        # self.t = threading.Thread(target=self.do_connection)
-        # self.t.daemon = True
-        # self.t.start()
-        worker = Worker(self.do_connection)  # Any other args, kwargs are passed to the run function
-        self.threadpool.start(worker)
+    def start_connection(self):
+        """Connect to the server, retrying until it succeeds or disconnect is called."""
+        self.keepgoing = True
+        self.reactor.call_soon(self.do_connection)
 
     def do_connection(self):
-        try:
-            # Create a TCP/IP socket
-            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            # Set timeout
-            self.sock.settimeout(3.0)
-            server_address = (self.__ip, int(self.__port))
-            self.sock.connect(server_address)
-            self.connected = True
-            self.connection_ok.emit()
-            logger.info("Connected")
-
-        except socket.error as e:
-            self.disconnect()
-            self.connected = False
+        if not self.keepgoing:
+            return
+        self.connect_timer = self.reactor.connect_tcp((self.__ip, int(self.__port)), REPLY_TIMEOUT,
+                                                      self.connection_done)
+
+    def connection_done(self, sock, error):
+        """Called from the reactor thread with the result of the connection attempt."""
+        self.connect_timer = None
+        if not self.keepgoing:
+            if sock is not None:
+                sock.close()
+            return
+        if error is not None:
+            logger.debug("Process server connection failed: {}".format(error))
             self.connection_failure.emit()
-
-        except Exception as e:
-            self.disconnect()
-            self.connected = False
-            self.connection_failure.emit()
-
-        if not self.connected:
-            time.sleep(5)
-            self.reconnect_signal.emit()
-
-    def start_watchdog_timer(self):
-        self.timer.start(5000)
+            self.schedule_reconnection()
+            return
+
+        self.sock = sock
+        self.sock.settimeout(REPLY_TIMEOUT)
+        self.reactor.add_reader(self.sock, self.on_readable)
+        self.backoff.reset()
+        self.connected = True
+        self.watchdog_timer = self.reactor.call_every(WATCHDOG_INTERVAL, self.watchdog)
+        logger.info("Connected")
+        self.connection_ok.emit()
+
+    def schedule_reconnection(self):
+        if self.keepgoing:
+            self.retry_timer = self.reactor.call_later(self.backoff.next_delay(), self.do_connection)
+
+    def on_readable(self):
+        """Called from the reactor thread when the server sends data."""
+        try:
+            data = self.sock.recv(4096)
+        except (BlockingIOError, socket.timeout):
+            return
+        except OSError as e:
+            logger.error("socket error occured: {}".format(e))
+            self.connection_lost()
+            return
+        if not data:
+            logger.error("connection closed by the server")
+            self.connection_lost()
+            return
+
+        if self.watchdog_reply_timer is not None:
+            self.watchdog_reply_timer.cancel()
+            self.watchdog_reply_timer = None
+            self.request_lock.release()
+            if data.decode() != "watchdogack":
+                logger.error("fail to receive ack from the server")
+                self.connection_lost()
+        else:
+            self.replies.put(data.decode())
 
     def watchdog(self):
+        """Check the connection with the server, skipped while a request is waiting for its reply."""
+        if not self.request_lock.acquire(blocking=False):
+            return
         try:
-            data = self.send("watchdog")
-            if data != "watchdogack":
-                self.disconnect()
-                self.connection_failure.emit()
-                self.reconnect_signal.emit()
-
-        except socket.timeout:
-            logger.error("timeout error")
-            self.disconnect()
-            self.connection_failure.emit()
-            self.reconnect_signal.emit()
-        except socket.error:
-            logger.error("socket error occured")
-            self.disconnect()
-            self.connection_failure.emit()
-            self.reconnect_signal.emit()
-
-        except Exception as e:
-            logger.error("%s fail to receive ack from the server" % e)
-            self.disconnect()
-            self.connection_failure.emit()
-            self.reconnect_signal.emit()
-
-    def send(self, message):
-        self.sock.sendall(message.encode())
-        data = self.sock.recv(4096).decode()
-        return data
-
-
-    def disconnect(self):
-        # if self.rt:
-        #     self.rt.stop()
+            self.sock.sendall("watchdog".encode())
+        except OSError as e:
+            self.request_lock.release()
+            logger.error("socket error occured: {}".format(e))
+            self.connection_lost()
+            return
+        self.watchdog_reply_timer = self.reactor.call_later(REPLY_TIMEOUT, self.watchdog_timeout)
+
+    def watchdog_timeout(self):
+        logger.error("timeout error")
+        self.watchdog_reply_timer = None
+        self.request_lock.release()
+        self.connection_lost()
+
+    def connection_lost(self):
+        """Close the failed connection, notify it and retry."""
+        self.close_connection()
+        self.connection_failure.emit()
+        self.schedule_reconnection()
+
+    def close_connection(self):
         self.connected = False
-        self.timer.stop()
+        for timer in (self.connect_timer, self.retry_timer, self.watchdog_timer, self.watchdog_reply_timer):
+            if timer is not None:
+                timer.cancel()
+        if self.watchdog_reply_timer is not None:
+            self.watchdog_reply_timer = None
+            self.request_lock.release()
+        self.connect_timer = None
+        self.retry_timer = None
+        self.watchdog_timer = None
         if self.sock:
+            self.reactor.remove_reader(self.sock)
             self.sock.close()
+            self.sock = None
+
+    def send(self, message):
+        """
+        Send a request to the server and wait for its reply.
+
+        :param message: request text
+        :return: reply text
+        """
+        if not self.request_lock.acquire(timeout=REPLY_TIMEOUT):
+            raise socket.timeout("Timeout waiting for the previous request")
+        try:
+            sock = self.sock
+            if sock is None:
+                raise ConnectionError("Not connected to the process server")
+            # discard replies that arrived after their request timed out
+            while not self.replies.empty():
+                self.replies.get_nowait()
+            sock.sendall(message.encode())
+            try:
+                return self.replies.get(timeout=REPLY_TIMEOUT)
+            except queue.Empty:
+                raise socket.timeout("No reply to {}".format(message))
+        finally:
+            self.request_lock.release()
 
-        self.threadpool.clear()
+    def disconnect(self):
+        """Close the connection and stop retrying."""
+        self.keepgoing = False
+        self.reactor.run_in_loop(self.close_connection)
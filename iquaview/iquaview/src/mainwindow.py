@@ -77,6 +77,7 @@ from iquaview.src import (options,
                           resources_qgis
                           )
 from iquaview.src.utils import busywidget
+from iquaview.src.utils.workerthread import FutureWatcher
 from iquaview.src.vehicle import keeppositionstatus, vehicledata, logwidget, calibratemagnetometer, thrustersstatus, \
     timeoutwidget, goto, vehicleinfo, auvconfigparams
 from iquaview.src.plugins.pluginmanager import PluginManager
@@ -139,6 +140,8 @@ class MainWindow(ui_mainwindow.Ui_MainWindow, QMainWindow):
 
         # vehicle data
         self.vehicle_data = vehicledata.VehicleData(self.config, self.vehicle_info)
+        # completion of the service calls sent without blocking
+        self.service_watcher = FutureWatcher(self)
 
         # Menu bar
         self.project_menu = self.menubar.addMenu("Project")
@@ -1387,7 +1390,9 @@ class MainWindow(ui_mainwindow.Ui_MainWindow, QMainWindow):
 
     def reset_timeout(self):
         """ Reset Timeout."""
-        self.timeout_widget.reset_timeout()
+        future = self.timeout_widget.reset_timeout()
+        if future is not None:
+            self.watch_service(future, self.reset_timeout_action)
 
     def on_click_calibrate_magnetometer(self):
         """ Start calibrate magnetometer."""
@@ -1653,18 +1658,10 @@ class MainWindow(ui_mainwindow.Ui_MainWindow, QMainWindow):
                 disable_keep_position = self.vehicle_data.get_disable_all_keep_positions_service()
 
             if disable_keep_position is not None:
-               response = cola2_interface.send_trigger_service(ip, port,
-                                                               vehicle_namespace+disable_keep_position)
-               try:
-                   if not response['values']['success']:
-                       QMessageBox.critical(self,
-                                            "Disable keep position failed",
-                                            response['values']['message'],
-                                            QMessageBox.Close)
-                       self.change_icon_keep_position()
-               # back compatibility
-               except Exception as e:
-                   logger.warning("Disable keep position response can not be read")
+               future = cola2_interface.run_async(cola2_interface.send_trigger_service, ip, port,
+                                                  vehicle_namespace+disable_keep_position)
+               self.watch_service(future, self.enable_keep_position_action, lambda f: self.check_trigger_response(
+                   f, "Disable keep position failed", self.change_icon_keep_position))
             else:
                 QMessageBox.critical(self,
                                      "Keep Position error",
@@ -1674,18 +1671,10 @@ class MainWindow(ui_mainwindow.Ui_MainWindow, QMainWindow):
         else:
             keep_position = self.vehicle_data.get_keep_position_service()
             if keep_position is not None:
-                response = cola2_interface.send_trigger_service(ip, port,
-                                                                vehicle_namespace+keep_position)
-                try:
-                    if not response['values']['success']:
-                        QMessageBox.critical(self,
-                                             "Enable keep position failed",
-                                             response['values']['message'],
-                                             QMessageBox.Close)
-                        self.change_icon_keep_position()
-                # back compatibility
-                except Exception as e:
-                    logger.warning("Enable keep position response can not be read")
+                future = cola2_interface.run_async(cola2_interface.send_trigger_service, ip, port,
+                                                   vehicle_namespace+keep_position)
+                self.watch_service(future, self.enable_keep_position_action, lambda f: self.check_trigger_response(
+                    f, "Enable keep position failed", self.change_icon_keep_position))
             else:
                 QMessageBox.critical(self,
                                      "Keep Position error",
@@ -1693,6 +1682,70 @@ class MainWindow(ui_mainwindow.Ui_MainWindow, QMainWindow):
                                      QMessageBox.Close)
                 self.change_icon_keep_position()
 
+    def watch_service(self, future, action, callback=None):
+        """
+        Disable an action until the service call it started has finished.
+
+        :param future: future of the service call
+        :param action: action that started the call
+        :param callback: function receiving the future, called in the GUI thread
+        """
+        action.setEnabled(False)
+
+        def done(f):
+            action.setEnabled(self.auv_on_wifi)
+            if callback is not None:
+                callback(f)
+
+        self.service_watcher.watch(future, done)
+
+    def check_trigger_response(self, future, title, on_failure=None):
+        """
+        Check the response of a trigger service sent without blocking.
+
+        :param future: future of the service call
+        :param title: title of the message shown if the service failed
+        :param on_failure: function called if the service failed
+        """
+        try:
+            response = future.result()
+        except Exception as e:
+            logger.error("{}: {}".format(title, e))
+            QMessageBox.critical(self,
+                                 title,
+                                 "Connection with COLA2 failed: {}".format(e),
+                                 QMessageBox.Close)
+            if on_failure is not None:
+                on_failure()
+            return
+        try:
+            if not response['values']['success']:
+                QMessageBox.critical(self,
+                                     title,
+                                     response['values']['message'],
+                                     QMessageBox.Close)
+                if on_failure is not None:
+                    on_failure()
+        # back compatibility
+        except Exception as e:
+            logger.warning("{}: the response can not be read".format(title))
+
+    def check_empty_response(self, future, title):
+        """
+        Check the result of an empty service sent without blocking.
+
+        :param future: future of the service call
+        :param title: title of the message shown if the service failed
+        """
+        try:
+            future.result()
+        except Exception as e:
+            logger.error("{}: {}".format(title, e))
+            QMessageBox.critical(self,
+                                 title,
+                                 "Connection with COLA2 failed: {}".format(e),
+                                 QMessageBox.Close)
+
     def change_icon_keep_position(self):
         """ change keep position icon."""
         if self.keep_position_status.get_keep_position_enabled():
@@ -1717,8 +1770,10 @@ class MainWindow(ui_mainwindow.Ui_MainWindow, QMainWindow):
         if self.thrusters_status.get_thrusters_enabled():
             disable_thrusters = self.vehicle_data.get_disable_thrusters_service()
             if disable_thrusters is not None:
-                cola2_interface.send_empty_service(ip, port,
+                future = cola2_interface.run_async(cola2_interface.send_empty_service, ip, port,
                                                    vehicle_namespace + disable_thrusters)
+                self.watch_service(future, self.disable_thrusters_action,
+                                   lambda f: self.check_empty_response(f, "Disable thrusters error"))
             else:
                 QMessageBox.critical(self,
                                      "Disable thrusters error",
@@ -1728,8 +1783,10 @@ class MainWindow(ui_mainwindow.Ui_MainWindow, QMainWindow):
         else:
             enable_thrusters = self.vehicle_data.get_enable_thrusters_service()
             if enable_thrusters is not None:
-                cola2_interface.send_empty_service(ip, port,
+                future = cola2_interface.run_async(cola2_interface.send_empty_service, ip, port,
                                                    vehicle_namespace + enable_thrusters)
+                self.watch_service(future, self.disable_thrusters_action,
+                                   lambda f: self.check_empty_response(f, "Enable thrusters error"))
                 #/girona500/controller/enable_thrusters
             else:
                 QMessageBox.critical(self,
@@ -2030,19 +2087,10 @@ class MainWindow(ui_mainwindow.Ui_MainWindow, QMainWindow):
 
                 if enable_mission is not None and self.check_disk_capacity():
 
-                        response = cola2_interface.send_trigger_service(ip, port,
-                                                            vehicle_namespace + enable_mission)
-                        try:
-                            if not response['values']['success']:
-                                QMessageBox.critical(self,
-                                                     "Execute mission failed",
-                                                     response['values']['message'],
-                                                     QMessageBox.Close)
-                                self.change_icon_mission()
-
-                        # back compatibility
-                        except Exception as e:
-                            logger.warning("The execute mission service response can not be read")
+                        future = cola2_interface.run_async(cola2_interface.send_trigger_service, ip, port,
+                                                           vehicle_namespace + enable_mission)
+                        self.watch_service(future, self.execute_mission_action, lambda f: self.check_trigger_response(
+                            f, "Execute mission failed", self.change_icon_mission))
                 else:
                     self.execute_mission_action.setChecked(False)
                     QMessageBox.critical(self,
@@ -2069,19 +2117,10 @@ class MainWindow(ui_mainwindow.Ui_MainWindow, QMainWindow):
         else:
             disable_mission = self.vehicle_data.get_disable_mission_service()
             if disable_mission is not None:
-                response = cola2_interface.send_trigger_service(ip, port,
-                                                                vehicle_namespace + disable_mission)
-                try:
-                    if not response['values']['success']:
-                        QMessageBox.critical(self,
-                                             "Disable mission failed",
-                                             response['values']['message'],
-                                             QMessageBox.Close)
-                        self.change_icon_mission()
-
-                # back compatibility
-                except Exception as e:
-                    logger.warning("The disable mission response can not be read")
+                future = cola2_interface.run_async(cola2_interface.send_trigger_service, ip, port,
+                                                   vehicle_namespace + disable_mission)
+                self.watch_service(future, self.execute_mission_action, lambda f: self.check_trigger_response(
+                    f, "Disable mission failed", self.change_icon_mission))
                 #/girona500/captain/disable_mission
             else:
                 QMessageBox.critical(self,
@@ -2339,6 +2378,7 @@ l
         self.vehicle_widgets.disconnect()
         self.log_widget.disconnect()
         self.goto_dialog.disconnect()
+        cola2_interface.close_service_connections()
 
     def closeEvent(self, event):
         """ Overrides closeEvent"""
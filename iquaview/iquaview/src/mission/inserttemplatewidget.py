@@ -41,6 +41,8 @@ class InsertTemplateWidget(QWidget, Ui_InsertTemplateWidget):
         self.current_missiontrack = current_missiontrack
         self.insertion_wp = 0
         self.modified = False
+        # once merged, previews finished later are not inserted
+        self.merged = False
         self.template_widget = None
         self.preview_mission = Mission()
 
@@ -77,6 +79,7 @@ class InsertTemplateWidget(QWidget, Ui_InsertTemplateWidget):
             self.template_widget = rectangletemplatewidget.RectangleTemplateWidget(self.canvas, self.msglog,
                                                                                    self.current_missiontrack)
 
+        self.template_widget.tracks_ready.connect(self.template_tracks_ready)
         self.templateWidget.layout().addWidget(self.template_widget)
         self.template_widget.show()
 
@@ -89,30 +92,32 @@ class InsertTemplateWidget(QWidget, Ui_InsertTemplateWidget):
         self.insertion_wp = self.insertionPointSpinBox.value() - 1
 
     def preview_tracks(self):
-        """ preview tracks on the canvas"""
+        """ preview tracks on the canvas, template_tracks_ready is called once they are computed"""
         self.template_widget.preview_tracks()
+
+    def template_tracks_ready(self):
+        """ Insert the tracks of the template in a copy of the current mission"""
+        if self.merged:
+            return
         self.modified = True
 
         template_mission = self.template_widget.get_template_mission()
-        insertion_point = self.insertion_wp
         self.preview_mission.copy(self.current_missiontrack.get_mission())
-
-        for step in range(0, template_mission.get_length()):
-            self.preview_mission.insert_step(insertion_point, template_mission.get_step(step))
-            insertion_point = insertion_point + 1
+        self.preview_mission.insert_steps(self.insertion_wp, [template_mission.get_step(step)
+                                                              for step in range(0, template_mission.get_length())])
         self.preview_mission_signal.emit()
 
     def merge_template_mission(self):
         """ Merge the template with the current mission"""
+        # the tracks of a preview still being computed are the ones to merge
+        self.template_widget.finish_preview()
+        self.merged = True
 
         # Get mission from template and append it in the current one in the current insertion point
         template_mission = self.template_widget.get_template_mission()
         current_mission = self.current_missiontrack.get_mission()
-        insertion_point = self.insertion_wp
-
-        for step in range(0, template_mission.get_length()):
-            current_mission.insert_step(insertion_point, template_mission.get_step(step))
-            insertion_point = insertion_point + 1
+        current_mission.insert_steps(self.insertion_wp, [template_mission.get_step(step)
+                                                         for step in range(0, template_mission.get_length())])
         self.modified = False
         self.current_missiontrack.update_layer_geometry()
         self.view.setCurrentLayer(self.current_missiontrack.get_mission_layer())
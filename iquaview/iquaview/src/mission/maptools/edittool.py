@@ -21,9 +21,10 @@ using a QGIS rubber band
 import math
 import logging
 
-from iquaview.src.utils.calcutils import intersect_point_to_line, is_between
+from iquaview.src.utils.calcutils import intersect_point_to_line
 from iquaview.src.mission.startendmarker import StartEndMarker
-from qgis.core import QgsFeature, QgsGeometry, QgsWkbTypes, QgsPointXY, QgsDistanceArea, QgsProject
+from iquaview.src.mission.maptools.waypointindex import WaypointIndex
+from qgis.core import QgsFeature, QgsWkbTypes, QgsPointXY, QgsDistanceArea, QgsProject
 from qgis.gui import QgsMapTool, QgsRubberBand, QgsVertexMarker
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QColor
@@ -72,6 +73,7 @@ class EditTool(QgsMapTool):
         self.layer.startEditing()
 
         self.wp = []
+        self.waypoint_index = WaypointIndex(self.canvas())
         self.mCtrl = False
         # handler for mission feature
         self.update_rubber_bands(0)
@@ -384,24 +386,7 @@ class EditTool(QgsMapTool):
         :return: bool
         """
         if len(self.wp) > 1:
-            dist_to_segment = []
-            for v in range(0, len(self.wp) - 1):
-                # convert layer coordinates to canvas coordinates
-                a1 = self.toCanvasCoordinates(QgsPointXY(self.wp[v]))
-                b1 = self.toCanvasCoordinates(QgsPointXY(self.wp[v + 1]))
-
-                dist_to_segment.append(
-                    self.dist_to_segment(a1.x(),
-                                         a1.y(),
-                                         b1.x(),
-                                         b1.y(),
-                                         pos.x(),
-                                         pos.y()))
-                logger.debug("dist to segment: {}".format(dist_to_segment))
-                if dist_to_segment[v] < tolerance:
-                    return True
-
-            return False
+            return self.waypoint_index.get_grid(self.wp).on_segment(pos.x(), pos.y(), tolerance)
         else:
             # last waypoint
             vertex = self.find_vertex_at(pos, tolerance)
@@ -417,18 +402,11 @@ class EditTool(QgsMapTool):
         :param pos: the point that we've clicked
         :return: initial vertex of the segment
         """
-        dist_to_segment = []
-        for v in range(0, len(self.wp) - 1):
-            a1 = self.toCanvasCoordinates(QgsPointXY(self.wp[v]))
-            b1 = self.toCanvasCoordinates(QgsPointXY(self.wp[v + 1]))
-            dist_to_segment.append(self.dist_to_segment(a1.x(),
-                                                        a1.y(),
-                                                        b1.x(),
-                                                        b1.y(),
-                                                        pos.x(),
-                                                        pos.y()))
-
-        vertex = dist_to_segment.index(min(dist_to_segment))
+        segment = self.waypoint_index.get_grid(self.wp).nearest_segment(pos.x(), pos.y(), self.calc_tolerance())
+        if segment is None:
+            raise ValueError("The mission has no segments")
+        vertex, distance = segment
+        logger.debug("dist to segment: {}".format(distance))
         return vertex
 
     def find_vertex_at(self, pos, tolerance):
@@ -441,57 +419,14 @@ class EditTool(QgsMapTool):
         :return: vertex or None
         """
         if len(self.wp) > 0:
-            dist_to_vertex = []
             logger.debug("tolerance {}".format(tolerance))
-            for v in range(0, len(self.wp)):
-                a1 = self.toCanvasCoordinates(QgsPointXY(self.wp[v]))
-                dist_to_vertex.append(math.sqrt((pos.x() - a1.x()) ** 2 + (pos.y() - a1.y()) ** 2))
-                logger.debug("dist to vertex: {}".format(dist_to_vertex))
-
-            vertex = dist_to_vertex.index(min(dist_to_vertex))
-            if min(dist_to_vertex) > tolerance:
-                return None
-            else:
+            vertex = self.waypoint_index.get_grid(self.wp).nearest_vertex(pos.x(), pos.y(), tolerance)
+            if vertex is not None:
                 logger.debug("ON VERTEX")
-                return vertex
+            return vertex
         else:
             return None
 
-    def dist_to_segment(self, ax, ay, bx, by, cx, cy):
-        """
-        Computes the minimum distance between a point (cx, cy) and a line segment with endpoints (ax, ay) and (bx, by).
-        :param ax: endpoint 1, x-coordinate
-        :param ay: endpoint 1, y-coordinate
-        :param bx: endpoint 2, x-coordinate
-        :param by: endpoint 2, y-coordinate
-        :param cx: point, x-coordinate
-        :param cy: point, x-coordinate
-        :return: minimum distance between point and line segment
-        """
-        # calculate tolerance
-        tolerance = self.calc_tolerance()
-        # get distance between points c-a and c-b
-        dist_to_a = math.sqrt((cx - ax) ** 2 + (cy - ay) ** 2)
-        dist_to_b = math.sqrt((cx - bx) ** 2 + (cy - by) ** 2)
-        # if distance to point a or distance to point b is smaller than tolerance, return -1
-        if (dist_to_a < tolerance) or (dist_to_b < tolerance):
-            return -1
-
-        # if one coordinate are between a coordinates or b coordinates
-        if is_between(ax, ay, bx, by, cx, cy):
-
-            y = (by - ay)
-            x = (bx - ax)
-
-            # line defined by two points formula
-            num = abs((y * cx) - (x * cy) + (bx * ay) - (by * ax))
-            den = math.sqrt(y ** 2 + x ** 2)
-            dl = num / den
-            return dl
-
-        else:
-            return tolerance + 1
-
     def set_geometry(self):
         """
         Save rubber band to geometry of the layer
@@ -499,21 +434,14 @@ class EditTool(QgsMapTool):
         if self.layer.featureCount() == 0:
             # no feature yet created
             f = QgsFeature()
-            if len(self.wp) == 1:
-                f.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(self.wp[0].x(), self.wp[0].y())))
-            else:
-                f.setGeometry(QgsGeometry.fromPolyline(self.wp))
+            f.setGeometry(self.mission_track.get_geometry())
             # self.layer.dataProvider().addFeatures([f])
             self.layer.addFeatures([f])
         else:
             # mission feature present, edit geometry
             feats = self.layer.getFeatures()
             for f in feats:
-                if len(self.wp) == 1:
-                    self.layer.changeGeometry(f.id(),
-                                              QgsGeometry.fromPointXY(QgsPointXY(self.wp[0].x(), self.wp[0].y())))
-                else:
-                    self.layer.changeGeometry(f.id(), QgsGeometry.fromPolyline(self.wp))
+                self.layer.changeGeometry(f.id(), self.mission_track.get_geometry())
         self.layer.commitChanges()
         self.layer.startEditing()
 
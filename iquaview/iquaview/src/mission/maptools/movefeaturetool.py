@@ -20,6 +20,8 @@ Map tool for moving a clicked mission track.
 import logging
 from math import degrees, cos
 
+import numpy as np
+
 from qgis.core import (QgsTolerance,
                        QgsRectangle,
                        QgsFeatureRequest,
@@ -36,7 +38,7 @@ from PyQt5.QtGui import QColor
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QMessageBox
 
-from iquaview.src.utils.calcutils import endpoint
+from iquaview.src.utils import geodesy
 
 logger = logging.getLogger(__name__)
 
@@ -200,11 +202,11 @@ class MoveFeatureTool(QgsMapTool):
                 dy = end_point.y() - start_point.y()
                 end_c = QgsPointXY(ini_coords[0].x() + dx, ini_coords[0].y() + dy)
                 end_coords.append(end_c)
-                for i in range(1, len(ini_coords)):
-                    dist = self.distance.measureLine(ini_coords[i-1], ini_coords[i])
-                    angle = self.distance.bearing(ini_coords[i-1], ini_coords[i])
-                    end_c = endpoint(end_coords[i-1], dist, degrees(angle))
-                    end_coords.append(end_c)
+                # measure all the legs at once and chain them from the translated first waypoint
+                coords = np.array([(p.x(), p.y()) for p in ini_coords])
+                dist, angle, _, _ = geodesy.inverse(coords[:-1, 0], coords[:-1, 1], coords[1:, 0], coords[1:, 1])
+                lons, lats = geodesy.traverse(end_c.x(), end_c.y(), dist, angle)
+                end_coords.extend(QgsPointXY(x, y) for x, y in zip(lons.tolist(), lats.tolist()))
 
                 feature = next(self.layer.dataProvider().getFeatures())
                 self.layer.startEditing()
@@ -330,15 +332,11 @@ class MoveFeatureTool(QgsMapTool):
         ini_coords = self.ini_geom.asPolyline()
         end_coords = []
         if len(ini_coords) > 1:
-            dist = self.distance.measureLine(self.rot_center, ini_coords[0])
-            angle = self.distance.bearing(self.rot_center, ini_coords[0]) + rot_angle
-            end_first_wp = endpoint(self.rot_center, dist, degrees(angle))
-            end_coords.append(end_first_wp)
-            for i in range(1, len(ini_coords)):
-                dist = self.distance.measureLine(ini_coords[i-1], ini_coords[i])
-                angle = self.distance.bearing(ini_coords[i-1], ini_coords[i]) + rot_angle
-                end_c = endpoint(end_coords[i-1], dist, degrees(angle))
-                end_coords.append(end_c)
+            # first leg from the rotation center to the first waypoint, then between waypoints
+            coords = np.array([(self.rot_center.x(), self.rot_center.y())] + [(p.x(), p.y()) for p in ini_coords])
+            dist, angle, _, _ = geodesy.inverse(coords[:-1, 0], coords[:-1, 1], coords[1:, 0], coords[1:, 1])
+            lons, lats = geodesy.traverse(self.rot_center.x(), self.rot_center.y(), dist, angle + degrees(rot_angle))
+            end_coords.extend(QgsPointXY(x, y) for x, y in zip(lons.tolist(), lats.tolist()))
 
             end_band_geom = QgsGeometry().fromPolylineXY(end_coords)
             self.band.setToGeometry(end_band_geom, self.layer)
@@ -16,9 +16,9 @@ If not, see <http://www.gnu.org/licenses/>.
 """
 Map tool to select multiple features of a layer graphically
 """
-import math
 import logging
 
+from iquaview.src.mission.maptools.waypointindex import WaypointIndex
 from qgis.core import QgsGeometry, QgsWkbTypes, QgsPointXY, QgsFeature
 from qgis.gui import QgsMapTool, QgsRubberBand
 from PyQt5.QtCore import Qt, pyqtSignal, QPoint
@@ -45,6 +45,7 @@ class SelectFeaturesTool(QgsMapTool):
         self.mission_track.mission_changed.connect(self.update_rubber_band)
         self.mission_track.step_removed.connect(self.remove_rubber_band)
         self.wp = self.mission_track.find_waypoints_in_mission()
+        self.waypoint_index = WaypointIndex(self.canvas())
         self.layer.startEditing()
         self.rubber_band_vs_track_indexes = {}
         self.rubber_band_points = QgsRubberBand(self.canvas(), QgsWkbTypes.PointGeometry)
@@ -128,16 +129,7 @@ class SelectFeaturesTool(QgsMapTool):
         :return: vertex or None
         """
         if len(self.wp) > 0:
-            dist_to_vertex = []
-            for v in range(0, len(self.wp)):
-                a1 = self.toCanvasCoordinates(QgsPointXY(self.wp[v]))
-                dist_to_vertex.append(math.sqrt((pos.x() - a1.x()) ** 2 + (pos.y() - a1.y()) ** 2))
-
-            vertex = dist_to_vertex.index(min(dist_to_vertex))
-            if min(dist_to_vertex) > tolerance:
-                return None
-            else:
-                return vertex
+            return self.waypoint_index.get_grid(self.wp).nearest_vertex(pos.x(), pos.y(), tolerance)
         else:
             return None
 
@@ -232,21 +224,14 @@ class SelectFeaturesTool(QgsMapTool):
         if self.layer.featureCount() == 0:
             # no feature yet created
             f = QgsFeature()
-            if len(self.wp) == 1:
-                f.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(self.wp[0].x(), self.wp[0].y())))
-            else:
-                f.setGeometry(QgsGeometry.fromPolyline(self.wp))
+            f.setGeometry(self.mission_track.get_geometry())
             # self.layer.dataProvider().addFeatures([f])
             self.layer.addFeatures([f])
         else:
             # mission feature present, edit geometry
             feats = self.layer.getFeatures()
             for f in feats:
-                if len(self.wp) == 1:
-                    self.layer.changeGeometry(f.id(),
-                                              QgsGeometry.fromPointXY(QgsPointXY(self.wp[0].x(), self.wp[0].y())))
-                else:
-                    self.layer.changeGeometry(f.id(), QgsGeometry.fromPolyline(self.wp))
+                self.layer.changeGeometry(f.id(), self.mission_track.get_geometry())
         self.layer.commitChanges()
         self.layer.startEditing()
 
@@ -0,0 +1,275 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+"""
+Screen space index of the waypoints and segments of a mission, for the hit tests of the map tools.
+"""
+
+import math
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# side in pixels of the grid cells
+CELL_SIZE = 32.0
+# pixels around the canvas covered by the grid, queries with a larger tolerance scan all the waypoints
+MARGIN = 64.0
+
+
+class WaypointGrid:
+    """
+    Uniform grid over the screen positions of the waypoints and the segments joining them.
+
+    Each cell lists the waypoints inside it and the segments crossing it, so hit tests
+    only measure the waypoints and segments in the cells around the cursor. Only the
+    canvas and a margin around it are indexed, the cursor is always inside the canvas.
+    """
+
+    def __init__(self, points, width, height, cell_size=CELL_SIZE, margin=MARGIN):
+        """
+        Class constructor
+
+        :param points: array of shape (n, 2) with the waypoints in canvas pixels
+        :param width: width of the canvas in pixels
+        :param height: height of the canvas in pixels
+        :param cell_size: side of the cells in pixels
+        :param margin: pixels indexed around the canvas
+        """
+        self.points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.cell_size = cell_size
+        self.margin = margin
+        self.x0 = -margin
+        self.y0 = -margin
+        self.columns = max(int(math.ceil((width + 2 * margin) / cell_size)), 1)
+        self.rows = max(int(math.ceil((height + 2 * margin) / cell_size)), 1)
+        self.x1 = self.x0 + self.columns * cell_size
+        self.y1 = self.y0 + self.rows * cell_size
+
+        inside = ((self.points[:, 0] >= self.x0) & (self.points[:, 0] < self.x1) &
+                  (self.points[:, 1] >= self.y0) & (self.points[:, 1] < self.y1))
+        vertices = np.flatnonzero(inside)
+        self.vertex_offsets, self.vertex_items = self.build_cells(self.cells_of(self.points[vertices]), vertices)
+
+        segment_cells, segments = self.rasterize_segments()
+        self.segment_offsets, self.segment_items = self.build_cells(segment_cells, segments)
+
+    def cells_of(self, points):
+        """Return the cell index of points inside the grid."""
+        columns = ((points[:, 0] - self.x0) // self.cell_size).astype(np.int64)
+        rows = ((points[:, 1] - self.y0) // self.cell_size).astype(np.int64)
+        return rows * self.columns + columns
+
+    def build_cells(self, cells, items):
+        """
+        Group items by cell.
+
+        :return: tuple with the offsets of each cell in the items and the items sorted by cell
+        """
+        order = np.argsort(cells, kind='stable')
+        counts = np.bincount(cells, minlength=self.rows * self.columns)
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        return offsets, items[order]
+
+    def rasterize_segments(self):
+        """
+        Find the cells crossed by each segment, clipped to the grid.
+
+        :return: tuple with the arrays of cells and of segment indices, one entry per cell crossed
+        """
+        if len(self.points) < 2:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        a = self.points[:-1]
+        d = self.points[1:] - a
+        # Liang-Barsky clipping against the grid
+        t0 = np.zeros(len(a))
+        t1 = np.ones(len(a))
+        visible = np.ones(len(a), dtype=bool)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for p, q in ((-d[:, 0], a[:, 0] - self.x0), (d[:, 0], self.x1 - a[:, 0]),
+                         (-d[:, 1], a[:, 1] - self.y0), (d[:, 1], self.y1 - a[:, 1])):
+                parallel = p == 0
+                visible &= ~(parallel & (q < 0))
+                r = q / p
+                t0 = np.where(~parallel & (p < 0), np.maximum(t0, r), t0)
+                t1 = np.where(~parallel & (p > 0), np.minimum(t1, r), t1)
+        visible &= t0 <= t1
+        segments = np.flatnonzero(visible)
+        start = a[segments] + t0[segments, None] * d[segments]
+        end = a[segments] + t1[segments, None] * d[segments]
+        # sample every half cell, a cell skipped at a corner is next to a sampled one
+        length = np.hypot(*(end - start).T)
+        samples = (np.ceil(length / (self.cell_size / 2.0)) + 1).astype(np.int64)
+        owner = np.repeat(np.arange(len(segments)), samples)
+        first = np.concatenate(([0], np.cumsum(samples)[:-1]))
+        step = np.arange(len(owner)) - np.repeat(first, samples)
+        fraction = step / np.maximum(np.repeat(samples, samples) - 1, 1)
+        positions = start[owner] + fraction[:, None] * (end - start)[owner]
+        positions[:, 0] = np.clip(positions[:, 0], self.x0, self.x1 - 1e-9)
+        positions[:, 1] = np.clip(positions[:, 1], self.y0, self.y1 - 1e-9)
+        # one entry per cell and segment, the keys sort by cell and then by segment
+        count = len(self.points) - 1
+        keys = np.unique(self.cells_of(positions) * count + segments[owner])
+        return keys // count, keys % count
+
+    def candidates(self, offsets, items, x, y, tolerance):
+        """Return the sorted items of the cells around a position, None if the tolerance exceeds the margin."""
+        if tolerance > self.margin:
+            return None
+        column_min = max(int((x - tolerance - self.x0) // self.cell_size) - 1, 0)
+        column_max = min(int((x + tolerance - self.x0) // self.cell_size) + 1, self.columns - 1)
+        row_min = max(int((y - tolerance - self.y0) // self.cell_size) - 1, 0)
+        row_max = min(int((y + tolerance - self.y0) // self.cell_size) + 1, self.rows - 1)
+        if column_min > column_max or row_min > row_max:
+            return np.empty(0, dtype=np.int64)
+        parts = list()
+        for row in range(row_min, row_max + 1):
+            # the cells of a row are contiguous
+            first = row * self.columns
+            parts.append(items[offsets[first + column_min]:offsets[first + column_max + 1]])
+        return np.unique(np.concatenate(parts))
+
+    def nearest_vertex(self, x, y, tolerance):
+        """
+        Find the waypoint closest to a position.
+
+        :param x: x canvas coordinate
+        :param y: y canvas coordinate
+        :param tolerance: maximum distance in pixels
+        :return: index of the waypoint, None if no waypoint is within the tolerance
+        """
+        vertices = self.candidates(self.vertex_offsets, self.vertex_items, x, y, tolerance)
+        if vertices is None:
+            vertices = np.arange(len(self.points))
+        if not len(vertices):
+            return None
+        distances = np.hypot(self.points[vertices, 0] - x, self.points[vertices, 1] - y)
+        closest = int(np.argmin(distances))
+        if distances[closest] > tolerance:
+            return None
+        return int(vertices[closest])
+
+    def segment_distances(self, segments, x, y, tolerance):
+        """
+        Measure the distance from a position to segments for the edit tool hit tests.
+
+        :param segments: indices of the segments, segment i joins waypoints i and i + 1
+        :return: array with -1 for segments with an end closer than the tolerance, the distance to the
+                 segment if the position projects inside it, or tolerance + 1 otherwise
+        """
+        a = self.points[segments]
+        b = self.points[segments + 1]
+        ab = b - a
+        ac = np.array((x, y)) - a
+        dot = ac[:, 0] * ab[:, 0] + ac[:, 1] * ab[:, 1]
+        squared_length = ab[:, 0] ** 2 + ab[:, 1] ** 2
+        inside = (dot >= 0) & (dot <= squared_length) & (squared_length > 0)
+        cross = np.abs(ab[:, 0] * ac[:, 1] - ab[:, 1] * ac[:, 0])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            distances = np.where(inside, cross / np.sqrt(squared_length), tolerance + 1)
+        near_end = ((np.hypot(ac[:, 0], ac[:, 1]) < tolerance) |
+                    (np.hypot(x - b[:, 0], y - b[:, 1]) < tolerance))
+        distances[near_end] = -1
+        return distances
+
+    def nearest_segment(self, x, y, tolerance):
+        """
+        Find the segment closest to a position.
+
+        :param x: x canvas coordinate
+        :param y: y canvas coordinate
+        :param tolerance: hit tolerance in pixels
+        :return: tuple with the index of the segment and its distance as segment_distances, None if
+                 there are no segments
+        """
+        if len(self.points) < 2:
+            return None
+        segments = self.candidates(self.segment_offsets, self.segment_items, x, y, tolerance)
+        if segments is not None and len(segments):
+            distances = self.segment_distances(segments, x, y, tolerance)
+            closest = int(np.argmin(distances))
+            if distances[closest] < tolerance:
+                return int(segments[closest]), float(distances[closest])
+        # nothing within the tolerance, the closest segment can be anywhere
+        distances = self.segment_distances(np.arange(len(self.points) - 1), x, y, tolerance)
+        closest = int(np.argmin(distances))
+        return closest, float(distances[closest])
+
+    def on_segment(self, x, y, tolerance):
+        """Tell if a position is closer than the tolerance to any segment."""
+        segments = self.candidates(self.segment_offsets, self.segment_items, x, y, tolerance)
+        if segments is None:
+            segments = np.arange(max(len(self.points) - 1, 0))
+        if not len(segments):
+            return False
+        return bool((self.segment_distances(segments, x, y, tolerance) < tolerance).any())
+
+
+class WaypointIndex:
+    """
+    WaypointGrid of the waypoints of a map tool, built again only when the waypoints or the view change.
+    """
+
+    def __init__(self, canvas):
+        """
+        Class constructor
+
+        :param canvas: map canvas the tool works on
+        """
+        self.canvas = canvas
+        self.waypoints = None
+        self.key = None
+        self.grid = None
+
+    def get_grid(self, waypoints):
+        """
+        Return the grid of a list of waypoints in the current view.
+
+        :param waypoints: list of waypoints in map coordinates, a new list is expected when they change
+        :return: WaypointGrid
+        """
+        map_to_pixel = self.canvas.getCoordinateTransform()
+        key = (map_to_pixel.mapUnitsPerPixel(), map_to_pixel.xCenter(), map_to_pixel.yCenter(),
+               map_to_pixel.mapRotation(), map_to_pixel.mapWidth(), map_to_pixel.mapHeight(), len(waypoints))
+        if self.grid is None or key != self.key or waypoints is not self.waypoints:
+            points = np.array([(p.x(), p.y()) for p in waypoints], dtype=float).reshape(-1, 2)
+            self.grid = WaypointGrid(self.to_pixels(map_to_pixel, points), self.canvas.width(), self.canvas.height())
+            self.key = key
+            self.waypoints = waypoints
+        return self.grid
+
+    @staticmethod
+    def to_pixels(map_to_pixel, points):
+        """
+        Transform map coordinates to canvas pixels with the affine transform of the view.
+
+        :param map_to_pixel: QgsMapToPixel of the canvas
+        :param points: array of shape (n, 2) in map coordinates
+        :return: array of shape (n, 2) in pixels
+        """
+        if not len(points):
+            return points
+        x0, y0 = points[0]
+        step = map_to_pixel.mapUnitsPerPixel() * 100.0
+        origin = map_to_pixel.transform(x0, y0)
+        x_axis = map_to_pixel.transform(x0 + step, y0)
+        y_axis = map_to_pixel.transform(x0, y0 + step)
+        origin = np.array((origin.x(), origin.y()))
+        x_axis = (np.array((x_axis.x(), x_axis.y())) - origin) / step
+        y_axis = (np.array((y_axis.x(), y_axis.y())) - origin) / step
+        offsets = points - (x0, y0)
+        return origin + offsets[:, :1] * x_axis + offsets[:, 1:] * y_axis
@@ -182,7 +182,7 @@ class WaypointEditWidget(QWidget, Ui_WaypointEditWidget):
         if self.multiple_edition:
             for step in self.step_list:
                 if (self.altitude_checkBox.isChecked()
-                   and (float(self.mission_track.get_step(step).get_maneuver().get_position().get_z()) == 0.0
+                   and (self.mission_track.get_step(step).get_maneuver().get_position().get_z() == 0.0
                         or (self.z_lineEdit.text() and float(self.z_lineEdit.text()) == 0.0))):
                     reply = QMessageBox.warning(None, "Mission Error",
                                                 "Z can not be 0 in Altitude Mode")
@@ -413,14 +413,14 @@ class WaypointEditWidget(QWidget, Ui_WaypointEditWidget):
                     self.parkTime_lineEdit.setText(str(maneuver.get_time()))
 
                 # latitude
-                if not self.latitude_lineEdit.text() or self.latitude_lineEdit.text() != position.get_latitude():
-                    if float(position.get_latitude()).is_integer() and float(position.get_latitude()) != 0.0:
+                if not self.latitude_lineEdit.text() or self.latitude_lineEdit.text() != str(position.get_latitude()):
+                    if position.get_latitude().is_integer() and position.get_latitude() != 0.0:
                         self.latitude_lineEdit.setText(str(int(position.get_latitude())))
                     else:
                         self.latitude_lineEdit.setText(str(position.get_latitude()))
                 # longitude
-                if not self.longitude_lineEdit.text() or self.longitude_lineEdit.text() != position.get_longitude():
-                    if float(position.get_longitude()).is_integer() and float(position.get_longitude()) != 0.0:
+                if not self.longitude_lineEdit.text() or self.longitude_lineEdit.text() != str(position.get_longitude()):
+                    if position.get_longitude().is_integer() and position.get_longitude() != 0.0:
                         self.longitude_lineEdit.setText(str(int(position.get_longitude())))
                     else:
                         self.longitude_lineEdit.setText(str(position.get_longitude()))
@@ -430,30 +430,30 @@ class WaypointEditWidget(QWidget, Ui_WaypointEditWidget):
                 self.apply_changes()
 
                 # z
-                if not self.z_lineEdit.text() or self.z_lineEdit.text() != position.get_z():
-                    if float(position.get_z()).is_integer() and float(position.get_z()) != 0.0:
-                        self.z_lineEdit.setText(str(int(float(position.get_z()))))
+                if not self.z_lineEdit.text() or self.z_lineEdit.text() != str(position.get_z()):
+                    if position.get_z().is_integer() and position.get_z() != 0.0:
+                        self.z_lineEdit.setText(str(int(position.get_z())))
                     else:
                         self.z_lineEdit.setText(str(position.get_z()))
 
                 # tolerance
                 tolerance = maneuver.get_tolerance()
 
-                if not self.tolerance_x_lineEdit.text() or float(self.tolerance_x_lineEdit.text()) != float(tolerance.x):
-                    if float(tolerance.x).is_integer() and float(tolerance.x) != 0.0:
-                        self.tolerance_x_lineEdit.setText(str(int(float(tolerance.x))))
+                if not self.tolerance_x_lineEdit.text() or float(self.tolerance_x_lineEdit.text()) != tolerance.x:
+                    if tolerance.x.is_integer() and tolerance.x != 0.0:
+                        self.tolerance_x_lineEdit.setText(str(int(tolerance.x)))
                     else:
                         self.tolerance_x_lineEdit.setText(str(tolerance.x))
 
-                if not self.tolerance_y_lineEdit.text() or float(self.tolerance_y_lineEdit.text()) != float(tolerance.y):
-                    if float(tolerance.y).is_integer() and float(tolerance.y) != 0.0:
-                        self.tolerance_y_lineEdit.setText(str(int(float(tolerance.y))))
+                if not self.tolerance_y_lineEdit.text() or float(self.tolerance_y_lineEdit.text()) != tolerance.y:
+                    if tolerance.y.is_integer() and tolerance.y != 0.0:
+                        self.tolerance_y_lineEdit.setText(str(int(tolerance.y)))
                     else:
                         self.tolerance_y_lineEdit.setText(str(tolerance.y))
 
-                if not self.tolerance_z_lineEdit.text() or float(self.tolerance_z_lineEdit.text()) != float(tolerance.z):
-                    if float(tolerance.z).is_integer() and float(tolerance.z) != 0.0:
-                        self.tolerance_z_lineEdit.setText(str(int(float(tolerance.z))))
+                if not self.tolerance_z_lineEdit.text() or float(self.tolerance_z_lineEdit.text()) != tolerance.z:
+                    if tolerance.z.is_integer() and tolerance.z != 0.0:
+                        self.tolerance_z_lineEdit.setText(str(int(tolerance.z)))
                     else:
                         self.tolerance_z_lineEdit.setText(str(tolerance.z))
 
@@ -538,11 +538,11 @@ class WaypointEditWidget(QWidget, Ui_WaypointEditWidget):
                             # maneuver is waypoint or section
                             if maneuver.get_maneuver_type() == WAYPOINT_MANEUVER \
                                     or maneuver.get_maneuver_type() == SECTION_MANEUVER:
-                                if float(maneuver.get_speed()) != float(maneuver_two.get_speed()):
+                                if maneuver.get_speed() != maneuver_two.get_speed():
                                     same_speed = False
                             # maneuver is a park
                             else:
-                                if float(maneuver.get_time()) != float(maneuver_two.get_time()):
+                                if maneuver.get_time() != maneuver_two.get_time():
                                     same_park = False
                         else:
                             same_maneuver = False
@@ -554,13 +554,13 @@ class WaypointEditWidget(QWidget, Ui_WaypointEditWidget):
                         position = maneuver.get_position()
                         position_two = maneuver_two.get_position()
 
-                        if float(position.get_latitude()) != float(position_two.get_latitude()):
+                        if position.get_latitude() != position_two.get_latitude():
                             same_lat = False
 
-                        if float(position.get_longitude()) != float(position_two.get_longitude()):
+                        if position.get_longitude() != position_two.get_longitude():
                             same_lon = False
 
-                        if float(position.get_z()) != float(position_two.get_z()):
+                        if position.get_z() != position_two.get_z():
                             same_z = False
 
                         if position.get_altitude_mode() != position_two.get_altitude_mode():
@@ -572,11 +572,11 @@ class WaypointEditWidget(QWidget, Ui_WaypointEditWidget):
 
                         tolerance = maneuver.get_tolerance()
                         tolerance_two = maneuver_two.get_tolerance()
-                        if float(tolerance.x) != float(tolerance_two.x):
+                        if tolerance.x != tolerance_two.x:
                             same_tolerance_x = False
-                        if float(tolerance.y) != float(tolerance_two.y):
+                        if tolerance.y != tolerance_two.y:
                             same_tolerance_y = False
-                        if float(tolerance.z) != float(tolerance_two.z):
+                        if tolerance.z != tolerance_two.z:
                             same_tolerance_z = False
 
                         j += 1
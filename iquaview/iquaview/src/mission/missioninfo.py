@@ -19,11 +19,12 @@ If not, see <http://www.gnu.org/licenses/>.
 
 import datetime
 
+import numpy as np
 from PyQt5.QtWidgets import QWidget
 from qgis.core import QgsDistanceArea, QgsProject, QgsPointXY
 
 from iquaview.src.ui.ui_mission_info import Ui_missionInfo
-from iquaview.src.cola2api.mission_types import PARK_MANEUVER
+from iquaview.src.cola2api.mission_types import PARK_MANEUVER, LATITUDE, LONGITUDE, SPEED, TIME
 
 
 class MissionInfo(QWidget, Ui_missionInfo):
@@ -64,13 +65,13 @@ class MissionInfo(QWidget, Ui_missionInfo):
             self.total_distance.setText("-")
 
         else:
-            if float(first_step.get_maneuver().get_position().z) == 0.0 \
+            if first_step.get_maneuver().get_position().z == 0.0 \
                     and not first_step.get_maneuver().get_position().altitude_mode:
                 self.first_waypoint_onsurface.setText("True")
             else:
                 self.first_waypoint_onsurface.setText("False")
 
-            if float(last_step.get_maneuver().get_position().z) == 0.0 \
+            if last_step.get_maneuver().get_position().z == 0.0 \
                     and not last_step.get_maneuver().get_position().altitude_mode:
                 self.last_waypoint_onsurface.setText("True")
             else:
@@ -84,35 +85,22 @@ class MissionInfo(QWidget, Ui_missionInfo):
             self.estimated_time.setText(str(datetime.timedelta(seconds=0)))
 
         else:
-            total_time = 0
-            total_distance = 0
-
-            if self.current_mission.get_step(0).get_maneuver().get_maneuver_type() == PARK_MANEUVER:  # park
-                total_time = float(self.current_mission.get_step(0).get_maneuver().time)
-                self.estimated_time.setText(str(datetime.timedelta(seconds=int(total_time))))
-
-            for i in range(0, self.current_mission.get_length() - 1):
-                previous_step = self.current_mission.get_step(i)
-                next_step = self.current_mission.get_step(i + 1)
-
-                previous_pos = QgsPointXY(float(previous_step.get_maneuver().get_position().get_longitude()),
-                                          float(previous_step.get_maneuver().get_position().get_latitude()))
-                next_pos = QgsPointXY(float(next_step.get_maneuver().get_position().get_longitude()),
-                                      float(next_step.get_maneuver().get_position().get_latitude()))
-
-                distance = self.distance_calc.measureLine([previous_pos, next_pos])
-                total_distance += distance
-
-                if next_step.get_maneuver().get_maneuver_type() == PARK_MANEUVER:  # park
-                    time = float(next_step.get_maneuver().time)
-                    total_time += time
-
-                if float(next_step.get_maneuver().get_speed()) == 0:
-                    time = 0
-                else:
-                    # estimated speed is 80% of speed
-                    time = distance / (float(next_step.get_maneuver().get_speed()) * 0.8)
-                total_time += time
+            longitudes = self.current_mission.get_column(LONGITUDE).tolist()
+            latitudes = self.current_mission.get_column(LATITUDE).tolist()
+            distances = np.array([self.distance_calc.measureLine([QgsPointXY(longitudes[i], latitudes[i]),
+                                                                   QgsPointXY(longitudes[i + 1], latitudes[i + 1])])
+                                  for i in range(len(longitudes) - 1)])
+            total_distance = distances.sum()
+
+            # time parked, including a park at the first step
+            parks = self.current_mission.get_maneuver_types() == PARK_MANEUVER
+            total_time = self.current_mission.get_column(TIME)[parks].sum()
+
+            # estimated speed is 80% of speed
+            speeds = self.current_mission.get_column(SPEED)[1:] * 0.8
+            times = np.zeros(len(distances))
+            np.divide(distances, speeds, out=times, where=speeds != 0)
+            total_time += times.sum()
 
             self.total_distance.setText(str(int(total_distance))+"m")
             self.estimated_time.setText(str(datetime.timedelta(seconds=int(total_time))))
@@ -19,21 +19,56 @@ If not, see <http://www.gnu.org/licenses/>.
 """
 
 import math
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from PyQt5.QtWidgets import QWidget, QMessageBox
 from PyQt5.QtGui import QColor
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from iquaview.src.ui.ui_lawnmowerwidget import Ui_LawnMowerWidget
+from iquaview.src.cola2api.mission_types import Mission
+from iquaview.src.utils.workerthread import FutureWatcher
 from iquaview.src.mission.maptools.rectangletools import (RectBy3PointsTool,
                                                           RectByFixedExtentTool,
                                                           RectFromCenterTool,
                                                           RectFromCenterFixedTool)
-from qgis.core import QgsPointXY, QgsWkbTypes
+from qgis.core import QgsPointXY, QgsWkbTypes, QgsGeometry
 from qgis.gui import QgsRubberBand
+from iquaview.src.mission.missiontemplates import trackgenerator
 from iquaview.src.mission.missiontemplates.classiclawnmower import ClassicLawnMower
 from iquaview.src.mission.missiontemplates.spirallawnmower import SpiralLawnMower
 
+logger = logging.getLogger(__name__)
+
+# milliseconds without parameter changes before the preview is computed again
+PREVIEW_DELAY = 300
+
+# a single worker, a new preview cancels the pending one
+preview_executor = ThreadPoolExecutor(max_workers=1)
+
+
+def compute_preview(pattern, area_points, track_spacing, num_across_tracks, z, altitude_mode, speed,
+                    tolerance_x, tolerance_y, tolerance_z, cancelled):
+    """
+    Compute the tracks of a lawn mower and their mission, in the preview worker.
+
+    :param cancelled: threading.Event set when the preview is not needed anymore
+    :return: tuple with the longitudes, the latitudes and the Mission, None if cancelled
+    """
+    lons, lats = trackgenerator.compute_tracks(pattern, area_points, track_spacing, num_across_tracks)
+    steps = trackgenerator.track_to_steps(lons, lats, z, altitude_mode, speed,
+                                          tolerance_x, tolerance_y, tolerance_z, cancelled)
+    if steps is None:
+        return None
+    mission = Mission()
+    mission.add_steps(steps)
+    return lons, lats, mission
+
 
 class LawnMowerWidget(QWidget, Ui_LawnMowerWidget):
+    tracks_ready = pyqtSignal()
+
     def __init__(self, canvas, msglog, current_missiontrack, lawnmower_type, parent=None):
         super(LawnMowerWidget, self).__init__(parent)
         self.setupUi(self)
@@ -96,6 +131,18 @@ class LawnMowerWidget(QWidget, Ui_LawnMowerWidget):
 
         self.mission = None
 
+        self.preview_watcher = FutureWatcher(self)
+        self.preview_future = None
+        self.preview_cancelled = None
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DELAY)
+        self.preview_timer.timeout.connect(self.refresh_preview)
+        for spinbox in (self.alongTSpace, self.numAcrossTracks, self.depthAltitudeBox, self.fovValue,
+                        self.overlapValue, self.speed_doubleSpinBox, self.x_tolerance_doubleSpinBox,
+                        self.y_tolerance_doubleSpinBox, self.z_tolerance_doubleSpinBox):
+            spinbox.valueChanged.connect(self.parameters_changed)
+
     def get_template_mission(self):
         return self.lawnmower.get_mission()
 
@@ -196,6 +243,8 @@ class LawnMowerWidget(QWidget, Ui_LawnMowerWidget):
                     return
         else:
             self.deactivate_tool()
+            self.cancel_preview()
+            self.wp_list = []
             self.rubber_band.reset(QgsWkbTypes.LineGeometry)
             self.rubber_band_points.reset(QgsWkbTypes.PointGeometry)
             self.missionAreaDefined = False
@@ -208,43 +257,108 @@ class LawnMowerWidget(QWidget, Ui_LawnMowerWidget):
             self.area_points = [QgsPointXY(geom.vertexAt(0)), QgsPointXY(geom.vertexAt(1)), QgsPointXY(geom.vertexAt(2))]
             self.missionAreaDefined = True
 
-    def preview_tracks(self):
-        """ preview tracks on the canvas"""
+    def preview_tracks(self, show_warnings=True, wait=False):
+        """
+        preview tracks on the canvas, they are computed in the background and tracks_ready is emitted once shown
+
+        :param show_warnings: warn about invalid parameters with a message box
+        :param wait: compute the tracks in the caller thread instead
+        """
         if self.missionAreaDefined:
             if self.altitudeButton.isChecked() and self.depthAltitudeBox.value() == 0:
-                QMessageBox.warning(None,
-                                    "Mission Template",
-                                    "<center>Altitude must be different from zero. </center>",
-                                    QMessageBox.Close)
+                warning = "Altitude must be different from zero."
             elif self.alongTSpace.value() == 0 and not self.bySensorCoverage.isChecked():
-                QMessageBox.warning(None,
-                                    "Mission Template",
-                                    "<center>Track spacing can not be zero. </center>",
-                                    QMessageBox.Close)
+                warning = "Track spacing can not be zero."
             else:
-                self.wp_list = self.lawnmower.compute_tracks(self.get_area_points(),
-                                                             self.get_track_spacing(),
-                                                             self.get_num_across_tracks())
-                self.lawnmower.track_to_mission(self.wp_list, self.get_z(), self.get_altitude_mode(),
-                                                self.get_speed(),
-                                                self.get_x_tolerance(), self.get_y_tolerance(), self.get_z_tolerance())
-
-                # show rubber band with temporal tracks
-                self.rubber_band.reset(QgsWkbTypes.LineGeometry)
-                self.rubber_band_points.reset(QgsWkbTypes.PointGeometry)
-                for wp in self.wp_list:
-                    self.rubber_band.addPoint(QgsPointXY(wp.x(), wp.y()))
-                    self.rubber_band_points.addPoint(QgsPointXY(wp.x(), wp.y()))
-                self.rubber_band_points.show()
-                self.rubber_band.show()
-
-                self.unset_map_tool()
+                warning = None
+                self.start_preview(wait)
         else:
+            warning = "Define first an area for the mission."
+
+        if warning is not None and show_warnings:
             QMessageBox.warning(None,
                                 "Mission Template",
-                                "<center>Define first an area for the mission. </center>",
+                                "<center>{} </center>".format(warning),
                                 QMessageBox.Close)
 
+    def parameters_changed(self):
+        """ Refresh the tracks shown once the parameters stop changing"""
+        if self.wp_list:
+            self.preview_timer.start()
+
+    def refresh_preview(self):
+        self.preview_tracks(show_warnings=False)
+
+    def start_preview(self, wait=False):
+        """
+        Compute the tracks in the preview worker, cancelling the previous preview
+
+        :param wait: compute the tracks in the caller thread and show them before returning
+        """
+        self.cancel_preview()
+        self.preview_cancelled = threading.Event()
+        args = (self.lawnmower.get_mission_type(),
+                [(p.x(), p.y()) for p in self.get_area_points()],
+                self.get_track_spacing(),
+                self.get_num_across_tracks(),
+                self.get_z(), self.get_altitude_mode(), self.get_speed(),
+                self.get_x_tolerance(), self.get_y_tolerance(), self.get_z_tolerance(),
+                self.preview_cancelled)
+        if wait:
+            self.show_preview(compute_preview(*args))
+            return
+        future = preview_executor.submit(compute_preview, *args)
+        self.preview_future = self.preview_watcher.watch(future, self.preview_done)
+
+    def finish_preview(self):
+        """ Compute now the preview still pending, so the template mission matches the parameters"""
+        if self.preview_future is not None or self.preview_timer.isActive():
+            self.cancel_preview()
+            self.preview_tracks(show_warnings=False, wait=True)
+
+    def cancel_preview(self):
+        """ Cancel the preview being computed, if any"""
+        self.preview_timer.stop()
+        if self.preview_future is not None:
+            self.preview_cancelled.set()
+            self.preview_future.cancel()
+            self.preview_future = None
+
+    def preview_done(self, future):
+        """
+        Show the tracks computed by the preview worker.
+
+        :param future: future of compute_preview
+        """
+        if future is not self.preview_future or future.cancelled():
+            return
+        self.preview_future = None
+        if future.exception() is not None:
+            logger.error("Could not compute the tracks: {}".format(future.exception()))
+            return
+        self.show_preview(future.result())
+
+    def show_preview(self, result):
+        """
+        Show the computed tracks and emit tracks_ready.
+
+        :param result: tracks returned by compute_preview, None if cancelled
+        """
+        if result is None:
+            return
+        lons, lats, mission = result
+        self.lawnmower.set_mission(mission)
+        self.wp_list = [QgsPointXY(x, y) for x, y in zip(lons.tolist(), lats.tolist())]
+
+        # show rubber band with temporal tracks
+        self.rubber_band.setToGeometry(QgsGeometry.fromPolylineXY(self.wp_list), None)
+        self.rubber_band_points.setToGeometry(QgsGeometry.fromMultiPointXY(self.wp_list), None)
+        self.rubber_band_points.show()
+        self.rubber_band.show()
+
+        self.unset_map_tool()
+        self.tracks_ready.emit()
+
     def get_area_points(self):
         return self.area_points
 
@@ -334,6 +448,7 @@ class LawnMowerWidget(QWidget, Ui_LawnMowerWidget):
 
     def close(self):
 
+        self.cancel_preview()
         self.unset_map_tool()
         self.deactivate_tool()
 
@@ -19,7 +19,7 @@ If not, see <http://www.gnu.org/licenses/>.
 
 from PyQt5.QtWidgets import QWidget, QMessageBox
 from PyQt5.QtGui import QColor
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSignal
 
 from iquaview.src.ui.ui_rectangletemplatewidget import Ui_RectangleTemplateWidget
 from iquaview.src.mission.maptools.rectangletools import (RectBy3PointsTool,
@@ -37,6 +37,7 @@ from qgis.core import QgsPointXY, QgsWkbTypes, QgsDistanceArea, QgsCoordinateRef
 
 
 class RectangleTemplateWidget(QWidget, Ui_RectangleTemplateWidget):
+    tracks_ready = pyqtSignal()
 
     def __init__(self, canvas, msglog, current_missiontrack, parent=None):
         super(RectangleTemplateWidget, self).__init__(parent)
@@ -250,12 +251,17 @@ class RectangleTemplateWidget(QWidget, Ui_RectangleTemplateWidget):
                 self.rubber_band.show()
 
                 self.unset_map_tool()
+                self.tracks_ready.emit()
         else:
             QMessageBox.warning(None,
                                 "Mission Template",
                                 "<center>Define first an area for the mission. </center>",
                                 QMessageBox.Close)
 
+    def finish_preview(self):
+        """ The tracks are computed by preview_tracks before returning, nothing is pending"""
+        pass
+
     def get_area_points(self):
         return self.area_points
 
@@ -0,0 +1,258 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+"""
+ Vectorized generation of the lawn mower tracks in a local tangent plane
+"""
+
+import math
+import logging
+
+import numpy as np
+
+from iquaview.src.cola2api.mission_types import (MissionColumns,
+                                                 MissionStep,
+                                                 WAYPOINT_MANEUVER,
+                                                 SECTION_MANEUVER,
+                                                 LATITUDE,
+                                                 LONGITUDE,
+                                                 Z,
+                                                 ALTITUDE_MODE,
+                                                 INITIAL_LATITUDE,
+                                                 INITIAL_LONGITUDE,
+                                                 INITIAL_Z,
+                                                 INITIAL_ALTITUDE_MODE,
+                                                 SPEED,
+                                                 TOLERANCE_X,
+                                                 TOLERANCE_Y,
+                                                 TOLERANCE_Z)
+from iquaview.src.utils.geodesy import SEMI_MAJOR_AXIS, FLATTENING
+
+logger = logging.getLogger(__name__)
+
+ECCENTRICITY_SQ = FLATTENING * (2 - FLATTENING)
+SEMI_MINOR_AXIS = SEMI_MAJOR_AXIS * (1 - FLATTENING)
+SECOND_ECCENTRICITY_SQ = ECCENTRICITY_SQ / (1 - ECCENTRICITY_SQ)
+
+# steps built between checks of the cancellation flag
+STEPS_PER_CHECK = 1024
+
+
+class LocalTangentPlane(object):
+    """
+    East-north plane tangent to the WGS 84 ellipsoid at an origin point.
+
+    Survey areas span a few kilometres, the error of working in the plane is of millimetres.
+    """
+
+    def __init__(self, lon, lat):
+        """
+        Class constructor
+
+        :param lon: longitude of the origin in degrees
+        :param lat: latitude of the origin in degrees
+        """
+        self.lon = math.radians(lon)
+        self.lat = math.radians(lat)
+        self.origin = self.to_ecef(np.array([self.lon]), np.array([self.lat]))[:, 0]
+        sin_lon, cos_lon = math.sin(self.lon), math.cos(self.lon)
+        sin_lat, cos_lat = math.sin(self.lat), math.cos(self.lat)
+        # rows are the east, north and up axes in ECEF
+        self.rotation = np.array([[-sin_lon, cos_lon, 0.0],
+                                  [-sin_lat * cos_lon, -sin_lat * sin_lon, cos_lat],
+                                  [cos_lat * cos_lon, cos_lat * sin_lon, sin_lat]])
+
+    @staticmethod
+    def to_ecef(lon, lat):
+        """Return the ECEF coordinates, shape (3, n), of points on the ellipsoid given in radians."""
+        sin_lat = np.sin(lat)
+        normal = SEMI_MAJOR_AXIS / np.sqrt(1 - ECCENTRICITY_SQ * sin_lat * sin_lat)
+        return np.stack((normal * np.cos(lat) * np.cos(lon),
+                         normal * np.cos(lat) * np.sin(lon),
+                         normal * (1 - ECCENTRICITY_SQ) * sin_lat))
+
+    def to_local(self, lon, lat):
+        """
+        Project points to the plane.
+
+        :param lon: array of longitudes in degrees
+        :param lat: array of latitudes in degrees
+        :return: array of shape (n, 2) with the east and north coordinates in meters
+        """
+        ecef = self.to_ecef(np.radians(np.asarray(lon, dtype=float)), np.radians(np.asarray(lat, dtype=float)))
+        return (self.rotation[:2] @ (ecef - self.origin[:, None])).T
+
+    def to_geodetic(self, points):
+        """
+        Bring points of the plane back to the ellipsoid, along its normal.
+
+        :param points: array of shape (n, 2) with east and north coordinates in meters
+        :return: tuple with the longitudes and latitudes in degrees
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        x, y, z = self.origin[:, None] + self.rotation[:2].T @ points.T
+        # Bowring's formula, exact to sub-millimetre close to the surface
+        p = np.hypot(x, y)
+        theta = np.arctan2(z * SEMI_MAJOR_AXIS, p * SEMI_MINOR_AXIS)
+        lat = np.arctan2(z + SECOND_ECCENTRICITY_SQ * SEMI_MINOR_AXIS * np.sin(theta) ** 3,
+                         p - ECCENTRICITY_SQ * SEMI_MAJOR_AXIS * np.cos(theta) ** 3)
+        lon = np.arctan2(y, x)
+        return np.degrees(lon), np.degrees(lat)
+
+
+def across_sweep(start_along, along_step, bottom, top, count, start_at_top):
+    """
+    Zig-zag of the across tracks: count tracks alternating between bottom and top,
+    each one along_step further than the previous.
+
+    :return: array of shape (2 * count + 1, 2) in (along, across) coordinates
+    """
+    q = np.arange(2 * count + 1)
+    along = start_along + ((q + 1) // 2) * along_step
+    first, second = (top, bottom) if start_at_top else (bottom, top)
+    across = np.where((q // 2) % 2 == 0, first, second)
+    return np.stack((along, across), axis=1)
+
+
+def classic_lawnmower(along_length, across_length, track_spacing, num_across_tracks):
+    """
+    Classic lawn mower: along tracks joined at alternate ends, then the across tracks.
+
+    :param along_length: length of the along tracks in meters
+    :param across_length: width of the area in meters
+    :param track_spacing: space between consecutive along tracks in meters
+    :param num_across_tracks: number of across tracks, equally spaced along the area
+    :return: array of shape (n, 2) with the waypoints in (along, across) meters from the first corner
+    """
+    num_along_tracks = int(math.ceil(across_length / track_spacing)) + 1
+    track = np.repeat(np.arange(num_along_tracks), 2)
+    # even tracks go forward, odd tracks come back
+    at_end = (np.arange(2 * num_along_tracks) % 2) != (track % 2)
+    waypoints = np.stack((at_end * along_length, track * track_spacing), axis=1)
+
+    if num_across_tracks > 0:
+        reverse_along = num_along_tracks % 2 == 1
+        last_track = (num_along_tracks - 1) * track_spacing
+        across = across_sweep(along_length if reverse_along else 0.0,
+                              (-1 if reverse_along else 1) * along_length / (num_across_tracks + 1),
+                              -track_spacing, last_track + track_spacing, num_across_tracks, True)
+        waypoints = np.concatenate((waypoints, across))
+    return waypoints
+
+
+def spiral_lawnmower(along_length, across_length, track_spacing, num_across_tracks):
+    """
+    Spiral lawn mower: loops of along tracks returning to the first corner, then the across tracks.
+
+    :param along_length: length of the along tracks in meters
+    :param across_length: width of the area in meters
+    :param track_spacing: space between consecutive along tracks in meters
+    :param num_across_tracks: number of across tracks, equally spaced along the area
+    :return: array of shape (n, 2) with the waypoints in (along, across) meters from the first corner
+    """
+    num_along_tracks = int(math.ceil(across_length / track_spacing)) + 1
+    loops = int(num_along_tracks / 2)
+    half_width = track_spacing * (num_along_tracks / 2 - 1)
+    start = np.arange(loops) * track_spacing
+    loop = np.stack((np.stack((np.full(loops, along_length), start), axis=1),
+                     np.stack((np.full(loops, along_length), start + half_width), axis=1),
+                     np.stack((np.zeros(loops), start + half_width), axis=1),
+                     np.stack((np.zeros(loops), start + track_spacing), axis=1)), axis=1).reshape(-1, 2)
+    waypoints = [np.zeros((1, 2)), loop]
+    if loops:
+        waypoints.append(np.zeros((1, 2)))
+
+    if num_across_tracks > 0:
+        waypoints.append(across_sweep(0.0, along_length / (num_across_tracks + 1),
+                                      -track_spacing, (num_along_tracks - 1) * track_spacing,
+                                      num_across_tracks, False))
+    return np.concatenate(waypoints)
+
+
+LAWNMOWER_PATTERNS = {'classic_lawnmower': classic_lawnmower,
+                      'spiral_lawnmower': spiral_lawnmower}
+
+
+def compute_tracks(pattern, area_points, track_spacing, num_across_tracks):
+    """
+    Compute the waypoints of a lawn mower pattern over an area.
+
+    :param pattern: key of LAWNMOWER_PATTERNS
+    :param area_points: three (lon, lat) tuples in degrees, the first two define the along track direction
+                        and the last two the across track direction
+    :param track_spacing: desired space in meters between consecutive along tracks
+    :param num_across_tracks: number of desired across tracks
+    :return: tuple with the arrays of longitudes and latitudes of the waypoints
+    """
+    lon, lat = np.asarray(area_points, dtype=float)[:3].T
+    plane = LocalTangentPlane(lon[0], lat[0])
+    corners = plane.to_local(lon, lat)
+    along = corners[1] - corners[0]
+    across = corners[2] - corners[1]
+    along_length = float(np.hypot(*along))
+    across_length = float(np.hypot(*across))
+    along_axis = along / along_length if along_length > 0 else np.array((0.0, 1.0))
+    across_axis = across / across_length if across_length > 0 else np.array((1.0, 0.0))
+
+    waypoints = LAWNMOWER_PATTERNS[pattern](along_length, across_length, track_spacing, num_across_tracks)
+    logger.debug("{}: {} waypoints, along {:.1f} m, across {:.1f} m".format(pattern, len(waypoints),
+                                                                            along_length, across_length))
+    local = corners[0] + waypoints[:, :1] * along_axis + waypoints[:, 1:] * across_axis
+    lons, lats = plane.to_geodetic(local)
+    # keep the corners of the area exact
+    lons[0], lats[0] = lon[0], lat[0]
+    if len(lons) > 1 and pattern == 'classic_lawnmower':
+        lons[1], lats[1] = lon[1], lat[1]
+    return lons, lats
+
+
+def track_to_steps(lons, lats, z, altitude_mode, speed, tolerance_x, tolerance_y, tolerance_z, cancelled=None):
+    """
+    Build the mission steps of a track, a waypoint followed by the sections joining the next points.
+
+    The values of all the steps are filled by column at once, the steps returned are views of them.
+
+    :param lons: longitudes of the waypoints
+    :param lats: latitudes of the waypoints
+    :param cancelled: optional threading.Event, the build stops and returns None once it is set
+    :return: list of MissionStep, None if cancelled
+    """
+    lons = np.asarray(lons, dtype=float)
+    lats = np.asarray(lats, dtype=float)
+    columns = MissionColumns(len(lons))
+    values = columns.values[:, :len(lons)]
+    values[LATITUDE] = lats
+    values[LONGITUDE] = lons
+    values[Z] = float(z)
+    values[ALTITUDE_MODE] = bool(altitude_mode)
+    values[INITIAL_LATITUDE, 1:] = lats[:-1]
+    values[INITIAL_LONGITUDE, 1:] = lons[:-1]
+    values[INITIAL_Z, 1:] = float(z)
+    values[INITIAL_ALTITUDE_MODE, 1:] = bool(altitude_mode)
+    values[SPEED] = float(speed)
+    values[TOLERANCE_X] = float(tolerance_x)
+    values[TOLERANCE_Y] = float(tolerance_y)
+    values[TOLERANCE_Z] = float(tolerance_z)
+    columns.types[:len(lons)] = SECTION_MANEUVER
+    if len(lons):
+        columns.types[0] = WAYPOINT_MANEUVER
+
+    steps = list()
+    for first in range(0, len(lons), STEPS_PER_CHECK):
+        if cancelled is not None and cancelled.is_set():
+            return None
+        steps.extend(MissionStep.view(columns, row) for row in range(first, min(first + STEPS_PER_CHECK, len(lons))))
+    return steps
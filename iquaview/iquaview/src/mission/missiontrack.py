@@ -21,7 +21,10 @@ If not, see <http://www.gnu.org/licenses/>.
 
 import copy
 import logging
+
+import numpy as np
 from qgis.core import (QgsPoint,
+                       QgsPointXY,
                        QgsVectorLayer,
                        QgsVectorFileWriter,
                        QgsCoordinateReferenceSystem,
@@ -35,6 +38,8 @@ from qgis.core import (QgsPoint,
 from iquaview.src.cola2api.mission_types import (SECTION_MANEUVER,
                                                  WAYPOINT_MANEUVER,
                                                  PARK_MANEUVER,
+                                                 LATITUDE,
+                                                 LONGITUDE,
                                                  Mission,
                                                  MissionStep,
                                                  MissionPosition,
@@ -66,6 +71,14 @@ class MissionTrack(QObject):
         self.mission_renderer = mission_renderer
         self.mission = Mission()
         self.canvas = canvas
+        # waypoints and geometry of the mission, built again only when the mission or its version change
+        self.waypoints_mission = None
+        self.waypoints_version = None
+        self.waypoint_coordinates = None
+        self.waypoints = None
+        self.geometry = None
+        self.waypoints_hits = 0
+        self.waypoints_misses = 0
         self.start_end_marker = StartEndMarker(canvas, self.find_waypoints_in_mission(), QColor(200, 0, 0))
 
         self.saved = False
@@ -303,7 +316,7 @@ class MissionTrack(QObject):
                                          QMessageBox.Yes)
             if reply == QMessageBox.No:
                 return False
-        elif float(self.mission.get_step(self.mission.get_length() - 1).get_maneuver().get_position().get_z()) != 0.0:
+        elif self.mission.get_step(self.mission.get_length() - 1).get_maneuver().get_position().get_z() != 0.0:
             # vehicle last waypoint is not at zero depth.
             reply = QMessageBox.question(None, "Save Mission",
                                          "You are about to save and the last waypoint is not at zero depth. "
@@ -331,7 +344,7 @@ class MissionTrack(QObject):
                                          QMessageBox.Yes)
             if reply == QMessageBox.No:
                 return False, None
-        elif float(self.mission.get_step(self.mission.get_length() - 1).get_maneuver().get_position().get_z()) != 0.0:
+        elif self.mission.get_step(self.mission.get_length() - 1).get_maneuver().get_position().get_z() != 0.0:
             # vehicle last waypoint is not at zero depth.
             reply = QMessageBox.question(None, "Save Mission",
                                          "You are about to save and the last waypoint is not at zero depth. "
@@ -380,7 +393,7 @@ class MissionTrack(QObject):
                     "memory")
                 self.mission_layer.setCustomProperty("mission_xml", self.mission_filename)
                 feature = QgsFeature()
-                feature.setGeometry(QgsGeometry(waypoints[0]))
+                feature.setGeometry(self.get_geometry())
                 self.mission_layer.dataProvider().addFeatures([feature])
             else:
                 self.mission_layer = QgsVectorLayer(
@@ -389,7 +402,7 @@ class MissionTrack(QObject):
                     "memory")
                 self.mission_layer.setCustomProperty("mission_xml", self.mission_filename)
                 feature = QgsFeature()
-                feature.setGeometry(QgsGeometry.fromPolyline(waypoints))
+                feature.setGeometry(self.get_geometry())
                 self.mission_layer.dataProvider().addFeatures([feature])
 
         else:
@@ -398,45 +411,69 @@ class MissionTrack(QObject):
             logger.debug("layer feature count {}".format(self.mission_layer.featureCount()))
             if self.mission_layer.featureCount() == 0:
                 feature = QgsFeature()
-                if len(waypoints) == 1:
-                    feature.setGeometry(QgsGeometry(waypoints[0]))
-                else:
-                    feature.setGeometry(QgsGeometry.fromPolyline(waypoints))
+                feature.setGeometry(self.get_geometry())
                 self.mission_layer.dataProvider().addFeatures([feature])
             else:
                 logger.debug("layer has feature mission already, updating...")
                 for f in feats:
                     self.mission_layer.dataProvider().deleteFeatures([f.id()])
                     feature = QgsFeature()
-                    if len(waypoints) == 1:
-                        feature.setGeometry(QgsGeometry(waypoints[0]))
-                    else:
-                        feature.setGeometry(QgsGeometry.fromPolyline(waypoints))
+                    feature.setGeometry(self.get_geometry())
                     self.mission_layer.dataProvider().addFeatures([feature])
 
         self.set_mission_renderer(self.get_default_track_renderer())
 
+    def update_waypoints(self):
+        """
+        Build the cached waypoints again if the mission changed since they were built.
+        """
+        version = self.mission.get_version()
+        if self.waypoints_mission is self.mission and self.waypoints_version == version:
+            self.waypoints_hits += 1
+            return
+        self.waypoints_misses += 1
+
+        # the position of every maneuver, the final one for a Section, is stored in the same columns
+        coordinates = np.column_stack((self.mission.get_column(LONGITUDE), self.mission.get_column(LATITUDE)))
+        coordinates.flags.writeable = False
+        self.waypoint_coordinates = coordinates
+        self.waypoints = [QgsPoint(lon, lat) for lon, lat in coordinates.tolist()]
+        self.geometry = None
+        self.waypoints_mission = self.mission
+        self.waypoints_version = version
+
+    def get_waypoint_coordinates(self):
+        """
+        Returns the positions of the steps, cached until the mission changes
+        :return: read only array of shape (n, 2) with the longitude and the latitude of each step
+        """
+        self.update_waypoints()
+        return self.waypoint_coordinates
+
     def find_waypoints_in_mission(self, indexes=None):
         """
         Gets all waypoints from a mission structure
+        The list is cached until the mission changes and shared by all the callers, it must not be modified.
+        :param indexes: optional list of step indexes, to get only their waypoints in a new list
         """
-        waypoints = []
+        self.update_waypoints()
         if indexes is None:
-            step_indexes = range(0, self.mission.size())
-        else:
-            step_indexes = indexes
-
-        for stepindex in step_indexes:
-            step = self.mission.get_step(stepindex)
-            maneuver = step.get_maneuver()
+            return self.waypoints
+        return [self.waypoints[i] for i in indexes]
 
-            if maneuver.get_maneuver_type() == SECTION_MANEUVER:  # for a Section
-                position = maneuver.get_final_position()
+    def get_geometry(self):
+        """
+        Returns the geometry of the mission, a Point if it has only 1 waypoint, otherwise a LineString.
+        The geometry is cached until the mission changes and shared by all the callers, it must not be modified.
+        """
+        self.update_waypoints()
+        if self.geometry is None:
+            if len(self.waypoints) == 1:
+                lon, lat = self.waypoint_coordinates[0]
+                self.geometry = QgsGeometry.fromPointXY(QgsPointXY(lon, lat))
             else:
-                position = maneuver.get_position()  # for Waypoint and Park
-
-            waypoints.append(QgsPoint(float(position.longitude), float(position.latitude)))
-        return waypoints
+                self.geometry = QgsGeometry.fromPolyline(self.waypoints)
+        return self.geometry
 
     def get_default_track_renderer(self):
         # Renderer for track lines
@@ -12,12 +12,34 @@ class Ui_Log(object):
     def setupUi(self, Log):
         Log.setObjectName("Log")
         Log.resize(470, 249)
-        self.horizontalLayout = QtWidgets.QHBoxLayout(Log)
-        self.horizontalLayout.setObjectName("horizontalLayout")
+        self.verticalLayout = QtWidgets.QVBoxLayout(Log)
+        self.verticalLayout.setObjectName("verticalLayout")
         self.plainTextEdit = QtWidgets.QPlainTextEdit(Log)
         self.plainTextEdit.setReadOnly(True)
         self.plainTextEdit.setObjectName("plainTextEdit")
-        self.horizontalLayout.addWidget(self.plainTextEdit)
+        self.verticalLayout.addWidget(self.plainTextEdit)
+        self.horizontalLayout = QtWidgets.QHBoxLayout()
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        self.levelLabel = QtWidgets.QLabel(Log)
+        self.levelLabel.setObjectName("levelLabel")
+        self.horizontalLayout.addWidget(self.levelLabel)
+        self.levelComboBox = QtWidgets.QComboBox(Log)
+        self.levelComboBox.setObjectName("levelComboBox")
+        self.horizontalLayout.addWidget(self.levelComboBox)
+        self.nodeLabel = QtWidgets.QLabel(Log)
+        self.nodeLabel.setObjectName("nodeLabel")
+        self.horizontalLayout.addWidget(self.nodeLabel)
+        self.nodeComboBox = QtWidgets.QComboBox(Log)
+        self.nodeComboBox.setSizeAdjustPolicy(QtWidgets.QComboBox.AdjustToContents)
+        self.nodeComboBox.setObjectName("nodeComboBox")
+        self.horizontalLayout.addWidget(self.nodeComboBox)
+        spacerItem = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout.addItem(spacerItem)
+        self.statsLabel = QtWidgets.QLabel(Log)
+        self.statsLabel.setText("")
+        self.statsLabel.setObjectName("statsLabel")
+        self.horizontalLayout.addWidget(self.statsLabel)
+        self.verticalLayout.addLayout(self.horizontalLayout)
 
         self.retranslateUi(Log)
         QtCore.QMetaObject.connectSlotsByName(Log)
@@ -25,6 +47,8 @@ class Ui_Log(object):
     def retranslateUi(self, Log):
         _translate = QtCore.QCoreApplication.translate
         Log.setWindowTitle(_translate("Log", "Form"))
+        self.levelLabel.setText(_translate("Log", "Level:"))
+        self.nodeLabel.setText(_translate("Log", "Node:"))
 
 
 if __name__ == "__main__":
@@ -21,6 +21,8 @@ If not, see <http://www.gnu.org/licenses/>.
 from qgis.core import QgsPointXY, QgsDistanceArea, QgsGeometry
 import math
 
+from iquaview.src.utils import geodesy
+
 
 def wrap_angle(angle):
     return angle + (2.0 * math.pi * math.floor((math.pi - angle) / (2.0 * math.pi)))
@@ -144,35 +146,13 @@ def calc_parallel_segment(p1, p2, dist):
 def distance(start, end):
     # Assumes points are WGS 84 lat/long
     # Returns great circle distance in meters
-    radius = 6378137  # meters
-    flattening = 1 / 298.257223563
-
-    # Convert to radians with reduced latitudes to compensate
-    # for flattening of the earth as in Lambert's formula
-    start_lon = start.x() * math.pi / 180
-    start_lat = math.atan2((1 - flattening) * math.sin(start.y() * math.pi / 180), math.cos(start.y() * math.pi / 180))
-    end_lon = end.x() * math.pi / 180
-    end_lat = math.atan2((1 - flattening) * math.sin(end.y() * math.pi / 180), math.cos(end.y() * math.pi / 180))
-
-    # Haversine formula
-    arc_distance = (math.sin((end_lat - start_lat) / 2) ** 2) + \
-                   (math.cos(start_lat) * math.cos(end_lat) * (math.sin((end_lon - start_lon) / 2) ** 2))
-
-    return 2 * radius * math.atan2(math.sqrt(arc_distance), math.sqrt(1 - arc_distance))
+    return float(geodesy.distance(start.x(), start.y(), end.x(), end.y()))
 
 
 def bearing(start, end):
     # Assumes points are WGS 84 lat/long
     # http://www.movable-type.co.uk/scripts/latlong.html
-
-    start_lon = start.x() * math.pi / 180
-    start_lat = start.y() * math.pi / 180
-    end_lon = end.x() * math.pi / 180
-    end_lat = end.y() * math.pi / 180
-
-    return math.atan2(math.sin(end_lon - start_lon) * math.cos(end_lat),
-                      (math.cos(start_lat) * math.sin(end_lat))
-                      - (math.sin(start_lat) * math.cos(end_lat) * math.cos(end_lon - start_lon))) * 180 / math.pi
+    return float(geodesy.bearing(start.x(), start.y(), end.x(), end.y()))
 
 
 def endpoint(start, dist, degrees_bearing):
@@ -180,69 +160,18 @@ def endpoint(start, dist, degrees_bearing):
     # Assumes points are WGS 84 lat/long, distance in meters,
     # bearing in degrees with north = 0, east = 90, west = -90
     # http://www.movable-type.co.uk/scripts/latlong.html
-    radius = 6378137.0  # meters
-
-    start_lon = start.x() * math.pi / 180
-    start_lat = start.y() * math.pi / 180
-    bearing = degrees_bearing * math.pi / 180
+    end_lon, end_lat = geodesy.endpoint(start.x(), start.y(), dist, degrees_bearing)
+    return QgsPointXY(float(end_lon), float(end_lat))
 
-    end_lat = math.asin((math.sin(start_lat) * math.cos(dist / radius)) +
-                        (math.cos(start_lat) * math.sin(dist / radius) * math.cos(bearing)))
-    end_lon = start_lon + math.atan2(math.sin(bearing) * math.sin(dist / radius) * math.cos(start_lat),
-                                     math.cos(dist / radius) - (math.sin(start_lat) * math.sin(end_lat)))
-
-    return QgsPointXY(end_lon * 180 / math.pi, end_lat * 180 / math.pi)
 
 def endpoint_ellipsoid(start, dist, degrees_bearing):
     # Ellipsoid aproximation
     # Assumes points are WGS 84 lat/long, distance in meters,
     # bearing in degrees with north = 0, east = 90, west = -90
     # https://www.movable-type.co.uk/scripts/latlong-vincenty.html
-    start_lon = start.x() * math.pi / 180
-    start_lat = start.y() * math.pi / 180
-    bearing = degrees_bearing * math.pi / 180
-    d = dist
-
-    a = 6378137
-    f = 0.003352813
-    b = 6356752.3142
-
-    sin_angle1 = math.sin(bearing)
-    cos_angle1 = math.cos(bearing)
-
-    tan_U1 = (1-f) * math.tan(start_lat)
-    cos_U1 = 1 / math.sqrt((1+ tan_U1*tan_U1))
-    sin_U1 = tan_U1 * cos_U1
-    o1 = math.atan2(tan_U1, cos_angle1)
-    sin_angle = cos_U1 * sin_angle1
-    cosSq_angle = 1 - sin_angle*sin_angle
-    uSq = cosSq_angle * (a*a - b*b) / (b*b)
-    A = 1 + uSq / 16384 * (4096 + uSq * (-768 + uSq * (320 - 175 * uSq)))
-    B = uSq / 1024 * (256 + uSq * (-128 + uSq * (74 - 47 * uSq)))
-
-    r1 = d / (b*A)
-    r2 = 0.0
-    iteration = 0
-    while abs(r1 - r2 > 1e-12) and iteration < 100:
-        cos2roM = math.cos(2*o1 + r1)
-        sin_ro = math.sin(r1)
-        cos_ro = math.cos(r1)
-        dif_ro = B * sin_ro * (cos2roM + B/4 * (cos_ro * (-1 + 2*cos2roM*cos2roM) -
-                                                B/6 * cos2roM * (-3 +4*sin_ro*sin_ro) *
-                                                (-3 + 4*cos2roM*cos2roM)))
-        r2 = r1
-        r1 = d / (b*A) + dif_ro
-        iteration += 1
-
-    x = sin_U1*sin_ro - cos_U1*cos_ro*cos_angle1
-    lon = math.atan2(sin_ro*sin_angle1, cos_U1*cos_ro - sin_U1*sin_ro*cos_angle1)
-    C = f/16 * cosSq_angle*(4+f * (4 - 3*cosSq_angle))
-    L = lon - (1-C) * f * sin_angle * (r1 + C*sin_ro * (cos2roM+C*cos_ro * (-1 + 2*cos2roM*cos2roM)))
-
-    end_lon = (start_lon + L + 3*math.pi) % (2*math.pi) - math.pi
-    end_lat = math.atan2(sin_U1 * cos_ro + cos_U1 * sin_ro * cos_angle1, (1 - f) * math.sqrt(sin_angle * sin_angle + x * x))
-
-    return QgsPointXY(end_lon * 180 / math.pi, end_lat * 180 / math.pi)
+    end_lon, end_lat = geodesy.endpoint_ellipsoid(start.x(), start.y(), dist, degrees_bearing)
+    return QgsPointXY(float(end_lon), float(end_lat))
+
 
 def magnitude(p1, p2):
     """
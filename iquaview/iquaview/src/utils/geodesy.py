@@ -0,0 +1,281 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+"""
+Geodesic computations on arrays of WGS 84 longitudes and latitudes in degrees.
+
+Every function accepts scalars or arrays that broadcast together and returns arrays.
+"""
+
+import math
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# WGS 84 ellipsoid
+SEMI_MAJOR_AXIS = 6378137.0  # meters
+FLATTENING = 1 / 298.257223563
+SEMI_MINOR_AXIS = SEMI_MAJOR_AXIS * (1 - FLATTENING)
+
+VINCENTY_TOLERANCE = 1e-12
+VINCENTY_MAX_ITERATIONS = 200
+
+
+def flat_arrays(*values):
+    """
+    Broadcast values together and flatten them.
+
+    :return: tuple with the broadcast shape and a contiguous 1d float copy of each value
+    """
+    arrays = np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in values))
+    return (arrays[0].shape,) + tuple(np.array(array, dtype=float).ravel() for array in arrays)
+
+
+def reduced_latitude(lat):
+    """Return the reduced latitude in radians of geodetic latitudes in radians."""
+    return np.arctan2((1 - FLATTENING) * np.sin(lat), np.cos(lat))
+
+
+def distance(start_lon, start_lat, end_lon, end_lat):
+    """
+    Great circle distance with reduced latitudes to compensate the flattening, as in Lambert's formula.
+
+    :param start_lon: longitudes of the start points in degrees
+    :param start_lat: latitudes of the start points in degrees
+    :param end_lon: longitudes of the end points in degrees
+    :param end_lat: latitudes of the end points in degrees
+    :return: distances in meters
+    """
+    start_lon = np.radians(start_lon)
+    end_lon = np.radians(end_lon)
+    start_lat = reduced_latitude(np.radians(start_lat))
+    end_lat = reduced_latitude(np.radians(end_lat))
+
+    # Haversine formula
+    arc_distance = (np.sin((end_lat - start_lat) / 2) ** 2 +
+                    np.cos(start_lat) * np.cos(end_lat) * np.sin((end_lon - start_lon) / 2) ** 2)
+    return 2 * SEMI_MAJOR_AXIS * np.arctan2(np.sqrt(arc_distance), np.sqrt(1 - arc_distance))
+
+
+def bearing(start_lon, start_lat, end_lon, end_lat):
+    """
+    Initial bearing of the great circle between two points.
+
+    :return: bearings in degrees, north = 0, east = 90, west = -90
+    """
+    start_lon = np.radians(start_lon)
+    start_lat = np.radians(start_lat)
+    end_lon = np.radians(end_lon)
+    end_lat = np.radians(end_lat)
+    return np.degrees(np.arctan2(np.sin(end_lon - start_lon) * np.cos(end_lat),
+                                 np.cos(start_lat) * np.sin(end_lat) -
+                                 np.sin(start_lat) * np.cos(end_lat) * np.cos(end_lon - start_lon)))
+
+
+def endpoint(start_lon, start_lat, dist, degrees_bearing):
+    """
+    Project points a distance along a bearing on a sphere of the WGS 84 semi-major axis.
+
+    :param start_lon: longitudes in degrees
+    :param start_lat: latitudes in degrees
+    :param dist: distances in meters
+    :param degrees_bearing: bearings in degrees, north = 0, east = 90, west = -90
+    :return: tuple with the longitudes and latitudes of the end points in degrees
+    """
+    start_lon = np.radians(start_lon)
+    start_lat = np.radians(start_lat)
+    angle = np.radians(degrees_bearing)
+    arc = np.asarray(dist, dtype=float) / SEMI_MAJOR_AXIS
+
+    end_lat = np.arcsin(np.sin(start_lat) * np.cos(arc) + np.cos(start_lat) * np.sin(arc) * np.cos(angle))
+    end_lon = start_lon + np.arctan2(np.sin(angle) * np.sin(arc) * np.cos(start_lat),
+                                     np.cos(arc) - np.sin(start_lat) * np.sin(end_lat))
+    return np.degrees(end_lon), np.degrees(end_lat)
+
+
+def endpoint_ellipsoid(start_lon, start_lat, dist, degrees_bearing,
+                       tolerance=VINCENTY_TOLERANCE, max_iterations=VINCENTY_MAX_ITERATIONS):
+    """
+    Project points a distance along a bearing on the WGS 84 ellipsoid, with Vincenty's direct formula.
+
+    https://www.movable-type.co.uk/scripts/latlong-vincenty.html
+
+    :param start_lon: longitudes in degrees
+    :param start_lat: latitudes in degrees
+    :param dist: distances in meters
+    :param degrees_bearing: initial bearings in degrees, north = 0, east = 90, west = -90
+    :param tolerance: convergence threshold of the angular distance, in radians
+    :param max_iterations: maximum number of iterations
+    :return: tuple with the longitudes and latitudes of the end points in degrees
+    """
+    shape, start_lon, start_lat, dist, degrees_bearing = flat_arrays(start_lon, start_lat, dist, degrees_bearing)
+    a = SEMI_MAJOR_AXIS
+    b = SEMI_MINOR_AXIS
+    f = FLATTENING
+
+    angle = np.radians(degrees_bearing)
+    sin_angle1 = np.sin(angle)
+    cos_angle1 = np.cos(angle)
+
+    tan_u1 = (1 - f) * np.tan(np.radians(start_lat))
+    cos_u1 = 1 / np.sqrt(1 + tan_u1 * tan_u1)
+    sin_u1 = tan_u1 * cos_u1
+    sigma1 = np.arctan2(tan_u1, cos_angle1)
+    sin_alpha = cos_u1 * sin_angle1
+    cos_sq_alpha = 1 - sin_alpha * sin_alpha
+    u_sq = cos_sq_alpha * (a * a - b * b) / (b * b)
+    big_a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+
+    sigma = dist / (b * big_a)
+    # only the points not converged yet are iterated
+    active = np.ones(sigma.shape, dtype=bool)
+    for _ in range(max_iterations):
+        if not active.any():
+            break
+        cos_2sigma_m = np.cos(2 * sigma1[active] + sigma[active])
+        sin_sigma = np.sin(sigma[active])
+        cos_sigma = np.cos(sigma[active])
+        b_active = big_b[active]
+        delta_sigma = b_active * sin_sigma * (cos_2sigma_m + b_active / 4 * (
+            cos_sigma * (-1 + 2 * cos_2sigma_m * cos_2sigma_m) -
+            b_active / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma * sin_sigma) * (-3 + 4 * cos_2sigma_m * cos_2sigma_m)))
+        previous = sigma[active]
+        sigma[active] = dist[active] / (b * big_a[active]) + delta_sigma
+        active[active] = np.abs(sigma[active] - previous) > tolerance
+
+    cos_2sigma_m = np.cos(2 * sigma1 + sigma)
+    sin_sigma = np.sin(sigma)
+    cos_sigma = np.cos(sigma)
+    x = sin_u1 * sin_sigma - cos_u1 * cos_sigma * cos_angle1
+    lon = np.arctan2(sin_sigma * sin_angle1, cos_u1 * cos_sigma - sin_u1 * sin_sigma * cos_angle1)
+    c = f / 16 * cos_sq_alpha * (4 + f * (4 - 3 * cos_sq_alpha))
+    big_l = lon - (1 - c) * f * sin_alpha * (sigma + c * sin_sigma * (
+        cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m * cos_2sigma_m)))
+
+    end_lon = (np.radians(start_lon) + big_l + 3 * np.pi) % (2 * np.pi) - np.pi
+    end_lat = np.arctan2(sin_u1 * cos_sigma + cos_u1 * sin_sigma * cos_angle1,
+                         (1 - f) * np.sqrt(sin_alpha * sin_alpha + x * x))
+    return np.degrees(end_lon).reshape(shape), np.degrees(end_lat).reshape(shape)
+
+
+def inverse(start_lon, start_lat, end_lon, end_lat,
+            tolerance=VINCENTY_TOLERANCE, max_iterations=VINCENTY_MAX_ITERATIONS):
+    """
+    Distance and bearings between points on the WGS 84 ellipsoid, with Vincenty's inverse formula.
+
+    The iteration does not converge for nearly antipodal points, they are flagged in the returned mask
+    and keep the values of the last iteration.
+
+    :param start_lon: longitudes of the start points in degrees
+    :param start_lat: latitudes of the start points in degrees
+    :param end_lon: longitudes of the end points in degrees
+    :param end_lat: latitudes of the end points in degrees
+    :param tolerance: convergence threshold of the longitude on the auxiliary sphere, in radians
+    :param max_iterations: maximum number of iterations
+    :return: tuple with the distances in meters, the initial and final bearings in degrees and
+             a boolean array, False where the iteration did not converge
+    """
+    shape, start_lon, start_lat, end_lon, end_lat = flat_arrays(start_lon, start_lat, end_lon, end_lat)
+    a = SEMI_MAJOR_AXIS
+    b = SEMI_MINOR_AXIS
+    f = FLATTENING
+
+    big_l = np.radians(end_lon - start_lon)
+    u1 = reduced_latitude(np.radians(start_lat))
+    u2 = reduced_latitude(np.radians(end_lat))
+    sin_u1, cos_u1 = np.sin(u1), np.cos(u1)
+    sin_u2, cos_u2 = np.sin(u2), np.cos(u2)
+
+    lam = big_l.copy()
+    sin_sigma = np.zeros(lam.shape)
+    cos_sigma = np.ones(lam.shape)
+    sigma = np.zeros(lam.shape)
+    cos_sq_alpha = np.ones(lam.shape)
+    cos_2sigma_m = np.zeros(lam.shape)
+    active = np.ones(lam.shape, dtype=bool)
+    for _ in range(max_iterations):
+        if not active.any():
+            break
+        index = np.flatnonzero(active)
+        lam_i = lam[index]
+        s1, c1 = sin_u1[index], cos_u1[index]
+        s2, c2 = sin_u2[index], cos_u2[index]
+        sin_lam, cos_lam = np.sin(lam_i), np.cos(lam_i)
+        sin_sigma_i = np.hypot(c2 * sin_lam, c1 * s2 - s1 * c2 * cos_lam)
+        cos_sigma_i = s1 * s2 + c1 * c2 * cos_lam
+        sigma_i = np.arctan2(sin_sigma_i, cos_sigma_i)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sin_alpha = np.where(sin_sigma_i != 0, c1 * c2 * sin_lam / sin_sigma_i, 0.0)
+            cos_sq_alpha_i = 1 - sin_alpha * sin_alpha
+            # equatorial lines have cos_sq_alpha = 0
+            cos_2sigma_m_i = np.where(cos_sq_alpha_i != 0, cos_sigma_i - 2 * s1 * s2 / cos_sq_alpha_i, 0.0)
+        c = f / 16 * cos_sq_alpha_i * (4 + f * (4 - 3 * cos_sq_alpha_i))
+        lam_next = big_l[index] + (1 - c) * f * sin_alpha * (sigma_i + c * sin_sigma_i * (
+            cos_2sigma_m_i + c * cos_sigma_i * (-1 + 2 * cos_2sigma_m_i * cos_2sigma_m_i)))
+
+        for array, values in ((lam, lam_next), (sin_sigma, sin_sigma_i), (cos_sigma, cos_sigma_i),
+                              (sigma, sigma_i), (cos_sq_alpha, cos_sq_alpha_i), (cos_2sigma_m, cos_2sigma_m_i)):
+            array[index] = values
+        active[index] = np.abs(lam_next - lam_i) > tolerance
+    converged = ~active
+    if not converged.all():
+        logger.debug("Vincenty inverse formula failed to converge for {} points".format(np.count_nonzero(active)))
+
+    u_sq = cos_sq_alpha * (a * a - b * b) / (b * b)
+    big_a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    delta_sigma = big_b * sin_sigma * (cos_2sigma_m + big_b / 4 * (
+        cos_sigma * (-1 + 2 * cos_2sigma_m * cos_2sigma_m) -
+        big_b / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma * sin_sigma) * (-3 + 4 * cos_2sigma_m * cos_2sigma_m)))
+    dist = b * big_a * (sigma - delta_sigma)
+
+    sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+    initial = np.degrees(np.arctan2(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam))
+    final = np.degrees(np.arctan2(cos_u1 * sin_lam, -sin_u1 * cos_u2 + cos_u1 * sin_u2 * cos_lam))
+    return dist.reshape(shape), initial.reshape(shape), final.reshape(shape), converged.reshape(shape)
+
+
+def traverse(start_lon, start_lat, distances, bearings):
+    """
+    Chain spherical projections, each leg starting where the previous one ended.
+
+    The legs depend on each other so they are not vectorized, but the loop runs on floats
+    without building intermediate points.
+
+    :param start_lon: longitude of the first point in degrees
+    :param start_lat: latitude of the first point in degrees
+    :param distances: sequence with the length of each leg in meters
+    :param bearings: sequence with the bearing of each leg in degrees
+    :return: tuple with arrays of the longitudes and latitudes of the end of each leg in degrees
+    """
+    lon = math.radians(start_lon)
+    lat = math.radians(start_lat)
+    lons = np.empty(len(distances))
+    lats = np.empty(len(distances))
+    for i, (dist, angle) in enumerate(zip(np.asarray(distances, dtype=float).tolist(),
+                                          np.radians(bearings).tolist())):
+        arc = dist / SEMI_MAJOR_AXIS
+        sin_lat, cos_lat = math.sin(lat), math.cos(lat)
+        sin_arc, cos_arc = math.sin(arc), math.cos(arc)
+        end_lat = math.asin(sin_lat * cos_arc + cos_lat * sin_arc * math.cos(angle))
+        lon += math.atan2(math.sin(angle) * sin_arc * cos_lat, cos_arc - sin_lat * math.sin(end_lat))
+        lat = end_lat
+        lons[i] = lon
+        lats[i] = lat
+    return np.degrees(lons), np.degrees(lats)
@@ -16,7 +16,7 @@ If not, see <http://www.gnu.org/licenses/>.
 """
  Class to send functions to thread
 """
-from PyQt5.QtCore import pyqtSignal, QObject, pyqtSlot, QRunnable
+from PyQt5.QtCore import Qt, pyqtSignal, QObject, pyqtSlot, QRunnable
 
 
 import traceback, sys
@@ -84,3 +84,31 @@ class Worker(QRunnable):
             self.signals.result.emit(result)  # Return the result of the processing
         finally:
             self.signals.finished.emit()  # Done
+
+
+class FutureWatcher(QObject):
+    '''
+    Deliver the completion of concurrent.futures.Future objects to the thread of the watcher
+
+    Create it in the GUI thread and the callbacks run there, so they can update widgets.
+    '''
+    done = pyqtSignal(object, object)
+
+    def __init__(self, parent=None):
+        super(FutureWatcher, self).__init__(parent)
+        self.done.connect(self.on_done, Qt.QueuedConnection)
+
+    def watch(self, future, callback):
+        '''
+        Call callback with the future once it is done.
+
+        :param future: concurrent.futures.Future
+        :param callback: function receiving the future, called in the thread of the watcher
+        :return: the future
+        '''
+        future.add_done_callback(lambda f: self.done.emit(f, callback))
+        return future
+
+    @pyqtSlot(object, object)
+    def on_done(self, future, callback):
+        callback(future)
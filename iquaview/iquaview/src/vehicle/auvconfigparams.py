@@ -19,12 +19,11 @@ If not, see <http://www.gnu.org/licenses/>.
  in the auv configuration xml file.
 """
 
-import time
 import logging
 
-from PyQt5.QtWidgets import QDialog, QLabel, QComboBox, QLineEdit, QMessageBox, QWidget
+from PyQt5.QtWidgets import QDialog, QLabel, QComboBox, QLineEdit, QMessageBox, QWidget, QProgressDialog
 from PyQt5.QtGui import QValidator, QRegExpValidator
-from PyQt5.QtCore import QRegExp, QEvent, pyqtSignal
+from PyQt5.QtCore import Qt, QRegExp, QEvent, pyqtSignal
 
 from iquaview.src.ui.ui_auvconfigparams import Ui_AUVConfigParamsDlg
 from iquaview.src.xmlconfighandler.rosparamsreader import RosParamsReader
@@ -44,6 +43,8 @@ class AUVConfigParamsDlg(QDialog, Ui_AUVConfigParamsDlg):
         self.vehicle_info = vehicle_info
         self.rosparamsreader = None
         self.sections = None
+        # values of the params as last read from or applied to the vehicle
+        self.snapshot = dict()
         self.changes = False
         self.current_index = 0
         self.ip = self.vehicle_info.get_vehicle_ip()
@@ -73,11 +74,32 @@ class AUVConfigParamsDlg(QDialog, Ui_AUVConfigParamsDlg):
         """
         Read xml configuration and load sections
         """
-        self.sections = self.rosparamsreader.read_configuration()
+        progress_dialog = QProgressDialog("Reading parameters...", None, 0, 0, self)
+        progress_dialog.setWindowTitle("AUV parameters")
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(500)
+        try:
+            self.sections = self.rosparamsreader.read_configuration(
+                lambda done, total: self.update_progress(progress_dialog, done, total))
+        finally:
+            progress_dialog.close()
+        self.snapshot = {self.vehicle_namespace + param.get_name(): param.get_value()
+                         for section in self.sections for param in section.get_params()}
         self.section_comboBox.clear()
         for section in self.sections:
             self.section_comboBox.addItem(section.get_description())
 
+    @staticmethod
+    def update_progress(progress_dialog, done, total):
+        """
+        Show the progress reading the parameters
+        :param progress_dialog: progress dialog
+        :param done: number of parameters read
+        :param total: number of parameters
+        """
+        progress_dialog.setMaximum(total)
+        progress_dialog.setValue(done)
+
     def update_params_form(self):
         """
         Updates the params form
@@ -235,17 +257,12 @@ class AUVConfigParamsDlg(QDialog, Ui_AUVConfigParamsDlg):
         """ Apply params"""
         try:
             if self.are_values_acceptable():
-                logger.info("Applying parameters")
-                for param in self.current_section.get_params():
-                    cola2_interface.set_ros_param(self.ip, self.port, self.vehicle_namespace + param.get_name(),
-                                                  param.get_value())
-                time.sleep(1.0)
-                # action_id
-                logger.info(
-                    "sending action service:  %s Param: %s " % (self.current_section.get_action_id(), param.get_name()))
-                result = cola2_interface.send_empty_service(self.ip, self.port,
-                                                            self.vehicle_namespace + self.current_section.get_action_id())
-                logger.info("Result: %s" % result)
+                changed_sections, values = self.get_changes()
+                if values:
+                    logger.info("Applying {} parameters".format(len(values)))
+                    self.apply_changes(changed_sections, values)
+                else:
+                    logger.info("No parameters changed")
                 self.changes = False
                 self.applied_changes.emit()
                 return True
@@ -268,6 +285,81 @@ class AUVConfigParamsDlg(QDialog, Ui_AUVConfigParamsDlg):
                                  e.args[0],
                                  QMessageBox.Close)
 
+    def get_changes(self):
+        """
+        Compare the params of the form with the snapshot
+        :return: list of sections with changes and dictionary with the new value of each changed param
+        """
+        changed_sections = list()
+        values = dict()
+        for section in self.sections:
+            for param in section.get_params():
+                name = self.vehicle_namespace + param.get_name()
+                if param.get_value() != self.snapshot.get(name):
+                    values[name] = param.get_value()
+                    if section not in changed_sections:
+                        changed_sections.append(section)
+        return changed_sections, values
+
+    def apply_changes(self, changed_sections, values):
+        """
+        Set the changed params and reload each changed section once.
+        If any param or reload fails, the params are restored to the snapshot.
+        :param changed_sections: sections with changes
+        :param values: dictionary with the new value of each changed param
+        """
+        reloaded_sections = list()
+        try:
+            failures = cola2_interface.set_ros_params(self.ip, self.port, values)
+            if not failures:
+                for section in changed_sections:
+                    if self.reload_section(section):
+                        reloaded_sections.append(section)
+                    else:
+                        failures[section.get_action_id()] = "reload service failed"
+                        break
+        except OSError as e:
+            failures = {"connection": str(e) or type(e).__name__}
+
+        if not failures:
+            self.snapshot.update(values)
+            return
+
+        logger.error("Parameters not applied: {}".format(failures))
+        message = "The following parameters could not be applied:\n"
+        message += "\n".join("  {}: {}".format(name, reason) for name, reason in sorted(failures.items()))
+        try:
+            # restore the last values and reload the sections that already loaded the new ones
+            rollback_failures = cola2_interface.set_ros_params(self.ip, self.port,
+                                                               {name: self.snapshot[name] for name in values})
+            for section in reloaded_sections:
+                if not self.reload_section(section):
+                    rollback_failures[section.get_action_id()] = "reload service failed"
+        except OSError as e:
+            rollback_failures = {"connection": str(e) or type(e).__name__}
+        if rollback_failures:
+            logger.error("Parameters not restored: {}".format(rollback_failures))
+            message += "\n\nThe previous values could not be restored:\n"
+            message += "\n".join("  {}: {}".format(name, reason)
+                                  for name, reason in sorted(rollback_failures.items()))
+        else:
+            message += "\n\nThe previous values have been restored."
+        raise Exception(message)
+
+    def reload_section(self, section):
+        """
+        Call the service that reloads the params of a section
+        :param section: section to reload
+        :return: result of the service
+        """
+        if section.get_action_id() is None:
+            return True
+        logger.info("sending action service: {}".format(section.get_action_id()))
+        result = cola2_interface.send_empty_service(self.ip, self.port,
+                                                    self.vehicle_namespace + section.get_action_id())
+        logger.info("Result: {}".format(result))
+        return result
+
     def save_params(self):
         """ Save Params"""
         save_msg = "Are you sure you want to save all the parameters as defaults?"
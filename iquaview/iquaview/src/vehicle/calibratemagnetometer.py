@@ -17,14 +17,19 @@ If not, see <http://www.gnu.org/licenses/>.
  Class to trigger the service to calibrate the vehicle's magnetometer
 """
 
-import threading
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
-from iquaview.src.cola2api.cola2_interface import send_empty_service
+from iquaview.src.cola2api.cola2_interface import send_empty_service, run_async
 from PyQt5.QtCore import pyqtSignal, QObject
 
 logger = logging.getLogger(__name__)
 
+# the calibration service responds once the vehicle has finished turning
+CALIBRATION_TIMEOUT = 600
+# the calibration waits on its own worker, not on the shared service workers
+calibration_executor = ThreadPoolExecutor(max_workers=1)
+
 
 class CalibrateMagnetometer(QObject):
     calibrate_magnetometer_signal = pyqtSignal(bool)
@@ -38,11 +43,8 @@ class CalibrateMagnetometer(QObject):
         self.vehicle_data = vehicle_data
 
     def start_calibrate_magnetometer(self):
-        """ Start calibrate magnetometer in a new thread"""
-
-        self.threadCalibrateMagnetometer = threading.Thread(target=self.calibrate_magnetometer)
-        self.threadCalibrateMagnetometer.daemon = True
-        self.threadCalibrateMagnetometer.start()
+        """ Start calibrate magnetometer on the calibration worker"""
+        return calibration_executor.submit(self.calibrate_magnetometer)
 
     def calibrate_magnetometer(self):
         """ Send service to start calibrate magnetometer"""
@@ -52,7 +54,8 @@ class CalibrateMagnetometer(QObject):
             thruster = send_empty_service(self.ip, self.port,
                                           self.vehicle_namespace+enable_thrusters)
             result = send_empty_service(self.ip, self.port,
-                                        self.vehicle_namespace+calibrate_magnetometer)
+                                        self.vehicle_namespace+calibrate_magnetometer,
+                                        timeout=CALIBRATION_TIMEOUT)
             logger.info("result {}".format(result))
             self.calibrate_magnetometer_signal.emit(result)
 
@@ -60,7 +63,14 @@ class CalibrateMagnetometer(QObject):
             self.calibrate_magnetometer_signal.emit(False)
 
     def stop_magnetometer_calibration(self):
-        """ Stop magnetometer calibration"""
+        """ Stop magnetometer calibration without blocking"""
         stop_magnetometer_calibration_service = self.vehicle_data.get_stop_magnetometer_calibration_service()
-        result = send_empty_service(self.ip, self.port,
-                                    self.vehicle_namespace+stop_magnetometer_calibration_service)
+        future = run_async(send_empty_service, self.ip, self.port,
+                           self.vehicle_namespace+stop_magnetometer_calibration_service)
+        future.add_done_callback(self.stop_magnetometer_calibration_done)
+        return future
+
+    @staticmethod
+    def stop_magnetometer_calibration_done(future):
+        if future.exception() is not None:
+            logger.error("Stop magnetometer calibration failed: {}".format(future.exception()))
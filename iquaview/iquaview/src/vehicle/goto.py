@@ -30,9 +30,11 @@ from qgis.core import QgsWkbTypes, QgsPointXY, QgsDistanceArea, QgsProject
 from iquaview.src.cola2api.cola2_interface import (SubscribeToTopic,
                                                    send_goto_service,
                                                    send_trigger_service,
-                                                   get_ros_param)
+                                                   get_ros_param,
+                                                   run_async)
 from iquaview.src.ui.ui_go_to_dlg import Ui_GoToDialog
 from iquaview.src.utils.busywidget import BusyWidget
+from iquaview.src.utils.workerthread import FutureWatcher
 from iquaview.src.utils.textvalidator import validate_custom_double, get_color, get_custom_double_validator
 from iquaview.src.xmlconfighandler.vehicledatahandler import VehicleDataHandler
 
@@ -57,6 +59,9 @@ class GoToDialog(QDialog, Ui_GoToDialog):
         self.installEventFilter(self)
         self.timer = QTimer()
         self.timer.timeout.connect(self.refresh_goto_status)
+        self.service_watcher = FutureWatcher(self)
+        # goto call waiting for its response, results of other calls are ignored
+        self.goto_future = None
         self.subscribed = False
 
         self.goto_status = None
@@ -142,52 +147,15 @@ class GoToDialog(QDialog, Ui_GoToDialog):
                 tolerance_y = float(self.y_tolerance_doubleSpinBox.value())
                 tolerance_z = float(self.z_tolerance_doubleSpinBox.value())
 
-                if self.is_allowed_distance(x, y):
-
-                    enable_goto = self.vehicle_data.get_goto_service()
-                    # send goto service with params
-                    result = send_goto_service(self.ip, self.port, self.vehicle_namespace + enable_goto, z,
-                                               altitude_mode, x, y, z, surge,
-                                               tolerance_x, tolerance_y, tolerance_z)
-                    if result['result']:
-
-                        if result['values']['success']:
-                            self.goto_status = None
-                            self.dialog_finished_signal.emit()
-                            self.accept()
-                        else:
-                            try:
-                                message = result['values']['message']
-                            # back compatibility
-                            except Exception as e:
-                                message = "There is another execution in progress."
-                            logger.warning("'Go to' failed")
-                            QMessageBox.critical(self,
-                                                 "Go to failed",
-                                                 message,
-                                                 QMessageBox.Close)
-                            self.rubber_band_points.reset(QgsWkbTypes.PointGeometry)
-                            self.on_reject()
-                    else:
-                        message = "Error sending 'Go to' Service"
-                        logger.error(message)
-                        QMessageBox.critical(self,
-                                             "Go to failed",
-                                             message,
-                                             QMessageBox.Close)
-                        self.rubber_band_points.reset(QgsWkbTypes.PointGeometry)
-                        self.on_reject()
-
-                else:
-                    message = "Enter a point within the allowed distance: "\
-                              + str(self.get_max_dist_allowed()) \
-                              + "m"
-                    logger.error(message)
-                    QMessageBox.critical(self,
-                                         "Go to failed",
-                                         message,
-                                         QMessageBox.Close)
-                    self.rubber_band_points.reset(QgsWkbTypes.PointGeometry)
+                enable_goto = self.vehicle_data.get_goto_service()
+                # check the distance and send goto service with params without blocking,
+                # the response is checked in goto_done
+                self.Ok_pushButton.setEnabled(False)
+                future = run_async(self.send_goto, self.get_distance_to_goal(x, y),
+                                   self.vehicle_namespace + enable_goto, z,
+                                   altitude_mode, x, y, z, surge,
+                                   tolerance_x, tolerance_y, tolerance_z)
+                self.goto_future = self.service_watcher.watch(future, self.goto_done)
 
         except OSError as oe:
             logger.error("Connection Refused")
@@ -205,6 +173,69 @@ class GoToDialog(QDialog, Ui_GoToDialog):
                                  QMessageBox.Close)
             self.rubber_band_points.reset(QgsWkbTypes.PointGeometry)
 
+    def goto_done(self, future):
+        """ Check the response of the goto service sent by on_accept"""
+        if future is not self.goto_future:
+            # the dialog was closed while waiting
+            return
+        self.goto_future = None
+        self.Ok_pushButton.setEnabled(True)
+        try:
+            result, max_dist = future.result()
+        except OSError as oe:
+            logger.error("Connection Refused")
+            QMessageBox.critical(self,
+                                 "Go to failed",
+                                 "Connection Refused: " + (oe.strerror or str(oe)),
+                                 QMessageBox.Close)
+            self.rubber_band_points.reset(QgsWkbTypes.PointGeometry)
+            return
+        except Exception as e:
+            logger.error("'Go to' failed: {}".format(e))
+            QMessageBox.critical(self,
+                                 "Go to failed",
+                                 "Error sending 'Go to' Service: {}".format(e),
+                                 QMessageBox.Close)
+            self.rubber_band_points.reset(QgsWkbTypes.PointGeometry)
+            return
+
+        if result is None:
+            message = "Enter a point within the allowed distance: {}m".format(max_dist)
+            logger.error(message)
+            QMessageBox.critical(self,
+                                 "Go to failed",
+                                 message,
+                                 QMessageBox.Close)
+            self.rubber_band_points.reset(QgsWkbTypes.PointGeometry)
+        elif result['result']:
+
+            if result['values']['success']:
+                self.goto_status = None
+                self.dialog_finished_signal.emit()
+                self.accept()
+            else:
+                try:
+                    message = result['values']['message']
+                # back compatibility
+                except Exception as e:
+                    message = "There is another execution in progress."
+                logger.warning("'Go to' failed")
+                QMessageBox.critical(self,
+                                     "Go to failed",
+                                     message,
+                                     QMessageBox.Close)
+                self.rubber_band_points.reset(QgsWkbTypes.PointGeometry)
+                self.on_reject()
+        else:
+            message = "Error sending 'Go to' Service"
+            logger.error(message)
+            QMessageBox.critical(self,
+                                 "Go to failed",
+                                 message,
+                                 QMessageBox.Close)
+            self.rubber_band_points.reset(QgsWkbTypes.PointGeometry)
+            self.on_reject()
+
     def update_goto_status(self):
         self.subscribed = True
         self.timer.start(1000)
@@ -293,28 +324,35 @@ class GoToDialog(QDialog, Ui_GoToDialog):
         self.rubber_band_points.addPoint(point)
         self.canvas.setMapTool(QgsMapToolPan(self.canvas))
 
-    def is_allowed_distance(self, x_goal, y_goal):
+    def get_distance_to_goal(self, x_goal, y_goal):
         """
 
-        :param x_goal: longitude
-        :param y_goal: latitude
-        :return: return true if the distance is allowed, otherwise false
+        :param x_goal: latitude
+        :param y_goal: longitude
+        :return: return the distance from the vehicle to the goal, None if the vehicle position is unknown
         """
-        allowed = False
         data = self.vehicle_data.get_nav_sts()
-        if data is not None and data['valid_data'] != 'disconnected':
-            lat = float(data['global_position']['latitude'])
-            lon = float(data['global_position']['longitude'])
-            pos = QgsPointXY(lon, lat)
-            pos_goal = QgsPointXY(y_goal, x_goal)
-
-            distance = self.distance_calc.measureLine([pos, pos_goal])
-            max_dist = self.get_max_dist_allowed()
-
-            if distance <= max_dist:
-                allowed = True
+        if data is None or data['valid_data'] == 'disconnected':
+            return None
+        lat = float(data['global_position']['latitude'])
+        lon = float(data['global_position']['longitude'])
+        pos = QgsPointXY(lon, lat)
+        pos_goal = QgsPointXY(y_goal, x_goal)
+        return self.distance_calc.measureLine([pos, pos_goal])
+
+    def send_goto(self, distance, service, *args):
+        """
+        Send the goto service if the goal is within the allowed distance, called on the service workers.
 
-        return allowed
+        :param distance: distance from the vehicle to the goal, None if unknown
+        :param service: name of the goto service
+        :param args: arguments of send_goto_service after the service name
+        :return: tuple with the service response, None if the goal is not allowed, and the allowed distance
+        """
+        max_dist = self.get_max_dist_allowed()
+        if distance is None or distance > max_dist:
+            return None, max_dist
+        return send_goto_service(self.ip, self.port, service, *args), max_dist
 
     def get_max_dist_allowed(self):
         """ Get the maximum distance allowed to waypoint"""
@@ -325,24 +363,48 @@ class GoToDialog(QDialog, Ui_GoToDialog):
         """ Send a service that disables goto"""
         disable_goto = self.vehicle_data.get_disable_goto_service()
         if disable_goto is not None:
-            response = send_trigger_service(self.ip, self.port, self.vehicle_namespace + disable_goto)
-            try:
-                if not response['values']['success']:
-                    QMessageBox.critical(self,
-                                         "Disable 'Go to' failed",
-                                         response['values']['message'],
-                                         QMessageBox.Close)
-            # back compatibility
-            except Exception as e:
-                logger.warning("The disable goto response can not be read")
+            future = run_async(send_trigger_service, self.ip, self.port, self.vehicle_namespace + disable_goto)
+            self.service_watcher.watch(future, self.disable_goto_done)
+
+    def disable_goto_done(self, future):
+        """ Check the response of the disable goto service sent by disable_goto"""
+        try:
+            response = future.result()
+        except Exception as e:
+            logger.error("Disable 'Go to' failed: {}".format(e))
+            QMessageBox.critical(self,
+                                 "Disable 'Go to' failed",
+                                 "Connection with COLA2 failed: {}".format(e),
+                                 QMessageBox.Close)
+            return
+        try:
+            if not response['values']['success']:
+                QMessageBox.critical(self,
+                                     "Disable 'Go to' failed",
+                                     response['values']['message'],
+                                     QMessageBox.Close)
+        # back compatibility
+        except Exception as e:
+            logger.warning("The disable goto response can not be read")
 
     def on_reject(self):
         """ reject goto"""
+        self.forget_goto()
         self.going_signal.emit()
         self.rubber_band_points.reset(QgsWkbTypes.PointGeometry)
         self.dialog_finished_signal.emit()
         self.reject()
 
+    def reject(self):
+        """ Overrides reject, also called when pressing Escape"""
+        self.forget_goto()
+        super(GoToDialog, self).reject()
+
+    def forget_goto(self):
+        """ Ignore the response of a goto call still in flight"""
+        self.goto_future = None
+        self.Ok_pushButton.setEnabled(True)
+
     def closeEvent(self, event):
         """ close event and call function on_reject"""
         self.on_reject()
@@ -17,80 +17,229 @@ If not, see <http://www.gnu.org/licenses/>.
  Dialog to display the log info
 """
 
-from PyQt5.QtCore import pyqtSignal, Qt, QTimer
-from PyQt5.QtGui import QBrush
+from collections import deque
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QBrush, QTextCharFormat, QTextCursor
 from PyQt5.QtWidgets import QWidget
 from iquaview.src.ui.ui_log import Ui_Log
 
+# rosout levels with their tag and color
+LEVELS = {0: ("[DEBUG]", Qt.gray),
+          1: ("[DEBUG]", Qt.gray),
+          2: ("[INFO]", Qt.black),
+          4: ("[WARN]", Qt.darkYellow),
+          8: ("[ERROR]", Qt.red),
+          16: ("[FATAL]", Qt.darkRed)}
+
+# minimum level shown by each entry of the level combo box
+LEVEL_FILTERS = [("All", 0), ("Info", 2), ("Warn", 4), ("Error", 8), ("Fatal", 16)]
+
+ALL_NODES = "All nodes"
+
+
+class LogModel(object):
+    """
+    Bounded history of log entries indexed by node.
+
+    Entries are formatted once when added. Filtering by node walks only the entries
+    of that node, and the level of each entry is kept as a number so the text is
+    never scanned again. When the history is full the oldest entry is removed from
+    both the history and its node, so all the nodes together hold max_entries at most.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = deque()
+        self.nodes = dict()
+
+    def add(self, data):
+        """
+        Format and store a rosout message.
+
+        :param data: rosout message
+        :return: the new entry, a tuple (level, node, text)
+        """
+        level = data.get('level', 2)
+        node = data.get('name', '')
+        msg_type = LEVELS.get(level, LEVELS[2])[0]
+        stamp = data['header']['stamp']
+        text = "{} [{}.{}] {}".format(msg_type, stamp['secs'], stamp['nsecs'], data['msg'])
+        entry = (level, node, text)
+        if len(self.entries) >= self.max_entries:
+            # the oldest entry is also the oldest of its node
+            oldest = self.entries.popleft()
+            oldest_node_entries = self.nodes[oldest[1]]
+            oldest_node_entries.popleft()
+            if not oldest_node_entries:
+                del self.nodes[oldest[1]]
+        self.entries.append(entry)
+        node_entries = self.nodes.get(node)
+        if node_entries is None:
+            node_entries = self.nodes[node] = deque()
+        node_entries.append(entry)
+        return entry
+
+    def filter(self, min_level=0, node=None):
+        """
+        Get the entries matching a filter, oldest first.
+
+        :param min_level: minimum rosout level
+        :param node: name of the node, all nodes if None
+        :return: list of entries
+        """
+        if node is None:
+            entries = self.entries
+        else:
+            entries = self.nodes.get(node, ())
+        if min_level <= 0:
+            return list(entries)
+        return [entry for entry in entries if entry[0] >= min_level]
+
+    def get_nodes(self):
+        """ Get the names of the nodes with entries, sorted."""
+        return sorted(self.nodes.keys())
+
+    def clear(self):
+        """ Remove all the entries."""
+        self.entries.clear()
+        self.nodes.clear()
+
 
 class LogWidget(QWidget, Ui_Log):
-    new_data_signal = pyqtSignal(dict)
 
     def __init__(self, vehicle_data):
         super(LogWidget, self).__init__()
         self.setupUi(self)
         self.setWindowTitle("Log Info")
         self.vehicle_data = vehicle_data
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.refresh_data)
         self.connected = False
-        self.new_data_signal.connect(self.update_log)
+
+        max_blocks = int(self.vehicle_data.config.csettings.get('log_max_blocks', 5000))
+        self.plainTextEdit.setMaximumBlockCount(max_blocks)
+        self.model = LogModel(max_blocks)
+
+        # one char format per level, created once
+        self.formats = dict()
+        for level, (msg_type, color) in LEVELS.items():
+            tf = QTextCharFormat()
+            tf.setForeground(QBrush(color))
+            self.formats[level] = tf
+
+        for name, level in LEVEL_FILTERS:
+            self.levelComboBox.addItem(name, level)
+        self.nodeComboBox.addItem(ALL_NODES)
+        self.levelComboBox.currentIndexChanged.connect(self.filter_changed)
+        self.nodeComboBox.currentIndexChanged.connect(self.filter_changed)
 
         self.plainTextEdit.setContextMenuPolicy(Qt.CustomContextMenu)
         self.plainTextEdit.customContextMenuRequested.connect(self.show_context_menu)
 
     def connect(self):
-        """ set connected start to True and start timer"""
+        """ set connected start to True and listen to rosout updates"""
         self.connected = True
-        self.timer.start(1000)
+        self.vehicle_data.topic_updated.connect(self.topic_updated)
+
+    def topic_updated(self, key):
+        """
+        Refresh the log when new rosout messages are received.
+
+        :param key: key of the updated topic
+        """
+        if key == 'rosout':
+            self.refresh_data()
 
     def refresh_data(self):
         """Refresh log data."""
         if self.connected:
             info = self.vehicle_data.get_rosout()
             if info is not None and info[0]['valid_data'] == 'new_data':
-                for data in info:
-                    self.new_data_signal.emit(data)
+                self.update_log(info)
+            self.update_stats()
 
-    def update_log(self, data):
-        """
-        Append data in log.
+    def update_stats(self):
+        """Show the delivered and dropped rosout messages."""
+        stats = self.vehicle_data.get_rosout_stats()
+        if stats is not None:
+            self.statsLabel.setText("Delivered: {}   Dropped: {}".format(stats['delivered'], stats['dropped']))
 
-        :param data: data from auv
-        :type data: dict
+    def get_filter(self):
         """
+        Get the current filter.
 
-        tf = self.plainTextEdit.currentCharFormat()
-
-        if data['level'] == 0:
+        :return: minimum level and node name, None for all nodes
+        """
+        min_level = self.levelComboBox.currentData()
+        if min_level is None:
+            min_level = 0
+        node = self.nodeComboBox.currentText()
+        if node == ALL_NODES or not node:
+            node = None
+        return min_level, node
 
-            tf.setForeground(QBrush(Qt.gray))
-            msg_type = "[DEBUG]"
+    def update_log(self, batch):
+        """
+        Append a batch of messages in log.
 
-        elif data['level'] == 2:
+        :param batch: rosout messages from auv
+        :type batch: iterable of dict
+        """
+        min_level, node = self.get_filter()
+        known_nodes = set(self.model.nodes)
+        entries = list()
+        for data in batch:
+            entry = self.model.add(data)
+            if entry[0] >= min_level and (node is None or entry[1] == node):
+                entries.append(entry)
 
-            tf.setForeground(QBrush(Qt.black))
-            msg_type = "[INFO]"
+        if self.model.nodes.keys() != known_nodes:
+            self.update_nodes()
 
-        elif data['level'] == 4:
+        self.append_entries(entries)
 
-            tf.setForeground(QBrush(Qt.darkYellow))
-            msg_type = "[WARN]"
+    def append_entries(self, entries):
+        """
+        Insert entries at the end of the document in a single edit block.
 
-        elif data['level'] == 8:
+        :param entries: list of (level, node, text) tuples
+        """
+        if not entries:
+            return
+        scrollbar = self.plainTextEdit.verticalScrollBar()
+        at_bottom = scrollbar.value() == scrollbar.maximum()
 
-            tf.setForeground(QBrush(Qt.red))
-            msg_type = "[ERROR]"
+        cursor = QTextCursor(self.plainTextEdit.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        first = self.plainTextEdit.document().isEmpty()
+        for level, node, text in entries:
+            if not first:
+                cursor.insertBlock()
+            first = False
+            cursor.insertText(text, self.formats.get(level, self.formats[2]))
+        cursor.endEditBlock()
 
-        elif data['level'] == 16:
-            tf.setForeground(QBrush(Qt.darkRed))
-            msg_type = "[FATAL]"
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
 
-        time = "[" + str(data['header']['stamp']['secs']) + "." + str(data['header']['stamp']['nsecs']) + "]"
-        string = msg_type + " " + time + " " + data['msg']
+    def update_nodes(self):
+        """ Update the nodes of the node combo box, keeping the selection even if its node has no entries left."""
+        current = self.nodeComboBox.currentText()
+        nodes = self.model.get_nodes()
+        if current != ALL_NODES and current and current not in nodes:
+            nodes = sorted(nodes + [current])
+        self.nodeComboBox.blockSignals(True)
+        self.nodeComboBox.clear()
+        self.nodeComboBox.addItem(ALL_NODES)
+        self.nodeComboBox.addItems(nodes)
+        self.nodeComboBox.setCurrentIndex(max(self.nodeComboBox.findText(current), 0))
+        self.nodeComboBox.blockSignals(False)
 
-        self.plainTextEdit.setCurrentCharFormat(tf)
-        self.plainTextEdit.appendPlainText(string)
+    def filter_changed(self):
+        """ Rebuild the log view from the model with the current filter."""
+        min_level, node = self.get_filter()
+        self.plainTextEdit.clear()
+        self.append_entries(self.model.filter(min_level, node))
 
     def show_context_menu(self, pos):
         """
@@ -103,8 +252,14 @@ class LogWidget(QWidget, Ui_Log):
         action = menu.exec_(self.plainTextEdit.mapToGlobal(pos))
         if action == clear:
             self.plainTextEdit.clear()
+            self.model.clear()
+            self.update_nodes()
 
     def disconnect(self):
-        """ Disconnect and cancel timer."""
+        """ Disconnect and stop listening to rosout updates."""
         self.connected = False
-        self.timer.stop()
+        try:
+            self.vehicle_data.topic_updated.disconnect(self.topic_updated)
+        except TypeError:
+            # not connected
+            pass
@@ -0,0 +1,340 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+"""
+ Recorder that persists the messages received from the vehicle topics
+"""
+
+import os
+import json
+import zlib
+import queue
+import struct
+import logging
+import time
+import datetime
+import threading
+
+logger = logging.getLogger(__name__)
+
+# file signature and size of the chunk length prefix
+MAGIC = b'IQTLOG1\n'
+CHUNK_HEADER = struct.Struct('<I')
+EXTENSION = '.tlog'
+
+
+def flatten(msg, prefix='', columns=None):
+    """
+    Flatten a nested message into a dictionary of field paths.
+
+    :param msg: message as a dictionary
+    :param prefix: path of msg inside the top level message
+    :param columns: dictionary to fill
+    :return: dictionary with paths separated by '/' (i.e. 'position/north') as keys
+    """
+    if columns is None:
+        columns = dict()
+    for key, value in msg.items():
+        path = prefix + key
+        if isinstance(value, dict) and value:
+            flatten(value, path + '/', columns)
+        else:
+            columns[path] = value
+    return columns
+
+
+def unflatten(fields):
+    """
+    Rebuild a nested message from a dictionary of field paths.
+
+    :param fields: dictionary with paths separated by '/' as keys
+    :return: nested message
+    """
+    msg = dict()
+    for path, value in fields.items():
+        names = path.split('/')
+        target = msg
+        for name in names[:-1]:
+            target = target.setdefault(name, dict())
+        target[names[-1]] = value
+    return msg
+
+
+def topic_file_name(topic):
+    """ Get a file name for a topic name."""
+    name = topic.strip('/').replace('/', '__')
+    return name if name else 'root'
+
+
+class TelemetryLogWriter(object):
+    """
+    Append-only writer of the log of one topic.
+
+    Messages are grouped in chunks, each chunk stores one column per field path plus
+    the receive times, and is compressed with zlib and appended with its length.
+    The rows of a column whose message lacks the field are listed apart, so a field
+    that is null in the message is kept.
+    A new file is started when the current one reaches max_file_size.
+    """
+
+    def __init__(self, path, topic, chunk_size=256, max_file_size=50 * 1024 * 1024):
+        """
+        Class constructor.
+
+        :param path: folder of the recording session
+        :param topic: name of the topic
+        :param chunk_size: messages per chunk
+        :param max_file_size: size in bytes to rotate files at
+        """
+        self.path = path
+        self.topic = topic
+        self.chunk_size = chunk_size
+        self.max_file_size = max_file_size
+        self.file_index = 0
+        self.file = None
+        self.stamps = list()
+        self.messages = list()
+
+    def get_file_name(self):
+        """ Get the name of the current file."""
+        return os.path.join(self.path, "{}.{:04d}{}".format(topic_file_name(self.topic), self.file_index, EXTENSION))
+
+    def open(self):
+        """ Open a new file for the topic."""
+        self.file = open(self.get_file_name(), 'ab')
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+
+    def append(self, stamp, msg):
+        """
+        Add a message to the current chunk, writing it when full.
+
+        :param stamp: receive time of the message
+        :param msg: decoded message
+        """
+        self.stamps.append(stamp)
+        self.messages.append(msg)
+        if len(self.messages) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """ Write the current chunk to disk."""
+        if not self.messages:
+            return
+        rows = [flatten(msg) for msg in self.messages]
+        columns = dict()
+        missing = dict()
+        for i, row in enumerate(rows):
+            for path, value in row.items():
+                column = columns.get(path)
+                if column is None:
+                    # the field is missing in the previous messages
+                    column = columns[path] = [None] * i
+                    if i:
+                        missing[path] = list(range(i))
+                column.append(value)
+            for path, column in columns.items():
+                if len(column) <= i:
+                    column.append(None)
+                    missing.setdefault(path, list()).append(i)
+        chunk = {'topic': self.topic, 'stamps': self.stamps, 'columns': columns, 'missing': missing}
+        data = zlib.compress(json.dumps(chunk, separators=(',', ':')).encode())
+
+        if self.file is None:
+            self.open()
+        self.file.write(CHUNK_HEADER.pack(len(data)))
+        self.file.write(data)
+        self.file.flush()
+        self.stamps = list()
+        self.messages = list()
+
+        if self.file.tell() >= self.max_file_size:
+            self.file.close()
+            self.file = None
+            self.file_index += 1
+
+    def close(self):
+        """ Write the pending messages and close the file."""
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class TelemetryRecorder(object):
+    """
+    Record every message received from the vehicle topics from a background thread.
+
+    record is called from the I/O reactor thread and only queues the message,
+    the disk is written from the recorder thread. If the queue is full the message
+    is dropped and counted instead of blocking the reactor. The partial chunks are
+    written every flush_interval seconds, even while messages keep arriving.
+    """
+
+    def __init__(self, path, chunk_size=256, max_file_size=50 * 1024 * 1024, flush_interval=5.0,
+                 max_queue_size=10000):
+        """
+        Class constructor.
+
+        :param path: folder where a session folder is created
+        :param chunk_size: messages per chunk
+        :param max_file_size: size in bytes to rotate files at
+        :param flush_interval: seconds after which partial chunks are written
+        :param max_queue_size: messages waiting to be written before dropping
+        """
+        session = datetime.datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
+        self.path = os.path.join(os.path.expanduser(path), session)
+        os.makedirs(self.path, exist_ok=True)
+        self.chunk_size = chunk_size
+        self.max_file_size = max_file_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.writers = dict()
+        self.recorded = 0
+        self.dropped = 0
+        self.keepgoing = True
+        # not a daemon, so the pending messages are written when the application exits
+        self.t = threading.Thread(target=self.write_loop)
+        self.t.start()
+        logger.info("Recording telemetry to {}".format(self.path))
+
+    def record(self, topic, msg, stamp):
+        """
+        Queue a message to be recorded.
+
+        :param topic: name of the topic
+        :param msg: decoded message
+        :param stamp: receive time of the message
+        """
+        try:
+            self.queue.put_nowait((topic, msg, stamp))
+        except queue.Full:
+            self.dropped += 1
+
+    def write_loop(self):
+        """ Write the queued messages until the recorder is closed."""
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self.queue.get(timeout=max(0.0, last_flush + self.flush_interval - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is not None:
+                self.write(*item)
+            if not self.keepgoing and self.queue.empty():
+                break
+
+            if time.monotonic() - last_flush >= self.flush_interval:
+                self.flush()
+                last_flush = time.monotonic()
+
+        for writer in self.writers.values():
+            writer.close()
+
+    def write(self, topic, msg, stamp):
+        """
+        Append a message to the writer of its topic.
+
+        :param topic: name of the topic
+        :param msg: decoded message
+        :param stamp: receive time of the message
+        """
+        writer = self.writers.get(topic)
+        if writer is None:
+            writer = self.writers[topic] = TelemetryLogWriter(self.path, topic, self.chunk_size,
+                                                              self.max_file_size)
+        try:
+            writer.append(stamp, msg)
+            self.recorded += 1
+        except (OSError, TypeError, ValueError) as e:
+            logger.error("Telemetry of {} could not be recorded: {}".format(topic, e))
+
+    def flush(self):
+        """ Write the partial chunks of all topics."""
+        for topic, writer in self.writers.items():
+            try:
+                writer.flush()
+            except (OSError, TypeError, ValueError) as e:
+                logger.error("Telemetry of {} could not be recorded: {}".format(topic, e))
+
+    def get_stats(self):
+        """ Get the recorded and dropped message counters."""
+        return {'recorded': self.recorded, 'dropped': self.dropped}
+
+    def close(self):
+        """
+        Stop the recorder thread once the pending messages are written.
+
+        It does not wait for the thread, use wait to know when the files are complete.
+        """
+        if self.keepgoing:
+            self.keepgoing = False
+            try:
+                self.queue.put_nowait(None)
+            except queue.Full:
+                # the thread stops when the queue is drained
+                pass
+
+    def wait(self, timeout=None):
+        """
+        Wait for the recorder thread to end after close.
+
+        :param timeout: maximum seconds to wait, None to wait until it ends
+        :return: True if the thread ended
+        """
+        self.t.join(timeout)
+        return not self.t.is_alive()
+
+
+def read_telemetry_file(file_name):
+    """
+    Read the messages of a telemetry log file.
+
+    A chunk cut by an unexpected stop of the recorder ends the reading. The fields
+    missing in a message are left out of it.
+
+    :param file_name: name of the .tlog file
+    :return: generator of (topic, stamp, msg) tuples
+    """
+    with open(file_name, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("{} is not a telemetry log".format(file_name))
+        while True:
+            header = f.read(CHUNK_HEADER.size)
+            if len(header) < CHUNK_HEADER.size:
+                return
+            size = CHUNK_HEADER.unpack(header)[0]
+            data = f.read(size)
+            if len(data) < size:
+                logger.warning("{} ends with a truncated chunk".format(file_name))
+                return
+            chunk = json.loads(zlib.decompress(data).decode())
+            columns = chunk['columns']
+            missing = {path: set(rows) for path, rows in chunk.get('missing', dict()).items()}
+            for i, stamp in enumerate(chunk['stamps']):
+                fields = {path: column[i] for path, column in columns.items()
+                          if path not in missing or i not in missing[path]}
+                yield chunk['topic'], stamp, unflatten(fields)
+
+
+def list_telemetry_files(path):
+    """
+    Get the telemetry log files of a session folder, grouped by topic in rotation order.
+
+    :param path: session folder
+    :return: list of file names
+    """
+    return sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(EXTENSION))
@@ -0,0 +1,307 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+"""
+ Replay of recorded telemetry through the same interface as a rosbridge connection
+"""
+
+import os
+import json
+import time
+import heapq
+import bisect
+import logging
+import threading
+
+from iquaview.src.cola2api.cola2_interface import TopicSubscription
+from iquaview.src.vehicle.telemetryrecorder import read_telemetry_file, list_telemetry_files
+
+logger = logging.getLogger(__name__)
+
+
+def read_json_lines(file_name):
+    """
+    Read a JSON-lines capture of rosbridge traffic.
+
+    Each line holds a rosbridge message. The receive time is taken from a 'stamp' key
+    of the line if present, otherwise from the header of the message.
+
+    :param file_name: name of the capture
+    :return: generator of (topic, stamp, msg) tuples
+    """
+    last_stamp = 0.0
+    with open(file_name, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                logger.warning("Skipping corrupt line of {}".format(file_name))
+                continue
+            if message.get('op', 'publish') != 'publish' or 'msg' not in message:
+                continue
+            msg = message['msg']
+            stamp = message.get('stamp')
+            if stamp is None:
+                try:
+                    header_stamp = msg['header']['stamp']
+                    stamp = header_stamp['secs'] + header_stamp['nsecs'] * 1e-9
+                except (KeyError, TypeError):
+                    stamp = last_stamp
+            last_stamp = stamp
+            yield message.get('topic'), stamp, msg
+
+
+def load_telemetry(path):
+    """
+    Load recorded telemetry sorted by receive time.
+
+    :param path: session folder of .tlog files, a single .tlog file or a JSON-lines capture
+    :return: list of stamps and list of (topic, msg) tuples in the same order
+    """
+    if os.path.isdir(path):
+        files = list_telemetry_files(path)
+        # files of each topic are already in time order, merge the topics
+        streams = dict()
+        for file_name in files:
+            topic_name = os.path.basename(file_name).rsplit('.', 2)[0]
+            streams.setdefault(topic_name, list()).append(file_name)
+        iterators = [chain_files(file_names) for file_names in streams.values()]
+        messages = heapq.merge(*iterators, key=lambda item: item[1])
+    elif path.endswith('.tlog'):
+        messages = read_telemetry_file(path)
+    else:
+        messages = sorted(read_json_lines(path), key=lambda item: item[1])
+
+    stamps = list()
+    items = list()
+    for topic, stamp, msg in messages:
+        stamps.append(stamp)
+        items.append((topic, msg))
+    return stamps, items
+
+
+def chain_files(file_names):
+    """ Read several telemetry files one after the other."""
+    for file_name in file_names:
+        for item in read_telemetry_file(file_name):
+            yield item
+
+
+class TelemetryReplay(object):
+    """
+    Source of topic data that plays back recorded telemetry.
+
+    It offers the subscribe/unsubscribe surface of RosbridgeConnection, so VehicleData
+    and its widgets are driven exactly as with a live vehicle. Messages are dispatched
+    from a playback thread keeping their original spacing divided by speed, or as fast
+    as possible if speed is 0. The playback begins with start, once the topics are subscribed.
+    """
+
+    def __init__(self, path, speed=1.0, loop=False):
+        """
+        Class constructor.
+
+        :param path: session folder of .tlog files, a single .tlog file or a JSON-lines capture
+        :param speed: playback speed factor, 0 to play as fast as possible
+        :param loop: restart from the beginning when the end is reached
+        """
+        self.path = path
+        self.stamps, self.items = load_telemetry(path)
+        self.speed = speed
+        self.loop = loop
+        self.lock = threading.Lock()
+        self.subscriptions = dict()
+        self.message_listener = None
+        self.next_id = 0
+        self.position = 0
+        self.dispatched = 0
+        self.lag = 0.0
+        self.seek_event = threading.Event()
+        self.paused = threading.Event()
+        self.keepgoing = True
+        self.finished = False
+        self.t = threading.Thread(target=self.play_loop)
+        self.t.daemon = True
+
+    def start(self):
+        """ Start the playback, messages dispatched before the subscriptions would be lost."""
+        if not self.t.is_alive() and self.keepgoing:
+            self.t.start()
+
+    def get_duration(self):
+        """ Get the duration of the recording in seconds."""
+        if not self.stamps:
+            return 0.0
+        return self.stamps[-1] - self.stamps[0]
+
+    def get_time(self):
+        """ Get the playback time in seconds from the start of the recording."""
+        if not self.stamps:
+            return 0.0
+        position = min(self.position, len(self.stamps) - 1)
+        return self.stamps[position] - self.stamps[0]
+
+    def set_speed(self, speed):
+        """
+        Change the playback speed.
+
+        :param speed: playback speed factor, 0 to play as fast as possible
+        """
+        self.speed = speed
+        self.seek_event.set()
+
+    def seek(self, seconds):
+        """
+        Move the playback to a time of the recording.
+
+        :param seconds: time from the start of the recording
+        """
+        if not self.stamps:
+            return
+        with self.lock:
+            self.position = bisect.bisect_left(self.stamps, self.stamps[0] + seconds)
+            self.finished = False
+        self.seek_event.set()
+
+    def pause(self):
+        """ Pause the playback."""
+        self.paused.set()
+
+    def resume(self):
+        """ Resume the playback."""
+        self.paused.clear()
+        self.seek_event.set()
+
+    def play_loop(self):
+        """ Dispatch the messages at their recorded times until closed."""
+        start_wall = time.time()
+        start_stamp = None
+        while self.keepgoing:
+            if self.paused.is_set():
+                self.seek_event.wait(0.1)
+                self.seek_event.clear()
+                start_stamp = None
+                continue
+
+            with self.lock:
+                position = self.position
+                if position >= len(self.items):
+                    if self.loop and self.items:
+                        self.position = 0
+                        start_stamp = None
+                        continue
+                    self.finished = True
+                else:
+                    self.position = position + 1
+            if self.finished:
+                self.seek_event.wait(0.1)
+                self.seek_event.clear()
+                start_stamp = None
+                continue
+
+            stamp = self.stamps[position]
+            if start_stamp is None:
+                start_wall = time.time()
+                start_stamp = stamp
+            if self.speed > 0:
+                due = start_wall + (stamp - start_stamp) / self.speed
+                delay = due - time.time()
+                self.lag = max(0.0, -delay)
+                if delay > 0:
+                    if self.seek_event.wait(delay):
+                        # seek, speed change or resume, restart the clock
+                        self.seek_event.clear()
+                        with self.lock:
+                            if self.position == position + 1:
+                                self.position = position
+                        start_stamp = None
+                        continue
+            topic, msg = self.items[position]
+            self.dispatch(topic, msg)
+
+    def dispatch(self, topic, msg):
+        """
+        Deliver a message to the listener and the subscriptions of its topic.
+
+        :param topic: name of the topic
+        :param msg: recorded message
+        """
+        listener = self.message_listener
+        if listener is not None:
+            listener(topic, msg, time.time())
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(topic, list()))
+        for subscription in subscriptions:
+            subscription.update(msg)
+        self.dispatched += 1
+
+    def subscribe(self, topic, timeout=5, buffer_enabled=False, throttle_rate=1, queue_length=None,
+                  fragment_size=None, fields=None, buffer_capacity=1000):
+        """
+        Subscribe to a recorded topic, see RosbridgeConnection.subscribe.
+
+        throttle_rate, queue_length and fragment_size only apply to rosbridge and are ignored.
+
+        :return: the TopicSubscription holding the last topic data
+        """
+        with self.lock:
+            self.next_id += 1
+            subscription = TopicSubscription(self, topic, "replay:{}".format(self.next_id), timeout,
+                                             buffer_enabled, fields, buffer_capacity)
+            self.subscriptions.setdefault(topic, list()).append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        Remove a subscription.
+
+        :param subscription: the TopicSubscription returned by subscribe
+        """
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.topic, list())
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+
+    def set_message_listener(self, listener):
+        """
+        Set a function called with every replayed message.
+
+        :param listener: function receiving the topic name, the message and its dispatch time, None to remove it
+        """
+        self.message_listener = listener
+
+    def call_service(self, service, args=None, timeout=5):
+        """ Services are not available in a replay."""
+        raise ConnectionError("Service {} is not available while replaying telemetry".format(service))
+
+    def get_stats(self):
+        """ Get the dispatched messages and the current lag behind the recorded timing in seconds."""
+        return {'dispatched': self.dispatched, 'lag': self.lag, 'finished': self.finished}
+
+    def get_keepgoing(self):
+        return self.keepgoing
+
+    def close(self):
+        """ Stop the playback."""
+        self.keepgoing = False
+        self.seek_event.set()
+        with self.lock:
+            subscriptions = [s for topic_subscriptions in self.subscriptions.values() for s in topic_subscriptions]
+        for subscription in subscriptions:
+            subscription.set_disconnected()
@@ -21,7 +21,8 @@ import logging
 from PyQt5.QtWidgets import QWidget, QMessageBox
 from PyQt5.QtCore import QTimer, pyqtSignal
 from iquaview.src.ui.ui_timeoutwidget import Ui_Timeout
-from iquaview.src.cola2api.cola2_interface import send_empty_service, get_ros_param
+from iquaview.src.cola2api.cola2_interface import send_empty_service, get_ros_param, run_async
+from iquaview.src.utils.workerthread import FutureWatcher
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +36,7 @@ class TimeoutWidget(QWidget, Ui_Timeout):
         self.vehicle_data = vehicle_data
 
         self.timeout_warning.connect(self.show_warning)
+        self.service_watcher = FutureWatcher(self)
 
         self.timer = QTimer()
         self.timer.timeout.connect(self.refresh_timeout)
@@ -88,8 +90,17 @@ class TimeoutWidget(QWidget, Ui_Timeout):
             self.timeout_label.setText(str(self.time))
 
     def set_timeout(self):
-        self.timeout = (get_ros_param(self.vehicle_info.get_vehicle_ip(), 9091,
-                                 self.vehicle_info.get_vehicle_namespace()+'/safety/timeout')['value'])
+        """ Read the timeout param without blocking"""
+        future = run_async(get_ros_param, self.vehicle_info.get_vehicle_ip(), 9091,
+                           self.vehicle_info.get_vehicle_namespace()+'/safety/timeout')
+        self.service_watcher.watch(future, self.timeout_received)
+
+    def timeout_received(self, future):
+        """ Set the timeout read by set_timeout"""
+        try:
+            self.timeout = future.result()['value']
+        except (OSError, KeyError) as e:
+            logger.error("The timeout could not be read: {}".format(e))
 
     def show_warning(self):
         logger.warning( "Less than {} seconds for timeout expiration. You might want to restart it.".format(str(self.time)))
@@ -110,17 +121,35 @@ class TimeoutWidget(QWidget, Ui_Timeout):
         self.timer_on = False
 
     def reset_timeout(self):
-        """ Send service that reset timeout"""
+        """
+        Send service that reset timeout
+
+        :return: future of the service call, None if it was not sent
+        """
         if self.connected:
             reset_timeout = self.vehicle_data.get_reset_timeout_service()
             if reset_timeout is not None:
-                send_empty_service(self.vehicle_info.get_vehicle_ip(), 9091,
+                future = run_async(send_empty_service, self.vehicle_info.get_vehicle_ip(), 9091,
                                    self.vehicle_info.get_vehicle_namespace()+reset_timeout)
-                self.set_timeout()
-                logger.info("Reset timeout")
+                return self.service_watcher.watch(future, self.reset_timeout_done)
             else:
                 logger.error("The service 'Reset Timeout' could not be sent.")
                 QMessageBox.critical(self,
                                      "Reset timeout error",
                                      "The service 'Reset Timeout' could not be sent.",
-                                     QMessageBox.Close)
\ No newline at end of file
+                                     QMessageBox.Close)
+        return None
+
+    def reset_timeout_done(self, future):
+        """ Read the new timeout once the reset timeout service is done"""
+        try:
+            future.result()
+        except Exception as e:
+            logger.error("Reset timeout failed: {}".format(e))
+            QMessageBox.critical(self,
+                                 "Reset timeout error",
+                                 "Connection with COLA2 failed: {}".format(e),
+                                 QMessageBox.Close)
+            return
+        self.set_timeout()
+        logger.info("Reset timeout")
@@ -17,16 +17,25 @@ If not, see <http://www.gnu.org/licenses/>.
  Class to subscribe to topics
 """
 import logging
-from PyQt5.QtCore import pyqtSignal, QObject, QTimer
+import threading
+from PyQt5.QtCore import pyqtSignal, QObject, QTimer, Qt
 from PyQt5.QtWidgets import QMessageBox
-from iquaview.src.cola2api.cola2_interface import SubscribeToTopic
+from iquaview.src.cola2api.cola2_interface import RosbridgeConnection
+from iquaview.src.vehicle.telemetryrecorder import TelemetryRecorder
 from iquaview.src.xmlconfighandler.vehicledatahandler import VehicleDataHandler
 
 logger = logging.getLogger(__name__)
 
+# minimum time between two refreshes of the current data, one frame at 60 Hz
+REFRESH_INTERVAL_MS = 16
+
 
 class VehicleData(QObject):
     state_signal = pyqtSignal()
+    # emitted with the topic key every time its current data is refreshed
+    topic_updated = pyqtSignal(str)
+    # emitted from the reactor thread when a refresh is needed
+    data_received = pyqtSignal()
 
     def __init__(self, config, vehicle_info):
         super(VehicleData, self).__init__()
@@ -37,12 +46,21 @@ class VehicleData(QObject):
         self.subscribed = False
         self.state = None
 
+        # keys of the topics received since the last refresh
+        self.pending_keys = set()
+        self.pending_lock = threading.Lock()
         self.timer = QTimer()
-        self.timer.timeout.connect(self.refresh_data)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(REFRESH_INTERVAL_MS)
+        self.timer.timeout.connect(self.refresh_pending_data)
+        self.data_received.connect(self.schedule_refresh, Qt.QueuedConnection)
 
+        self.connection = None
+        self.recorder = None
         self.topics = dict()
         self.current_data = dict()
 
+        self.topic_options = dict()
         self.topic_names = self.read_xml_topics()
         #read services from xml
         self.services = self.read_xml_services()
@@ -64,6 +82,7 @@ class VehicleData(QObject):
 
         for topic in xml_vehicle_data_topics:
             topic_names[topic.get('id')] = topic.text
+            self.topic_options[topic.get('id')] = vd_handler.read_topic_options(topic)
 
         topic_names['rosout'] = '/rosout_agg'
 
@@ -109,32 +128,48 @@ class VehicleData(QObject):
 
         return launch_list
 
-    def subscribe_topics(self):
+    def subscribe_topics(self, connection=None):
 
         """
         Subscribe topics
+
+        :param connection: source of the topics, a RosbridgeConnection to the vehicle is opened if None
+                           (i.e. a TelemetryReplay to drive the interface from recorded telemetry)
         """
 
         ip = self.vehicle_info.get_vehicle_ip()
         port = 9091
         vehicle_namespace = self.vehicle_info.get_vehicle_namespace()
         try:
+            if connection is None:
+                # all topics share a single rosbridge connection
+                self.connection = RosbridgeConnection(ip, port)
+                self.start_recorder()
+            else:
+                self.connection = connection
             for key, value in self.topic_names.items():
+                options = self.topic_options.get(key, dict())
                 if key == 'rosout':
-                    self.topics[key] = SubscribeToTopic(ip, port, value, 30, True)
+                    self.topics[key] = self.connection.subscribe(
+                        value, 30, True, buffer_capacity=int(self.config.csettings['rosout_buffer_capacity']))
                 elif key == 'thruster setpoints':
                     self.topics[key] = None
                 elif 'usage' in key:
-                    self.topics[key] = SubscribeToTopic(ip, port, vehicle_namespace+value, 10)
+                    self.topics[key] = self.connection.subscribe(vehicle_namespace+value, 10, **options)
                 else:
-                    self.topics[key] = SubscribeToTopic(ip, port, vehicle_namespace+value)
+                    self.topics[key] = self.connection.subscribe(vehicle_namespace+value, **options)
 
-            self.subscribed = True
+                if self.topics[key] is not None:
+                    self.topics[key].set_callback(self.make_callback(key))
 
-            self.timer.start(1000)
+            self.subscribed = True
 
         except:
             logger.error("Connection with COLA2 could not be established")
+            self.stop_recorder()
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
             QMessageBox.critical(self.parent(),
                                  "Connection with AUV Failed",
                                  "Connection with COLA2 could not be established",
@@ -142,6 +177,30 @@ class VehicleData(QObject):
             self.state_signal.emit()
             self.subscribed = False
 
+    def start_recorder(self):
+        """
+        Record the messages of all subscribed topics if enabled in the settings
+        """
+        if not self.config.csettings.get('telemetry_recording', False):
+            return
+        try:
+            max_file_size = int(float(self.config.csettings['telemetry_max_file_size_mb']) * 1024 * 1024)
+            self.recorder = TelemetryRecorder(self.config.csettings['telemetry_path'], max_file_size=max_file_size)
+            self.connection.set_message_listener(self.recorder.record)
+        except OSError as e:
+            logger.error("Telemetry recording could not be started: {}".format(e))
+            self.recorder = None
+
+    def stop_recorder(self):
+        """
+        Stop recording and write the pending messages
+        """
+        if self.recorder is not None:
+            if self.connection is not None:
+                self.connection.set_message_listener(None)
+            self.recorder.close()
+            self.recorder = None
+
     def unsubscribe_topic(self, key):
         """
         Unsubscribe topic with key key
@@ -155,13 +214,12 @@ class VehicleData(QObject):
         Subscribe topic with key key
         :param key: the key of the topic in the xml
         """
-        ip = self.vehicle_info.get_vehicle_ip()
-        port = 9091
         vehicle_namespace = self.vehicle_info.get_vehicle_namespace()
         value = self.topic_names[key]
         if self.topics[key] is not None:
             self.topics[key].close()
-        self.topics[key] = SubscribeToTopic(ip, port, vehicle_namespace+value)
+        self.topics[key] = self.connection.subscribe(vehicle_namespace+value, **self.topic_options.get(key, dict()))
+        self.topics[key].set_callback(self.make_callback(key))
 
     def is_subscribed_to_topic(self, key):
         """
@@ -174,17 +232,51 @@ class VehicleData(QObject):
         else:
             return False
 
-    def refresh_data(self):
+    def make_callback(self, key):
         """
-        start timer and refresh data
+        Create the function called from the reactor thread when the topic with key 'key' changes.
 
+        :param key: the key of the topic in the xml
+        :return: the callback for the topic subscription
+        """
+        def callback(subscription):
+            with self.pending_lock:
+                first = not self.pending_keys
+                self.pending_keys.add(key)
+            # only the first change of a burst crosses to the GUI thread
+            if first:
+                self.data_received.emit()
+
+        return callback
+
+    def schedule_refresh(self):
+        """ Refresh the pending topics on the next frame."""
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def refresh_pending_data(self):
+        """ Refresh the topics that changed since the last refresh and notify them."""
+        with self.pending_lock:
+            keys = self.pending_keys
+            self.pending_keys = set()
+        self.refresh_data(keys)
+        if self.subscribed:
+            for key in keys:
+                self.topic_updated.emit(key)
+
+    def refresh_data(self, keys=None):
+        """
+        Refresh current data from the topic subscriptions
+
+        :param keys: keys of the topics to refresh, all topics if None
         """
         if self.subscribed:
-            for key, value in self.topics.items():
+            if keys is None:
+                keys = list(self.topics.keys())
+            for key in keys:
+                value = self.topics.get(key)
                 if key == 'rosout':
-                    buffer = value.get_buffer()
-                    self.set_buffer(key, buffer)
-                    value.clear_buffer()
+                    self.set_buffer(key, value.drain_buffer())
 
                 else:
                     if value is not None:
@@ -368,6 +460,16 @@ class VehicleData(QObject):
 
         return self.current_data['rosout']
 
+    def get_rosout_stats(self):
+        """
+        Get the counters of the rosout buffer
+
+        :return: dictionary with pushed, dropped, delivered and pending messages, None if not subscribed
+        """
+        if self.topics.get('rosout') is None:
+            return None
+        return self.topics['rosout'].get_buffer_stats()
+
     def get_calibrate_magnetometer_service(self):
         """ Get calibrate magnetometer service"""
         if self.services is None:
@@ -518,4 +620,11 @@ class VehicleData(QObject):
             if subscriber is not None:
                 subscriber.close()
 
+        self.stop_recorder()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
         self.timer.stop()
+        with self.pending_lock:
+            self.pending_keys.clear()
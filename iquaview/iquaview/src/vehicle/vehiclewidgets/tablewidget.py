@@ -18,7 +18,7 @@ If not, see <http://www.gnu.org/licenses/>.
 """
 
 from PyQt5.QtWidgets import QWidget, QHeaderView
-from PyQt5.QtCore import Qt, pyqtSignal, QTimer
+from PyQt5.QtCore import Qt, pyqtSignal
 from iquaview.src.ui.ui_table_widget import Ui_Table
 import numpy as np
 
@@ -39,18 +39,24 @@ class TablePoseWidget(QWidget, Ui_Table):
         self.port = 9091
         self.connected = False
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.refresh)
-
         self.data = None
         self.desired_pose_data = None
         self.desired_twist_data = None
         self.update_table_signal.connect(self.update_table)
 
     def connect(self):
-        """ set connected state to true and start timer"""
+        """ set connected state to true and listen to topic updates"""
         self.connected = True
-        self.timer.start(1000)
+        self.vehicle_data.topic_updated.connect(self.topic_updated)
+
+    def topic_updated(self, key):
+        """
+        Update the table when a pose topic is refreshed.
+
+        :param key: key of the updated topic
+        """
+        if key in ('navigation status', 'merged world waypoint req', 'merged body velocity req'):
+            self.refresh()
 
     def refresh(self):
         """ send signal to update table"""
@@ -203,4 +209,8 @@ class TablePoseWidget(QWidget, Ui_Table):
     def disconnect(self):
         self.connected = False
 
-        self.timer.stop()
+        try:
+            self.vehicle_data.topic_updated.disconnect(self.topic_updated)
+        except TypeError:
+            # not connected
+            pass
@@ -23,7 +23,7 @@ import matplotlib
 
 from PyQt5 import QtCore
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtCore import QTimer, pyqtSignal
+from PyQt5.QtCore import pyqtSignal
 
 from iquaview.src.vehicle.vehiclewidgets import (compasswidget,
                                                  rollpitchwidget,
@@ -49,10 +49,9 @@ class VehicleWidgets(QWidget, Ui_VehicleWidgets):
     def __init__(self, vehicle_info, vehicledata, parent=None):
         super(VehicleWidgets, self).__init__(parent)
         self.setupUi(self)
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.start_timer)
 
         self.table = None
+        self.connected = False
 
         self.setAttribute(QtCore.Qt.WA_DeleteOnClose)
         self.vehicle_info = vehicle_info
@@ -137,14 +136,30 @@ class VehicleWidgets(QWidget, Ui_VehicleWidgets):
 
     def start_updating_data(self):
         self.table.connect()
-        self.timer.start(1000)
-
-    def start_timer(self):
-        if self.connected:
-            self.refresh_signal.emit()
+        self.vehicle_data.topic_updated.connect(self.topic_updated)
+
+    def topic_updated(self, key):
+        """
+        Refresh the widgets showing the topic with key 'key'.
+
+        :param key: key of the updated topic
+        """
+        if not self.connected:
+            return
+        if key == 'navigation status':
+            self.refresh_navigation()
+        elif key in ('vehicle status', 'cpu usage', 'ram usage'):
+            self.refresh_resources()
+        elif key == 'thruster setpoints':
+            self.refresh_setpoints()
 
     def refresh(self):
+        self.refresh_navigation()
+        self.refresh_resources()
+        self.refresh_setpoints()
 
+    def refresh_navigation(self):
+        """ Refresh compass, roll/pitch, velocimeter and depth/altitude widgets."""
         data = self.vehicle_data.get_nav_sts()
         if data is not None and data['valid_data'] == 'new_data':
             self.depthaltitudecanvas.set_data(data)
@@ -152,13 +167,14 @@ class VehicleWidgets(QWidget, Ui_VehicleWidgets):
             self.rollpitch.set_data(data)
             self.velocimeter.set_data(data)
 
+    def refresh_resources(self):
+        """ Refresh resources usage and subscribe to thruster setpoints while thrusters are enabled."""
         battery_charge = self.vehicle_data.get_battery_charge()
         cpu_usage = self.vehicle_data.get_cpu_usage()
         ram_usage = self.vehicle_data.get_ram_usage()
         self.resourcesusage.set_data(battery_charge, cpu_usage, ram_usage)
 
         thrusters_enabled = self.vehicle_data.get_thrusters_status()
-        thruster_setpoints = self.vehicle_data.get_thruster_setpoints()
 
         if (not thrusters_enabled) and self.vehicle_data.is_subscribed_to_topic('thruster setpoints'):
             self.vehicle_data.unsubscribe_topic('thruster setpoints')
@@ -167,6 +183,9 @@ class VehicleWidgets(QWidget, Ui_VehicleWidgets):
         if thrusters_enabled and (not self.vehicle_data.is_subscribed_to_topic('thruster setpoints')):
             self.vehicle_data.subscribe_topic('thruster setpoints')
 
+    def refresh_setpoints(self):
+        """ Refresh thruster setpoints widget."""
+        thruster_setpoints = self.vehicle_data.get_thruster_setpoints()
         if thruster_setpoints is not None and thruster_setpoints['valid_data'] == 'new_data':
             self.setpoints.set_data(thruster_setpoints)
 
@@ -176,7 +195,10 @@ class VehicleWidgets(QWidget, Ui_VehicleWidgets):
             self.layout.itemAt(i).widget().setParent(None)
         # disconnect
         self.connected = False
-        # close thread and timer
-        self.timer.stop()
+        try:
+            self.vehicle_data.topic_updated.disconnect(self.topic_updated)
+        except TypeError:
+            # not connected
+            pass
         if self.table:
             self.table.disconnect()
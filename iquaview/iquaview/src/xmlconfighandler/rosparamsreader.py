@@ -17,12 +17,16 @@ If not, see <http://www.gnu.org/licenses/>.
  Helper classes to read the xml structure associated to the ros_params tag in the AUV config file
 """
 
+import json
 import logging
 from iquaview.src.xmlconfighandler.xmlconfigparser import XMLConfigParser
 from iquaview.src.cola2api import cola2_interface
 
 logger = logging.getLogger(__name__)
 
+# maximum number of param requests sent without a response when reading them one by one
+MAX_IN_FLIGHT = 16
+
 
 class Field(object):
     def __init__(self, field_name=None, field_type=None):
@@ -131,7 +135,13 @@ class RosParamsReader(object):
         self.port = port
         self.vehicle_namespace = vehicle_namespace
 
-    def read_configuration(self):
+    def read_configuration(self, progress=None):
+        """
+        Read the sections of the ros_params XML and their values in the param server
+
+        :param progress: function called with the number of params read and the total while reading them
+        :return: list of sections
+        """
         logger.debug("Reading  ros_params XML...")
         config_parser = XMLConfigParser(self.filename)
         # get ros_params
@@ -142,7 +152,7 @@ class RosParamsReader(object):
         # initialize empty list of sections
         section_list = list()
 
-        # fill section values by reading xml and corresponding param values in the param server
+        # fill section values by reading xml
         for section in sections:
             sect = Section()
             logger.debug("section.tag")
@@ -169,12 +179,8 @@ class RosParamsReader(object):
                         f_size = config_parser.first_match(field_array, "field_array_size").text
                         param.set_field_array(f_name, f_type, f_size)
 
-                    p_value = cola2_interface.get_ros_param(self.ip, self.port,
-                                                            self.vehicle_namespace + f_name)['value']
-                    param.set_value(p_value)
                     logger.debug("         {}".format(desc))
                     logger.debug("         {}".format(f_name))
-                    logger.debug("         {}".format(p_value))
                     logger.debug("         {}".format(f_type))
 
                     sect.add_param(param)
@@ -184,4 +190,87 @@ class RosParamsReader(object):
                     sect.set_action_id(value.text)
 
             section_list.append(sect)
+
+        # corresponding param values in the param server
+        params = [param for sect in section_list for param in sect.get_params()]
+        values = self.read_params([self.vehicle_namespace + param.get_name() for param in params], progress)
+        for param in params:
+            param.set_value(values[self.vehicle_namespace + param.get_name()])
+            logger.debug("         {} {}".format(param.get_name(), param.get_value()))
         return section_list
+
+    def read_params(self, names, progress=None):
+        """
+        Read the values of several params from the param server.
+
+        The namespace common to all the params is fetched with a single request and the
+        values are taken from it. Params not found there are read with requests
+        pipelined over one connection, at most MAX_IN_FLIGHT at a time.
+
+        :param names: list of full param names
+        :param progress: function called with the number of params read and the total
+        :return: dictionary with the value of each param as returned by rosapi
+        """
+        values = dict()
+        namespace = common_namespace(names)
+        if namespace:
+            try:
+                subtree = json.loads(cola2_interface.get_ros_param(self.ip, self.port, namespace)['value'])
+                for name in names:
+                    value = find_in_subtree(subtree, name[len(namespace):])
+                    if value is not None:
+                        values[name] = json.dumps(value)
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning("Params under {} could not be read at once: {}".format(namespace, e))
+        if progress is not None:
+            progress(len(values), len(names))
+
+        missing = [name for name in names if name not in values]
+        if missing:
+            logger.debug("Reading {} params one by one".format(len(missing)))
+        for i in range(0, len(missing), MAX_IN_FLIGHT):
+            batch = missing[i:i + MAX_IN_FLIGHT]
+            responses = cola2_interface.call_services(self.ip, self.port,
+                                                      [("/rosapi/get_param", {"name": name}) for name in batch])
+            for name, response in zip(batch, responses):
+                if response is None:
+                    raise ConnectionError("No response reading param {}".format(name))
+                values[name] = response['values']['value']
+            if progress is not None:
+                progress(len(values), len(names))
+        return values
+
+
+def common_namespace(names):
+    """
+    Return the deepest namespace containing all the params.
+
+    :param names: list of full param names
+    :return: namespace without the trailing slash, empty string if it is the root namespace
+    """
+    if not names:
+        return ""
+    common = names[0].split('/')[:-1]
+    for name in names[1:]:
+        parts = name.split('/')[:-1]
+        n = 0
+        while n < len(common) and n < len(parts) and common[n] == parts[n]:
+            n += 1
+        common = common[:n]
+    return '/'.join(common)
+
+
+def find_in_subtree(subtree, relative_name):
+    """
+    Find the value of a param in the dictionary of a namespace.
+
+    :param subtree: dictionary returned by the param server for the namespace
+    :param relative_name: name of the param relative to the namespace, starting with '/'
+    :return: the value, None if not found
+    """
+    value = subtree
+    for key in relative_name.strip('/').split('/'):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
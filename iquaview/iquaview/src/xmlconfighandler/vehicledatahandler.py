@@ -31,6 +31,26 @@ class VehicleDataHandler(object):
 
         return xml_vehicle_data_topics
 
+    @staticmethod
+    def read_topic_options(xml_topic):
+        """
+        Read the optional subscription attributes of a vehicle data topic.
+
+        <topic id="cpu usage" throttle_rate="1000" queue_length="1" fields="data">/computer_logger/cpu_usage</topic>
+
+        :param xml_topic: topic element of the vehicle_data_topics section
+        :return: dictionary with the attributes found, ready to pass to RosbridgeConnection.subscribe
+        """
+        options = dict()
+        for name in ('throttle_rate', 'queue_length', 'fragment_size'):
+            value = xml_topic.get(name)
+            if value is not None:
+                options[name] = int(value)
+        fields = xml_topic.get('fields')
+        if fields:
+            options['fields'] = [field.strip() for field in fields.split(',') if field.strip()]
+        return options
+
     def read_services(self):
         # get Vehicle Data services
         xml_vehicle_data_services = self.configParser.first_match(self.configParser.root, "vehicle_data_services")
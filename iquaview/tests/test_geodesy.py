@@ -0,0 +1,93 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import sys
+import os
+import unittest
+
+import numpy as np
+
+srcpath = os.path.dirname(os.path.realpath(sys.argv[0]))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+from iquaview.src.utils import geodesy
+
+# Flinders Peak to Buninyong, the worked example of Vincenty's formulae
+FLINDERS_PEAK = (144.42486788888888, -37.95103341666667)
+BUNINYONG = (143.92649552777777, -37.65282113888889)
+FLINDERS_DISTANCE = 54972.271
+FLINDERS_BEARING = 306 + 52 / 60.0 + 5.37 / 3600.0
+BUNINYONG_REVERSE_BEARING = 127 + 10 / 60.0 + 25.07 / 3600.0
+
+
+class TestGeodesy(unittest.TestCase):
+
+    def test_inverse(self):
+        dist, initial, final, converged = geodesy.inverse(*(FLINDERS_PEAK + BUNINYONG))
+        self.assertTrue(converged)
+        self.assertAlmostEqual(float(dist), FLINDERS_DISTANCE, places=3)
+        self.assertAlmostEqual(float(initial) % 360, FLINDERS_BEARING, places=5)
+        self.assertAlmostEqual((float(final) + 180) % 360, BUNINYONG_REVERSE_BEARING, places=5)
+
+    def test_endpoint_ellipsoid(self):
+        lon, lat = geodesy.endpoint_ellipsoid(FLINDERS_PEAK[0], FLINDERS_PEAK[1], FLINDERS_DISTANCE,
+                                              FLINDERS_BEARING)
+        self.assertEqual(np.shape(lon), ())
+        self.assertAlmostEqual(float(lon), BUNINYONG[0], places=7)
+        self.assertAlmostEqual(float(lat), BUNINYONG[1], places=7)
+
+    def test_round_trip(self):
+        rng = np.random.RandomState(1)
+        lon = rng.uniform(-180, 180, 1000)
+        lat = rng.uniform(-80, 80, 1000)
+        dist = rng.uniform(0, 1e6, 1000)
+        angle = rng.uniform(-180, 180, 1000)
+        end_lon, end_lat = geodesy.endpoint_ellipsoid(lon, lat, dist, angle)
+        inverse_dist, inverse_angle, _, converged = geodesy.inverse(lon, lat, end_lon, end_lat)
+        self.assertTrue(converged.all())
+        np.testing.assert_allclose(inverse_dist, dist, atol=1e-3)
+        moved = dist > 1
+        np.testing.assert_allclose((inverse_angle - angle + 180)[moved] % 360 - 180, 0, atol=1e-6)
+
+    def test_zero_distance(self):
+        lon, lat = geodesy.endpoint_ellipsoid([3.0, 3.0], [41.0, 41.0], 0.0, [0.0, 90.0])
+        np.testing.assert_allclose(lon, 3.0)
+        np.testing.assert_allclose(lat, 41.0)
+        dist, _, _, converged = geodesy.inverse(3.0, 41.0, 3.0, 41.0)
+        self.assertEqual(float(dist), 0.0)
+        self.assertTrue(converged)
+
+    def test_sphere(self):
+        dist = geodesy.distance(0.0, 0.0, [0.0, 1.0], [1.0, 0.0])
+        np.testing.assert_allclose(dist[1], 2 * np.pi * geodesy.SEMI_MAJOR_AXIS / 360)
+        np.testing.assert_allclose(geodesy.bearing(0.0, 0.0, [0.0, 1.0], [1.0, 0.0]), [0.0, 90.0])
+        lon, lat = geodesy.endpoint(0.0, 0.0, dist, [0.0, 90.0])
+        np.testing.assert_allclose(lon, [0.0, 1.0], atol=1e-6)
+        np.testing.assert_allclose(lat, [1.0, 0.0], atol=1e-2)
+
+    def test_traverse(self):
+        distances = [1000.0, 2000.0, 500.0]
+        bearings = [10.0, 100.0, -45.0]
+        lons, lats = geodesy.traverse(3.0, 41.0, distances, bearings)
+        lon, lat = 3.0, 41.0
+        for i in range(3):
+            lon, lat = geodesy.endpoint(lon, lat, distances[i], bearings[i])
+            self.assertAlmostEqual(lons[i], float(lon), places=10)
+            self.assertAlmostEqual(lats[i], float(lat), places=10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+import sys
+import os
+import unittest
+from unittest import mock
+
+srcpath = os.path.dirname(os.path.realpath(sys.argv[0]))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+from iquaview.src.cola2api import gps_driver
+from iquaview.src.cola2api.gps_driver import GpsDriver, interpolate_heading
+
+
+def gga(latitude):
+    return {"time": "", "latitude": latitude, "longitude": 3.0, "quality": 4, "satellites": 12, "hdop": 0.8,
+            "altitude": 0.0}
+
+
+class TestGpsDriver(unittest.TestCase):
+
+    def test_interpolate_heading(self):
+        self.assertAlmostEqual(interpolate_heading(0.0, 10.0, 1.0, 20.0, 0.5), 15.0)
+        self.assertAlmostEqual(interpolate_heading(0.0, 350.0, 1.0, 10.0, 0.75), 5.0)
+        self.assertAlmostEqual(interpolate_heading(0.0, 10.0, 1.0, 350.0, 0.5), 0.0)
+
+    def test_fix_queue(self):
+        gps = GpsDriver(ip_addr='127.0.0.1')
+        with mock.patch.object(gps_driver.time, 'time') as now:
+            # 10 Hz position, 20 Hz heading turning 1 degree per heading
+            for step in range(20):
+                now.return_value = 100.0 + step * 0.05 + 0.01
+                gps.update('HDT', {"heading": float(step)})
+                if step % 2 == 0:
+                    now.return_value = 100.0 + step * 0.05 + 0.035
+                    gps.update('GGA', gga(41.0 + step))
+            fixes = gps.drain_fixes()
+            self.assertEqual(len(fixes), 10)
+            self.assertEqual([fix['latitude'] for fix in fixes], [41.0 + step for step in range(0, 20, 2)])
+            for step, fix in zip(range(0, 20, 2), fixes):
+                self.assertAlmostEqual(fix['heading'], step + 0.5)
+
+            # without a newer heading the fix waits until the heading timeout
+            now.return_value = 101.0
+            gps.update('GGA', gga(60.0))
+            self.assertEqual(gps.drain_fixes(), [])
+            now.return_value = 101.0 + gps_driver.HEADING_WAIT + 0.01
+            fixes = gps.drain_fixes()
+            self.assertEqual(len(fixes), 1)
+            self.assertEqual(fixes[0]['heading'], 19.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+import sys
+import os
+import socket
+import threading
+import unittest
+
+srcpath = os.path.dirname(os.path.realpath(sys.argv[0]))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+from iquaview.src.cola2api.io_reactor import IOReactor, ReconnectBackoff
+
+
+class TestIOReactor(unittest.TestCase):
+
+    def setUp(self):
+        self.reactor = IOReactor()
+        self.reactor.start()
+
+    def tearDown(self):
+        self.reactor.stop()
+
+    def test_reader_and_timers(self):
+        a, b = socket.socketpair()
+        received = list()
+        done = threading.Event()
+
+        def on_readable():
+            received.append(a.recv(100))
+            if b''.join(received) == b'abcdef':
+                done.set()
+
+        self.reactor.add_reader(a, on_readable)
+        b.sendall(b'abc')
+        self.reactor.call_later(0.05, b.sendall, b'def')
+        self.assertTrue(done.wait(2))
+
+        # once removed the callback is not called anymore
+        self.reactor.remove_reader(a)
+        b.sendall(b'ghi')
+        ticks = list()
+        timer = self.reactor.call_every(0.01, ticks.append, 1)
+        fired = threading.Event()
+        self.reactor.call_later(0.1, fired.set)
+        self.assertTrue(fired.wait(2))
+        timer.cancel()
+        self.assertEqual(b''.join(received), b'abcdef')
+        self.assertGreater(len(ticks), 3)
+        a.close()
+        b.close()
+
+    def test_connect_tcp(self):
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(1)
+        results = list()
+        done = threading.Event()
+
+        def connected(sock, error):
+            results.append((sock, error))
+            done.set()
+
+        self.reactor.connect_tcp(server.getsockname(), 2, connected)
+        self.assertTrue(done.wait(3))
+        sock, error = results[0]
+        self.assertIsNone(error)
+        sock.close()
+
+        # nobody listening anymore
+        address = server.getsockname()
+        server.close()
+        done.clear()
+        self.reactor.connect_tcp(address, 2, connected)
+        self.assertTrue(done.wait(3))
+        self.assertIsNone(results[1][0])
+        self.assertIsInstance(results[1][1], OSError)
+
+    def test_backoff(self):
+        backoff = ReconnectBackoff(initial=1.0, maximum=5.0)
+        self.assertEqual([backoff.next_delay() for _ in range(5)], [1.0, 2.0, 4.0, 5.0, 5.0])
+        backoff.reset()
+        self.assertEqual(backoff.next_delay(), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
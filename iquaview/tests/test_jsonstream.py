@@ -0,0 +1,71 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+import sys
+import os
+import json
+import random
+import unittest
+
+srcpath = os.path.dirname(os.path.realpath(sys.argv[0]))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+from iquaview.src.cola2api.json_stream import JsonStreamDecoder
+
+
+class TestJsonStreamDecoder(unittest.TestCase):
+
+    def setUp(self):
+        self.messages = [{"op": "publish", "topic": "/rosout_agg",
+                          "msg": {"msg": "braces {[ and \"quotes\" \\ inside ]}", "level": i, "name": "/nöde"}}
+                         for i in range(50)]
+        self.stream = b''.join(json.dumps(m, ensure_ascii=False).encode() for m in self.messages)
+
+    def test_coalesced(self):
+        decoder = JsonStreamDecoder()
+        self.assertEqual(decoder.feed(self.stream), self.messages)
+        self.assertEqual(decoder.pending(), 0)
+
+    def test_random_splits(self):
+        rng = random.Random(0)
+        for _ in range(20):
+            decoder = JsonStreamDecoder()
+            decoded = list()
+            pos = 0
+            while pos < len(self.stream):
+                end = pos + rng.randint(1, 300)
+                decoded.extend(decoder.feed(self.stream[pos:end]))
+                pos = end
+            self.assertEqual(decoded, self.messages)
+            self.assertEqual(decoder.corrupt, 0)
+
+    def test_byte_by_byte(self):
+        decoder = JsonStreamDecoder()
+        decoded = list()
+        for i in range(len(self.stream)):
+            decoded.extend(decoder.feed(self.stream[i:i + 1]))
+        self.assertEqual(decoded, self.messages)
+
+    def test_corrupt_message(self):
+        decoder = JsonStreamDecoder()
+        decoded = decoder.feed(b'{"a": 1}{"b": tru}\n{"c": 3}')
+        self.assertEqual(decoded, [{"a": 1}, {"c": 3}])
+        self.assertEqual(decoder.corrupt, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
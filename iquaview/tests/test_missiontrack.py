@@ -159,6 +159,26 @@ class TestMissionTrack(unittest.TestCase):
         self.assertEqual(self.mission_track.get_mission_length(), 0)
         self.assertEqual(self.mission_track.mission_layer.geometryType(), QgsWkbTypes.LineGeometry)
 
+    def test_waypoints_cache(self):
+        self.write_temp_mission_xml()
+        self.mission_ctrl.load_mission(self.MISSION_NAME + ".xml")
+        self.mission_track = self.mission_ctrl.mission_list[0]
+
+        waypoints = self.mission_track.find_waypoints_in_mission()
+        misses = self.mission_track.waypoints_misses
+        hits = self.mission_track.waypoints_hits
+        self.assertIs(self.mission_track.find_waypoints_in_mission(), waypoints)
+        self.assertEqual(self.mission_track.get_waypoint_coordinates().shape, (3, 2))
+        self.assertEqual(self.mission_track.waypoints_misses, misses)
+        self.assertEqual(self.mission_track.waypoints_hits, hits + 2)
+
+        point = QgsPointXY(3.002, 40.001)
+        self.mission_track.change_position(1, point)
+        waypoints = self.mission_track.find_waypoints_in_mission()
+        self.assertGreater(self.mission_track.waypoints_misses, misses)
+        self.assertEqual((waypoints[1].x(), waypoints[1].y()), (point.x(), point.y()))
+        self.assertEqual(self.mission_track.get_geometry().asPolyline()[1], point)
+
     def write_temp_mission_xml(self):
         mission = Mission()
         mission_step = MissionStep()
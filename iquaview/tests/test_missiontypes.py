@@ -0,0 +1,252 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import sys
+import os
+import tempfile
+import tracemalloc
+import unittest
+
+srcpath = os.path.dirname(os.path.realpath(sys.argv[0]))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+from iquaview.src.cola2api import mission_types
+from iquaview.src.cola2api.mission_types import (Mission,
+                                                 MissionStep,
+                                                 MissionPosition,
+                                                 MissionWaypoint,
+                                                 MissionSection,
+                                                 MissionPark,
+                                                 MissionTolerance,
+                                                 MissionAction,
+                                                 Parameter,
+                                                 LATITUDE,
+                                                 SECTION_MANEUVER,
+                                                 PARK_MANEUVER)
+
+PARK_STEP = b"""  <mission_step>
+    <maneuver type="park">
+      <position>
+        <latitude>41.777</latitude>
+        <longitude>3.03</longitude>
+        <z>15.0</z>
+        <altitude_mode>True</altitude_mode>
+      </position>
+      <speed>0.5</speed>
+      <time>120.0</time>
+      <tolerance>
+        <x>2.0</x>
+        <y>2.0</y>
+        <z>1.0</z>
+      </tolerance>
+    </maneuver>
+    <actions_list>
+      <action>
+        <action_id>camera/enable</action_id>
+        <parameters>
+          <param>true</param>
+        </parameters>
+      </action>
+    </actions_list>
+  </mission_step>
+"""
+
+
+class TestMissionXml(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, 'mission.xml')
+
+    def tearDown(self):
+        if os.path.exists(self.file_name):
+            os.remove(self.file_name)
+        os.rmdir(self.directory)
+
+    def build_mission(self, steps):
+        mission = Mission()
+        for i in range(steps):
+            step = MissionStep()
+            position = MissionPosition(41.0 + i * 1e-4, 3.0, 5.0, False)
+            if i == 0:
+                step.add_maneuver(MissionWaypoint(position, 0.5, MissionTolerance(2.0, 2.0, 1.0)))
+            else:
+                step.add_maneuver(MissionSection(MissionPosition(41.0 + (i - 1) * 1e-4, 3.0, 5.0, False),
+                                                 position, 0.5, MissionTolerance(2.0, 2.0, 1.0)))
+            mission.add_step(step)
+        park = MissionStep()
+        park.add_maneuver(MissionPark(MissionPosition(41.777, 3.03, 15.0, True), 0.5, 120,
+                                      MissionTolerance(2.0, 2.0, 1.0)))
+        park.add_action(MissionAction("camera/enable", [Parameter("true")]))
+        mission.add_step(park)
+        return mission
+
+    def test_write(self):
+        self.build_mission(0).write_mission(self.file_name)
+        with open(self.file_name, 'rb') as f:
+            self.assertEqual(f.read(), b"<mission>\n" + PARK_STEP + b"</mission>\n")
+
+        Mission().write_mission(self.file_name)
+        with open(self.file_name, 'rb') as f:
+            self.assertEqual(f.read(), b"<mission/>\n")
+
+    def test_round_trip(self):
+        # more steps than a chunk of the writer
+        steps = mission_types.STEPS_PER_CHUNK + 10
+        self.build_mission(steps).write_mission(self.file_name)
+        with open(self.file_name, 'rb') as f:
+            self.assertTrue(f.read().endswith(PARK_STEP + b"</mission>\n"))
+
+        mission = Mission()
+        mission.load_mission(self.file_name)
+        self.assertEqual(mission.get_length(), steps + 1)
+        section = mission.get_step(steps - 1).get_maneuver()
+        self.assertEqual(section.get_initial_position().get_latitude(), 41.0 + (steps - 2) * 1e-4)
+        self.assertEqual(section.get_final_position().get_latitude(), 41.0 + (steps - 1) * 1e-4)
+        park_step = mission.get_step(steps)
+        park = park_step.get_maneuver()
+        self.assertEqual(park.get_maneuver_type(), PARK_MANEUVER)
+        self.assertEqual(park.get_time(), 120.0)
+        self.assertTrue(park.get_position().get_altitude_mode())
+        self.assertEqual(park_step.get_actions()[0].get_action_id(), "camera/enable")
+        self.assertEqual(park_step.get_actions()[0].get_parameters()[0].value, "true")
+
+        # writing the loaded mission gives the same file
+        with open(self.file_name, 'rb') as f:
+            written = f.read()
+        mission.write_mission(self.file_name)
+        with open(self.file_name, 'rb') as f:
+            self.assertEqual(f.read(), written)
+
+    def test_failed_write(self):
+        self.build_mission(3).write_mission(self.file_name)
+        with open(self.file_name, 'rb') as f:
+            written = f.read()
+
+        # a step that can not be serialized stops the writer half way
+        mission = self.build_mission(mission_types.STEPS_PER_CHUNK + 10)
+        mission.get_step(mission.get_length() - 1).add_action(MissionAction("\x00", []))
+        with self.assertRaises(ValueError):
+            mission.write_mission(self.file_name)
+        with open(self.file_name, 'rb') as f:
+            self.assertEqual(f.read(), written)
+        self.assertEqual(os.listdir(self.directory), ['mission.xml'])
+
+
+class TestMissionColumns(unittest.TestCase):
+
+    def build_step(self, latitude):
+        step = MissionStep()
+        step.add_maneuver(MissionWaypoint(MissionPosition(latitude, 3.0, 5.0, False), 0.5,
+                                          MissionTolerance(2.0, 2.0, 1.0)))
+        return step
+
+    def test_edit(self):
+        mission = Mission()
+        mission.add_steps([self.build_step(41.0 + i) for i in range(3)])
+        mission.insert_step(1, self.build_step(50.0))
+        mission.remove_step(0)
+        self.assertEqual(mission.get_column(LATITUDE).tolist(), [50.0, 42.0, 43.0])
+
+        section = MissionStep()
+        section.add_maneuver(MissionSection(mission.get_step(0).get_maneuver().get_position(),
+                                            MissionPosition(60.0, 4.0, 5.0, True), "1.5",
+                                            MissionTolerance("3", 3.0, 1.0)))
+        mission.update_step(1, section)
+        maneuver = mission.get_step(1).get_maneuver()
+        self.assertEqual(maneuver.get_maneuver_type(), SECTION_MANEUVER)
+        self.assertEqual(maneuver.get_initial_position().get_latitude(), 50.0)
+        self.assertTrue(maneuver.get_final_position().get_altitude_mode())
+        self.assertEqual(maneuver.get_speed(), 1.5)
+        self.assertEqual(maneuver.get_tolerance().x, 3.0)
+
+        # views write to the mission, copies are independent
+        duplicate = Mission()
+        duplicate.copy(mission)
+        mission.get_step(2).get_maneuver().get_position().set_lat_lon(70.0, 5.0)
+        self.assertEqual(mission.get_step(2).get_maneuver().position.latitude, 70.0)
+        self.assertEqual(duplicate.get_step(2).get_maneuver().position.latitude, 43.0)
+        version = mission.get_version()
+        duplicate.get_step(0).add_action(MissionAction("camera/enable"))
+        self.assertFalse(mission.get_step(0).has_actions())
+        self.assertEqual(mission.get_version(), version)
+        self.assertIsNone(mission.get_step(3))
+
+        # a view of a removed step does not read the rows left past the end
+        last = mission.get_step(2).get_maneuver()
+        mission.remove_step(2)
+        with self.assertRaises(IndexError):
+            last.get_position().get_latitude()
+        with self.assertRaises(IndexError):
+            last.set_speed(1.0)
+
+        # columns are read-only, changes go through the steps
+        with self.assertRaises(ValueError):
+            mission.get_column(LATITUDE)[0] = 0.0
+        with self.assertRaises(ValueError):
+            mission.get_maneuver_types()[0] = PARK_MANEUVER
+
+        # inserted steps do not share their actions with the source step
+        step = self.build_step(45.0)
+        step.add_action(MissionAction("camera/enable"))
+        mission.add_step(step)
+        step.add_action(MissionAction("camera/disable"))
+        self.assertEqual(len(mission.get_step(mission.get_length() - 1).get_actions()), 1)
+
+    def test_version(self):
+        mission = Mission()
+        changes = [lambda: mission.add_step(self.build_step(41.0)),
+                   lambda: mission.get_step(0).get_maneuver().get_position().set_lat_lon(42.0, 3.0),
+                   lambda: setattr(mission.get_step(0).get_maneuver().get_tolerance(), 'x', 4.0),
+                   lambda: mission.get_step(0).add_action(MissionAction("camera/enable")),
+                   lambda: mission.remove_step(0)]
+        for change in changes:
+            version = mission.get_version()
+            change()
+            self.assertGreater(mission.get_version(), version)
+
+        # reading does not change the version, copies get a new one
+        mission.add_step(self.build_step(41.0))
+        version = mission.get_version()
+        mission.get_step(0).get_maneuver().get_position().get_latitude()
+        self.assertEqual(mission.get_version(), version)
+        duplicate = Mission()
+        duplicate.copy(mission)
+        self.assertGreater(duplicate.get_version(), version)
+
+    def test_memory(self):
+        directory = tempfile.mkdtemp()
+        file_name = os.path.join(directory, 'mission.xml')
+        steps = 5000
+        mission = Mission()
+        mission.add_steps([self.build_step(41.0 + i * 1e-4) for i in range(steps)])
+        mission.write_mission(file_name)
+
+        tracemalloc.start()
+        loaded = Mission()
+        loaded.load_mission(file_name)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        os.remove(file_name)
+        os.rmdir(directory)
+
+        self.assertEqual(loaded.get_length(), steps)
+        # 13 float64 values, the maneuver type and the pointer to the actions
+        self.assertLess(size / steps, 150)
+
+
+if __name__ == '__main__':
+    unittest.main()
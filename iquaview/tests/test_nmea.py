@@ -0,0 +1,61 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+import sys
+import os
+import unittest
+
+srcpath = os.path.dirname(os.path.realpath(sys.argv[0]))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+from iquaview.src.cola2api.nmea import NmeaParser, nmea_checksum
+
+GGA = b'$GPGGA,082051.800,3840.3358,N,00908.4963,W,1,9,0.86,2.2,M,50.7,M,,*46\r\n'
+HDT = b'$HEHDT,123.45,T*1E\r\n'
+
+
+class TestNmeaParser(unittest.TestCase):
+
+    def test_checksum(self):
+        self.assertEqual(nmea_checksum(b'GPGGA,082051.800,3840.3358,N,00908.4963,W,1,9,0.86,2.2,M,50.7,M,,'),
+                         0x46)
+        self.assertEqual(nmea_checksum(b''), 0)
+
+    def test_chunk_boundaries(self):
+        parser = NmeaParser()
+        sentences = list()
+        for i in range(len(GGA + HDT)):
+            sentences.extend(parser.feed((GGA + HDT)[i:i + 1]))
+        self.assertEqual([s[0] for s in sentences], ['GGA', 'HDT'])
+        gga = sentences[0][1]
+        self.assertAlmostEqual(gga['latitude'], 38.672263, 5)
+        self.assertAlmostEqual(gga['longitude'], -9.141605, 5)
+        self.assertEqual(gga['quality'], 1)
+        self.assertEqual(sentences[1][1]['heading'], 123.45)
+
+    def test_invalid_sentences(self):
+        parser = NmeaParser()
+        sentences = parser.feed(GGA.replace(b'*46', b'*47') + b'$GPGGA,082051.800,,,,,0*xx\r\n' +
+                                b'$PSXN,20,1,0,0,1*3B\r\n' + HDT)
+        self.assertEqual([s[0] for s in sentences], ['HDT'])
+        stats = parser.get_stats()
+        self.assertEqual(stats['bad_checksum'], 2)
+        self.assertEqual(stats['unsupported'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
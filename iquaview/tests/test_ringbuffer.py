@@ -0,0 +1,53 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+import sys
+import os
+import unittest
+
+srcpath = os.path.dirname(os.path.realpath(sys.argv[0]))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+from iquaview.src.cola2api.ring_buffer import RingBuffer
+
+
+class TestRingBuffer(unittest.TestCase):
+
+    def test_overflow(self):
+        buffer = RingBuffer(5)
+        for i in range(8):
+            buffer.push(i)
+        self.assertEqual(list(buffer.drain()), [3, 4, 5, 6, 7])
+        stats = buffer.get_stats()
+        self.assertEqual(stats['pushed'], 8)
+        self.assertEqual(stats['dropped'], 3)
+        self.assertEqual(stats['delivered'], 5)
+        self.assertEqual(stats['pending'], 0)
+
+    def test_partial_drain(self):
+        buffer = RingBuffer(10)
+        for i in range(6):
+            buffer.push(i)
+        self.assertEqual(list(buffer.drain(4)), [0, 1, 2, 3])
+        self.assertEqual(buffer.snapshot(), [4, 5])
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(list(buffer.drain()), [4, 5])
+        self.assertEqual(buffer.get_stats()['delivered'], 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+import sys
+import os
+import time
+import unittest
+
+srcpath = os.path.dirname(os.path.realpath(sys.argv[0]))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+from iquaview.src.cola2api import cola2_interface
+from iquaview.src.cola2api.cola2_interface import RosbridgeConnection
+from iquaview.src.cola2api.rosbridgesimulator import RosbridgeSimulator
+
+
+class TestRosbridgeSimulator(unittest.TestCase):
+
+    def setUp(self):
+        config_file = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                   '../iquaview/auv_configs/sparus2_configuration.xml')
+        self.simulator = RosbridgeSimulator(config_file, port=0, rates={'navigation status': 50}, split=16)
+        self.connection = RosbridgeConnection('127.0.0.1', self.simulator.start())
+
+    def tearDown(self):
+        self.connection.close()
+        self.simulator.stop()
+
+    def test_params(self):
+        name = '/sparus2/safety/timeout'
+        response = self.connection.call_service('/rosapi/get_param', {'name': name})
+        self.assertEqual(response['values']['value'], '0.0')
+        self.connection.call_service('/rosapi/set_param', {'name': name, 'value': '3600'})
+        response = self.connection.call_service('/rosapi/get_param', {'name': name})
+        self.assertEqual(response['values']['value'], '3600')
+
+    def test_fragmented_topic(self):
+        subscription = self.connection.subscribe('/sparus2/navigator/navigation_throttle', fragment_size=100)
+        deadline = time.time() + 2
+        while subscription.get_data().get('valid_data') != 'new_data' and time.time() < deadline:
+            time.sleep(0.01)
+        data = subscription.get_data()
+        self.assertEqual(data['valid_data'], 'new_data')
+        self.assertIn('north', data['position'])
+
+    def test_pooled_service_calls(self):
+        port = self.simulator.port
+        names = sorted(self.simulator.params)
+        responses = cola2_interface.call_services('127.0.0.1', port, [('/rosapi/get_param', {'name': name})
+                                                                      for name in names])
+        self.assertEqual(len(responses), len(names))
+        self.assertTrue(all(response is not None and response['result'] for response in responses))
+        connection = cola2_interface.service_connection_pool.get_connection('127.0.0.1', port)
+        self.assertTrue(cola2_interface.send_empty_service('127.0.0.1', port, '/controller/enable_thrusters'))
+        self.assertIs(cola2_interface.service_connection_pool.get_connection('127.0.0.1', port), connection)
+        cola2_interface.close_service_connections()
+        self.assertFalse(connection.get_keepgoing())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+import sys
+import os
+import unittest
+
+srcpath = os.path.dirname(os.path.realpath(sys.argv[0]))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+from iquaview.src.xmlconfighandler.rosparamsreader import common_namespace, find_in_subtree
+
+
+class TestRosParamsReader(unittest.TestCase):
+
+    def test_common_namespace(self):
+        self.assertEqual(common_namespace(['/sparus2/navigator/ned_latitude', '/sparus2/safety/timeout']),
+                         '/sparus2')
+        self.assertEqual(common_namespace(['/sparus2/navigator/ned_latitude', '/sparus2/navigator/ned_longitude']),
+                         '/sparus2/navigator')
+        self.assertEqual(common_namespace(['/sparus2/safety/timeout', '/girona500/safety/timeout']), '')
+
+    def test_find_in_subtree(self):
+        subtree = {'navigator': {'ned_latitude': 41.7, 'use_gps_data': False}, 'safety': {'timeout': 3600}}
+        self.assertEqual(find_in_subtree(subtree, '/navigator/ned_latitude'), 41.7)
+        self.assertEqual(find_in_subtree(subtree, '/navigator/use_gps_data'), False)
+        self.assertIsNone(find_in_subtree(subtree, '/navigator/missing'))
+        self.assertIsNone(find_in_subtree(subtree, '/safety/timeout/value'))
+
+
+if __name__ == '__main__':
+    unittest.main()
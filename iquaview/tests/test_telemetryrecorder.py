@@ -0,0 +1,72 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+srcpath = os.path.dirname(os.path.realpath(sys.argv[0]))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+from iquaview.src.vehicle.telemetryrecorder import (TelemetryLogWriter, TelemetryRecorder, read_telemetry_file,
+                                                    list_telemetry_files)
+
+
+class TestTelemetryRecorder(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_round_trip(self):
+        messages = [{'header': {'seq': 0}, 'position': {'north': 1.5, 'east': -2.0}, 'status': None},
+                    {'header': {'seq': 1}, 'position': {'north': 1.6}, 'names': ['a', 'b']},
+                    {'header': {'seq': 2}, 'position': {}, 'status': 'ok', 'names': None}]
+        writer = TelemetryLogWriter(self.path, '/navigator/navigation', chunk_size=2)
+        for i, msg in enumerate(messages):
+            writer.append(float(i), msg)
+        writer.close()
+
+        records = list(read_telemetry_file(writer.get_file_name()))
+        self.assertEqual([topic for topic, stamp, msg in records], ['/navigator/navigation'] * 3)
+        self.assertEqual([stamp for topic, stamp, msg in records], [0.0, 1.0, 2.0])
+        # nulls are kept and missing fields stay missing
+        self.assertEqual([msg for topic, stamp, msg in records], messages)
+
+    def test_periodic_flush(self):
+        recorder = TelemetryRecorder(self.path, chunk_size=1000, flush_interval=0.2)
+        # steady traffic never leaves the queue empty for a whole flush interval
+        end = time.time() + 1.0
+        while time.time() < end:
+            recorder.record('/rosout_agg', {'msg': 'x'}, time.time())
+            time.sleep(0.01)
+        file_names = list_telemetry_files(recorder.path)
+        self.assertEqual(len(file_names), 1)
+        self.assertGreater(len(list(read_telemetry_file(file_names[0]))), 0)
+
+        recorder.close()
+        self.assertTrue(recorder.wait(5.0))
+        self.assertEqual(len(list(read_telemetry_file(file_names[0]))), recorder.get_stats()['recorded'])
+        self.assertEqual(recorder.get_stats()['dropped'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+srcpath = os.path.dirname(os.path.realpath(sys.argv[0]))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+from iquaview.src.vehicle.telemetryrecorder import TelemetryLogWriter
+from iquaview.src.vehicle.telemetryreplay import TelemetryReplay
+
+
+class TestTelemetryReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        for topic, offset in (('/navigator/navigation', 0.0), ('/cola2_watchdog/total_time', 0.05)):
+            writer = TelemetryLogWriter(self.path, topic, chunk_size=4)
+            for i in range(10):
+                writer.append(100.0 + i * 0.1 + offset, {'seq': i, 'topic': topic})
+            writer.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_replay(self):
+        replay = TelemetryReplay(self.path, speed=0)
+        self.assertEqual(len(replay.stamps), 20)
+        self.assertEqual(replay.stamps, sorted(replay.stamps))
+        self.assertAlmostEqual(replay.get_duration(), 0.95)
+
+        # the playback waits for start, nothing is lost before subscribing
+        time.sleep(0.1)
+        received = list()
+        subscription = replay.subscribe('/navigator/navigation')
+        subscription.set_callback(lambda s: received.append(s.get_data()['seq']))
+        replay.start()
+        end = time.time() + 5.0
+        while not replay.get_stats()['finished'] and time.time() < end:
+            time.sleep(0.01)
+        self.assertEqual(received, list(range(10)))
+        replay.close()
+
+        self.assertEqual(subscription.get_data()['topic'], '/navigator/navigation')
+        self.assertEqual(subscription.get_data()['valid_data'], 'disconnected')
+        with self.assertRaises(ConnectionError):
+            replay.call_service('/captain/enable_goto')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+import sys
+import os
+import csv
+import struct
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+srcpath = os.path.dirname(os.path.realpath(sys.argv[0]))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+from iquaview.src.canvastracks.trackstore import TrackStore
+from iquaview.src.canvastracks.trackexport import export_track
+
+
+class TestTrackExport(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.track = TrackStore(capacity=2)
+        for i in range(5000):
+            self.track.append(3.0 + i * 1e-5, 41.0 + i * 1e-5, 1.7e9 + i * 0.1, i * 0.01, float('nan'))
+        self.samples = self.track.get_samples()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def export(self, selected_filter, as_points=False):
+        return export_track(os.path.join(self.directory.name, 'track'), selected_filter, self.samples,
+                            "AUV track", as_points)
+
+    def test_csv(self):
+        with open(self.export("CSV (*.csv)")) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 5000)
+        self.assertEqual(rows[1]['time'], '2023-11-14T22:13:20.100Z')
+        self.assertEqual(float(rows[1]['depth']), 0.01)
+        self.assertEqual(rows[1]['heading'], '')
+
+    def test_gpx_and_kml(self):
+        namespace = {'gpx': 'http://www.topografix.com/GPX/1/1'}
+        points = ET.parse(self.export("GPX (*.gpx)")).getroot().findall('.//gpx:trkpt', namespace)
+        self.assertEqual(len(points), 5000)
+        self.assertEqual(float(points[-1].get('lon')), self.samples[-1, 0])
+        self.assertEqual(float(points[-1].find('gpx:ele', namespace).text), -49.99)
+
+        namespace = {'gx': 'http://www.google.com/kml/ext/2.2', 'kml': 'http://www.opengis.net/kml/2.2'}
+        track = ET.parse(self.export("KML (*.kml)")).getroot().find('.//gx:Track', namespace)
+        self.assertEqual(len(track.findall('kml:when', namespace)), 5000)
+        self.assertEqual(len(track.findall('gx:coord', namespace)), 5000)
+
+    def test_shapefile(self):
+        path = self.export("Shapefile (*.shp)")
+        with open(path, 'rb') as f:
+            data = f.read()
+        code, length = struct.unpack('>i20xi', data[:28])
+        version, shape_type = struct.unpack('<ii', data[28:36])
+        self.assertEqual((code, length * 2, version, shape_type), (9994, len(data), 1000, 13))
+        num_parts, num_points = struct.unpack('<ii', data[144:152])
+        self.assertEqual((num_parts, num_points), (1, 5000))
+        xy = np.frombuffer(data, '<f8', 2 * num_points, 156).reshape(-1, 2)
+        np.testing.assert_array_equal(xy, self.samples[:, :2])
+        # M values hold the time of each position
+        m = np.frombuffer(data, '<f8', num_points, len(data) - 8 * num_points)
+        np.testing.assert_array_equal(m, self.samples[:, 2])
+
+        path = self.export("Shapefile (*.shp)", as_points=True)
+        for extension in ('.shp', '.shx', '.dbf', '.prj'):
+            self.assertTrue(os.path.exists(path[:-4] + extension))
+        with open(path[:-4] + '.dbf', 'rb') as f:
+            self.assertEqual(struct.unpack('<4xI', f.read(8))[0], 5000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import sys
+import os
+import math
+import threading
+import unittest
+
+import numpy as np
+
+srcpath = os.path.dirname(os.path.realpath(sys.argv[0]))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+from iquaview.src.utils import geodesy
+from iquaview.src.cola2api.mission_types import WAYPOINT_MANEUVER, SECTION_MANEUVER
+from iquaview.src.mission.missiontemplates import trackgenerator
+
+
+class TestTrackGenerator(unittest.TestCase):
+
+    def setUp(self):
+        # 1000 m along track towards 30 degrees, 500 m across track towards 120 degrees
+        corner = (3.0, 41.0)
+        along = geodesy.endpoint_ellipsoid(corner[0], corner[1], 1000.0, 30.0)
+        across = geodesy.endpoint_ellipsoid(float(along[0]), float(along[1]), 500.0, 120.0)
+        self.area_points = [corner, (float(along[0]), float(along[1])), (float(across[0]), float(across[1]))]
+
+    def test_local_tangent_plane(self):
+        plane = trackgenerator.LocalTangentPlane(3.0, 41.0)
+        lon = np.array([3.0, 3.01, 2.98])
+        lat = np.array([41.0, 41.02, 40.99])
+        local = plane.to_local(lon, lat)
+        np.testing.assert_allclose(local[0], 0.0, atol=1e-6)
+        back_lon, back_lat = plane.to_geodetic(local)
+        np.testing.assert_allclose(back_lon, lon, atol=1e-9)
+        np.testing.assert_allclose(back_lat, lat, atol=1e-9)
+        # distances in the plane match the geodesic ones to millimetres
+        dist = geodesy.inverse(lon[0], lat[0], lon[1:], lat[1:])[0]
+        np.testing.assert_allclose(np.hypot(*local[1:].T), dist, atol=1e-2)
+
+    def test_classic_pattern(self):
+        waypoints = trackgenerator.classic_lawnmower(100.0, 20.0, 10.0, 1)
+        expected = [(0, 0), (100, 0), (100, 10), (0, 10), (0, 20), (100, 20),
+                    (100, 30), (50, 30), (50, -10)]
+        np.testing.assert_allclose(waypoints, expected)
+
+    def test_spiral_pattern(self):
+        waypoints = trackgenerator.spiral_lawnmower(100.0, 30.0, 10.0, 1)
+        expected = [(0, 0), (100, 0), (100, 10), (0, 10), (0, 10), (100, 10), (100, 20), (0, 20), (0, 20),
+                    (0, 0), (0, -10), (50, -10), (50, 30)]
+        np.testing.assert_allclose(waypoints, expected)
+
+    def test_track_spacing(self):
+        lons, lats = trackgenerator.compute_tracks('classic_lawnmower', self.area_points, 20.0, 0)
+        self.assertEqual(len(lons), 2 * (math.ceil(500.0 / 20.0) + 1))
+        self.assertAlmostEqual(lons[1], self.area_points[1][0])
+        self.assertAlmostEqual(lats[1], self.area_points[1][1])
+        # the turns between along tracks are one track spacing long
+        dist = geodesy.inverse(lons[1:-1:2], lats[1:-1:2], lons[2::2], lats[2::2])[0]
+        np.testing.assert_allclose(dist, 20.0, atol=1e-2)
+
+    def test_track_to_steps(self):
+        lons, lats = trackgenerator.compute_tracks('spiral_lawnmower', self.area_points, 50.0, 2)
+        steps = trackgenerator.track_to_steps(lons, lats, 5.0, False, 0.5, 2.0, 2.0, 1.0)
+        self.assertEqual(len(steps), len(lons))
+        self.assertEqual(steps[0].get_maneuver().get_maneuver_type(), WAYPOINT_MANEUVER)
+        section = steps[3].get_maneuver()
+        self.assertEqual(section.get_maneuver_type(), SECTION_MANEUVER)
+        self.assertEqual(section.get_initial_position().get_longitude(), lons[2])
+        self.assertEqual(section.get_final_position().get_latitude(), lats[3])
+
+        cancelled = threading.Event()
+        cancelled.set()
+        self.assertIsNone(trackgenerator.track_to_steps(lons, lats, 5.0, False, 0.5, 2.0, 2.0, 1.0, cancelled))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+import sys
+import os
+import unittest
+
+import numpy as np
+
+srcpath = os.path.dirname(os.path.realpath(sys.argv[0]))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+from iquaview.src.canvastracks.trackstore import TrackStore, douglas_peucker
+
+
+def distance_to_polyline(points, polyline):
+    """Distance from each point to the closest segment of the polyline."""
+    distances = np.full(len(points), np.inf)
+    for a, b in zip(polyline[:-1], polyline[1:]):
+        ab = b - a
+        t = np.clip(((points - a) @ ab) / max(ab @ ab, 1e-300), 0.0, 1.0)
+        closest = a + t[:, None] * ab
+        distances = np.minimum(distances, np.hypot(*(points - closest).T))
+    return distances
+
+
+class TestTrackStore(unittest.TestCase):
+
+    def test_douglas_peucker(self):
+        t = np.linspace(0, 20, 500)
+        points = np.c_[t, np.sin(t)]
+        indices = douglas_peucker(points, 0.01)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], len(points) - 1)
+        self.assertLess(len(indices), len(points) / 4)
+        self.assertLessEqual(distance_to_polyline(points, points[indices]).max(), 0.01)
+        # collinear points are removed
+        self.assertEqual(douglas_peucker(np.c_[t, t], 0.01).tolist(), [0, len(t) - 1])
+
+    def test_incremental_simplification(self):
+        t = np.linspace(0, 60, 2000)
+        points = np.c_[t, np.cos(t / 3)]
+        track = TrackStore(capacity=4)
+        level = track.get_level(0.05)
+        drawn = list()
+        for i in range(0, len(points), 7):
+            track.extend(points[i:i + 7])
+            chunks, tail_start = track.get_simplified(level)
+            drawn = chunks
+        self.assertEqual(len(track), len(points))
+        np.testing.assert_array_equal(track.get_points(), points)
+
+        vertices = np.concatenate(drawn + [track.get_points()[tail_start:]])
+        self.assertLess(len(vertices), len(points) / 4)
+        np.testing.assert_array_equal(vertices[0], points[0])
+        np.testing.assert_array_equal(vertices[-1], points[-1])
+        self.assertLessEqual(distance_to_polyline(points, vertices).max(), 2.0 ** level)
+
+        # samples keep their attributes, NaN when not given
+        self.assertTrue(np.isnan(track.get_samples()[:, 2:]).all())
+        track.append(1.0, 2.0, 3.0, 4.0, 5.0)
+        self.assertEqual(track.get_samples()[-1].tolist(), [1.0, 2.0, 3.0, 4.0, 5.0])
+
+        track.clear()
+        self.assertEqual(len(track), 0)
+        self.assertEqual(track.get_simplified(level), ([], 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
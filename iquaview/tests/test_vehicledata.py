@@ -15,6 +15,9 @@ If not, see <http://www.gnu.org/licenses/>.
 
 import sys
 import os
+import json
+import time
+import tempfile
 import unittest
 
 srcpath = os.path.dirname(os.path.realpath(sys.argv[0]))
@@ -23,6 +26,7 @@ sys.path.append(iquaview_root_path)
 
 from PyQt5.QtWidgets import QApplication
 
+from iquaview.src.vehicle.telemetryreplay import TelemetryReplay
 from iquaview.src.vehicle.vehicledata import VehicleData
 from iquaview.src.vehicle.vehicleinfo import VehicleInfo
 from iquaview.src.config import Config
@@ -79,5 +83,31 @@ class TestVehicleData(unittest.TestCase):
         self.assertEqual(self.vd.get_disable_mission_service(), "/captain/disable_mission")
         self.assertEqual(self.vd.get_teleoperation_launch(), "roslaunch cola2_sparus2 sparus2_teleoperation.launch")
 
+    def test_topic_updated(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            for i in range(5):
+                f.write(json.dumps({'op': 'publish', 'topic': '/sparus2/navigator/navigation_throttle',
+                                    'stamp': float(i), 'msg': {'position': {'north': float(i)}}}) + '\n')
+        replay = TelemetryReplay(f.name, speed=0)
+        updated = list()
+        self.vd.topic_updated.connect(updated.append)
+        self.vd.subscribe_topics(replay)
+        self.assertTrue(self.vd.is_subscribed())
+        replay.start()
+
+        # the reactor thread pushes the changes, the GUI thread refreshes them on the next frame
+        end = time.time() + 5.0
+        while not (replay.get_stats()['finished'] and 'navigation status' in updated
+                   and not self.vd.pending_keys) and time.time() < end:
+            self.app.processEvents()
+            time.sleep(0.005)
+        self.vd.disconnect()
+        os.remove(f.name)
+
+        self.assertIn('navigation status', updated)
+        self.assertEqual(self.vd.get_nav_sts()['valid_data'], 'new_data')
+        self.assertEqual(self.vd.get_nav_sts()['position']['north'], 4.0)
+
+
 if __name__ == "__main__":
     unittest.main()
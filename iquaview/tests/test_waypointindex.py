@@ -0,0 +1,84 @@
+"""
+Copyright (c) 2018 Iqua Robotics SL
+
+This program is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 2 of
+the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program.
+If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import sys
+import os
+import math
+import unittest
+
+import numpy as np
+
+srcpath = os.path.dirname(os.path.realpath(sys.argv[0]))
+iquaview_root_path = srcpath + '/../'
+sys.path.append(iquaview_root_path)
+
+from iquaview.src.mission.maptools.waypointindex import WaypointGrid
+
+
+def dist_to_segment(ax, ay, bx, by, cx, cy, tolerance):
+    """Distance measured by the scalar hit test that EditTool used before the waypoint index"""
+    if math.hypot(cx - ax, cy - ay) < tolerance or math.hypot(cx - bx, cy - by) < tolerance:
+        return -1
+    dot = (cx - ax) * (bx - ax) + (cy - ay) * (by - ay)
+    squared_length = (bx - ax) ** 2 + (by - ay) ** 2
+    if 0 <= dot <= squared_length:
+        return abs((by - ay) * cx - (bx - ax) * cy + bx * ay - by * ax) / math.sqrt(squared_length)
+    return tolerance + 1
+
+
+class TestWaypointGrid(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(3)
+        # lawnmower crossing the canvas and leaving it
+        rows = [((0, y), (1000, y)) if i % 2 == 0 else ((1000, y), (0, y))
+                for i, y in enumerate(range(-200, 1000, 40))]
+        self.points = np.array([p for row in rows for p in row], dtype=float) + rng.uniform(-5, 5, (len(rows) * 2, 2))
+        self.grid = WaypointGrid(self.points, 800, 600)
+        self.queries = rng.uniform(0, [800, 600], (500, 2))
+        self.tolerance = 12.0
+
+    def test_nearest_vertex(self):
+        on_canvas = self.points[((self.points >= 0) & (self.points < (800, 600))).all(axis=1)]
+        for x, y in self.queries.tolist() + on_canvas.tolist():
+            distances = np.hypot(self.points[:, 0] - x, self.points[:, 1] - y)
+            expected = int(np.argmin(distances)) if distances.min() <= self.tolerance else None
+            self.assertEqual(self.grid.nearest_vertex(x, y, self.tolerance), expected)
+
+    def test_segments(self):
+        for x, y in self.queries.tolist():
+            distances = [dist_to_segment(a[0], a[1], b[0], b[1], x, y, self.tolerance)
+                         for a, b in zip(self.points[:-1], self.points[1:])]
+            self.assertEqual(self.grid.on_segment(x, y, self.tolerance),
+                             any(d < self.tolerance for d in distances))
+            vertex, distance = self.grid.nearest_segment(x, y, self.tolerance)
+            self.assertEqual(vertex, distances.index(min(distances)))
+            self.assertAlmostEqual(distance, min(distances))
+
+    def test_large_tolerance(self):
+        tolerance = 10000.0
+        for x, y in self.queries[:50].tolist():
+            distances = np.hypot(self.points[:, 0] - x, self.points[:, 1] - y)
+            self.assertEqual(self.grid.nearest_vertex(x, y, tolerance), int(np.argmin(distances)))
+
+    def test_empty(self):
+        grid = WaypointGrid(np.empty((0, 2)), 800, 600)
+        self.assertIsNone(grid.nearest_vertex(10, 10, 5))
+        self.assertIsNone(grid.nearest_segment(10, 10, 5))
+        self.assertFalse(grid.on_segment(10, 10, 5))
+
+
+if __name__ == '__main__':
+    unittest.main()